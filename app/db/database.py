@@ -1,7 +1,8 @@
 # app/db/database.py
 import json
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from datetime import datetime
+from typing import AsyncGenerator, Awaitable, Callable, List
 
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -31,9 +32,62 @@ AsyncSessionLocal = async_sessionmaker(
 async def init_db() -> None:
     """Inicializa o banco de dados criando as tabelas e aplicando migrações de schema."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        await _apply_schema_migrations(conn)
-    logger.info(f"Banco de dados inicializado em: {DATABASE_PATH}")
+        applied = await _init_schema(conn)
+    if applied:
+        logger.info(
+            f"Banco de dados inicializado em: {DATABASE_PATH} "
+            f"(migrações aplicadas: {applied})"
+        )
+    else:
+        logger.info(
+            f"Banco de dados inicializado em: {DATABASE_PATH} "
+            f"(schema v{SCHEMA_VERSION})"
+        )
+
+
+async def _init_schema(conn) -> List[int]:
+    """Cria as tabelas e aplica as migrações pendentes; retorna as aplicadas.
+
+    Com o schema já em ``SCHEMA_VERSION`` (o caso comum: todo restart e todo
+    worker do uvicorn depois do primeiro) é um único SELECT em
+    ``schema_version``; ``create_all`` e os PRAGMAs só rodam quando falta
+    alguma migração.
+    """
+    version = await _schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return []
+
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(100) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    )
+    applied = []
+    for number, migration in enumerate(_MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        await migration(conn)
+        # OR IGNORE: outro worker pode ter aplicado o mesmo passo (idempotente)
+        await conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO schema_version (version, name, applied_at) "
+            "VALUES (?, ?, ?)",
+            (number, migration.__name__, datetime.now().isoformat()),
+        )
+        applied.append(number)
+    return applied
+
+
+async def _schema_version(conn) -> int:
+    """Última migração aplicada (0 em banco novo ou anterior ao schema_version)."""
+    from sqlalchemy.exc import OperationalError
+
+    try:
+        result = await conn.exec_driver_sql("SELECT MAX(version) FROM schema_version")
+    except OperationalError:
+        return 0
+    return result.scalar() or 0
 
 
 async def _add_column_if_missing(
@@ -62,15 +116,17 @@ async def _add_column_if_missing(
         raise
 
 
-async def _apply_schema_migrations(conn) -> None:
-    """Aplica migrações idempotentes de schema para suporte multi-plataforma.
+# Passos de migração de schema, numerados pela posição (1, 2, ...) em
+# _MIGRATIONS: nunca reordenar nem remover, só acrescentar no fim. Cada passo é
+# idempotente (tolera colunas/índices já existentes, como num banco criado pelo
+# create_all atual, e inicializações concorrentes de vários workers).
+
+
+async def _migrate_audio_sources(conn) -> None:
+    """Colunas `source` e `external_id` em `audios` (suporte multi-plataforma).
 
-    Adiciona colunas `source` e `external_id` em `audios` e `external_id` em
-    `videos`. Faz backfill de `external_id = youtube_id` e `source = 'youtube'`
-    para linhas pré-existentes. Seguro para rodar em todo startup e para
-    inicializações concorrentes (multi-worker uvicorn).
+    Faz backfill de `external_id = youtube_id` para linhas pré-existentes.
     """
-    # --- audios ---
     result = await conn.exec_driver_sql("PRAGMA table_info(audios)")
     audio_cols = {row[1] for row in result.fetchall()}
     audio_needs_backfill = "source" not in audio_cols or "external_id" not in audio_cols
@@ -99,7 +155,9 @@ async def _apply_schema_migrations(conn) -> None:
         "CREATE INDEX IF NOT EXISTS ix_audios_external_id ON audios(external_id)"
     )
 
-    # --- videos ---
+
+async def _migrate_video_external_ids(conn) -> None:
+    """Coluna `external_id` em `videos`, com backfill a partir de `youtube_id`."""
     result = await conn.exec_driver_sql("PRAGMA table_info(videos)")
     video_cols = {row[1] for row in result.fetchall()}
     video_needs_backfill = "external_id" not in video_cols
@@ -121,6 +179,9 @@ async def _apply_schema_migrations(conn) -> None:
         "CREATE INDEX IF NOT EXISTS ix_videos_external_id ON videos(external_id)"
     )
 
+
+async def _migrate_storage_columns(conn) -> None:
+    """Colunas `storage_backend` e `s3_key` em `audios` e `videos`."""
     # TODO(review): the two storage-column blocks below are near-identical
     # copy-paste. If a third storage-bearing table ever appears, extract
     # _add_storage_columns(conn, table_name). For two tables, inline is fine.
@@ -155,7 +216,9 @@ async def _apply_schema_migrations(conn) -> None:
         "CREATE INDEX IF NOT EXISTS ix_videos_storage_backend ON videos(storage_backend)"
     )
 
-    # --- folders.kind / album metadata ---
+
+async def _migrate_album_folders(conn) -> None:
+    """`folders.kind` e metadados de álbum; classifica playlists legadas."""
     result = await conn.exec_driver_sql("PRAGMA table_info(folders)")
     folder_cols = {row[1] for row in result.fetchall()}
     await _add_column_if_missing(
@@ -213,49 +276,111 @@ async def _apply_schema_migrations(conn) -> None:
         """
     )
 
-    # --- audios.track_number / audios.artist ---
+
+async def _migrate_track_metadata(conn) -> None:
+    """`audios.track_number` e `audios.artist`."""
     result = await conn.exec_driver_sql("PRAGMA table_info(audios)")
     audio_cols = {row[1] for row in result.fetchall()}
     await _add_column_if_missing(conn, "audios", "track_number", "INTEGER", audio_cols)
     await _add_column_if_missing(conn, "audios", "artist", "VARCHAR(500)", audio_cols)
 
 
-async def recompute_album_artists_from_tracks() -> None:
-    """Set each album folder.artist from majority track artists, else NULL.
+async def _migrate_typed_download_tasks(conn) -> None:
+    """`kind` e `resolution` nas tasks da fila: jobs tipados (áudio/vídeo)."""
+    for table in ("download_tasks", "download_task_history"):
+        result = await conn.exec_driver_sql(f"PRAGMA table_info({table})")
+        task_cols = {row[1] for row in result.fetchall()}
+        await _add_column_if_missing(
+            conn, table, "kind", "VARCHAR(20) NOT NULL DEFAULT 'audio'", task_cols
+        )
+        await _add_column_if_missing(
+            conn, table, "resolution", "VARCHAR(20)", task_cols
+        )
+
 
-    Clears wrong playlist-owner names when tracks do not share that artist.
+# Marcam o álbum como "artist_dirty" quando uma faixa entra, sai ou muda de
+# artista, para ``FolderRepository.recompute_album_artists`` recalcular só esses
+# álbuns.
+ALBUM_ARTIST_DIRTY_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_audios_album_dirty_insert
+    AFTER INSERT ON audios
+    WHEN NEW.folder_id IS NOT NULL
+    BEGIN
+        UPDATE folders SET artist_dirty = 1
+        WHERE id = NEW.folder_id AND kind = 'album' AND artist_dirty = 0;
+    END
+    """,
     """
-    from collections import Counter
+    CREATE TRIGGER IF NOT EXISTS trg_audios_album_dirty_update
+    AFTER UPDATE OF artist, folder_id ON audios
+    WHEN OLD.artist IS NOT NEW.artist OR OLD.folder_id IS NOT NEW.folder_id
+    BEGIN
+        UPDATE folders SET artist_dirty = 1
+        WHERE id IN (OLD.folder_id, NEW.folder_id)
+          AND kind = 'album' AND artist_dirty = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_audios_album_dirty_delete
+    AFTER DELETE ON audios
+    WHEN OLD.folder_id IS NOT NULL
+    BEGIN
+        UPDATE folders SET artist_dirty = 1
+        WHERE id = OLD.folder_id AND kind = 'album' AND artist_dirty = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_folders_album_dirty_kind
+    AFTER UPDATE OF kind ON folders
+    WHEN NEW.kind = 'album' AND OLD.kind IS NOT 'album'
+    BEGIN
+        UPDATE folders SET artist_dirty = 1 WHERE id = NEW.id;
+    END
+    """,
+)
 
-    from sqlalchemy import select
 
-    from app.db.models import Audio, Folder
+async def _migrate_album_artist_dirty(conn) -> None:
+    """`folders.artist_dirty` e seus triggers.
+
+    Álbuns já existentes ficam marcados, para serem recalculados uma vez.
+    """
+    result = await conn.exec_driver_sql("PRAGMA table_info(folders)")
+    folder_cols = {row[1] for row in result.fetchall()}
+    await _add_column_if_missing(
+        conn, "folders", "artist_dirty", "BOOLEAN NOT NULL DEFAULT 0", folder_cols
+    )
+    if "artist_dirty" not in folder_cols:
+        await conn.exec_driver_sql(
+            "UPDATE folders SET artist_dirty = 1 WHERE kind = 'album'"
+        )
+    for trigger in ALBUM_ARTIST_DIRTY_TRIGGERS:
+        await conn.exec_driver_sql(trigger)
+
+
+_MIGRATIONS: List[Callable[..., Awaitable[None]]] = [
+    _migrate_audio_sources,
+    _migrate_video_external_ids,
+    _migrate_storage_columns,
+    _migrate_album_folders,
+    _migrate_track_metadata,
+    _migrate_typed_download_tasks,
+    _migrate_album_artist_dirty,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+async def recompute_album_artists_from_tracks() -> int:
+    """Recalcula o ``artist`` dos álbuns marcados como ``artist_dirty``.
+
+    Ver ``FolderRepository.recompute_album_artists``; os endpoints de álbuns já
+    fazem isso sob demanda, então o startup não precisa chamar.
+    """
+    from app.db.repositories import FolderRepository
 
     async with get_db_context() as session:
-        result = await session.execute(select(Folder).where(Folder.kind == "album"))
-        albums = result.scalars().all()
-        changed = 0
-        for album in albums:
-            tracks_result = await session.execute(
-                select(Audio.artist).where(Audio.folder_id == album.id)
-            )
-            artists = [row[0] for row in tracks_result.all()]
-            total = len(artists)
-            non_null = [a.strip() for a in artists if isinstance(a, str) and a.strip()]
-            new_artist = None
-            if total > 0 and non_null:
-                ranked = Counter(non_null).most_common(2)
-                common, count = ranked[0]
-                if count * 2 >= total and (len(ranked) == 1 or ranked[1][1] != count):
-                    new_artist = common[:500]
-            if album.artist != new_artist:
-                album.artist = new_artist
-                changed += 1
-        if changed:
-            logger.info(
-                "Album artist recompute: updated {} album folder(s) from tracks",
-                changed,
-            )
+        return await FolderRepository(session).recompute_album_artists()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
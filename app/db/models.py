@@ -4,6 +4,7 @@ from typing import Optional, List
 import uuid
 
 from sqlalchemy import (
+    Boolean,
     String,
     Integer,
     DateTime,
@@ -61,6 +62,11 @@ class Folder(Base):
     )
     cover_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
     artist: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # Faixas do álbum mudaram (artista/pasta) desde o último recálculo de
+    # ``artist``; marcado pelos triggers de app/db/database.py
+    artist_dirty: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="0"
+    )
     created_date: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.now
     )
@@ -324,3 +330,98 @@ class Video(Base):
             if self.modified_date
             else None,
         }
+
+
+class DownloadTaskState(Base):
+    """Estado persistido das tasks vivas da fila de downloads.
+
+    Espelha ``DownloadQueue.tasks`` (gravado em lote pelo flusher da fila)
+    para que tasks QUEUED/RETRYING/DOWNLOADING sobrevivam a um restart. Ao
+    serem arquivadas, as tasks saem daqui e vão para ``download_task_history``.
+    """
+
+    __tablename__ = "download_tasks"
+
+    task_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    audio_id: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    url: Mapped[str] = mapped_column(String(1000), nullable=False, default="")
+    high_quality: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    retry_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_retries: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False, default="audio")
+    resolution: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    next_retry_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now
+    )
+
+
+class DownloadTaskHistory(Base):
+    """Histórico de tasks da fila de downloads já finalizadas.
+
+    O compactador da ``DownloadQueue`` move para cá as tasks terminais
+    (completed/failed/cancelled) mais antigas que o limite configurado,
+    liberando a memória da fila. ``seq`` é autoincremento e serve de cursor
+    para paginação.
+    """
+
+    __tablename__ = "download_task_history"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    task_id: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    audio_id: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    url: Mapped[str] = mapped_column(String(1000), nullable=False, default="")
+    high_quality: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    retry_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_retries: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False, default="audio")
+    resolution: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now
+    )
+
+
+class DownloadMetric(Base):
+    """Métricas por fase de uma tentativa de download (telemetria).
+
+    Uma linha por job finalizado, gravada pelo ``DownloadMetrics`` dos
+    managers. Tempos em segundos, throughput em bytes/s. A tabela é podada
+    para as últimas ``DOWNLOAD_METRICS_RETENTION`` linhas.
+    """
+
+    __tablename__ = "download_metrics"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False, default="audio")
+    item_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    source: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    metadata_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    transfer_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    postprocess_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    upload_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    total_s: Mapped[float] = mapped_column(Float, nullable=False)
+    bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    avg_bps: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    peak_bps: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    postprocess_cpu_s: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            column.name: getattr(self, column.name) for column in self.__table__.columns
+        }
@@ -1,11 +1,98 @@
 # app/db/repositories.py
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import bindparam, func, select, update, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Audio, Video, Folder
+from app.db.models import (
+    Audio,
+    Video,
+    Folder,
+    DownloadMetric,
+    DownloadTaskHistory,
+    DownloadTaskState,
+)
+
+
+async def _bulk_update_progress(
+    session: AsyncSession, model, progress: Dict[str, int]
+) -> int:
+    """Grava o progresso de vários downloads com um único UPDATE (executemany).
+
+    Sem recarregar as linhas e só para itens ainda em ``downloading``: um
+    valor atrasado nunca sobrescreve um download já concluído ou com erro.
+    """
+    if not progress:
+        return 0
+    table = model.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .where(table.c.download_status == "downloading")
+        .values(
+            download_progress=bindparam("progress"),
+            modified_date=bindparam("modified"),
+        )
+    )
+    now = datetime.now()
+    result = await session.execute(
+        stmt,
+        [
+            {"row_id": item_id, "progress": value, "modified": now}
+            for item_id, value in progress.items()
+        ],
+    )
+    return max(result.rowcount, 0)
+
+
+async def _get_by_external_ids(
+    session: AsyncSession, model, external_ids: List[str], source: Optional[str]
+) -> Dict[str, object]:
+    """Busca várias linhas por ``external_id`` com um único ``IN (...)``."""
+    if not external_ids:
+        return {}
+    query = select(model).where(model.external_id.in_(set(external_ids)))
+    if source is not None:
+        query = query.where(model.source == source)
+    result = await session.execute(query)
+    return {row.external_id: row for row in result.scalars().all()}
+
+
+async def _folder_index(
+    session: AsyncSession, model, folder_id: str
+) -> Dict[str, Tuple[str, Optional[int]]]:
+    """``external_id -> (id, track_number)`` das linhas de uma pasta.
+
+    Uma única consulta só com as colunas necessárias; ``track_number`` é None
+    para modelos sem a coluna (vídeos).
+    """
+    track = getattr(model, "track_number", None)
+    columns = [model.external_id, model.id]
+    if track is not None:
+        columns.append(track)
+    result = await session.execute(
+        select(*columns).where(
+            model.folder_id == folder_id, model.external_id.is_not(None)
+        )
+    )
+    return {row[0]: (row[1], row[2] if track is not None else None) for row in result}
+
+
+async def _update_many(session: AsyncSession, model, rows: List[dict]) -> None:
+    """UPDATE em lote por chave primária (cada dict traz ``id`` + colunas).
+
+    Linhas com o mesmo conjunto de colunas são agrupadas num único
+    executemany.
+    """
+    if not rows:
+        return
+    now = datetime.now()
+    rows = sorted(
+        ({**row, "modified_date": now} for row in rows), key=lambda row: sorted(row)
+    )
+    await session.execute(update(model), rows)
 
 
 class AudioRepository:
@@ -36,6 +123,12 @@ class AudioRepository:
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_by_external_ids(
+        self, external_ids: List[str], source: Optional[str] = None
+    ) -> Dict[str, Audio]:
+        """Busca áudios por vários external_ids de uma vez (chave: external_id)"""
+        return await _get_by_external_ids(self.session, Audio, external_ids, source)
+
     async def get_all(self, order_by_date: bool = True) -> List[Audio]:
         """Lista todos os áudios"""
         query = select(Audio)
@@ -72,6 +165,11 @@ class AudioRepository:
         await self.session.refresh(audio)
         return audio
 
+    async def create_many(self, audios: List[Audio]) -> None:
+        """Insere vários áudios num único flush"""
+        self.session.add_all(audios)
+        await self.session.flush()
+
     async def update(self, audio_id: str, **kwargs) -> Optional[Audio]:
         """Atualiza um áudio"""
         kwargs["modified_date"] = datetime.now()
@@ -87,6 +185,20 @@ class AudioRepository:
         result = await self.session.execute(delete(Audio).where(Audio.id == audio_id))
         return result.rowcount > 0
 
+    async def get_folder_index(
+        self, folder_id: str
+    ) -> Dict[str, Tuple[str, Optional[int]]]:
+        """``external_id -> (id, track_number)`` das faixas da pasta."""
+        return await _folder_index(self.session, Audio, folder_id)
+
+    async def update_many(self, rows: List[dict]) -> None:
+        """Atualiza vários áudios de uma vez (cada dict traz ``id`` + colunas)"""
+        await _update_many(self.session, Audio, rows)
+
+    async def bulk_update_progress(self, progress: Dict[str, int]) -> int:
+        """Atualiza ``download_progress`` de vários áudios de uma vez"""
+        return await _bulk_update_progress(self.session, Audio, progress)
+
     async def update_download_status(
         self, audio_id: str, status: str, progress: int = None, error: str = None
     ) -> Optional[Audio]:
@@ -184,6 +296,12 @@ class VideoRepository:
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_by_external_ids(
+        self, external_ids: List[str], source: Optional[str] = None
+    ) -> Dict[str, Video]:
+        """Busca vídeos por vários external_ids de uma vez (chave: external_id)"""
+        return await _get_by_external_ids(self.session, Video, external_ids, source)
+
     async def get_all(self, order_by_date: bool = True) -> List[Video]:
         """Lista todos os vídeos"""
         query = select(Video)
@@ -220,6 +338,11 @@ class VideoRepository:
         await self.session.refresh(video)
         return video
 
+    async def create_many(self, videos: List[Video]) -> None:
+        """Insere vários vídeos num único flush"""
+        self.session.add_all(videos)
+        await self.session.flush()
+
     async def update(self, video_id: str, **kwargs) -> Optional[Video]:
         """Atualiza um vídeo"""
         kwargs["modified_date"] = datetime.now()
@@ -235,6 +358,20 @@ class VideoRepository:
         result = await self.session.execute(delete(Video).where(Video.id == video_id))
         return result.rowcount > 0
 
+    async def get_folder_index(
+        self, folder_id: str
+    ) -> Dict[str, Tuple[str, Optional[int]]]:
+        """``external_id -> (id, None)`` dos vídeos da pasta."""
+        return await _folder_index(self.session, Video, folder_id)
+
+    async def update_many(self, rows: List[dict]) -> None:
+        """Atualiza vários vídeos de uma vez (cada dict traz ``id`` + colunas)"""
+        await _update_many(self.session, Video, rows)
+
+    async def bulk_update_progress(self, progress: Dict[str, int]) -> int:
+        """Atualiza ``download_progress`` de vários vídeos de uma vez"""
+        return await _bulk_update_progress(self.session, Video, progress)
+
     async def update_download_status(
         self, video_id: str, status: str, progress: int = None, error: str = None
     ) -> Optional[Video]:
@@ -420,6 +557,70 @@ class FolderRepository:
         )
         return list(result.scalars().all())
 
+    async def recompute_album_artists(self) -> int:
+        """Recalcula ``artist`` dos álbuns com ``artist_dirty`` a partir das faixas.
+
+        Artista majoritário (≥50% das faixas, sem empate), senão NULL — a mesma
+        regra de ``majority_artist_from_names``. Um único GROUP BY para todos os
+        álbuns sujos; sem álbuns sujos é um SELECT só. Retorna quantos álbuns
+        mudaram de artista.
+
+        ``artist_dirty`` é limpo só nos álbuns lidos, e antes do GROUP BY: uma
+        faixa alterada depois disso (por outra sessão) marca o álbum de novo
+        e ele é recalculado na próxima chamada.
+        """
+        result = await self.session.execute(
+            select(Folder.id, Folder.artist).where(
+                Folder.kind == "album", Folder.artist_dirty.is_(True)
+            )
+        )
+        albums = result.all()
+        if not albums:
+            return 0
+        ids = [folder_id for folder_id, _ in albums]
+        await self.session.execute(
+            update(Folder).where(Folder.id.in_(ids)).values(artist_dirty=False)
+        )
+
+        name = func.trim(Audio.artist)
+        result = await self.session.execute(
+            select(Audio.folder_id, name, func.count())
+            .where(Audio.folder_id.in_(ids))
+            .group_by(Audio.folder_id, name)
+        )
+        totals: Dict[str, int] = {}
+        named: Dict[str, List[Tuple[int, str]]] = {}
+        for folder_id, artist, count in result.all():
+            totals[folder_id] = totals.get(folder_id, 0) + count
+            if artist:
+                named.setdefault(folder_id, []).append((count, artist))
+
+        rows = []
+        for folder_id, current in albums:
+            ranked = sorted(named.get(folder_id, []), reverse=True)[:2]
+            artist = None
+            if ranked and ranked[0][0] * 2 >= totals[folder_id]:
+                if len(ranked) == 1 or ranked[1][0] != ranked[0][0]:
+                    artist = ranked[0][1][:500]
+            if artist != current:
+                rows.append({"id": folder_id, "artist": artist})
+
+        await _update_many(self.session, Folder, rows)
+        return len(rows)
+
+    async def get_synced_playlists(self) -> List[Folder]:
+        """Álbuns e playlists de vídeo que têm uma playlist de origem."""
+        result = await self.session.execute(
+            select(Folder)
+            .where(
+                Folder.kind.in_(("album", "playlist")),
+                (Folder.source_url.is_not(None))
+                | (Folder.external_playlist_id.is_not(None)),
+            )
+            .order_by(Folder.name.asc())
+        )
+        return list(result.scalars().all())
+
     async def count_ready_audios(self, folder_id: str) -> int:
         """Conta faixas prontas (download_status=ready) em uma pasta."""
         from sqlalchemy import func
@@ -431,3 +632,139 @@ class FolderRepository:
             )
         )
         return result.scalar() or 0
+
+
+class DownloadTaskStateRepository:
+    """Repositório do estado persistido das tasks vivas da fila de downloads"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def upsert_many(self, records: List[dict]) -> None:
+        """Grava em lote (um único executemany) o estado atual das tasks."""
+        if not records:
+            return
+        now = datetime.now()
+        records = [{**record, "updated_at": now} for record in records]
+        stmt = sqlite_insert(DownloadTaskState)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["task_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in records[0]
+                if column != "task_id"
+            },
+        )
+        await self.session.execute(stmt, records)
+
+    async def delete_many(self, task_ids: List[str]) -> None:
+        """Remove o estado das tasks informadas"""
+        if task_ids:
+            await self.session.execute(
+                delete(DownloadTaskState).where(DownloadTaskState.task_id.in_(task_ids))
+            )
+
+    async def get_all(self) -> List[DownloadTaskState]:
+        """Lista todas as tasks persistidas por prioridade e ordem de criação"""
+        result = await self.session.execute(
+            select(DownloadTaskState).order_by(
+                DownloadTaskState.priority.desc(), DownloadTaskState.created_at
+            )
+        )
+        return list(result.scalars().all())
+
+
+class DownloadTaskHistoryRepository:
+    """Repositório do histórico de tasks arquivadas da fila de downloads"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_many(self, records: List[dict]) -> None:
+        """Insere tasks arquivadas em lote (sobrescreve task_id já arquivado)."""
+        if not records:
+            return
+        stmt = sqlite_insert(DownloadTaskHistory)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["task_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in records[0]
+                if column != "task_id"
+            },
+        )
+        await self.session.execute(stmt, records)
+
+    async def get_by_task_id(self, task_id: str) -> Optional[DownloadTaskHistory]:
+        """Busca uma task arquivada pelo ID da task"""
+        result = await self.session.execute(
+            select(DownloadTaskHistory).where(DownloadTaskHistory.task_id == task_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_audio_id(self, audio_id: str) -> List[DownloadTaskHistory]:
+        """Lista as tasks arquivadas de um audio_id (mais antigas primeiro)"""
+        result = await self.session.execute(
+            select(DownloadTaskHistory)
+            .where(DownloadTaskHistory.audio_id == audio_id)
+            .order_by(DownloadTaskHistory.seq)
+        )
+        return list(result.scalars().all())
+
+    async def page(
+        self,
+        status: Optional[str] = None,
+        audio_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> Tuple[List[DownloadTaskHistory], Optional[int]]:
+        """Pagina o histórico por ``seq`` (keyset). Retorna (linhas, próximo cursor)."""
+        query = select(DownloadTaskHistory).order_by(DownloadTaskHistory.seq)
+        if status is not None:
+            query = query.where(DownloadTaskHistory.status == status)
+        if audio_id is not None:
+            query = query.where(DownloadTaskHistory.audio_id == audio_id)
+        if cursor is not None:
+            query = query.where(DownloadTaskHistory.seq > cursor)
+        result = await self.session.execute(query.limit(limit + 1))
+        rows = list(result.scalars().all())
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1].seq
+        return rows, None
+
+
+class DownloadMetricsRepository:
+    """Repositório das métricas por fase dos downloads"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, record: dict) -> None:
+        """Insere a linha de métricas de um download"""
+        self.session.add(DownloadMetric(**record))
+        await self.session.flush()
+
+    async def prune(self, keep: int) -> int:
+        """Mantém apenas as ``keep`` linhas mais recentes"""
+        newest = await self.session.scalar(select(func.max(DownloadMetric.id)))
+        if newest is None or newest <= keep:
+            return 0
+        result = await self.session.execute(
+            delete(DownloadMetric).where(DownloadMetric.id <= newest - keep)
+        )
+        return result.rowcount
+
+    async def recent(
+        self,
+        limit: int = 1000,
+        source: Optional[str] = None,
+        kind: Optional[str] = None,
+    ) -> List[dict]:
+        """Últimas ``limit`` linhas (mais recentes primeiro), como dicts"""
+        query = select(DownloadMetric).order_by(DownloadMetric.id.desc()).limit(limit)
+        if source is not None:
+            query = query.where(DownloadMetric.source == source)
+        if kind is not None:
+            query = query.where(DownloadMetric.kind == kind)
+        result = await self.session.execute(query)
+        return [row.to_dict() for row in result.scalars().all()]
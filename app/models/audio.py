@@ -108,3 +108,30 @@ class PlaylistDownloadResponse(BaseModel):
     failed_items: int = 0
     # TODO(review): add Field(ge=0) to counter fields - business-logic-reviewer, 2026-04-28, Severity: Low
     tasks: List[PlaylistTaskItem]
+    # Os contadores e tasks cobrem só a primeira página da playlist; com
+    # has_more=True as páginas seguintes são registradas em segundo plano.
+    has_more: bool = False
+
+
+class PlaylistSyncRequest(BaseModel):
+    """Opções de download das entradas novas em POST /folders/{id}/sync."""
+
+    high_quality: bool = False  # álbuns (áudio)
+    resolution: Literal["360p", "480p", "720p", "1080p", "1440p", "2160p", "best"] = (
+        "1080p"  # playlists de vídeo
+    )
+
+
+class PlaylistSyncResponse(BaseModel):
+    """Resultado da sincronização de um álbum/playlist com a origem"""
+
+    folder_id: str
+    playlist_title: str
+    total_items: int  # entradas na playlist de origem
+    new_items: int  # entradas que ainda não estavam na pasta
+    queued_items: int
+    skipped_items: int
+    failed_items: int = 0
+    renumbered_items: int = 0  # faixas com track_number atualizado
+    missing_items: int = 0  # itens da pasta que saíram da playlist (mantidos)
+    tasks: List[PlaylistTaskItem]
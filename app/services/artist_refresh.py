@@ -0,0 +1,250 @@
+"""
+Preenchimento em segundo plano dos artistas das faixas de um álbum.
+
+``POST /albums/{id}/refresh-artists`` só cria um :class:`ArtistRefreshJob` e
+devolve o ``job_id``. O job:
+
+1. resolve o que já está no ``metadata_cache`` (entradas da playlist de
+   origem, extrações ``full``/``raw`` das faixas) numa única ida ao executor;
+2. extrai o restante com ``fetch_track_artist``, no máximo
+   ``ARTIST_REFRESH_CONCURRENCY`` ao mesmo tempo;
+3. grava todos os artistas com um único UPDATE em lote e recalcula o artista
+   majoritário do álbum.
+
+O progresso sai como eventos SSE ``artist_refresh_progress`` e
+``artist_refresh_completed`` no stream de ``/audio/download-events`` (com
+``audio_id`` = ``job_id``) e pode ser consultado em
+``GET /albums/refresh-artists/{job_id}``.
+"""
+
+import asyncio
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.services.configs import ARTIST_REFRESH_CONCURRENCY
+from app.services.managers import (
+    cached_track_artist,
+    majority_artist_from_names,
+    playlist_entry_artists,
+)
+from app.services.sse_manager import DownloadEvent, sse_manager
+
+# Jobs terminados mantidos para consulta de status
+_FINISHED_JOBS_KEPT = 50
+
+
+@dataclass
+class ArtistRefreshJob:
+    """Estado de um preenchimento de artistas."""
+
+    job_id: str
+    folder_id: str
+    total: int
+    status: str = "running"  # running | completed | failed
+    processed: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    from_cache: int = 0
+    folder_artist: Optional[str] = None
+    error: Optional[str] = None
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _has_artist(track: dict) -> bool:
+    artist = track.get("artist")
+    return isinstance(artist, str) and bool(artist.strip())
+
+
+class ArtistRefreshService:
+    """Cria e acompanha os jobs de preenchimento de artistas."""
+
+    def __init__(
+        self,
+        concurrency: int = ARTIST_REFRESH_CONCURRENCY,
+        session_factory=None,
+    ):
+        self.concurrency = max(1, concurrency)
+        # None = get_db_context (import tardio, como no progress_writer)
+        self._session_factory = session_factory
+        self._jobs: Dict[str, ArtistRefreshJob] = {}
+        self._running: Dict[str, str] = {}  # folder_id -> job_id
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get(self, job_id: str) -> Optional[ArtistRefreshJob]:
+        return self._jobs.get(job_id)
+
+    def start(
+        self,
+        folder_id: str,
+        tracks: List[dict],
+        fetch: Callable[[str], Awaitable[Optional[str]]],
+        source_url: Optional[str] = None,
+    ) -> ArtistRefreshJob:
+        """Inicia (ou devolve o já em andamento) o job de um álbum.
+
+        ``tracks`` são os ``to_dict()`` das faixas, na ordem do álbum;
+        ``fetch`` extrai o artista de uma faixa (``fetch_track_artist``).
+        """
+        running = self._running.get(folder_id)
+        if running is not None:
+            return self._jobs[running]
+
+        job = ArtistRefreshJob(
+            job_id=str(uuid.uuid4()), folder_id=folder_id, total=len(tracks)
+        )
+        self._jobs[job.job_id] = job
+        self._running[folder_id] = job.job_id
+        task = asyncio.create_task(self._run(job, tracks, fetch, source_url))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        self._prune()
+        return job
+
+    async def stop(self) -> None:
+        """Cancela os jobs em andamento (shutdown)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status != "running"]
+        for job in finished[: max(0, len(finished) - _FINISHED_JOBS_KEPT)]:
+            self._jobs.pop(job.job_id, None)
+
+    def _session(self):
+        if self._session_factory is not None:
+            return self._session_factory()
+        from app.db.database import get_db_context
+
+        return get_db_context()
+
+    async def _publish(self, job: ArtistRefreshJob, event_type: str) -> None:
+        await sse_manager.broadcast_event(
+            DownloadEvent(
+                audio_id=job.job_id,
+                event_type=event_type,
+                progress=(100 * job.processed // job.total) if job.total else 100,
+                message=f"Artistas: {job.processed}/{job.total}",
+                error=job.error,
+            )
+        )
+
+    async def _run(
+        self,
+        job: ArtistRefreshJob,
+        tracks: List[dict],
+        fetch: Callable[[str], Awaitable[Optional[str]]],
+        source_url: Optional[str],
+    ) -> None:
+        from app.db.repositories import AudioRepository, FolderRepository
+
+        try:
+            need = [
+                t
+                for t in tracks
+                if t.get("download_status") == "ready" and not _has_artist(t)
+            ]
+            job.skipped = len(tracks) - len(need)
+            job.processed = job.skipped
+            found: Dict[str, str] = {}
+
+            # Tudo o que já está em cache numa só ida ao executor
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(None, _cached_artists, need, source_url)
+            misses = []
+            for track in need:
+                artist = cached.get(track["id"])
+                if artist:
+                    found[track["id"]] = artist
+                    job.from_cache += 1
+                    job.processed += 1
+                else:
+                    misses.append(track)
+            await self._publish(job, "artist_refresh_progress")
+
+            sem = asyncio.Semaphore(self.concurrency)
+
+            async def _fetch(track: dict) -> None:
+                ref = _track_ref(track)
+                artist = None
+                if ref:
+                    async with sem:
+                        artist = await fetch(ref)
+                if artist:
+                    found[track["id"]] = artist
+                else:
+                    job.failed += 1
+                job.processed += 1
+                await self._publish(job, "artist_refresh_progress")
+
+            await asyncio.gather(*(_fetch(track) for track in misses))
+
+            rows = [
+                {"id": track_id, "artist": artist[:500]}
+                for track_id, artist in found.items()
+            ]
+            artists = [found.get(t["id"]) or t.get("artist") for t in tracks]
+            job.folder_artist = majority_artist_from_names(artists, total=len(tracks))
+            async with self._session() as session:
+                await AudioRepository(session).update_many(rows)
+                await FolderRepository(session).update(
+                    job.folder_id, artist=job.folder_artist
+                )
+            job.updated = len(rows)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelado"
+            raise
+        except Exception as exc:
+            logger.exception(f"Falha no refresh de artistas {job.job_id}: {exc}")
+            job.status = "failed"
+            job.error = str(exc)[:200]
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            self._running.pop(job.folder_id, None)
+
+        logger.info(
+            f"Refresh de artistas do álbum {job.folder_id}: {job.updated} "
+            f"atualizados ({job.from_cache} do cache), {job.failed} falhas"
+        )
+        await self._publish(job, "artist_refresh_completed")
+
+
+def _cached_artists(tracks: List[dict], source_url: Optional[str]) -> Dict[str, str]:
+    """Artistas já conhecidos pelo ``metadata_cache`` (roda no executor)."""
+    from_playlist = playlist_entry_artists(source_url) if source_url else {}
+    found = {}
+    for track in tracks:
+        ref = _track_ref(track)
+        if not ref:
+            continue
+        artist = from_playlist.get(track.get("youtube_id") or track.get("external_id"))
+        artist = artist or cached_track_artist(ref)
+        if artist:
+            found[track["id"]] = artist
+    return found
+
+
+def _track_ref(track: dict) -> Optional[str]:
+    """URL ou id da faixa para a extração."""
+    ref = (
+        track.get("url")
+        or track.get("youtube_id")
+        or track.get("external_id")
+        or track.get("id")
+    )
+    return str(ref) if ref else None
+
+
+artist_refresh = ArtistRefreshService()
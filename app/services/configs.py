@@ -142,6 +142,170 @@ DEFAULT_TRANSCRIPTION_LANGUAGE = os.getenv(
 ).strip()
 
 
+# ---------------------------------------------------------------------------
+# Download queue configuration
+# ---------------------------------------------------------------------------
+
+# Tasks terminais (completed/failed/cancelled) ficam em memória por este tempo
+# após terminarem; depois o compactador da fila as move para a tabela
+# ``download_task_history`` no SQLite. As APIs da fila continuam respondendo
+# sobre elas a partir do histórico.
+DOWNLOAD_TASK_ARCHIVE_AFTER_SECONDS = float(
+    os.getenv("DOWNLOAD_TASK_ARCHIVE_AFTER_SECONDS", "3600")
+)
+# Intervalo entre execuções do compactador.
+DOWNLOAD_TASK_ARCHIVE_INTERVAL = float(
+    os.getenv("DOWNLOAD_TASK_ARCHIVE_INTERVAL", "300")
+)
+# Limite global de downloads simultâneos (soma de todas as lanes).
+DOWNLOAD_MAX_CONCURRENT = int(os.getenv("DOWNLOAD_MAX_CONCURRENT", "3"))
+
+# Modo adaptativo (AIMD): quando ligado, a fila ajusta o limite global sozinha
+# entre FLOOR e CEILING a cada INTERVAL segundos, subindo 1 enquanto o
+# throughput agregado melhora e cortando pela metade em 429/erros.
+DOWNLOAD_ADAPTIVE_CONCURRENCY = (
+    os.getenv("DOWNLOAD_ADAPTIVE_CONCURRENCY", "false").strip().lower() == "true"
+)
+DOWNLOAD_ADAPTIVE_FLOOR = int(os.getenv("DOWNLOAD_ADAPTIVE_FLOOR", "1"))
+DOWNLOAD_ADAPTIVE_CEILING = int(os.getenv("DOWNLOAD_ADAPTIVE_CEILING", "6"))
+DOWNLOAD_ADAPTIVE_INTERVAL = float(os.getenv("DOWNLOAD_ADAPTIVE_INTERVAL", "30"))
+
+# Lanes por fonte (``Downloader.source``). Cada lane reserva ``concurrency``
+# slots do limite global e inicia no máximo ``rate`` downloads por segundo
+# (token bucket com capacidade ``burst``; rate 0 = sem limite). Slots de uma
+# lane ociosa podem ser emprestados às outras; a taxa nunca é emprestada.
+DOWNLOAD_LANE_SOURCES = ("youtube", "instagram")
+_DOWNLOAD_LANE_DEFAULTS = {
+    "youtube": {"concurrency": 2, "rate": 0.5, "burst": 3},
+    "instagram": {"concurrency": 1, "rate": 0.2, "burst": 2},
+}
+
+# Downloads de vídeo (yt-dlp + merge no ffmpeg) ficam em lanes próprias por
+# fonte. Cada vídeo ativo ocupa ``weight`` slots do limite global, refletindo
+# o custo de CPU/disco bem maior que o de um áudio; a taxa de inícios é a do
+# token bucket da fonte, compartilhado com a lane de áudio.
+VIDEO_DOWNLOAD_CONCURRENCY = int(os.getenv("VIDEO_DOWNLOAD_CONCURRENCY", "1"))
+VIDEO_DOWNLOAD_WEIGHT = int(os.getenv("VIDEO_DOWNLOAD_WEIGHT", "2"))
+
+
+def get_download_lane_config(source: str, kind: str = "audio") -> Dict[str, Any]:
+    """Return the lane limits for ``source`` (per-source env vars override).
+
+    Env vars use the upper-cased source as prefix, e.g.
+    ``YOUTUBE_DOWNLOAD_CONCURRENCY``, ``YOUTUBE_DOWNLOAD_RATE`` (downloads
+    started per second) and ``YOUTUBE_DOWNLOAD_BURST``. Unknown sources get a
+    single slot and no rate limit.
+
+    Video lanes (``kind="video"``) read ``YOUTUBE_VIDEO_DOWNLOAD_CONCURRENCY``
+    and ``YOUTUBE_VIDEO_DOWNLOAD_WEIGHT``, falling back to
+    ``VIDEO_DOWNLOAD_CONCURRENCY`` / ``VIDEO_DOWNLOAD_WEIGHT``.
+    """
+    prefix = source.upper()
+    if kind == "video":
+        return {
+            "concurrency": int(
+                os.getenv(
+                    f"{prefix}_VIDEO_DOWNLOAD_CONCURRENCY", VIDEO_DOWNLOAD_CONCURRENCY
+                )
+            ),
+            "weight": int(
+                os.getenv(f"{prefix}_VIDEO_DOWNLOAD_WEIGHT", VIDEO_DOWNLOAD_WEIGHT)
+            ),
+        }
+    defaults = _DOWNLOAD_LANE_DEFAULTS.get(
+        source, {"concurrency": 1, "rate": 0.0, "burst": 1}
+    )
+    return {
+        "concurrency": int(
+            os.getenv(f"{prefix}_DOWNLOAD_CONCURRENCY", defaults["concurrency"])
+        ),
+        "rate": float(os.getenv(f"{prefix}_DOWNLOAD_RATE", defaults["rate"])),
+        "burst": int(os.getenv(f"{prefix}_DOWNLOAD_BURST", defaults["burst"])),
+    }
+
+
+# Intervalo (segundos) entre gravações em lote do estado da fila na tabela
+# ``download_tasks``. Transições no intervalo são agrupadas numa única escrita.
+DOWNLOAD_QUEUE_FLUSH_INTERVAL = float(os.getenv("DOWNLOAD_QUEUE_FLUSH_INTERVAL", "1.0"))
+
+# Intervalo (segundos) entre gravações em lote do progresso dos downloads
+# ativos. Um único writer guarda o último valor de cada download e grava todos
+# numa transação com um UPDATE executemany.
+DOWNLOAD_PROGRESS_FLUSH_INTERVAL = float(
+    os.getenv("DOWNLOAD_PROGRESS_FLUSH_INTERVAL", "0.25")
+)
+
+# Eventos SSE ``download_progress``: no máximo um a cada INTERVAL segundos por
+# download, e só quando o percentual avança MIN_DELTA pontos (ou, sem tamanho
+# conhecido, quando chegam bytes novos).
+DOWNLOAD_PROGRESS_EVENT_INTERVAL = float(
+    os.getenv("DOWNLOAD_PROGRESS_EVENT_INTERVAL", "0.5")
+)
+DOWNLOAD_PROGRESS_EVENT_MIN_DELTA = int(
+    os.getenv("DOWNLOAD_PROGRESS_EVENT_MIN_DELTA", "1")
+)
+
+# Telemetria por fase dos downloads (tabela ``download_metrics``): quantas
+# linhas mais recentes manter para o cálculo de percentis.
+DOWNLOAD_METRICS_RETENTION = int(os.getenv("DOWNLOAD_METRICS_RETENTION", "5000"))
+
+# Cache do info dict extraído no registro, reaproveitado no download via
+# ``process_ie_result`` (uma extração por item em vez de duas). As URLs de
+# formato do YouTube são assinadas e expiram em algumas horas: o TTL precisa
+# ficar bem abaixo disso. Limite: um item que espera na fila mais que o TTL (fila
+# funda) perde a entrada e o download volta a extrair — correto, só sem o ganho.
+# Com filas longas, suba o TTL (até ~3h) em vez de passar da validade das URLs.
+INFO_CACHE_TTL = float(os.getenv("INFO_CACHE_TTL", "1800"))
+INFO_CACHE_MAX_ENTRIES = int(os.getenv("INFO_CACHE_MAX_ENTRIES", "512"))
+
+# Cache persistente (SQLite em ``data/metadata_cache.db``) dos info dicts do
+# yt-dlp, por ``(source, external_id, mode)``. TTL por campo: metadados
+# estáveis (título, artista...) valem METADATA_CACHE_TTL; URLs assinadas de
+# stream/formatos valem METADATA_CACHE_URL_TTL; listas de playlist valem
+# METADATA_CACHE_LIST_TTL. Acima de MAX_MB, as entradas menos usadas saem.
+METADATA_CACHE_ENABLED = (
+    os.getenv("METADATA_CACHE_ENABLED", "true").strip().lower() == "true"
+)
+METADATA_CACHE_PATH = Path(
+    os.getenv("METADATA_CACHE_PATH", str(DATA_DIR / "metadata_cache.db"))
+)
+METADATA_CACHE_MAX_MB = float(os.getenv("METADATA_CACHE_MAX_MB", "128"))
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", str(7 * 24 * 3600)))
+METADATA_CACHE_URL_TTL = float(os.getenv("METADATA_CACHE_URL_TTL", "1800"))
+METADATA_CACHE_LIST_TTL = float(os.getenv("METADATA_CACHE_LIST_TTL", "600"))
+
+# Extração de playlists em páginas: cada página de PLAYLIST_PAGE_SIZE entradas
+# é registrada e enfileirada enquanto as seguintes ainda estão sendo buscadas.
+# PLAYLIST_MAX_ENTRIES limita quantas entradas são lidas (0 = sem limite).
+PLAYLIST_PAGE_SIZE = max(1, int(os.getenv("PLAYLIST_PAGE_SIZE", "100")))
+PLAYLIST_MAX_ENTRIES = int(os.getenv("PLAYLIST_MAX_ENTRIES", "0"))
+
+# Sincronização periódica de álbuns/playlists com a origem (novas entradas são
+# enfileiradas, track_number reordenado). Intervalo em segundos; 0 = desligada
+# (POST /folders/{id}/sync continua disponível).
+PLAYLIST_SYNC_INTERVAL = float(os.getenv("PLAYLIST_SYNC_INTERVAL", "0"))
+
+# Extrações simultâneas no refresh de artistas de um álbum (job em segundo
+# plano de POST /albums/{id}/refresh-artists).
+ARTIST_REFRESH_CONCURRENCY = max(1, int(os.getenv("ARTIST_REFRESH_CONCURRENCY", "4")))
+
+# Pool de instâncias YoutubeDL já inicializadas, por (source, perfil). Cada
+# instância atende um job por vez; é descartada após MAX_AGE segundos ou
+# MAX_USES jobs (cookies renovados voltam a ser lidos) e após qualquer erro.
+YDL_POOL_ENABLED = os.getenv("YDL_POOL_ENABLED", "true").strip().lower() == "true"
+YDL_POOL_MAX_IDLE = int(os.getenv("YDL_POOL_MAX_IDLE", "4"))
+YDL_POOL_MAX_AGE = float(os.getenv("YDL_POOL_MAX_AGE", "600"))
+YDL_POOL_MAX_USES = int(os.getenv("YDL_POOL_MAX_USES", "100"))
+
+# Solver de JS challenges do YouTube (scripts EJS do yt-dlp). Os scripts ficam
+# no cache do yt-dlp em YDL_CACHE_DIR, baixados e verificados no startup. Com
+# YDL_EJS_OFFLINE=true o yt-dlp nunca os busca no GitHub durante uma extração:
+# só vale o que já estiver no cache (ou no pacote yt-dlp-ejs).
+YDL_CACHE_DIR = Path(os.getenv("YDL_CACHE_DIR", str(DATA_DIR / "yt-dlp-cache")))
+YDL_EJS_OFFLINE = os.getenv("YDL_EJS_OFFLINE", "false").strip().lower() == "true"
+YDL_EJS_PREWARM_TIMEOUT = float(os.getenv("YDL_EJS_PREWARM_TIMEOUT", "60"))
+
+
 # ---------------------------------------------------------------------------
 # Storage backend configuration
 # ---------------------------------------------------------------------------
@@ -0,0 +1,274 @@
+"""
+Ajuste adaptativo (AIMD) do limite de downloads simultâneos da DownloadQueue.
+
+A cada janela o controlador compara o throughput agregado (bytes/s reportados
+pelos progress hooks do yt-dlp) com o da janela anterior:
+
+* 429 / "Too Many Requests" de uma fonte, ou taxa de erro acima do limiar,
+  corta multiplicativamente (``decrease_factor``) o limite *daquela fonte*
+  (``SourceStats.limit``); as outras fontes não são afetadas;
+* a cada janela limpa o limite de uma fonte cortada sobe ``increase_step``
+  e some quando alcança o limite global;
+* o limite global é cortado multiplicativamente quando todas as fontes
+  ativas na janela estão com 429/erros, ou quando o throughput cai mais de
+  ``max_drop`` em relação à janela anterior;
+* com fila acumulada e throughput ainda subindo, o limite global soma
+  ``increase_step``; caso contrário é mantido.
+
+Janelas vazias (sem bytes nem resultados) não ajustam nada. O limite global
+fica sempre entre ``floor`` e ``ceiling`` e o teto de uma fonte nunca fica
+abaixo de ``floor``. Erros e 429 são contados por fonte e expostos no
+snapshot junto com o motivo do último ajuste.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from app.services.configs import (
+    DOWNLOAD_ADAPTIVE_CEILING,
+    DOWNLOAD_ADAPTIVE_FLOOR,
+    DOWNLOAD_ADAPTIVE_INTERVAL,
+)
+
+_THROTTLE_MARKERS = ("429", "too many requests", "rate-limit", "rate limit")
+
+
+def is_throttle_error(message: str) -> bool:
+    """Heurística: a mensagem de erro indica throttling da fonte?"""
+    lowered = (message or "").lower()
+    return any(marker in lowered for marker in _THROTTLE_MARKERS)
+
+
+@dataclass
+class SourceStats:
+    """Contadores de uma fonte na janela atual e acumulados.
+
+    ``limit`` é o teto de downloads simultâneos da fonte imposto pelo
+    controlador depois de 429/erros (None = só os limites da lane).
+    """
+
+    completed: int = 0
+    errors: int = 0
+    throttled: int = 0
+    bytes: int = 0
+    total_completed: int = 0
+    total_errors: int = 0
+    total_throttled: int = 0
+    limit: Optional[int] = None
+
+    @property
+    def empty(self) -> bool:
+        return not (self.completed or self.errors or self.bytes)
+
+    def reset_window(self) -> None:
+        self.completed = self.errors = self.throttled = self.bytes = 0
+
+    @property
+    def error_rate(self) -> float:
+        attempts = self.completed + self.errors
+        return self.errors / attempts if attempts else 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "completed": self.total_completed,
+            "errors": self.total_errors,
+            "throttled": self.total_throttled,
+            "window_error_rate": round(self.error_rate, 3),
+            "limit": self.limit,
+        }
+
+
+@dataclass
+class ConcurrencyAutoTuner:
+    """Controlador AIMD do limite global e dos limites por fonte."""
+
+    limit: int
+    floor: int = DOWNLOAD_ADAPTIVE_FLOOR
+    ceiling: int = DOWNLOAD_ADAPTIVE_CEILING
+    interval: float = DOWNLOAD_ADAPTIVE_INTERVAL
+    increase_step: int = 1
+    decrease_factor: float = 0.5
+    error_rate_threshold: float = 0.3
+    min_samples: int = 3
+    min_gain: float = 0.05  # ganho relativo mínimo para continuar subindo
+    max_drop: float = 0.2  # queda relativa que corta o limite global
+    reason: str = "limite inicial"
+    adjusted_at: Optional[datetime] = None
+    throughput_bps: float = 0.0
+    _throughput_limit: int = field(default=0, repr=False)  # limite da janela anterior
+    sources: Dict[str, SourceStats] = field(default_factory=dict)
+    _window_started: float = field(default_factory=time.monotonic, repr=False)
+
+    def __post_init__(self):
+        self.limit = min(max(self.limit, self.floor), self.ceiling)
+
+    def _stats(self, source: str) -> SourceStats:
+        stats = self.sources.get(source)
+        if stats is None:
+            stats = self.sources[source] = SourceStats()
+        return stats
+
+    # Entradas (chamar no event loop) -----------------------------------
+
+    def record_bytes(self, source: str, nbytes: int) -> None:
+        if nbytes > 0:
+            self._stats(source).bytes += nbytes
+
+    def record_result(self, source: str, error: Optional[str] = None) -> None:
+        stats = self._stats(source)
+        if error is None:
+            stats.completed += 1
+            stats.total_completed += 1
+            return
+        stats.errors += 1
+        stats.total_errors += 1
+        if is_throttle_error(error):
+            stats.throttled += 1
+            stats.total_throttled += 1
+
+    def source_limit(self, source: str) -> Optional[int]:
+        """Teto atual de downloads simultâneos de ``source`` (None = sem teto)."""
+        stats = self.sources.get(source)
+        return stats.limit if stats is not None else None
+
+    # Ajuste --------------------------------------------------------------
+
+    def _cut_sources(self, sources: List[str], active: Dict[str, int]) -> None:
+        """Corte multiplicativo no limite de cada fonte em ``sources``.
+
+        A base é o teto atual da fonte ou, na primeira vez, quantos downloads
+        dela estavam ativos (o limite global se ``active`` não informar).
+        """
+        for source in sources:
+            stats = self.sources[source]
+            base = stats.limit
+            if base is None:
+                base = active.get(source) or self.limit
+            stats.limit = max(self.floor, math.floor(base * self.decrease_factor))
+            logger.info(f"Concorrência adaptativa de {source}: teto {stats.limit}")
+
+    def _relax_sources(self, offending: List[str]) -> None:
+        """Aumento aditivo do teto das fontes cortadas que tiveram janela limpa.
+
+        Tetos que alcançam o limite global deixam de existir.
+        """
+        for source, stats in self.sources.items():
+            if stats.limit is None:
+                continue
+            if source not in offending:
+                stats.limit += self.increase_step
+            if stats.limit >= self.limit:
+                stats.limit = None
+
+    def _expected(self, previous: float) -> float:
+        """Throughput esperado no limite atual, dado o da janela anterior.
+
+        Depois de um corte a queda proporcional é esperada e não deve
+        provocar outro corte.
+        """
+        if not self._throughput_limit:
+            return previous
+        return previous * min(1.0, self.limit / self._throughput_limit)
+
+    def _set(self, limit: int, reason: str) -> int:
+        old = self.limit
+        self.limit = min(max(limit, self.floor), self.ceiling)
+        self.reason = reason
+        if self.limit != old:
+            self.adjusted_at = datetime.now()
+            logger.info(f"Concorrência adaptativa: {old} -> {self.limit} ({reason})")
+        return self.limit
+
+    def adjust(
+        self,
+        backlog: int,
+        now: Optional[float] = None,
+        active: Optional[Dict[str, int]] = None,
+    ) -> int:
+        """Fecha a janela atual e devolve o novo limite global.
+
+        ``backlog`` é o número de tasks prontas esperando slot: sem fila não
+        faz sentido subir o limite. ``active`` (downloads ativos por fonte)
+        serve de base para o primeiro corte de uma fonte.
+        """
+        now = time.monotonic() if now is None else now
+        if all(stats.empty for stats in self.sources.values()):
+            # Nada terminou nem transferiu bytes: sem sinal, sem ajuste
+            self._window_started = now
+            return self.limit
+        elapsed = max(now - self._window_started, 1e-6)
+        window_bytes = sum(stats.bytes for stats in self.sources.values())
+        throughput = window_bytes / elapsed
+        previous = self.throughput_bps
+        window_limit = self.limit
+
+        throttled = [s for s, st in self.sources.items() if st.throttled]
+        erroring = [
+            s
+            for s, st in self.sources.items()
+            if st.completed + st.errors >= self.min_samples
+            and st.error_rate > self.error_rate_threshold
+        ]
+
+        offending = sorted(set(throttled) | set(erroring))
+        self._cut_sources(offending, active or {})
+        active_sources = [s for s, st in self.sources.items() if not st.empty]
+
+        if offending and set(active_sources) <= set(offending):
+            limit = self._set(
+                math.floor(self.limit * self.decrease_factor),
+                f"429/erros em todas as fontes ativas ({', '.join(offending)})",
+            )
+        elif throttled:
+            limit = self._set(
+                self.limit,
+                f"429/throttling de {', '.join(sorted(throttled))}; "
+                "teto da fonte reduzido",
+            )
+        elif erroring:
+            limit = self._set(
+                self.limit,
+                f"taxa de erro alta em {', '.join(sorted(erroring))}; "
+                "teto da fonte reduzido",
+            )
+        elif previous and throughput < self._expected(previous) * (1 - self.max_drop):
+            limit = self._set(
+                math.floor(self.limit * self.decrease_factor),
+                f"throughput caiu para {throughput / 1024:.0f} KiB/s",
+            )
+        elif (
+            backlog
+            and self.limit < self.ceiling
+            and throughput > 0
+            and (previous == 0 or throughput > previous * (1 + self.min_gain))
+        ):
+            limit = self._set(
+                self.limit + self.increase_step,
+                f"throughput subiu para {throughput / 1024:.0f} KiB/s com fila",
+            )
+        else:
+            limit = self._set(self.limit, "throughput estável; limite mantido")
+        self._relax_sources(offending)
+
+        self.throughput_bps = throughput
+        self._throughput_limit = window_limit
+        for stats in self.sources.values():
+            stats.reset_window()
+        self._window_started = now
+        return limit
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "reason": self.reason,
+            "adjusted_at": self.adjusted_at.isoformat() if self.adjusted_at else None,
+            "throughput_bps": round(self.throughput_bps, 1),
+            "sources": {s: st.snapshot() for s, st in self.sources.items()},
+        }
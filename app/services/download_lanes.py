@@ -0,0 +1,193 @@
+"""
+Lanes de download por fonte (YouTube, Instagram, ...) para a DownloadQueue.
+
+Cada lane tem o próprio heap de tasks prontas, um limite de concorrência
+reservado e um token bucket que limita a taxa de downloads iniciados contra a
+fonte. Slots de lanes ociosas podem ser emprestados (ver
+``DownloadQueue._choose_lane``); tokens nunca são emprestados, para não
+provocar throttling do lado da fonte.
+
+Downloads de vídeo usam lanes separadas (chave ``video:<fonte>``) com peso:
+cada vídeo ativo ocupa ``weight`` slots do limite global. As lanes de áudio
+e de vídeo de uma mesma fonte compartilham o token bucket.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.services.configs import DOWNLOAD_LANE_SOURCES, get_download_lane_config
+from app.services.downloaders import get_source_for_url
+
+# Lane usada quando a fonte da URL não é reconhecida pela factory.
+UNKNOWN_SOURCE = "unknown"
+
+# Tipos de job; áudio é o tipo padrão e usa a fonte pura como chave de lane.
+AUDIO_KIND = "audio"
+VIDEO_KIND = "video"
+
+
+def source_for_url(url: str) -> str:
+    """Fonte (``Downloader.source``) da URL, ou ``UNKNOWN_SOURCE``."""
+    try:
+        return get_source_for_url(url)
+    except ValueError:
+        return UNKNOWN_SOURCE
+
+
+def lane_key(kind: str, source: str) -> str:
+    """Chave da lane: ``youtube`` para áudio, ``video:youtube`` para vídeo."""
+    return source if kind == AUDIO_KIND else f"{kind}:{source}"
+
+
+@dataclass
+class LaneConfig:
+    """Limites de uma lane.
+
+    ``rate`` é a taxa de reposição de tokens (downloads iniciados por
+    segundo) e ``burst`` a capacidade do bucket; ``rate <= 0`` desliga o
+    limite de taxa. ``weight`` é quantos slots do limite global cada job
+    ativo da lane ocupa.
+    """
+
+    concurrency: int
+    rate: float = 0.0
+    burst: int = 1
+    weight: int = 1
+
+    @classmethod
+    def from_env(cls, source: str, kind: str = AUDIO_KIND) -> "LaneConfig":
+        return cls(**get_download_lane_config(source, kind))
+
+
+def default_lane_configs() -> Dict[str, LaneConfig]:
+    """Configuração das lanes conhecidas a partir das variáveis de ambiente."""
+    configs = {}
+    for kind in (AUDIO_KIND, VIDEO_KIND):
+        for source in DOWNLOAD_LANE_SOURCES:
+            configs[lane_key(kind, source)] = LaneConfig.from_env(source, kind)
+    return configs
+
+
+class TokenBucket:
+    """Token bucket clássico com relógio monotônico."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self._last = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float) -> None:
+        if now > self._last:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self._last) * self.rate
+            )
+        self._last = now
+
+    def available(self, now: Optional[float] = None) -> bool:
+        if self.unlimited:
+            return True
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens >= 1
+
+    def consume(self, now: Optional[float] = None) -> None:
+        if self.unlimited:
+            return
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+    def seconds_until_available(self, now: Optional[float] = None) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class Lane:
+    """Fila de prontas de uma fonte + seus limites.
+
+    Entradas do heap são listas ``[-priority, created_ts, seq, task_id]``;
+    remoção é preguiçosa (``task_id`` vira None). ``bucket`` pode ser o de
+    outra lane da mesma fonte (lanes de vídeo). Use sempre com o
+    ``queue_lock`` da fila adquirido.
+    """
+
+    source: str
+    config: LaneConfig
+    kind: str = AUDIO_KIND
+    active: int = 0
+    bucket: Optional[TokenBucket] = None
+    _heap: List[list] = field(default_factory=list, init=False, repr=False)
+    _entries: Dict[str, list] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.bucket is None:
+            self.bucket = TokenBucket(self.config.rate, self.config.burst)
+
+    @property
+    def key(self) -> str:
+        return lane_key(self.kind, self.source)
+
+    @property
+    def weight(self) -> int:
+        return max(1, self.config.weight)
+
+    @property
+    def slots_in_use(self) -> int:
+        """Slots do limite global ocupados pelos jobs ativos da lane."""
+        return self.active * self.weight
+
+    @property
+    def queued(self) -> int:
+        return len(self._entries)
+
+    @property
+    def under_limit(self) -> bool:
+        return self.active < self.config.concurrency
+
+    def push(self, task_id: str, entry: list) -> None:
+        self.discard(task_id)
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def discard(self, task_id: str) -> None:
+        entry = self._entries.pop(task_id, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def peek(self) -> Optional[list]:
+        """Entrada válida de maior prioridade (sem removê-la)."""
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def pop(self) -> Optional[str]:
+        """Remove e retorna o ``task_id`` de maior prioridade."""
+        entry = self.peek()
+        if entry is None:
+            return None
+        heapq.heappop(self._heap)
+        task_id = entry[-1]
+        del self._entries[task_id]
+        return task_id
+
+    def snapshot(self) -> Dict:
+        self.bucket.available()  # atualiza o saldo de tokens
+        return {
+            "kind": self.kind,
+            "active": self.active,
+            "queued": self.queued,
+            "concurrency": self.config.concurrency,
+            "weight": self.weight,
+            "rate": self.bucket.rate,
+            "tokens": None if self.bucket.unlimited else round(self.bucket.tokens, 2),
+        }
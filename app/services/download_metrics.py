@@ -0,0 +1,216 @@
+"""
+Telemetria por fase de cada download.
+
+Um :class:`DownloadMetrics` acompanha um job do início ao fim e mede o tempo
+de parede de cada fase:
+
+* ``metadata``    — do início do job até o primeiro byte (extração do yt-dlp);
+* ``transfer``    — do primeiro byte até o último arquivo terminar;
+* ``postprocess`` — soma dos post-processors (``FFmpegExtractAudio``,
+  merge de vídeo...), com o tempo de CPU gasto neles;
+* ``upload``      — envio ao storage (``_upload_to_storage_if_needed``).
+
+Também registra bytes transferidos nesta tentativa e throughput médio e de
+pico. Os hooks do yt-dlp chamam os métodos ``on_*`` na thread do executor;
+:meth:`DownloadMetrics.finish` gera a linha gravada em ``download_metrics`` e
+:func:`summarize` calcula os percentis servidos em ``/admin/download-metrics``.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERCENTILES = (50, 90, 99)
+
+
+def _children_cpu() -> float:
+    """CPU (user + sys) de processos filhos já finalizados, como o ffmpeg.
+
+    É um contador do processo inteiro: com post-processors simultâneos em
+    outros downloads, o delta pode incluir parte do trabalho deles.
+    """
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class DownloadMetrics:
+    """Coleta as métricas de um download (uma tentativa)."""
+
+    def __init__(self, kind: str, item_id: str, source: str):
+        self.kind = kind
+        self.item_id = item_id
+        self.source = source
+        self.started = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+        self.transfer_end: Optional[float] = None
+        self.extracted_at: Optional[float] = None
+        self.bytes = 0
+        self.peak_bps = 0.0
+        self.phases: Dict[str, float] = {}
+        self.postprocess_cpu = 0.0
+        self._pp_running: Dict[str, tuple] = {}
+        self.recorded = False
+
+    # -- hooks do yt-dlp (thread do executor) ---------------------------------
+
+    def on_progress(self, d: Dict[str, Any], delta: int = 0) -> None:
+        """Progress hook: primeiro byte, fim da transferência, bytes e pico."""
+        now = time.monotonic()
+        status = d.get("status")
+        if status == "downloading":
+            if self.first_byte_at is None:
+                self.first_byte_at = now
+            speed = d.get("speed")
+            if speed and speed > self.peak_bps:
+                self.peak_bps = float(speed)
+        elif status == "finished":
+            self.transfer_end = now
+        if delta > 0:
+            self.bytes += delta
+
+    def on_postprocessor(self, d: Dict[str, Any]) -> None:
+        """Postprocessor hook: tempo de parede e CPU de cada post-processor."""
+        name = d.get("postprocessor") or "?"
+        status = d.get("status")
+        if status == "started":
+            self._pp_running[name] = (
+                time.monotonic(),
+                time.thread_time(),
+                _children_cpu(),
+            )
+        elif status == "finished" and name in self._pp_running:
+            wall0, thread0, children0 = self._pp_running.pop(name)
+            self._add("postprocess", time.monotonic() - wall0)
+            self.postprocess_cpu += (time.thread_time() - thread0) + (
+                _children_cpu() - children0
+            )
+
+    def apply(self, ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+        """Registra o hook de post-processors nas opções do yt-dlp."""
+        ydl_opts["postprocessor_hooks"] = [
+            *ydl_opts.get("postprocessor_hooks", []),
+            self.on_postprocessor,
+        ]
+        return ydl_opts
+
+    # -- loop ------------------------------------------------------------------
+
+    def extraction_finished(self) -> None:
+        """Marca o retorno de ``extract_info`` (download + post-processors)."""
+        self.extracted_at = time.monotonic()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mede uma fase executada fora do yt-dlp (ex.: ``upload``)."""
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self._add(name, time.monotonic() - t0)
+
+    def _add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish(self, status: str) -> Dict[str, Any]:
+        """Fecha a coleta e devolve a linha para ``download_metrics``."""
+        end = time.monotonic()
+        first_mark = self.first_byte_at or self.transfer_end or self.extracted_at
+        metadata = (first_mark or end) - self.started
+        transfer = None
+        if self.first_byte_at is not None:
+            transfer = (self.transfer_end or self.extracted_at or end) - (
+                self.first_byte_at
+            )
+        self.recorded = True
+        return {
+            "kind": self.kind,
+            "item_id": self.item_id,
+            "source": self.source,
+            "status": status,
+            "metadata_s": round(metadata, 3),
+            "transfer_s": round(transfer, 3) if transfer is not None else None,
+            "postprocess_s": _rounded(self.phases.get("postprocess")),
+            "upload_s": _rounded(self.phases.get("upload")),
+            "total_s": round(end - self.started, 3),
+            "bytes": self.bytes,
+            "avg_bps": round(self.bytes / transfer) if transfer else None,
+            "peak_bps": round(self.peak_bps) if self.peak_bps else None,
+            "postprocess_cpu_s": (
+                round(self.postprocess_cpu, 3) if "postprocess" in self.phases else None
+            ),
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+async def record_download_metrics(metrics: Optional[DownloadMetrics], status: str):
+    """Grava as métricas de um download; falhas aqui nunca afetam o download."""
+    from app.db.database import get_db_context
+    from app.db.repositories import DownloadMetricsRepository
+    from app.services.configs import DOWNLOAD_METRICS_RETENTION
+
+    if metrics is None or metrics.recorded:
+        return
+    try:
+        async with get_db_context() as session:
+            repo = DownloadMetricsRepository(session)
+            await repo.add(metrics.finish(status))
+            await repo.prune(keep=DOWNLOAD_METRICS_RETENTION)
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar métricas do download: {e}")
+
+
+# -- agregação -----------------------------------------------------------------
+
+_FIELDS = {
+    "metadata": "metadata_s",
+    "transfer": "transfer_s",
+    "postprocess": "postprocess_s",
+    "upload": "upload_s",
+    "total": "total_s",
+}
+_EXTRA_FIELDS = ("bytes", "avg_bps", "peak_bps", "postprocess_cpu_s")
+
+
+def percentiles(values: Iterable[float]) -> Optional[Dict[str, float]]:
+    """p50/p90/p99/max (nearest-rank) de ``values``; ``None`` se vazio."""
+    data = sorted(v for v in values if v is not None)
+    if not data:
+        return None
+    result: Dict[str, float] = {"count": len(data)}
+    for p in PERCENTILES:
+        rank = max(1, -(-p * len(data) // 100))  # ceil(p/100 * n)
+        result[f"p{p}"] = data[rank - 1]
+    result["max"] = data[-1]
+    return result
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Percentis por fonte e por fase a partir das linhas de ``download_metrics``."""
+    by_source: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_source.setdefault(row["source"], []).append(row)
+
+    sources = {}
+    for source, items in sorted(by_source.items()):
+        sources[source] = {
+            "downloads": len(items),
+            "failed": sum(1 for r in items if r["status"] != "completed"),
+            "phases": {
+                phase: percentiles(r[field] for r in items)
+                for phase, field in _FIELDS.items()
+            },
+            **{field: percentiles(r[field] for r in items) for field in _EXTRA_FIELDS},
+        }
+    return {"samples": len(rows), "sources": sources}
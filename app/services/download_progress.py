@@ -0,0 +1,173 @@
+"""
+Canal de progresso entre os hooks do yt-dlp (thread do executor) e o event loop.
+
+O hook não abre event loop nem sessão de banco: apenas guarda o último valor
+e, se ainda não houver um aviso pendente, agenda um com
+``loop.call_soon_threadsafe``. No loop, um único consumidor grava o valor mais
+recente (valores intermediários são descartados) respeitando um intervalo
+mínimo entre gravações. Não há lock: o hook só faz atribuições simples, e a
+ordem "limpa a flag, depois lê o valor" no consumidor garante que nenhuma
+atualização fica sem aviso.
+
+Cada download usa dois canais: um leva o percentual ao writer do banco e o
+outro leva um :class:`ProgressSnapshot` (bytes, velocidade, ETA) aos clientes
+SSE via :class:`ProgressEventEmitter`.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.services.configs import DOWNLOAD_PROGRESS_EVENT_MIN_DELTA
+
+_EMPTY = object()
+
+
+class ProgressChannel:
+    """Entrega o último progresso publicado a ``sink`` no event loop.
+
+    ``publish`` pode ser chamado de qualquer thread; ``sink`` roda sempre no
+    loop, no máximo uma vez a cada ``min_interval`` segundos e nunca em
+    paralelo consigo mesmo. Chame :meth:`close` ao fim do download para
+    entregar o último valor pendente.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        sink: Callable[[Any], Awaitable[None]],
+        min_interval: float = 1.0,
+    ):
+        self._loop = loop
+        self._sink = sink
+        self.min_interval = min_interval
+        self._latest: Any = _EMPTY
+        self._delivered: Any = _EMPTY
+        self._pending = False
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._consumer: Optional[asyncio.Task] = loop.create_task(self._consume())
+
+    def publish(self, value: Any) -> None:
+        """Registra ``value`` como progresso atual (thread-safe, não bloqueia)."""
+        self._latest = value
+        if not self._pending:
+            self._pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # loop encerrado: não há mais quem consuma
+
+    async def _deliver(self) -> None:
+        self._pending = False  # antes de ler: publicações novas reagendam
+        value = self._latest
+        if value is _EMPTY or value == self._delivered:
+            return
+        try:
+            await self._sink(value)
+            self._delivered = value
+        except Exception as e:
+            logger.debug(f"Erro ao entregar progresso: {e}")
+
+    async def _consume(self) -> None:
+        while not self._stop.is_set():
+            await self._ready.wait()
+            self._ready.clear()
+            await self._deliver()
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.min_interval)
+            except asyncio.TimeoutError:
+                pass
+        await self._deliver()
+
+    async def close(self) -> None:
+        """Encerra o consumidor depois de entregar o valor mais recente."""
+        if self._consumer is None:
+            return
+        self._stop.set()
+        self._ready.set()
+        consumer, self._consumer = self._consumer, None
+        await consumer
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Progresso de um download como reportado pelo hook do yt-dlp."""
+
+    percent: int
+    downloaded_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    speed: Optional[int] = None  # bytes/s
+    eta: Optional[int] = None  # segundos
+    finished: bool = False
+
+    @classmethod
+    def from_hook(cls, d: Dict[str, Any]) -> Optional["ProgressSnapshot"]:
+        """Converte o dicionário do progress hook; ``None`` para outros status."""
+        status = d.get("status")
+        downloaded = d.get("downloaded_bytes")
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        total = int(total) if total else None
+        if status == "finished":
+            # Arquivo baixado; o pós-processamento (ffmpeg) ainda vai rodar
+            return cls(95, downloaded or total, total, finished=True)
+        if status != "downloading":
+            return None
+        percent = int(downloaded / total * 100) if total and downloaded else 0
+        speed = d.get("speed")
+        eta = d.get("eta")
+        return cls(
+            percent=min(percent, 100),
+            downloaded_bytes=int(downloaded) if downloaded is not None else None,
+            total_bytes=total,
+            speed=int(speed) if speed else None,
+            eta=int(eta) if eta is not None else None,
+        )
+
+
+class ProgressEventEmitter:
+    """Sink de :class:`ProgressChannel` que publica ``download_progress`` via SSE.
+
+    O canal já limita a frequência (``min_interval``); aqui o evento só sai se
+    o percentual andou ``min_delta`` pontos desde o último enviado, se o
+    tamanho total é desconhecido e chegaram bytes novos, ou se um arquivo
+    terminou.
+    """
+
+    def __init__(
+        self,
+        sse_manager,
+        item_id: str,
+        min_delta: int = DOWNLOAD_PROGRESS_EVENT_MIN_DELTA,
+    ):
+        self.sse_manager = sse_manager
+        self.item_id = item_id
+        self.min_delta = min_delta
+        self.last: Optional[ProgressSnapshot] = None
+
+    def due(self, snapshot: ProgressSnapshot) -> bool:
+        last = self.last
+        if last is None or snapshot.finished:
+            return True
+        if abs(snapshot.percent - last.percent) >= self.min_delta:
+            return True
+        return (
+            snapshot.total_bytes is None
+            and snapshot.downloaded_bytes != last.downloaded_bytes
+        )
+
+    async def __call__(self, snapshot: ProgressSnapshot) -> None:
+        if not self.due(snapshot):
+            return
+        await self.sse_manager.download_progress(
+            self.item_id,
+            snapshot.percent,
+            "Processando arquivo..." if snapshot.finished else None,
+            downloaded_bytes=snapshot.downloaded_bytes,
+            total_bytes=snapshot.total_bytes,
+            speed=snapshot.speed,
+            eta=snapshot.eta,
+        )
+        self.last = snapshot
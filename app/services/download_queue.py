@@ -3,13 +3,39 @@ Sistema de Fila de Downloads com controle de concorrência e retry
 """
 
 import asyncio
+import bisect
+import heapq
+import itertools
+import random
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Callable
+from typing import Any, Dict, Iterator, List, Optional, Callable, Set, Tuple, Union
 import uuid
 from loguru import logger
 
+from app.services.configs import (
+    DOWNLOAD_ADAPTIVE_CONCURRENCY,
+    DOWNLOAD_MAX_CONCURRENT,
+    DOWNLOAD_QUEUE_FLUSH_INTERVAL,
+    DOWNLOAD_TASK_ARCHIVE_AFTER_SECONDS,
+    DOWNLOAD_TASK_ARCHIVE_INTERVAL,
+)
+from app.services.download_autotune import ConcurrencyAutoTuner
+from app.services.download_lanes import (
+    AUDIO_KIND,
+    UNKNOWN_SOURCE,
+    VIDEO_KIND,
+    Lane,
+    LaneConfig,
+    TokenBucket,
+    default_lane_configs,
+    lane_key,
+    source_for_url,
+)
+from app.services.downloaders import get_downloader
+
 
 class DownloadStatus(str, Enum):
     QUEUED = "queued"
@@ -20,9 +46,59 @@ class DownloadStatus(str, Enum):
     RETRYING = "retrying"
 
 
-@dataclass
+class DownloadKind(str, Enum):
+    """Tipo do job: define o manager que executa o download e a lane."""
+
+    AUDIO = AUDIO_KIND
+    VIDEO = VIDEO_KIND
+
+
+_TERMINAL_STATUSES = frozenset(
+    {DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELLED}
+)
+
+
+# Chave de single-flight: (kind, source, external_id). Duas submissões com a
+# mesma chave compartilham a mesma task enquanto ela não terminar.
+FlightKey = Tuple[str, str, str]
+
+
+def _flight_key(kind: DownloadKind, url: str, item_id: str) -> FlightKey:
+    """Identidade do conteúdo baixado, independente da forma da URL.
+
+    Só com os parsers offline (``cache_id``): roda sob ``queue_lock`` e nunca
+    pode cair na extração de rede do yt-dlp. Sem ``external_id`` reconhecível
+    na URL, usa o ID do item (que define o diretório de destino do download).
+    """
+    try:
+        downloader = get_downloader(url)
+    except ValueError:
+        return (kind.value, UNKNOWN_SOURCE, item_id)
+    external_id = downloader.cache_id(url)
+    if external_id == url:
+        external_id = item_id
+    return (kind.value, downloader.source, external_id)
+
+
+def _to_datetime(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts) if ts is not None else None
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+@dataclass(slots=True)
 class DownloadTask:
-    """Representa uma tarefa de download na fila"""
+    """Representa uma tarefa de download na fila.
+
+    Registro compacto: ``__slots__`` (sem ``__dict__`` por instância) e
+    instantes guardados como epoch ``float``. Os atributos ``*_at`` expõem
+    os mesmos instantes como ``datetime`` para quem consome a task.
+
+    ``audio_id`` é o ID do item baixado: um áudio ou, com
+    ``kind=DownloadKind.VIDEO``, um vídeo (baixado em ``resolution``).
+    """
 
     id: str
     audio_id: str
@@ -30,52 +106,418 @@ class DownloadTask:
     high_quality: bool = True
     status: DownloadStatus = DownloadStatus.QUEUED
     priority: int = 0  # Maior número = maior prioridade
-    created_at: datetime = field(default_factory=datetime.now)
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
+    created_ts: float = field(default_factory=time.time)
+    started_ts: Optional[float] = None
+    completed_ts: Optional[float] = None
     error_message: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
     retry_delay: int = 5  # segundos
-    next_retry_at: Optional[datetime] = None
+    retry_jitter: float = 0.25  # fração aleatória (±) aplicada ao backoff
+    next_retry_ts: Optional[float] = None
     progress: int = 0
+    source: str = ""  # Downloader.source (lane); derivado da URL se vazio
+    kind: DownloadKind = DownloadKind.AUDIO
+    resolution: Optional[str] = None  # só para vídeos
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.created_ts)
+
+    @property
+    def started_at(self) -> Optional[datetime]:
+        return _to_datetime(self.started_ts)
+
+    @started_at.setter
+    def started_at(self, value: Optional[datetime]) -> None:
+        self.started_ts = _to_timestamp(value)
+
+    @property
+    def completed_at(self) -> Optional[datetime]:
+        return _to_datetime(self.completed_ts)
+
+    @completed_at.setter
+    def completed_at(self, value: Optional[datetime]) -> None:
+        self.completed_ts = _to_timestamp(value)
+
+    @property
+    def next_retry_at(self) -> Optional[datetime]:
+        return _to_datetime(self.next_retry_ts)
+
+    @next_retry_at.setter
+    def next_retry_at(self, value: Optional[datetime]) -> None:
+        self.next_retry_ts = _to_timestamp(value)
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in _TERMINAL_STATUSES
 
     def can_retry(self) -> bool:
         """Verifica se pode tentar novamente"""
         return (
-            self.status == DownloadStatus.FAILED and self.retry_count < self.max_retries
+            self.status not in (DownloadStatus.CANCELLED, DownloadStatus.COMPLETED)
+            and self.retry_count < self.max_retries
         )
 
     def should_retry_now(self) -> bool:
         """Verifica se deve tentar novamente agora"""
         if not self.can_retry():
             return False
-        if not self.next_retry_at:
+        if self.next_retry_ts is None:
             return True
-        return datetime.now() >= self.next_retry_at
+        return time.time() >= self.next_retry_ts
 
     def schedule_retry(self):
-        """Agenda próxima tentativa com backoff exponencial"""
+        """Agenda próxima tentativa com backoff exponencial e jitter.
+
+        O jitter espalha os retries de tasks que falharam juntas (ex.: uma
+        playlist inteira) para que não voltem todas no mesmo instante.
+        """
         self.retry_count += 1
         delay = self.retry_delay * (2 ** (self.retry_count - 1))  # backoff exponencial
-        self.next_retry_at = datetime.now() + timedelta(seconds=delay)
+        if self.retry_jitter:
+            delay *= random.uniform(1 - self.retry_jitter, 1 + self.retry_jitter)
+        self.next_retry_ts = time.time() + delay
         self.status = DownloadStatus.RETRYING
         logger.info(
-            f"Agendando retry {self.retry_count} para {self.audio_id} em {delay}s"
+            f"Agendando retry {self.retry_count} para {self.audio_id} em {delay:.1f}s"
         )
 
+    def to_record(self) -> dict:
+        """Linha para a tabela ``download_tasks`` (estado persistido)."""
+        record = self.to_history_record()
+        record["next_retry_at"] = self.next_retry_at
+        return record
+
+    def to_history_record(self) -> dict:
+        """Linha para a tabela ``download_task_history``."""
+        return {
+            "task_id": self.id,
+            "audio_id": self.audio_id,
+            "url": self.url,
+            "high_quality": self.high_quality,
+            "status": self.status.value,
+            "priority": self.priority,
+            "error_message": self.error_message,
+            "retry_count": self.retry_count,
+            "max_retries": self.max_retries,
+            "kind": self.kind.value,
+            "resolution": self.resolution,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+        }
+
+    @classmethod
+    def from_record(cls, row) -> "DownloadTask":
+        """Reconstrói uma task a partir de ``download_tasks`` ou do histórico."""
+        status = DownloadStatus(row.status)
+        return cls(
+            id=row.task_id,
+            audio_id=row.audio_id,
+            url=row.url,
+            high_quality=row.high_quality,
+            status=status,
+            priority=row.priority,
+            created_ts=row.created_at.timestamp(),
+            started_ts=_to_timestamp(row.started_at),
+            completed_ts=_to_timestamp(row.completed_at),
+            error_message=row.error_message,
+            retry_count=row.retry_count,
+            max_retries=row.max_retries,
+            next_retry_ts=_to_timestamp(getattr(row, "next_retry_at", None)),
+            progress=100 if status == DownloadStatus.COMPLETED else 0,
+            kind=DownloadKind(getattr(row, "kind", None) or DownloadKind.AUDIO),
+            resolution=getattr(row, "resolution", None),
+        )
+
+
+class TaskStore:
+    """Armazena as tasks da fila com índices mantidos a cada transição.
+
+    Além do mapa ``id -> task``, mantém para cada status e para cada
+    ``audio_id`` a lista de ``(seq, task_id)`` ordenada pela ordem de
+    inserção. Contadores por status saem de ``len()`` (O(1)) e a listagem
+    filtrada/paginada percorre só a fatia pedida.
+
+    Toda mudança de ``task.status`` feita pela fila passa por
+    :meth:`set_status` (ou :meth:`sync`, após mutações como
+    ``DownloadTask.schedule_retry``). Não é thread-safe: use com o
+    ``queue_lock`` da fila. Os índices guardam só uma tupla ``(seq, id)``
+    compartilhada por task, para manter o custo por task baixo.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, DownloadTask] = {}
+        # Uma única tupla (seq, task_id) por task, compartilhada por todos os
+        # índices em que ela aparece.
+        self._keys: Dict[str, Tuple[int, str]] = {}
+        self._by_status: Dict[DownloadStatus, List[Tuple[int, str]]] = {
+            status: [] for status in DownloadStatus
+        }
+        # audio_id -> chave (caso comum: uma task por áudio) ou lista de chaves
+        self._by_audio: Dict[str, Union[Tuple[int, str], List[Tuple[int, str]]]] = {}
+        self._all: List[Tuple[int, str]] = []
+        self._counter = itertools.count()
+        # IDs alterados desde o último flush para o SQLite
+        self.dirty: Set[str] = set()
+
+    # Interface de mapeamento (somente leitura) -------------------------
+
+    def __getitem__(self, task_id: str) -> DownloadTask:
+        return self._tasks[task_id]
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def get(self, task_id: str, default=None) -> Optional[DownloadTask]:
+        return self._tasks.get(task_id, default)
+
+    def values(self):
+        return self._tasks.values()
+
+    def items(self):
+        return self._tasks.items()
+
+    # Mutação ------------------------------------------------------------
+
+    @staticmethod
+    def _remove_key(keys: List[Tuple[int, str]], key: Tuple[int, str]) -> bool:
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+            return True
+        return False
+
+    def _unindex_status(self, key: Tuple[int, str], hint: DownloadStatus) -> None:
+        """Remove ``key`` do índice de status em que ela estiver.
+
+        O status indexado não é guardado por task (economia de memória):
+        tenta-se primeiro ``hint`` e depois os demais, cada um com bisect.
+        """
+        if self._remove_key(self._by_status[hint], key):
+            return
+        for status, keys in self._by_status.items():
+            if status != hint and self._remove_key(keys, key):
+                return
+
+    def _audio_keys(self, audio_id: str) -> List[Tuple[int, str]]:
+        keys = self._by_audio.get(audio_id)
+        if keys is None:
+            return []
+        return [keys] if isinstance(keys, tuple) else keys
+
+    def add(self, task: DownloadTask) -> None:
+        """Registra uma nova task e a indexa."""
+        key = (next(self._counter), task.id)
+        self._tasks[task.id] = task
+        self._keys[task.id] = key
+        self.dirty.add(task.id)
+        # seq é crescente: inserir no fim mantém as listas ordenadas
+        self._all.append(key)
+        self._by_status[task.status].append(key)
+        existing = self._by_audio.get(task.audio_id)
+        if existing is None:
+            self._by_audio[task.audio_id] = key
+        elif isinstance(existing, tuple):
+            self._by_audio[task.audio_id] = [existing, key]
+        else:
+            existing.append(key)
+
+    def remove(self, task_id: str) -> Optional[DownloadTask]:
+        """Remove a task e todas as suas entradas de índice."""
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+        key = self._keys.pop(task_id)
+        self.dirty.discard(task_id)
+        self._remove_key(self._all, key)
+        self._unindex_status(key, task.status)
+        audio_keys = self._by_audio.get(task.audio_id)
+        if isinstance(audio_keys, tuple):
+            del self._by_audio[task.audio_id]
+        elif audio_keys is not None:
+            self._remove_key(audio_keys, key)
+            if len(audio_keys) == 1:
+                self._by_audio[task.audio_id] = audio_keys[0]
+        return task
+
+    def set_status(self, task: DownloadTask, status: DownloadStatus) -> None:
+        """Altera o status da task e move-a para o índice correspondente."""
+        old = task.status
+        task.status = status
+        self.sync(task, old)
+
+    def sync(self, task: DownloadTask, old_status: DownloadStatus) -> None:
+        """Reindexa a task depois que ``task.status`` saiu de ``old_status``."""
+        key = self._keys.get(task.id)
+        if key is None or old_status == task.status:
+            return
+        self._unindex_status(key, old_status)
+        bisect.insort(self._by_status[task.status], key)
+        self.dirty.add(task.id)
+
+    def mark_dirty(self, task_id: str) -> None:
+        """Marca para o próximo flush uma task alterada fora de ``set_status``."""
+        if task_id in self._tasks:
+            self.dirty.add(task_id)
+
+    # Consultas ----------------------------------------------------------
+
+    def count(self, status: DownloadStatus) -> int:
+        return len(self._by_status[status])
+
+    def finished_before(self, cutoff_ts: float) -> List[DownloadTask]:
+        """Tasks terminais concluídas antes de ``cutoff_ts`` (epoch)."""
+        result = []
+        for status in _TERMINAL_STATUSES:
+            for _, task_id in self._by_status[status]:
+                task = self._tasks[task_id]
+                if task.completed_ts is not None and task.completed_ts < cutoff_ts:
+                    result.append(task)
+        return result
+
+    def by_audio_id(self, audio_id: str) -> List[DownloadTask]:
+        return [self._tasks[task_id] for _, task_id in self._audio_keys(audio_id)]
+
+    def page(
+        self,
+        status: Optional[DownloadStatus] = None,
+        audio_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> Tuple[List[DownloadTask], Optional[int]]:
+        """Retorna até ``limit`` tasks em ordem de inserção após ``cursor``.
+
+        O cursor é opaco para o cliente (o ``seq`` da última task devolvida);
+        o segundo item do retorno é o cursor da próxima página, ou None.
+        """
+        if audio_id is not None:
+            keys = self._audio_keys(audio_id)
+        elif status is not None:
+            keys = self._by_status[status]
+        else:
+            keys = self._all
+
+        start = 0 if cursor is None else bisect.bisect_right(keys, (cursor, "\uffff"))
+        result: List[DownloadTask] = []
+        last_seq = None
+        for i in range(start, len(keys)):
+            seq, task_id = keys[i]
+            task = self._tasks[task_id]
+            if status is not None and task.status != status:
+                continue  # só acontece no filtro combinado por audio_id
+            result.append(task)
+            last_seq = seq
+            if len(result) >= limit:
+                break
+
+        if not result or last_seq == keys[-1][0]:
+            return result, None
+        return result, last_seq
+
 
 class DownloadQueue:
-    """Gerenciador de fila de downloads com controle de concorrência"""
+    """Gerenciador de fila de downloads com controle de concorrência.
+
+    O agendamento é orientado a eventos: tasks QUEUED ficam num heap
+    ``(-priority, created_at, seq)`` por lane (fonte da URL, ver
+    ``download_lanes``) e o loop de processamento dorme numa
+    ``asyncio.Condition`` (que compartilha o ``queue_lock``) até que uma task
+    seja adicionada, um slot seja liberado, um retry vença ou uma lane ganhe
+    token. Cada despertar preenche todos os slots livres de uma vez, com custo
+    O(log n) por task iniciada em vez de ordenar a fila inteira a cada segundo.
 
-    def __init__(self, max_concurrent_downloads: int = 2):
+    ``max_concurrent_downloads`` é o limite global, em slots; cada lane
+    reserva o seu ``concurrency`` dentro dele e pode emprestar slots que
+    nenhuma outra lane com trabalho pronto esteja reservando. Jobs de vídeo
+    rodam em lanes próprias e ocupam ``weight`` slots cada. O token bucket da
+    fonte limita a taxa de inícios e nunca é emprestado.
+
+    Retries agendados ficam num segundo heap ordenado por prazo
+    ``(next_retry_ts, seq)``: o loop dorme até o prazo mais próximo e só
+    toca nas tasks que já venceram.
+
+    Submissões são coalescidas (single-flight) por ``(kind, source,
+    external_id)``: enquanto houver uma task não terminal para o mesmo
+    conteúdo, ``add_download`` devolve o ID dela em vez de criar outra, e
+    o yt-dlp roda uma única vez para o mesmo diretório de destino.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_downloads: int = 2,
+        lanes: Optional[Dict[str, LaneConfig]] = None,
+        archive_after_seconds: Optional[float] = DOWNLOAD_TASK_ARCHIVE_AFTER_SECONDS,
+        archive_interval: float = DOWNLOAD_TASK_ARCHIVE_INTERVAL,
+        persist: bool = False,
+        flush_interval: float = DOWNLOAD_QUEUE_FLUSH_INTERVAL,
+        autotuner: Optional[ConcurrencyAutoTuner] = None,
+    ):
         self.max_concurrent_downloads = max_concurrent_downloads
-        self.tasks: Dict[str, DownloadTask] = {}
+        # Modo adaptativo opcional: o autotuner passa a controlar
+        # max_concurrent_downloads (ver download_autotune).
+        self.autotuner = autotuner
+        if autotuner is not None:
+            self.max_concurrent_downloads = autotuner.limit
+        self._autotune_task: Optional[asyncio.Task] = None
+        # Tasks terminais mais antigas que isso vão para o histórico no SQLite
+        # (None desliga o compactador automático).
+        self.archive_after_seconds = archive_after_seconds
+        self.archive_interval = archive_interval
+        self._archiver_task: Optional[asyncio.Task] = None
+        # Persistência em ``download_tasks``: as transições marcam a task como
+        # suja e o flusher grava todas de uma vez a cada ``flush_interval``.
+        self.persist = persist
+        self.flush_interval = flush_interval
+        self._flusher_task: Optional[asyncio.Task] = None
+        # Serializa flush e arquivamento para que um não reescreva o outro.
+        self._db_lock = asyncio.Lock()
+        self._stopping = False
+        self.tasks = TaskStore()
         self.active_downloads: Dict[str, asyncio.Task] = {}
         self.queue_lock = asyncio.Lock()
         self.is_running = False
         self._processor_task: Optional[asyncio.Task] = None
 
+        # A Condition usa o próprio queue_lock: quem já segura o lock pode
+        # notificar o loop sem um segundo nível de sincronização.
+        self._wakeup = asyncio.Condition(self.queue_lock)
+
+        # Tasks prontas, um heap por lane. Entradas são listas mutáveis
+        # [-priority, created_ts, seq, task_id]; remoção/repriorização é
+        # "preguiçosa" (task_id vira None e a entrada é descartada no pop).
+        # Chaves de lane: "youtube" (áudio) ou "video:youtube". As lanes de
+        # uma mesma fonte compartilham o token bucket em ``_buckets``.
+        lane_configs = default_lane_configs() if lanes is None else lanes
+        self._lanes: Dict[str, Lane] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Lanes de áudio primeiro: são elas que definem o bucket da fonte
+        for key in sorted(lane_configs, key=lambda k: ":" in k):
+            kind, _, source = key.rpartition(":")
+            self._make_lane(kind or AUDIO_KIND, source, lane_configs[key])
+        self._heap_seq = itertools.count()
+
+        # Heap de prazos de retry: (next_retry_ts, seq, task_id). Entradas
+        # de tasks canceladas/reagendadas são descartadas ao vencerem.
+        self._retry_heap: List[Tuple[float, int, str]] = []
+
+        # Single-flight: chave do conteúdo -> task não terminal que o baixa
+        self._inflight: Dict[FlightKey, str] = {}
+        self._flight_keys: Dict[str, FlightKey] = {}
+        self.coalesced = 0  # submissões anexadas a uma task existente
+
+        # Retomada de partials (ver download_resume): tentativas que
+        # continuaram de onde a anterior parou e bytes que não foram rebaixados
+        self.resumed_attempts = 0
+        self.resumed_bytes = 0
+
         # Callbacks
         self.on_download_started: Optional[Callable[[DownloadTask], None]] = None
         self.on_download_progress: Optional[Callable[[DownloadTask, int], None]] = None
@@ -87,119 +529,459 @@ class DownloadQueue:
             f"Fila de downloads inicializada com limite de {max_concurrent_downloads} downloads simultâneos"
         )
 
+    # ------------------------------------------------------------------
+    # Lanes / heaps de prontas (chamar sempre com queue_lock adquirido)
+    # ------------------------------------------------------------------
+
+    def _make_lane(
+        self, kind: str, source: str, config: Optional[LaneConfig] = None
+    ) -> Lane:
+        """Cria e registra a lane ``(kind, source)`` com o bucket da fonte."""
+        if config is None:
+            config = LaneConfig.from_env(source, kind)
+        bucket = self._buckets.get(source)
+        if bucket is None:
+            # O limite de taxa é o da lane de áudio da fonte
+            rate_config = config if kind == AUDIO_KIND else LaneConfig.from_env(source)
+            bucket = TokenBucket(rate_config.rate, rate_config.burst)
+            self._buckets[source] = bucket
+        lane = Lane(source, config, kind=kind, bucket=bucket)
+        self._lanes[lane.key] = lane
+        return lane
+
+    def _lane_for(self, task: DownloadTask) -> Lane:
+        """Lane da task; lanes de fontes sem configuração são criadas sob demanda."""
+        if not task.source:
+            task.source = source_for_url(task.url)
+        lane = self._lanes.get(lane_key(task.kind.value, task.source))
+        if lane is None:
+            lane = self._make_lane(task.kind.value, task.source)
+        return lane
+
+    def _weight(self, lane: Lane) -> int:
+        """Slots que um job da lane ocupa (nunca mais que o limite global)."""
+        return max(1, min(lane.weight, self.max_concurrent_downloads))
+
+    def _slots_in_use(self) -> int:
+        return sum(
+            lane.active * self._weight(lane)
+            for lane in self._lanes.values()
+            if lane.active
+        )
+
+    def _push_ready(self, task: DownloadTask) -> None:
+        """Insere (ou reinsere com nova prioridade) uma task QUEUED na sua lane."""
+        entry = [
+            -task.priority,
+            task.created_ts,
+            next(self._heap_seq),
+            task.id,
+        ]
+        self._lane_for(task).push(task.id, entry)
+
+    def _discard_ready(self, task_id: str) -> None:
+        """Invalida a entrada de ``task_id`` no heap da lane, se houver."""
+        task = self.tasks.get(task_id)
+        if task is not None:
+            self._lane_for(task).discard(task_id)
+
+    def _source_active(self) -> Dict[str, int]:
+        """Downloads ativos por fonte, somando as lanes de áudio e de vídeo."""
+        active: Dict[str, int] = {}
+        for lane in self._lanes.values():
+            if lane.active:
+                active[lane.source] = active.get(lane.source, 0) + lane.active
+        return active
+
+    def _source_capped(self, lane: Lane, active: Dict[str, int]) -> bool:
+        """O autotuner limitou a fonte da lane e o teto já foi atingido?"""
+        if self.autotuner is None:
+            return False
+        cap = self.autotuner.source_limit(lane.source)
+        return cap is not None and active.get(lane.source, 0) >= cap
+
+    def _lane_candidates(self) -> Tuple[List[Lane], int, Dict[str, int]]:
+        """Lanes com trabalho pronto, slots que reservam e ativos por fonte.
+
+        Lanes de fontes no teto do autotuner não reservam slots.
+        """
+        waiting = [lane for lane in self._lanes.values() if lane.peek() is not None]
+        active = self._source_active()
+        reserved = sum(
+            (lane.config.concurrency - lane.active) * self._weight(lane)
+            for lane in waiting
+            if lane.under_limit and not self._source_capped(lane, active)
+        )
+        return waiting, reserved, active
+
+    def _may_start(
+        self, lane: Lane, reserved: int, in_use: int, active: Dict[str, int]
+    ) -> bool:
+        """A lane pode ocupar ``weight`` slots (próprios ou emprestados) agora?"""
+        if self._source_capped(lane, active):
+            return False
+        needed = in_use + self._weight(lane)
+        if lane.under_limit:
+            return needed <= self.max_concurrent_downloads
+        # Empréstimo: só slots que nenhuma lane com trabalho pronto reserva
+        return needed + reserved <= self.max_concurrent_downloads
+
+    def _choose_lane(self) -> Optional[Lane]:
+        """Lane que deve iniciar o próximo download, ou None.
+
+        Entre as lanes elegíveis (slot disponível e token no bucket) vence a
+        que tiver a task de maior prioridade/mais antiga no topo.
+        """
+        in_use = self._slots_in_use()
+        if in_use >= self.max_concurrent_downloads:
+            return None
+        waiting, reserved, active = self._lane_candidates()
+        now = time.monotonic()
+        best = None
+        for lane in waiting:
+            if not self._may_start(lane, reserved, in_use, active):
+                continue
+            if not lane.bucket.available(now):
+                continue
+            if best is None or lane.peek() < best.peek():
+                best = lane
+        return best
+
+    def _seconds_until_next_token(self) -> Optional[float]:
+        """Segundos até uma lane bloqueada só por falta de token poder iniciar."""
+        in_use = self._slots_in_use()
+        if in_use >= self.max_concurrent_downloads:
+            return None
+        waiting, reserved, active = self._lane_candidates()
+        now = time.monotonic()
+        waits = [
+            lane.bucket.seconds_until_available(now)
+            for lane in waiting
+            if self._may_start(lane, reserved, in_use, active)
+        ]
+        return min(waits) if waits else None
+
+    def _inflight_owner(self, key: FlightKey) -> Optional[DownloadTask]:
+        """Task não terminal que já baixa o conteúdo ``key``, se houver."""
+        task = self.tasks.get(self._inflight.get(key))
+        if task is None or task.is_terminal:
+            return None
+        return task
+
+    def _claim_flight(self, task: DownloadTask, key: FlightKey) -> None:
+        self._release_flight(task.id)
+        self._inflight[key] = task.id
+        self._flight_keys[task.id] = key
+
+    def _release_flight(self, task_id: str) -> None:
+        key = self._flight_keys.pop(task_id, None)
+        if key is not None and self._inflight.get(key) == task_id:
+            del self._inflight[key]
+
     async def add_download(
-        self, audio_id: str, url: str, high_quality: bool = True, priority: int = 0
+        self,
+        audio_id: str,
+        url: str,
+        high_quality: bool = True,
+        priority: int = 0,
+        kind: DownloadKind = DownloadKind.AUDIO,
+        resolution: Optional[str] = None,
+    ) -> str:
+        """Adiciona um download à fila.
+
+        Com ``kind=DownloadKind.VIDEO``, ``audio_id`` é o ID do vídeo
+        registrado e ``resolution`` a resolução pedida.
+
+        Se o mesmo conteúdo já está na fila ou baixando, retorna o ID da task
+        existente (elevando a prioridade dela, se a nova for maior).
+        """
+        async with self._wakeup:
+            task_id = self._enqueue(
+                audio_id, url, high_quality, priority, kind, resolution
+            )
+            self._wakeup.notify()
+        return task_id
+
+    async def add_downloads(self, items: List[Dict[str, Any]]) -> List[str]:
+        """Adiciona vários downloads à fila de uma vez (ex.: uma playlist).
+
+        Cada item traz os argumentos de :meth:`add_download`. A fila é travada
+        uma única vez e o scheduler acordado uma vez. Retorna os IDs das tasks
+        na mesma ordem dos itens.
+        """
+        if not items:
+            return []
+        async with self._wakeup:
+            task_ids = [self._enqueue(**item) for item in items]
+            self._wakeup.notify()
+        logger.info(f"{len(task_ids)} downloads adicionados à fila em lote")
+        return task_ids
+
+    def _enqueue(
+        self,
+        audio_id: str,
+        url: str,
+        high_quality: bool = True,
+        priority: int = 0,
+        kind: DownloadKind = DownloadKind.AUDIO,
+        resolution: Optional[str] = None,
     ) -> str:
-        """Adiciona um download à fila"""
-        task_id = str(uuid.uuid4())
+        """Cria a task (ou anexa à task em andamento). Requer ``self._wakeup``."""
+        kind = DownloadKind(kind)
+        key = _flight_key(kind, url, audio_id)
+
+        owner = self._inflight_owner(key)
+        if owner is not None:
+            self.coalesced += 1
+            if priority > owner.priority:
+                owner.priority = priority
+                self.tasks.mark_dirty(owner.id)
+                if owner.status == DownloadStatus.QUEUED:
+                    self._push_ready(owner)
+            logger.info(
+                f"Download já em andamento para {audio_id}: anexado à task {owner.id}"
+            )
+            return owner.id
+
         task = DownloadTask(
-            id=task_id,
+            id=str(uuid.uuid4()),
             audio_id=audio_id,
             url=url,
             high_quality=high_quality,
             priority=priority,
+            source=key[1],
+            kind=kind,
+            resolution=resolution,
         )
+        self.tasks.add(task)
+        self._claim_flight(task, key)
+        self._push_ready(task)
+        logger.info(f"Download adicionado à fila: {audio_id} (ID: {task.id})")
+        return task.id
 
-        async with self.queue_lock:
-            self.tasks[task_id] = task
+    async def set_priority(self, task_id: str, priority: int) -> bool:
+        """Altera a prioridade de uma task.
 
-        logger.info(f"Download adicionado à fila: {audio_id} (ID: {task_id})")
-        return task_id
+        Se a task ainda está QUEUED, ela é reposicionada no heap e passa a
+        valer imediatamente no próximo preenchimento de slots.
+        """
+        async with self._wakeup:
+            task = self.tasks.get(task_id)
+            if not task:
+                return False
+            task.priority = priority
+            self.tasks.mark_dirty(task_id)
+            if task.status == DownloadStatus.QUEUED:
+                self._push_ready(task)
+                self._wakeup.notify()
+        logger.info(f"Prioridade da task {task_id} alterada para {priority}")
+        return True
+
+    async def retry_download(self, task_id: str) -> bool:
+        """Recoloca na fila uma task FAILED (retry manual).
+
+        Tasks já arquivadas no histórico voltam para a memória.
+        """
+        archived = None
+        if task_id not in self.tasks:
+            archived = await self.get_task_status(task_id)
+
+        async with self._wakeup:
+            task = self.tasks.get(task_id)
+            if task is None and archived is not None:
+                if archived.status != DownloadStatus.FAILED:
+                    return False
+                task = archived
+                self.tasks.add(task)
+            if not task or task.status != DownloadStatus.FAILED:
+                return False
+            key = _flight_key(task.kind, task.url, task.audio_id)
+            owner = self._inflight_owner(key)
+            if owner is not None:
+                logger.info(
+                    f"Retry ignorado: {task.audio_id} já está na task {owner.id}"
+                )
+                return False
+            self._claim_flight(task, key)
+            self.tasks.set_status(task, DownloadStatus.QUEUED)
+            task.error_message = None
+            task.next_retry_ts = None
+            self._push_ready(task)
+            self._wakeup.notify()
+        logger.info(f"Download recolocado na fila: {task.audio_id}")
+        return True
 
     async def cancel_download(self, task_id: str) -> bool:
         """Cancela um download"""
-        async with self.queue_lock:
+        async with self._wakeup:
             task = self.tasks.get(task_id)
             if not task:
                 return False
 
-            # Se está baixando ativamente, cancelar task
-            if task_id in self.active_downloads:
-                active_task = self.active_downloads[task_id]
-                active_task.cancel()
-                try:
-                    await active_task
-                except asyncio.CancelledError:
-                    pass
-                del self.active_downloads[task_id]
+            self._discard_ready(task_id)
+            active_task = self.active_downloads.pop(task_id, None)
 
-            task.status = DownloadStatus.CANCELLED
-            task.completed_at = datetime.now()
+            self.tasks.set_status(task, DownloadStatus.CANCELLED)
+            task.completed_ts = time.time()
+            self._release_flight(task_id)
+            self._wakeup.notify()
 
-            if self.on_download_cancelled:
-                await self.on_download_cancelled(task)
+        # Aguarda o cancelamento fora do lock: o ``finally`` da task ativa
+        # precisa do lock para liberar o slot.
+        if active_task is not None:
+            active_task.cancel()
+            try:
+                await active_task
+            except asyncio.CancelledError:
+                pass
 
-            logger.info(f"Download cancelado: {task.audio_id}")
-            return True
+        if self.on_download_cancelled:
+            await self.on_download_cancelled(task)
+
+        logger.info(f"Download cancelado: {task.audio_id}")
+        return True
 
     async def get_queue_status(self) -> Dict:
         """Retorna status da fila"""
         async with self.queue_lock:
-            total = len(self.tasks)
-            queued = len(
-                [t for t in self.tasks.values() if t.status == DownloadStatus.QUEUED]
-            )
-            downloading = len(
-                [
-                    t
-                    for t in self.tasks.values()
-                    if t.status == DownloadStatus.DOWNLOADING
-                ]
-            )
-            completed = len(
-                [t for t in self.tasks.values() if t.status == DownloadStatus.COMPLETED]
-            )
-            failed = len(
-                [t for t in self.tasks.values() if t.status == DownloadStatus.FAILED]
-            )
-            cancelled = len(
-                [t for t in self.tasks.values() if t.status == DownloadStatus.CANCELLED]
-            )
-            retrying = len(
-                [t for t in self.tasks.values() if t.status == DownloadStatus.RETRYING]
-            )
-
+            count = self.tasks.count
             return {
-                "total": total,
-                "queued": queued,
-                "downloading": downloading,
-                "completed": completed,
-                "failed": failed,
-                "cancelled": cancelled,
-                "retrying": retrying,
+                "total": len(self.tasks),
+                "queued": count(DownloadStatus.QUEUED),
+                "downloading": count(DownloadStatus.DOWNLOADING),
+                "completed": count(DownloadStatus.COMPLETED),
+                "failed": count(DownloadStatus.FAILED),
+                "cancelled": count(DownloadStatus.CANCELLED),
+                "retrying": count(DownloadStatus.RETRYING),
+                "in_flight": len(self._inflight),
+                "coalesced": self.coalesced,
+                "resume": {
+                    "resumed_attempts": self.resumed_attempts,
+                    "bytes_saved": self.resumed_bytes,
+                },
                 "active_slots": len(self.active_downloads),
+                "slots_in_use": self._slots_in_use(),
                 "max_concurrent": self.max_concurrent_downloads,
+                "adaptive": self.autotuner.snapshot() if self.autotuner else None,
+                "lanes": {key: lane.snapshot() for key, lane in self._lanes.items()},
             }
 
     async def get_task_status(self, task_id: str) -> Optional[DownloadTask]:
-        """Retorna status de uma task específica"""
-        return self.tasks.get(task_id)
+        """Retorna status de uma task específica (em memória ou arquivada)"""
+        task = self.tasks.get(task_id)
+        if task is not None:
+            return task
+        rows = await self._query_history("get_by_task_id", task_id)
+        return DownloadTask.from_record(rows) if rows else None
 
     async def get_tasks_by_audio_id(self, audio_id: str) -> List[DownloadTask]:
-        """Retorna todas as tasks de um audio_id"""
-        return [task for task in self.tasks.values() if task.audio_id == audio_id]
+        """Retorna todas as tasks de um audio_id (arquivadas primeiro)"""
+        live = self.tasks.by_audio_id(audio_id)
+        live_ids = {task.id for task in live}
+        rows = await self._query_history("get_by_audio_id", audio_id) or []
+        archived = [
+            DownloadTask.from_record(row) for row in rows if row.task_id not in live_ids
+        ]
+        return archived + live
+
+    async def pending_items(self) -> Set[Tuple[DownloadKind, str]]:
+        """``(kind, audio_id)`` de todas as tasks ainda não terminadas."""
+        async with self.queue_lock:
+            return {
+                (task.kind, task.audio_id)
+                for task in self.tasks.values()
+                if not task.is_terminal
+            }
+
+    async def list_tasks(
+        self,
+        status: Optional[DownloadStatus] = None,
+        audio_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> Tuple[List[DownloadTask], Optional[int]]:
+        """Lista tasks (ordem de inserção) com filtro e paginação por cursor.
+
+        Retorna ``(tasks, next_cursor)``; ``next_cursor`` é None na última
+        página.
+        """
+        async with self.queue_lock:
+            return self.tasks.page(
+                status=status, audio_id=audio_id, limit=limit, cursor=cursor
+            )
+
+    async def list_archived_tasks(
+        self,
+        status: Optional[DownloadStatus] = None,
+        audio_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> Tuple[List[DownloadTask], Optional[int]]:
+        """Como :meth:`list_tasks`, mas sobre o histórico no SQLite."""
+        page = await self._query_history(
+            "page",
+            status=status.value if status else None,
+            audio_id=audio_id,
+            limit=limit,
+            cursor=cursor,
+        )
+        if not page:
+            return [], None
+        rows, next_cursor = page
+        return [DownloadTask.from_record(row) for row in rows], next_cursor
+
+    async def _query_history(self, method: str, *args, **kwargs):
+        """Chama ``DownloadTaskHistoryRepository.<method>``; None em caso de erro."""
+        from app.db.database import get_db_context
+        from app.db.repositories import DownloadTaskHistoryRepository
+
+        try:
+            async with get_db_context() as session:
+                repo = DownloadTaskHistoryRepository(session)
+                return await getattr(repo, method)(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Falha ao consultar histórico de downloads: {e}")
+            return None
 
     def start_processing(self):
         """Inicia o processamento da fila"""
         if not self.is_running:
             self.is_running = True
             self._processor_task = asyncio.create_task(self._process_queue())
+            self._stopping = False
+            if self.archive_after_seconds is not None:
+                self._archiver_task = asyncio.create_task(self._archive_loop())
+            if self.persist:
+                self._flusher_task = asyncio.create_task(self._flush_loop())
+            if self.autotuner is not None:
+                self._autotune_task = asyncio.create_task(self._autotune_loop())
             logger.info("Processamento da fila de downloads iniciado")
 
     async def stop_processing(self):
-        """Para o processamento da fila"""
+        """Para o processamento da fila.
+
+        Downloads interrompidos voltam para QUEUED (não CANCELLED) e o estado
+        é gravado uma última vez, para serem retomados no próximo startup.
+        """
         self.is_running = False
+        self._stopping = True
 
-        # Cancelar processor task
-        if self._processor_task:
-            self._processor_task.cancel()
-            try:
-                await self._processor_task
-            except asyncio.CancelledError:
-                pass
+        # Cancelar processor task, compactador e flusher
+        for background in (
+            self._processor_task,
+            self._archiver_task,
+            self._flusher_task,
+            self._autotune_task,
+        ):
+            if background:
+                background.cancel()
+                try:
+                    await background
+                except asyncio.CancelledError:
+                    pass
 
         # Cancelar todos os downloads ativos
-        for task_id, active_task in self.active_downloads.items():
+        for task_id, active_task in list(self.active_downloads.items()):
             active_task.cancel()
             try:
                 await active_task
@@ -207,45 +989,62 @@ class DownloadQueue:
                 pass
 
         self.active_downloads.clear()
+
+        if self.persist:
+            try:
+                await self.flush_state()
+            except Exception as e:
+                logger.error(f"Erro ao gravar estado da fila no encerramento: {e}")
         logger.info("Processamento da fila de downloads parado")
 
     async def _process_queue(self):
-        """Loop principal de processamento da fila"""
+        """Loop principal de processamento da fila.
+
+        Dorme na Condition até ser notificado (task adicionada, slot liberado,
+        prioridade alterada) ou até o próximo retry agendado vencer / a
+        próxima lane bloqueada por taxa ganhar token.
+        """
         while self.is_running:
             try:
-                await self._process_next_downloads()
-                await self._check_retries()
-                await asyncio.sleep(1)  # Check a cada segundo
+                async with self._wakeup:
+                    self._check_retries()
+                    self._process_next_downloads()
+                    waits = [
+                        t
+                        for t in (
+                            self._seconds_until_next_retry(),
+                            self._seconds_until_next_token(),
+                        )
+                        if t is not None
+                    ]
+                    timeout = min(waits) if waits else None
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Erro no processamento da fila: {e}")
                 await asyncio.sleep(5)  # Wait antes de tentar novamente
 
-    async def _process_next_downloads(self):
-        """Processa próximos downloads disponíveis"""
-        async with self.queue_lock:
-            # Verificar se há slots disponíveis
-            if len(self.active_downloads) >= self.max_concurrent_downloads:
-                return
+    def _process_next_downloads(self):
+        """Inicia downloads até preencher todos os slots livres.
 
-            # Encontrar próxima task na fila (por prioridade e tempo)
-            available_tasks = [
-                task
-                for task in self.tasks.values()
-                if task.status == DownloadStatus.QUEUED
-            ]
-
-            if not available_tasks:
+        Deve ser chamado com ``queue_lock`` adquirido.
+        """
+        while True:
+            lane = self._choose_lane()
+            if lane is None:
                 return
+            next_task = self.tasks.get(lane.pop())
+            if next_task is None or next_task.status != DownloadStatus.QUEUED:
+                continue
 
-            # Ordenar por prioridade (desc) e depois por tempo de criação (asc)
-            available_tasks.sort(key=lambda t: (-t.priority, t.created_at))
-
-            # Pegar próxima task
-            next_task = available_tasks[0]
-            next_task.status = DownloadStatus.DOWNLOADING
-            next_task.started_at = datetime.now()
+            lane.bucket.consume()
+            lane.active += 1
+            self.tasks.set_status(next_task, DownloadStatus.DOWNLOADING)
+            next_task.started_ts = time.time()
 
             # Criar task assíncrona para processar download
             download_task = asyncio.create_task(self._execute_download(next_task))
@@ -254,19 +1053,105 @@ class DownloadQueue:
 
             logger.info(f"Iniciando download: {next_task.audio_id}")
 
-    async def _check_retries(self):
-        """Verifica e processa retries agendados"""
-        async with self.queue_lock:
-            retry_tasks = [
-                task
-                for task in self.tasks.values()
-                if task.status == DownloadStatus.RETRYING and task.should_retry_now()
-            ]
+    def _push_retry(self, task: DownloadTask) -> None:
+        """Registra o prazo de retry de uma task RETRYING.
+
+        Deve ser chamado com ``queue_lock`` adquirido.
+        """
+        deadline = task.next_retry_ts if task.next_retry_ts is not None else time.time()
+        heapq.heappush(self._retry_heap, (deadline, next(self._heap_seq), task.id))
+
+    def _check_retries(self):
+        """Devolve à fila os retries cujo prazo já venceu.
+
+        Só visita entradas vencidas no topo do heap de prazos. Deve ser
+        chamado com ``queue_lock`` adquirido.
+        """
+        now = time.time()
+        while self._retry_heap and self._retry_heap[0][0] <= now:
+            deadline, _, task_id = heapq.heappop(self._retry_heap)
+            task = self.tasks.get(task_id)
+            if task is None or task.status != DownloadStatus.RETRYING:
+                continue
+            if task.next_retry_ts is not None and task.next_retry_ts != deadline:
+                continue  # entrada obsoleta: a task foi reagendada
+            self.tasks.set_status(task, DownloadStatus.QUEUED)
+            task.next_retry_ts = None
+            self._push_ready(task)
+            logger.info(f"Retry agendado voltou para fila: {task.audio_id}")
+
+    def _seconds_until_next_retry(self) -> Optional[float]:
+        """Segundos até o próximo retry agendado (None se não houver)."""
+        if not self._retry_heap:
+            return None
+        return max(0.0, self._retry_heap[0][0] - time.time())
+
+    def _bytes_reporter(self, task: DownloadTask) -> Optional[Callable[[int], None]]:
+        """Callback thread-safe para os progress hooks reportarem bytes baixados.
+
+        Os hooks do yt-dlp rodam na thread do executor; o incremento é
+        agendado no event loop para o autotuner não precisar de locks.
+        """
+        if self.autotuner is None:
+            return None
+        loop = asyncio.get_running_loop()
+        record = self.autotuner.record_bytes
+        source = task.source
 
-            for task in retry_tasks:
-                task.status = DownloadStatus.QUEUED
-                task.next_retry_at = None
-                logger.info(f"Retry agendado voltou para fila: {task.audio_id}")
+        def report(nbytes: int) -> None:
+            loop.call_soon_threadsafe(record, source, nbytes)
+
+        return report
+
+    def _record_resume(self, nbytes: int) -> None:
+        """Contabiliza uma tentativa que reaproveitou ``nbytes`` de partials."""
+        self.resumed_attempts += 1
+        self.resumed_bytes += nbytes
+
+    async def _perform_download(self, task: DownloadTask):
+        """Executa o download propriamente dito (integração com o manager)"""
+        from app.services.managers import AudioDownloadManager, VideoDownloadManager
+        from app.services.sse_manager import sse_manager
+
+        if task.kind == DownloadKind.VIDEO:
+            await VideoDownloadManager().download_video_with_status_async(
+                task.audio_id,
+                task.url,
+                resolution=task.resolution or "1080p",
+                sse_manager=sse_manager,
+                on_bytes=self._bytes_reporter(task),
+                on_resume=self._record_resume,
+            )
+            return
+
+        # Instanciar o AudioDownloadManager
+        audio_manager = AudioDownloadManager()
+
+        # Executar download
+        await audio_manager.download_audio_with_status_async(
+            task.audio_id,
+            task.url,
+            sse_manager=sse_manager,
+            on_bytes=self._bytes_reporter(task),
+            on_resume=self._record_resume,
+        )
+
+    async def _autotune_loop(self):
+        """Fecha uma janela do autotuner a cada ``interval`` e aplica o limite."""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.autotuner.interval)
+                async with self._wakeup:
+                    backlog = sum(lane.queued for lane in self._lanes.values())
+                    limit = self.autotuner.adjust(backlog, active=self._source_active())
+                    if limit != self.max_concurrent_downloads:
+                        self.max_concurrent_downloads = limit
+                    # Tetos por fonte podem ter subido mesmo com o global igual
+                    self._wakeup.notify()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro no ajuste adaptativo de concorrência: {e}")
 
     async def _execute_download(self, task: DownloadTask):
         """Executa o download de uma task"""
@@ -274,29 +1159,14 @@ class DownloadQueue:
             if self.on_download_started:
                 await self.on_download_started(task)
 
-            # Aqui seria a integração com o AudioDownloadManager
-            # Por enquanto, vamos simular um download
-            from app.services.managers import AudioDownloadManager
-            from app.services.sse_manager import sse_manager
-
-            # Instanciar o AudioDownloadManager
-            audio_manager = AudioDownloadManager()
-
-            # Callback para progresso
-            async def progress_callback(progress):
-                task.progress = progress
-                if self.on_download_progress:
-                    await self.on_download_progress(task, progress)
-
-            # Executar download
-            await audio_manager.download_audio_with_status_async(
-                task.audio_id, task.url, sse_manager=sse_manager
-            )
+            await self._perform_download(task)
 
             # Sucesso
-            task.status = DownloadStatus.COMPLETED
-            task.completed_at = datetime.now()
+            self.tasks.set_status(task, DownloadStatus.COMPLETED)
+            task.completed_ts = time.time()
             task.progress = 100
+            if self.autotuner is not None:
+                self.autotuner.record_result(task.source)
 
             if self.on_download_completed:
                 await self.on_download_completed(task)
@@ -304,33 +1174,43 @@ class DownloadQueue:
             logger.success(f"Download concluído: {task.audio_id}")
 
         except asyncio.CancelledError:
-            task.status = DownloadStatus.CANCELLED
-            task.completed_at = datetime.now()
+            if self._stopping and task.status == DownloadStatus.DOWNLOADING:
+                # Encerramento do servidor: a task será retomada no restart
+                self.tasks.set_status(task, DownloadStatus.QUEUED)
+                task.started_ts = None
+                logger.info(f"Download interrompido pelo encerramento: {task.audio_id}")
+                raise
+            self.tasks.set_status(task, DownloadStatus.CANCELLED)
+            task.completed_ts = time.time()
             logger.info(f"Download cancelado: {task.audio_id}")
             raise
 
         except ValueError as config_err:
             # Configuration errors are permanent — do not retry
             logger.error(f"Configuration error (will not retry): {config_err}")
-            task.status = DownloadStatus.FAILED
+            self.tasks.set_status(task, DownloadStatus.FAILED)
             task.error_message = str(config_err)
-            task.completed_at = datetime.now()
+            task.completed_ts = time.time()
             if self.on_download_failed:
                 await self.on_download_failed(task, str(config_err))
 
         except Exception as e:
             error_msg = str(e)
             task.error_message = error_msg
+            if self.autotuner is not None:
+                self.autotuner.record_result(task.source, error_msg)
 
             # Tentar retry se possível
             if task.can_retry():
+                old_status = task.status
                 task.schedule_retry()
+                self.tasks.sync(task, old_status)
                 logger.warning(
                     f"Download falhou, agendando retry: {task.audio_id} - {error_msg}"
                 )
             else:
-                task.status = DownloadStatus.FAILED
-                task.completed_at = datetime.now()
+                self.tasks.set_status(task, DownloadStatus.FAILED)
+                task.completed_ts = time.time()
                 logger.error(
                     f"Download falhou definitivamente: {task.audio_id} - {error_msg}"
                 )
@@ -339,27 +1219,168 @@ class DownloadQueue:
                 await self.on_download_failed(task, error_msg)
 
         finally:
-            # Remover da lista de downloads ativos
-            if task.id in self.active_downloads:
-                del self.active_downloads[task.id]
+            # Libera o slot e acorda o loop para preencher a vaga imediatamente
+            async with self._wakeup:
+                self.active_downloads.pop(task.id, None)
+                self._lane_for(task).active -= 1
+                if task.status == DownloadStatus.RETRYING:
+                    self._push_retry(task)
+                elif task.is_terminal:
+                    self._release_flight(task.id)
+                self._wakeup.notify()
 
-    async def cleanup_old_tasks(self, max_age_hours: int = 24):
-        """Remove tasks antigas para evitar acúmulo de memória"""
-        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+    async def archive_finished_tasks(self, max_age_seconds: float) -> int:
+        """Move tasks terminais mais antigas que ``max_age_seconds`` para o histórico.
 
-        async with self.queue_lock:
-            old_tasks = [
-                task_id
-                for task_id, task in self.tasks.items()
-                if task.completed_at and task.completed_at < cutoff
-            ]
+        A escrita no SQLite acontece fora do ``queue_lock``; só saem da
+        memória as tasks que continuam terminais depois de gravadas (um retry
+        manual no meio do caminho mantém a task na fila). Retorna quantas
+        foram arquivadas.
+        """
+        from app.db.database import get_db_context
+        from app.db.repositories import (
+            DownloadTaskHistoryRepository,
+            DownloadTaskStateRepository,
+        )
 
-            for task_id in old_tasks:
-                del self.tasks[task_id]
+        cutoff = time.time() - max_age_seconds
+        async with self._db_lock:
+            async with self.queue_lock:
+                finished = self.tasks.finished_before(cutoff)
+                records = [task.to_history_record() for task in finished]
+            if not records:
+                return 0
+
+            async with get_db_context() as session:
+                await DownloadTaskHistoryRepository(session).add_many(records)
+                if self.persist:
+                    await DownloadTaskStateRepository(session).delete_many(
+                        [task.id for task in finished]
+                    )
+
+            archived = 0
+            async with self.queue_lock:
+                for task in finished:
+                    if task.is_terminal and self.tasks.get(task.id) is task:
+                        self.tasks.remove(task.id)
+                        archived += 1
+                    elif self.tasks.get(task.id) is task:
+                        # Voltou à fila (retry manual) durante a gravação
+                        self.tasks.mark_dirty(task.id)
+
+        logger.info(f"Arquivadas {archived} tasks finalizadas no histórico")
+        return archived
+
+    async def _archive_loop(self):
+        """Compactador: arquiva periodicamente as tasks finalizadas."""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.archive_interval)
+                await self.archive_finished_tasks(self.archive_after_seconds)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro ao arquivar tasks da fila: {e}")
+
+    async def flush_state(self) -> int:
+        """Grava em lote no SQLite as tasks alteradas desde o último flush.
+
+        Retorna quantas tasks foram gravadas. Em caso de erro as tasks voltam
+        a ficar sujas para a próxima tentativa.
+        """
+        from app.db.database import get_db_context
+        from app.db.repositories import DownloadTaskStateRepository
+
+        async with self._db_lock:
+            async with self.queue_lock:
+                if not self.tasks.dirty:
+                    return 0
+                dirty = self.tasks.dirty
+                self.tasks.dirty = set()
+                records = [
+                    self.tasks[task_id].to_record()
+                    for task_id in dirty
+                    if task_id in self.tasks
+                ]
+            try:
+                async with get_db_context() as session:
+                    await DownloadTaskStateRepository(session).upsert_many(records)
+            except Exception:
+                async with self.queue_lock:
+                    self.tasks.dirty |= {t for t in dirty if t in self.tasks}
+                raise
+        return len(records)
+
+    async def _flush_loop(self):
+        """Flusher: persiste periodicamente as transições de estado."""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush_state()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro ao persistir estado da fila: {e}")
+
+    async def restore_pending(self) -> int:
+        """Reidrata a fila a partir de ``download_tasks`` (startup).
+
+        As tasks são lidas por prioridade e ordem de criação; as que estavam
+        DOWNLOADING quando o processo caiu voltam para QUEUED e as RETRYING
+        mantêm o prazo do retry. Usa só o que foi persistido (URL, opções),
+        sem consultar o yt-dlp de novo. Tasks terminais voltam para a memória
+        e seguem o fluxo normal de arquivamento. Retorna quantas tasks
+        pendentes foram recolocadas na fila.
+        """
+        from app.db.database import get_db_context
+        from app.db.repositories import DownloadTaskStateRepository
+
+        async with get_db_context() as session:
+            rows = await DownloadTaskStateRepository(session).get_all()
+
+        restored = 0
+        async with self._wakeup:
+            for row in rows:
+                if row.task_id in self.tasks:
+                    continue
+                task = DownloadTask.from_record(row)
+                if task.status == DownloadStatus.DOWNLOADING:
+                    task.status = DownloadStatus.QUEUED
+                    task.started_ts = None
+                self.tasks.add(task)
+                if not task.is_terminal:
+                    key = _flight_key(task.kind, task.url, task.audio_id)
+                    if self._inflight_owner(key) is None:
+                        self._claim_flight(task, key)
+                if task.status == DownloadStatus.QUEUED:
+                    self._push_ready(task)
+                    restored += 1
+                elif task.status == DownloadStatus.RETRYING:
+                    self._push_retry(task)
+                    restored += 1
+            self._wakeup.notify()
+
+        if restored:
+            logger.info(
+                f"Fila de downloads: {restored} task(s) pendente(s) restaurada(s)"
+            )
+        return restored
+
+    async def cleanup_old_tasks(self, max_age_hours: int = 24):
+        """Arquiva tasks finalizadas há mais de ``max_age_hours`` horas.
 
-            if old_tasks:
-                logger.info(f"Removidas {len(old_tasks)} tasks antigas da fila")
+        Elas saem da memória, mas continuam consultáveis pelo histórico.
+        """
+        await self.archive_finished_tasks(max_age_hours * 3600)
 
 
 # Instância global da fila
-download_queue = DownloadQueue(max_concurrent_downloads=2)
+download_queue = DownloadQueue(
+    max_concurrent_downloads=DOWNLOAD_MAX_CONCURRENT,
+    persist=True,
+    autotuner=(
+        ConcurrencyAutoTuner(limit=DOWNLOAD_MAX_CONCURRENT)
+        if DOWNLOAD_ADAPTIVE_CONCURRENCY
+        else None
+    ),
+)
@@ -0,0 +1,207 @@
+"""
+Retomada de downloads parciais entre tentativas e restarts.
+
+O yt-dlp já continua um ``.part`` existente (``continuedl``) e os fragmentos
+de HLS/DASH (``.part-FragN`` + estado em ``.ytdl``), mas só é seguro fazer
+isso se a nova tentativa escolher o **mesmo formato**: ``bestaudio`` pode
+cair em outro stream com a mesma extensão e os bytes seriam concatenados com
+os de outro arquivo.
+
+Por isso, na primeira tentativa o formato escolhido e o tamanho esperado de
+cada arquivo são gravados num sidecar (``.resume.json``) dentro de
+``downloads/<tipo>/<id>/``. Antes de cada tentativa :func:`prepare_resume`
+valida o que sobrou no diretório:
+
+* partials sem sidecar (não dá para saber de que formato são) são apagados;
+* partials maiores que o tamanho esperado são apagados;
+* o formato gravado é fixado nas opções, com fallback para o seletor
+  original caso ele não esteja mais disponível.
+
+Se o fallback escolher outro formato, o progress hook apaga os partials e o
+sidecar e aborta a tentativa com :class:`ResumeFormatChanged`; a próxima
+tentativa recomeça do zero em vez de concatenar streams diferentes.
+
+Ao concluir o download, :func:`finish_resume` remove o sidecar e partials
+que tenham sobrado de formatos abandonados.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+RESUME_SIDECAR = ".resume.json"
+_PARTIAL_SUFFIXES = (".part", ".ytdl")
+
+
+class ResumeFormatChanged(RuntimeError):
+    """O yt-dlp escolheu um formato diferente do fixado para a retomada."""
+
+
+def _is_partial(path: Path) -> bool:
+    name = path.name
+    return name.endswith(_PARTIAL_SUFFIXES) or ".part-Frag" in name
+
+
+def _partial_files(download_dir: Path) -> List[Path]:
+    if not download_dir.is_dir():
+        return []
+    return [p for p in download_dir.iterdir() if p.is_file() and _is_partial(p)]
+
+
+def _final_name(part: Path) -> str:
+    """Nome do arquivo final a que um partial pertence."""
+    name = part.name
+    if ".part-Frag" in name:
+        return name.split(".part-Frag", 1)[0]
+    for suffix in _PARTIAL_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def _load_sidecar(download_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads((download_dir / RESUME_SIDECAR).read_text())
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get("format") else None
+
+
+def _selected_format(info: Dict[str, Any]) -> Optional[str]:
+    """Seletor exato do formato escolhido (``137+140`` em downloads mesclados)."""
+    requested = info.get("requested_formats")
+    if requested:
+        ids = [f.get("format_id") for f in requested]
+        if all(ids):
+            return "+".join(ids)
+    return info.get("format_id")
+
+
+@dataclass
+class ResumeState:
+    """Estado de retomada de uma tentativa de download."""
+
+    download_dir: Path
+    pinned_format: Optional[str] = None
+    partial_bytes: int = 0  # bytes válidos reaproveitados nesta tentativa
+    sizes: Dict[str, int] = field(default_factory=dict)
+    part_sizes: Dict[str, int] = field(default_factory=dict)
+
+    def initial_bytes(self, filename: str) -> int:
+        """Bytes de ``filename`` que já estavam no disco antes da tentativa."""
+        return self.part_sizes.get(Path(filename).name, 0)
+
+    def apply(self, ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+        """Ajusta as opções do yt-dlp para continuar os partials validados."""
+        ydl_opts["continuedl"] = True
+        if self.pinned_format:
+            original = ydl_opts.get("format")
+            ydl_opts["format"] = (
+                f"{self.pinned_format}/{original}" if original else self.pinned_format
+            )
+        ydl_opts["progress_hooks"] = [
+            *ydl_opts.get("progress_hooks", []),
+            self.progress_hook,
+        ]
+        return ydl_opts
+
+    def progress_hook(self, d: Dict[str, Any]) -> None:
+        """Grava no sidecar o formato escolhido e o tamanho esperado.
+
+        Roda na thread do yt-dlp; só escreve quando aparece informação nova.
+        Se o formato escolhido não for o fixado (o seletor caiu no fallback),
+        descarta os partials e o sidecar e levanta ``ResumeFormatChanged``.
+        """
+        filename = d.get("filename")
+        if not filename:
+            return
+        changed = False
+        selected = _selected_format(d.get("info_dict") or {})
+        if self.pinned_format is None:
+            self.pinned_format = selected
+            changed = self.pinned_format is not None
+        elif selected is not None and selected != self.pinned_format:
+            self._abort_format_change(selected)
+        name = Path(filename).name
+        total = d.get("total_bytes")
+        if total and self.sizes.get(name) != int(total):
+            self.sizes[name] = int(total)
+            changed = True
+        if not changed or self.pinned_format is None:
+            return
+        try:
+            (self.download_dir / RESUME_SIDECAR).write_text(
+                json.dumps({"format": self.pinned_format, "sizes": self.sizes})
+            )
+        except OSError as e:
+            logger.debug(f"Não foi possível gravar o sidecar de retomada: {e}")
+
+    def _abort_format_change(self, selected: str) -> None:
+        pinned = self.pinned_format
+        logger.warning(
+            f"Formato {pinned} indisponível em {self.download_dir.name}; "
+            f"yt-dlp escolheu {selected}. Descartando partials"
+        )
+        for part in _partial_files(self.download_dir):
+            part.unlink(missing_ok=True)
+        (self.download_dir / RESUME_SIDECAR).unlink(missing_ok=True)
+        self.pinned_format = None
+        self.partial_bytes = 0
+        self.sizes.clear()
+        self.part_sizes.clear()
+        raise ResumeFormatChanged(
+            f"formato fixado {pinned} trocado por {selected}; partials descartados"
+        )
+
+
+def prepare_resume(download_dir: Path) -> ResumeState:
+    """Valida os partials de ``download_dir`` antes de uma nova tentativa."""
+    state = ResumeState(download_dir)
+    parts = _partial_files(download_dir)
+    sidecar = _load_sidecar(download_dir)
+
+    if not parts:
+        if sidecar is not None:
+            (download_dir / RESUME_SIDECAR).unlink(missing_ok=True)
+        return state
+
+    if sidecar is None:
+        logger.info(
+            f"Partials sem formato registrado em {download_dir}; recomeçando do zero"
+        )
+        for part in parts:
+            part.unlink(missing_ok=True)
+        return state
+
+    sizes = {str(k): int(v) for k, v in (sidecar.get("sizes") or {}).items()}
+    for part in parts:
+        expected = sizes.get(_final_name(part))
+        size = part.stat().st_size
+        if expected and size > expected:
+            logger.warning(f"Partial inválido descartado: {part.name}")
+            part.unlink(missing_ok=True)
+            continue
+        if not part.name.endswith(".ytdl"):
+            state.partial_bytes += size
+            state.part_sizes[_final_name(part)] = (
+                state.part_sizes.get(_final_name(part), 0) + size
+            )
+
+    state.pinned_format = sidecar["format"]
+    state.sizes = sizes
+    if state.partial_bytes:
+        logger.info(
+            f"Retomando download em {download_dir.name}: "
+            f"{state.partial_bytes} bytes já baixados (formato {state.pinned_format})"
+        )
+    return state
+
+
+def finish_resume(download_dir: Path) -> None:
+    """Remove o sidecar e partials órfãos depois de um download concluído."""
+    for part in _partial_files(download_dir):
+        part.unlink(missing_ok=True)
+    (download_dir / RESUME_SIDECAR).unlink(missing_ok=True)
@@ -19,7 +19,8 @@ class Downloader(ABC):
 
     Each subclass encapsulates:
       * ID extraction from a URL (regex + yt-dlp fallback)
-      * The yt-dlp option dictionary (cookies, headers, format selection)
+      * The yt-dlp option dictionary (headers, format selection); cookies
+        for ``source`` are added by ``ydl_pool`` when it builds the instance
       * Source identifier (`'youtube'`, `'instagram'`, ...)
     """
 
@@ -29,9 +30,22 @@ class Downloader(ABC):
     def extract_id(self, url: str) -> Optional[str]:
         """Return the platform-native ID for ``url`` or ``None`` if not parseable."""
 
+    def cache_id(self, url: str) -> str:
+        """Cheap, offline key for ``url`` in the metadata cache.
+
+        Unlike :meth:`extract_id` this never touches the network; when the id
+        cannot be parsed locally the URL itself is the key.
+        """
+        return url
+
     @abstractmethod
-    def get_info(self, url: str) -> Dict[str, Any]:
-        """Return yt-dlp info dict for ``url`` (without downloading the media)."""
+    def get_info(self, url: str, process: bool = True) -> Dict[str, Any]:
+        """Return yt-dlp info dict for ``url`` (without downloading the media).
+
+        With ``process=False`` the raw extractor result is returned, before
+        format selection, so it can later be handed to
+        ``YoutubeDL.process_ie_result`` to download without re-extracting.
+        """
 
     @abstractmethod
     def build_audio_opts(self, output_dir: str, progress_hook) -> Dict[str, Any]:
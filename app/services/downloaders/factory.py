@@ -11,7 +11,10 @@ _YOUTUBE_HOSTS = {
     "www.youtube.com",
     "m.youtube.com",
     "music.youtube.com",
+    "youtube-nocookie.com",
+    "www.youtube-nocookie.com",
     "youtu.be",
+    "www.youtu.be",
 }
 
 _INSTAGRAM_HOSTS = {
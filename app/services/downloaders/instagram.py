@@ -1,21 +1,14 @@
 """Instagram strategy — uses yt-dlp's native extractor for Reels, Posts, IGTV."""
 
 import os
-import re
 from typing import Any, Dict, Optional
 
 from loguru import logger
-from yt_dlp import YoutubeDL
 
-from app.services.configs import get_yt_dlp_cookies_opts
 from app.services.downloaders.base import Downloader
-
-# Matches /reel/{shortcode}, /reels/{shortcode}, /p/{shortcode}, /tv/{shortcode}.
-# Shortcodes are 5-20 chars of [A-Za-z0-9_-] historically. We allow up to 30
-# to be future-proof; yt-dlp will reject genuinely invalid ones at extract time.
-_INSTAGRAM_URL_RE = re.compile(
-    r"instagram\.com/(?:reel|reels|p|tv)/([A-Za-z0-9_-]{1,30})"
-)
+from app.services.downloaders.url_ids import instagram_shortcode
+from app.services.metadata_cache import metadata_cache
+from app.services.ydl_pool import ydl_pool
 
 # Instagram is fussy about User-Agents — pretend to be a recent Chrome.
 _INSTAGRAM_HEADERS = {
@@ -37,26 +30,35 @@ class InstagramDownloader(Downloader):
         # Profile URLs (instagram.com/<user>/), stories, IGTV-collection links,
         # and other non-media paths must not silently succeed via yt-dlp's
         # generic fallback — that produces junk DB rows whose external_id
-        # is a username or timestamp. Require the regex to match a known
+        # is a username or timestamp. Require the URL to resolve to a known
         # media-bearing path (/reel, /reels, /p, /tv) up front.
-        match = _INSTAGRAM_URL_RE.search(url)
-        if match:
-            return match.group(1)
+        shortcode = instagram_shortcode(url)
+        if shortcode:
+            return shortcode
         logger.warning(
             f"URL do Instagram não reconhecida como mídia (reel/p/tv): {url}"
         )
         return None
 
-    def get_info(self, url: str) -> Dict[str, Any]:
+    def cache_id(self, url: str) -> str:
+        return instagram_shortcode(url) or url
+
+    def get_info(self, url: str, process: bool = True) -> Dict[str, Any]:
         opts = {
             "quiet": True,
             "no_warnings": True,
             "skip_download": True,
             "http_headers": _INSTAGRAM_HEADERS,
-            **get_yt_dlp_cookies_opts("instagram"),
         }
-        with YoutubeDL(opts) as ydl:
-            return ydl.extract_info(url, download=False) or {}
+
+        def _extract():
+            with ydl_pool.lease(self.source, "metadata", opts) as ydl:
+                return ydl.extract_info(url, download=False, process=process)
+
+        mode = "full" if process else "raw"
+        return (
+            metadata_cache.cached(self.source, self.cache_id(url), mode, _extract) or {}
+        )
 
     def build_audio_opts(self, output_dir: str, progress_hook) -> Dict[str, Any]:
         return {
@@ -79,7 +81,6 @@ class InstagramDownloader(Downloader):
             in ("1", "true", "yes"),
             "noplaylist": True,
             "http_headers": _INSTAGRAM_HEADERS,
-            **get_yt_dlp_cookies_opts("instagram"),
         }
 
     def build_video_opts(
@@ -102,5 +103,4 @@ class InstagramDownloader(Downloader):
             in ("1", "true", "yes"),
             "noplaylist": True,
             "http_headers": _INSTAGRAM_HEADERS,
-            **get_yt_dlp_cookies_opts("instagram"),
         }
@@ -0,0 +1,117 @@
+"""Offline external-id parsing for every known YouTube and Instagram URL shape.
+
+``extract_id`` used to fall back to a full yt-dlp flat extraction whenever a
+single regex did not match, which meant a network round-trip for common
+shapes such as ``/embed/``, ``attribution_link`` or ``youtube-nocookie``.
+These helpers resolve ids with :mod:`urllib.parse` only; yt-dlp is left for
+URLs none of them recognise (channels, handles, search pages...).
+
+Results are memoised (pure functions of the URL string).
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+_YOUTUBE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_PLAYLIST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{2,64}$")
+_SHORTCODE_RE = re.compile(r"^[A-Za-z0-9_-]{1,30}$")
+
+_YOUTUBE_HOSTS = frozenset(
+    {
+        "youtube.com",
+        "www.youtube.com",
+        "m.youtube.com",
+        "music.youtube.com",
+        "gaming.youtube.com",
+        "youtube-nocookie.com",
+        "www.youtube-nocookie.com",
+    }
+)
+_YOUTU_BE_HOSTS = frozenset({"youtu.be", "www.youtu.be"})
+_INSTAGRAM_HOSTS = frozenset({"instagram.com", "www.instagram.com", "m.instagram.com"})
+
+# Path prefixes whose next segment is the video id: /embed/ID, /shorts/ID...
+_YOUTUBE_ID_PATHS = frozenset({"embed", "v", "e", "shorts", "live", "watch"})
+# Instagram media paths: /p/CODE, /reel/CODE, /<user>/reel/CODE...
+_INSTAGRAM_MEDIA_PATHS = frozenset({"p", "reel", "reels", "tv"})
+
+_MEMO_SIZE = 4096
+
+
+def _parse(url: str):
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    return parsed, (parsed.hostname or "").lower()
+
+
+def _valid_video_id(value: Optional[str]) -> Optional[str]:
+    return value if value and _YOUTUBE_ID_RE.match(value) else None
+
+
+def _first(query: str, key: str) -> Optional[str]:
+    values = parse_qs(query).get(key)
+    return values[0] if values else None
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def youtube_video_id(url: str) -> Optional[str]:
+    """11-char video id for a YouTube URL, or ``None`` if there isn't one.
+
+    Handles ``watch?v=`` (any host, extra params, ``#t=``), ``youtu.be/ID``,
+    ``/embed/``, ``/v/``, ``/e/``, ``/shorts/``, ``/live/``, ``/watch/ID``,
+    ``youtube-nocookie.com``, ``attribution_link?u=...`` and the legacy
+    ``#!v=ID`` fragment.
+    """
+    parsed, host = _parse(url)
+    segments = [s for s in parsed.path.split("/") if s]
+
+    if host in _YOUTU_BE_HOSTS:
+        return _valid_video_id(segments[0]) if segments else None
+    if host not in _YOUTUBE_HOSTS:
+        return None
+
+    video_id = _valid_video_id(_first(parsed.query, "v"))
+    if video_id:
+        return video_id
+    if len(segments) >= 2 and segments[0] in _YOUTUBE_ID_PATHS:
+        return _valid_video_id(segments[1])
+    if segments[:1] == ["attribution_link"]:
+        target = _first(parsed.query, "u")
+        if target:
+            return youtube_video_id(f"https://www.youtube.com{unquote(target)}")
+    if parsed.fragment:
+        return _valid_video_id(_first(parsed.fragment.lstrip("!"), "v"))
+    return None
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def youtube_playlist_id(url: str) -> Optional[str]:
+    """Value of ``list=`` on a YouTube URL (``playlist?list=``, ``watch?...&list=``)."""
+    parsed, host = _parse(url)
+    if host not in _YOUTUBE_HOSTS and host not in _YOUTU_BE_HOSTS:
+        return None
+    playlist = _first(parsed.query, "list")
+    return playlist if playlist and _PLAYLIST_ID_RE.match(playlist) else None
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def instagram_shortcode(url: str) -> Optional[str]:
+    """Shortcode of an Instagram post/reel/IGTV URL, or ``None``.
+
+    Accepts ``/p/``, ``/reel/``, ``/reels/`` and ``/tv/``, optionally after a
+    username segment (``/<user>/reel/CODE``). Profiles, stories and other
+    non-media paths return ``None``.
+    """
+    parsed, host = _parse(url)
+    if host not in _INSTAGRAM_HOSTS:
+        return None
+    segments = [s for s in parsed.path.split("/") if s]
+    for i, segment in enumerate(segments[:2]):
+        if segment in _INSTAGRAM_MEDIA_PATHS and i + 1 < len(segments):
+            code = segments[i + 1]
+            return code if _SHORTCODE_RE.match(code) else None
+    return None
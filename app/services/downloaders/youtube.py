@@ -1,15 +1,16 @@
 """YouTube strategy — preserves the historical yt-dlp option set."""
 
 import os
-import re
 import shutil
 from typing import Any, Dict, Optional
 
 from loguru import logger
-from yt_dlp import YoutubeDL
 
-from app.services.configs import get_yt_dlp_cookies_opts
+from app.services.configs import YDL_EJS_OFFLINE
 from app.services.downloaders.base import Downloader
+from app.services.downloaders.url_ids import youtube_playlist_id, youtube_video_id
+from app.services.metadata_cache import metadata_cache
+from app.services.ydl_pool import ydl_pool
 
 # Detecta deno e node para resolver JS challenges do YouTube
 _deno_path = shutil.which("deno") or os.path.expanduser("~/.deno/bin/deno")
@@ -26,11 +27,18 @@ if _node_path and os.path.exists(_node_path):
 if not YDL_JS_RUNTIMES:
     logger.warning("Nenhum runtime JS encontrado (deno/node). Downloads podem falhar.")
 
-YDL_REMOTE_COMPONENTS = ["ejs:github"]
-
-_YOUTUBE_URL_RE = re.compile(
-    r"(?:youtube\.com/(?:watch\?v=|live/|shorts/)|youtu\.be/)([a-zA-Z0-9_-]{11})"
-)
+# Em modo offline o solver vem só do cache local (ver ejs_component)
+YDL_REMOTE_COMPONENTS = [] if YDL_EJS_OFFLINE else ["ejs:github"]
+
+# Opções das extrações só de metadados (mesmo perfil do ydl_pool que
+# fetch_track_artist e o warm-up do solver de JS challenges)
+METADATA_OPTS: Dict[str, Any] = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "js_runtimes": YDL_JS_RUNTIMES,
+    "remote_components": YDL_REMOTE_COMPONENTS,
+}
 
 # Shared HTTP headers used by both audio and video opts
 _YOUTUBE_HEADERS = {
@@ -58,11 +66,12 @@ class YouTubeDownloader(Downloader):
     source = "youtube"
 
     def extract_id(self, url: str) -> Optional[str]:
+        # Formatos conhecidos (watch, youtu.be, embed, shorts, attribution_link,
+        # playlist...) resolvem sem rede; yt-dlp só para URLs desconhecidas.
+        known = youtube_video_id(url) or youtube_playlist_id(url)
+        if known:
+            return known
         try:
-            match = _YOUTUBE_URL_RE.search(url)
-            if match:
-                return match.group(1)
-
             ydl_info_opts = {
                 "quiet": True,
                 "no_warnings": True,
@@ -70,26 +79,28 @@ class YouTubeDownloader(Downloader):
                 "extract_flat": True,
                 "js_runtimes": YDL_JS_RUNTIMES,
                 "remote_components": YDL_REMOTE_COMPONENTS,
-                **get_yt_dlp_cookies_opts("youtube"),
             }
-            with YoutubeDL(ydl_info_opts) as ydl:
+            with ydl_pool.lease(self.source, "flat", ydl_info_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
                 return info.get("id") or None
         except Exception as exc:
             logger.error(f"Erro ao extrair YouTube ID: {exc}")
             return None
 
-    def get_info(self, url: str) -> Dict[str, Any]:
-        opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "skip_download": True,
-            "js_runtimes": YDL_JS_RUNTIMES,
-            "remote_components": YDL_REMOTE_COMPONENTS,
-            **get_yt_dlp_cookies_opts("youtube"),
-        }
-        with YoutubeDL(opts) as ydl:
-            return ydl.extract_info(url, download=False) or {}
+    def cache_id(self, url: str) -> str:
+        return youtube_video_id(url) or youtube_playlist_id(url) or url
+
+    def get_info(self, url: str, process: bool = True) -> Dict[str, Any]:
+        opts = METADATA_OPTS
+
+        def _extract():
+            with ydl_pool.lease(self.source, "metadata", opts) as ydl:
+                return ydl.extract_info(url, download=False, process=process)
+
+        mode = "full" if process else "raw"
+        return (
+            metadata_cache.cached(self.source, self.cache_id(url), mode, _extract) or {}
+        )
 
     def build_audio_opts(self, output_dir: str, progress_hook) -> Dict[str, Any]:
         return {
@@ -114,7 +125,6 @@ class YouTubeDownloader(Downloader):
             "js_runtimes": YDL_JS_RUNTIMES,
             "remote_components": YDL_REMOTE_COMPONENTS,
             "http_headers": _YOUTUBE_HEADERS,
-            **get_yt_dlp_cookies_opts("youtube"),
         }
 
     def build_video_opts(
@@ -137,5 +147,4 @@ class YouTubeDownloader(Downloader):
             "js_runtimes": YDL_JS_RUNTIMES,
             "remote_components": YDL_REMOTE_COMPONENTS,
             "http_headers": _YOUTUBE_HEADERS,
-            **get_yt_dlp_cookies_opts("youtube"),
         }
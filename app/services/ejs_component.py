@@ -0,0 +1,256 @@
+"""
+Scripts do solver de JS challenges do YouTube (componente EJS do yt-dlp).
+
+Para resolver os challenges ``n``/``sig`` o yt-dlp roda ``yt.solver.lib`` e
+``yt.solver.core`` num runtime JS (deno/node). Com
+``remote_components=["ejs:github"]`` esses scripts são baixados do release
+``yt-dlp/ejs`` na primeira extração que precisa deles e guardados no cache do
+yt-dlp (``cachedir``). Sem preparo, a primeira extração depois de um deploy
+paga o download e a inicialização do runtime.
+
+:class:`EjsComponent` faz isso no startup (``lifespan``):
+
+* :meth:`~EjsComponent.ensure` baixa os scripts da versão suportada pelo
+  yt-dlp instalado para ``YDL_CACHE_DIR`` e confere o hash contra o que o
+  próprio yt-dlp aceita. O arquivo segue o formato do cache do yt-dlp
+  (``challenge-solver/<tipo>.json``), que passa a usá-lo sem rede;
+* :meth:`~EjsComponent.warm` detecta o runtime numa instância do
+  ``ydl_pool`` (que fica aquecida) e executa os scripts uma vez;
+* :meth:`~EjsComponent.status` alimenta o ``/health``.
+
+Com ``YDL_EJS_OFFLINE=true`` nada é baixado, nem aqui nem pelo yt-dlp
+durante as extrações (``YDL_REMOTE_COMPONENTS`` fica vazio).
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.services.configs import YDL_CACHE_DIR, YDL_EJS_OFFLINE
+
+SECTION = "challenge-solver"
+# Tipo do script -> arquivo minificado do release (o que o yt-dlp baixaria)
+SCRIPTS = {"lib": "yt.solver.lib.min.js", "core": "yt.solver.core.min.js"}
+RELEASE_URL = "https://github.com/yt-dlp/ejs/releases/download/{version}/{filename}"
+
+# Argumentos para ler o programa da stdin, por runtime
+_STDIN_ARGS = {"node": ["-"], "deno": ["run", "--no-prompt", "-"], "bun": ["-"]}
+
+
+def _vendor():
+    """Versão e hashes dos scripts aceitos pelo yt-dlp, ou None.
+
+    ``vendor`` é interno ao yt-dlp (não é API pública) e pode sumir ou mudar
+    numa atualização: nesse caso o componente se reporta ``unsupported`` em vez
+    de derrubar o startup ou o ``/health``.
+    """
+    try:
+        from yt_dlp.extractor.youtube.jsc._builtin import vendor
+    except ImportError:
+        return None
+    if not (hasattr(vendor, "VERSION") and hasattr(vendor, "HASHES")):
+        return None
+    return vendor
+
+
+def _minor(version: Optional[str]) -> tuple:
+    from yt_dlp.utils import version_tuple
+
+    return version_tuple(version or "0", lenient=True)[:2]
+
+
+class EjsComponent:
+    """Cache local verificado dos scripts EJS e warm-up do runtime JS."""
+
+    def __init__(
+        self, cache_dir: Path = YDL_CACHE_DIR, offline: bool = YDL_EJS_OFFLINE
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.offline = offline
+        # Resultado do último warm-up (runtime, versão, tempo), para o /health
+        self.runtime: Optional[Dict[str, Any]] = None
+
+    @property
+    def supported(self) -> bool:
+        """O yt-dlp instalado expõe os internos que o componente usa."""
+        return _vendor() is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Versão dos scripts suportada pelo yt-dlp instalado."""
+        vendor = _vendor()
+        return vendor.VERSION if vendor is not None else None
+
+    def _path(self, script: str) -> Path:
+        return self.cache_dir / SECTION / f"{script}.json"
+
+    def _load(self, script: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(script), encoding="utf-8") as f:
+                return json.load(f).get("data")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _verify(self, script: str, code: str) -> bool:
+        vendor = _vendor()
+        if vendor is None:
+            return False
+        digest = hashlib.sha3_512(code.encode()).hexdigest()
+        return digest == vendor.HASHES.get(SCRIPTS[script])
+
+    def script_status(self, script: str) -> str:
+        """Estado do script no cache local.
+
+        ``ok``, ``missing``, ``stale`` (outra versão), ``invalid`` (hash) ou
+        ``unsupported`` (yt-dlp sem os internos esperados).
+        """
+        if not self.supported:
+            return "unsupported"
+        data = self._load(script)
+        if not data or not data.get("code"):
+            return "missing"
+        if _minor(data.get("version")) != _minor(self.version):
+            return "stale"
+        if not self._verify(script, data["code"]):
+            return "invalid"
+        return "ok"
+
+    def status(self) -> Dict[str, Any]:
+        scripts = {script: self.script_status(script) for script in SCRIPTS}
+        runtime_ok = bool(self.runtime and self.runtime.get("ok"))
+        return {
+            "ok": all(s == "ok" for s in scripts.values()) and runtime_ok,
+            "supported": self.supported,
+            "version": self.version,
+            "offline": self.offline,
+            "scripts": scripts,
+            "runtime": self.runtime,
+        }
+
+    # -- download ----------------------------------------------------------------
+
+    def _download(self, filename: str) -> str:
+        url = RELEASE_URL.format(version=self.version, filename=filename)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.read().decode("utf-8")
+
+    def _store(self, script: str, code: str) -> None:
+        """Grava no formato de ``yt_dlp.cache.Cache`` (escrita atômica)."""
+        from yt_dlp.version import __version__
+
+        path = self._path(script)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "yt-dlp_version": __version__,
+            "data": {"version": self.version, "variant": "minified", "code": code},
+        }
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def ensure(self) -> Dict[str, str]:
+        """Baixa e verifica os scripts ausentes ou desatualizados.
+
+        No modo offline só reporta o estado do cache.
+        """
+        result = {}
+        for script, filename in SCRIPTS.items():
+            state = self.script_status(script)
+            if state not in ("ok", "unsupported") and not self.offline:
+                try:
+                    code = self._download(filename)
+                except OSError as e:
+                    logger.warning(f"Falha ao baixar o script EJS {filename}: {e}")
+                else:
+                    if self._verify(script, code):
+                        self._store(script, code)
+                        state = "ok"
+                        logger.info(f"Script EJS {filename} v{self.version} em cache")
+                    else:
+                        logger.error(f"Hash inesperado no script EJS {filename}")
+                        state = "invalid"
+            result[script] = state
+        return result
+
+    # -- runtime -----------------------------------------------------------------
+
+    def warm(self, opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Detecta o runtime JS numa instância do pool e roda os scripts uma vez.
+
+        A detecção (``<runtime> --version``) fica em cache na instância, que
+        volta aquecida para o ``ydl_pool``; ``opts`` deve ser o perfil das
+        extrações de metadados para que elas a reaproveitem.
+        """
+        from app.services.ydl_pool import ydl_pool
+
+        with ydl_pool.lease("youtube", "metadata", opts) as ydl:
+            # ``_js_runtimes`` também é interno ao yt-dlp
+            runtimes = getattr(ydl, "_js_runtimes", None)
+            if not isinstance(runtimes, dict):
+                self.runtime = {"ok": False, "error": "unsupported"}
+                return self.runtime
+            info = next(
+                (
+                    rt.info
+                    for rt in runtimes.values()
+                    if getattr(getattr(rt, "info", None), "supported", False)
+                ),
+                None,
+            )
+        if info is None:
+            self.runtime = {"ok": False, "error": "nenhum runtime JS suportado"}
+            return self.runtime
+
+        self.runtime = {"ok": True, "name": info.name, "version": info.version}
+        lib, core = self._load("lib"), self._load("core")
+        args = _STDIN_ARGS.get(info.name)
+        if not (lib and core and args):
+            return self.runtime
+        program = (
+            f"{lib['code']}\nObject.assign(globalThis, lib);\n{core['code']}\n"
+            "console.log(typeof jsc);\n"
+        )
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                [info.path, *args],
+                input=program,
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            ok = proc.returncode == 0 and proc.stdout.strip() == "function"
+            error = None if ok else (proc.stderr.strip() or proc.stdout.strip())[:200]
+        except (OSError, subprocess.TimeoutExpired) as e:
+            ok, error = False, str(e)[:200]
+        self.runtime.update(ok=ok, warmup_ms=round((time.perf_counter() - t0) * 1e3))
+        if error:
+            self.runtime["error"] = error
+        return self.runtime
+
+    def prewarm(self, opts: Dict[str, Any]) -> Dict[str, Any]:
+        """``ensure`` + ``warm``; roda no executor durante o startup."""
+        self.ensure()
+        self.warm(opts)
+        status = self.status()
+        if status["ok"]:
+            logger.info(
+                f"Solver de JS challenges pronto (EJS v{self.version}, "
+                f"{self.runtime['name']} {self.runtime['version']})"
+            )
+        else:
+            logger.warning(f"Solver de JS challenges incompleto: {status}")
+        return status
+
+
+# Instância global
+ejs_component = EjsComponent()
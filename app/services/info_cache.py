@@ -0,0 +1,84 @@
+"""
+Cache em memória do info dict extraído no registro de um item.
+
+``register_*_for_download`` extrai os metadados com ``process=False`` (o
+resultado bruto do extractor, antes da seleção de formatos) e guarda aqui,
+por ``(source, external_id)``. O download seguinte entrega esse resultado a
+``YoutubeDL.process_ie_result``, que só seleciona formatos e baixa: a página,
+o player JS e os JS challenges são resolvidos uma única vez por item.
+
+O cache é pequeno (``INFO_CACHE_MAX_ENTRIES``, LRU) e de vida curta
+(``INFO_CACHE_TTL``): as URLs de formato são assinadas e expiram. Uma falha
+de download invalida a entrada para que a próxima tentativa extraia de novo.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.configs import INFO_CACHE_MAX_ENTRIES, INFO_CACHE_TTL
+
+CacheKey = Tuple[str, str]
+
+
+class InfoCache:
+    """Cache LRU com TTL de info dicts do yt-dlp."""
+
+    def __init__(
+        self,
+        ttl: float = INFO_CACHE_TTL,
+        max_entries: int = INFO_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, source: str, external_id: str, info: Dict[str, Any]) -> None:
+        """Guarda ``info`` para ``(source, external_id)``."""
+        if self.ttl <= 0 or self.max_entries <= 0 or not info:
+            return
+        key = (source, external_id)
+        self._entries[key] = (self._clock() + self.ttl, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, source: str, external_id: str) -> Optional[Dict[str, Any]]:
+        """Cópia do info em cache, ou ``None`` se ausente/expirado.
+
+        Devolve uma cópia porque ``process_ie_result`` altera o dict recebido
+        e o mesmo item pode ser baixado como áudio e como vídeo.
+        """
+        key = (source, external_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, info = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(info)
+
+    def invalidate(self, source: str, external_id: str) -> None:
+        self._entries.pop((source, external_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Instância global
+info_cache = InfoCache()
@@ -5,27 +5,42 @@ import re
 import shutil
 import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import aiohttp
 from fastapi import HTTPException
 from loguru import logger
-from yt_dlp import YoutubeDL
 
 from app.services.configs import (
     AUDIO_DIR,
+    DOWNLOAD_PROGRESS_EVENT_INTERVAL,
+    PLAYLIST_MAX_ENTRIES,
+    PLAYLIST_PAGE_SIZE,
     VIDEO_DIR,
+    YDL_EJS_OFFLINE,
     audio_mapping,
     video_mapping,
-    get_yt_dlp_cookies_opts,
     S3_DELETE_LOCAL_AFTER_UPLOAD,
     STORAGE_BACKEND,
 )
 from app.db.database import get_db_context
 from app.db.models import Audio, Video
 from app.db.repositories import AudioRepository, VideoRepository
+from app.services.download_metrics import DownloadMetrics, record_download_metrics
+from app.services.download_progress import (
+    ProgressChannel,
+    ProgressEventEmitter,
+    ProgressSnapshot,
+)
+from app.services.download_resume import finish_resume, prepare_resume
 from app.services.downloaders import get_downloader
+from app.services.downloaders.youtube import YouTubeDownloader
+from app.services.info_cache import info_cache
+from app.services.metadata_cache import metadata_cache
+from app.services.progress_writer import AUDIO, VIDEO, progress_writer
 from app.services.storage import get_storage
+from app.services.ydl_pool import ydl_pool
 
 # Detecta deno e node para resolver JS challenges do YouTube
 _deno_path = shutil.which("deno") or os.path.expanduser("~/.deno/bin/deno")
@@ -42,13 +57,24 @@ if _node_path and os.path.exists(_node_path):
 if not YDL_JS_RUNTIMES:
     logger.warning("Nenhum runtime JS encontrado (deno/node). Downloads podem falhar.")
 
-# Script de challenge solver baixado do GitHub (equivalente a --remote-components ejs:github)
-YDL_REMOTE_COMPONENTS = ["ejs:github"]
+# Script de challenge solver baixado do GitHub (equivalente a --remote-components
+# ejs:github). Em modo offline só vale o cache local (ver ejs_component).
+YDL_REMOTE_COMPONENTS = [] if YDL_EJS_OFFLINE else ["ejs:github"]
 
 # YouTube video IDs são sempre 11 caracteres alfanuméricos (inclui _ e -)
 _YOUTUBE_ID_RE = re.compile(r"^[A-Za-z0-9_\-]{11}$")
 
 
+# Só para ``cache_id`` (parse local, sem rede) nos fluxos exclusivos do YouTube
+_youtube = YouTubeDownloader()
+
+
+def _playlist_cache_id(url: str) -> str:
+    """Chave da playlist no ``metadata_cache``: o parâmetro ``list`` ou a URL."""
+    playlist = parse_qs(urlparse(str(url)).query).get("list")
+    return playlist[0] if playlist else str(url)
+
+
 def extract_artist_from_info(info: Optional[Dict[str, Any]]) -> Optional[str]:
     """Extract artist from yt-dlp info/entry.
 
@@ -160,6 +186,277 @@ def _playlist_info_payload(info: dict, url: str, entries: list) -> dict:
     }
 
 
+# Playlists são só do YouTube (Instagram não tem um conceito equivalente no
+# extrator flat do yt-dlp; ver docs/plans/2026-05-13-instagram-support.md).
+_PLAYLIST_HOSTS = frozenset(
+    {
+        "youtube.com",
+        "www.youtube.com",
+        "youtu.be",
+        "music.youtube.com",
+        "m.youtube.com",
+    }
+)
+
+_PLAYLIST_YDL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "extract_flat": True,
+    "js_runtimes": YDL_JS_RUNTIMES,
+    "remote_components": YDL_REMOTE_COMPONENTS,
+}
+
+
+def _validate_playlist_url(url: str) -> None:
+    """Levanta ``ValueError`` se ``url`` não pode ser extraída como playlist."""
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ("http", "https"):
+        raise ValueError(f"Esquema de URL não suportado: {parsed.scheme!r}")
+    if parsed.username or parsed.password:
+        raise ValueError("URL com credenciais embutidas não é permitida.")
+    if (parsed.hostname or "") not in _PLAYLIST_HOSTS:
+        raise ValueError(
+            "Host da URL não está na lista permitida para extração de playlist."
+        )
+
+
+def _playlist_entry(entry: Optional[dict]) -> Optional[dict]:
+    """Entrada flat normalizada (``id``, ``title``, ``url``, ``artist``) ou None."""
+    if entry is None:
+        return None
+    video_id = entry.get("id") or ""
+    if not video_id:
+        logger.warning(
+            f"Entrada de playlist sem ID ignorada: {entry.get('title', 'desconhecido')}"
+        )
+        return None
+    if not _YOUTUBE_ID_RE.match(video_id):
+        logger.warning(
+            "Entrada de playlist com ID inválido ignorada: "
+            f"{entry.get('title', 'desconhecido')}"
+        )
+        return None
+    title = entry.get("title") or entry.get("webpage_title") or f"Video_{video_id}"
+    item = {
+        "id": video_id,
+        "title": title,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+    entry_artist = extract_artist_from_info(entry)
+    if entry_artist:
+        item["artist"] = entry_artist
+    return item
+
+
+def _iter_entries(entries) -> Iterator[Optional[dict]]:
+    """Percorre ``entries`` sem materializar: gerador, lista ou PagedList."""
+    if hasattr(entries, "getslice"):
+        # PagedList do yt-dlp: pede uma página do extrator por vez
+        start = 0
+        while True:
+            chunk = entries.getslice(start, start + PLAYLIST_PAGE_SIZE)
+            if not chunk:
+                return
+            yield from chunk
+            start += len(chunk)
+    else:
+        yield from entries or ()
+
+
+def _iter_playlist_pages(
+    url: str, page_size: int, use_cache: bool = True
+) -> Iterator[Tuple[Optional[dict], List[Optional[dict]]]]:
+    """Gerador síncrono de ``(cabeçalho, página de entradas brutas)``.
+
+    Roda no executor, uma página por ``next()``. Sem ``process``, o yt-dlp
+    devolve as entradas como gerador: cada página de continuação só é buscada
+    quando a anterior já foi entregue. O cabeçalho é o info sem ``entries``
+    (``None`` se o yt-dlp não retornou nada). A lista completa vai para o
+    ``metadata_cache`` quando a playlist é lida até o fim. Com
+    ``use_cache=False`` o cache não é consultado (a leitura completa ainda o
+    atualiza).
+    """
+    cache_id = _playlist_cache_id(url)
+    cached = (
+        metadata_cache.get("youtube", cache_id, "playlist", require=("entries",))
+        if use_cache
+        else None
+    )
+    if cached is not None:
+        entries = cached.pop("entries") or []
+        for start in range(0, max(len(entries), 1), page_size):
+            yield cached, entries[start : start + page_size]
+        return
+
+    collected: List[Optional[dict]] = []
+    with ydl_pool.lease("youtube", "flat", _PLAYLIST_YDL_OPTS) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        # Algumas URLs (music.youtube.com, abas de canal) redirecionam
+        for _ in range(3):
+            if not info or info.get("_type") not in ("url", "url_transparent"):
+                break
+            info = ydl.extract_info(info["url"], download=False, process=False)
+        if info is None:
+            yield None, []
+            return
+        header = {key: value for key, value in info.items() if key != "entries"}
+        page: List[Optional[dict]] = []
+        for entry in _iter_entries(info.get("entries")):
+            page.append(entry)
+            if len(page) >= page_size:
+                collected.extend(page)
+                yield header, page
+                page = []
+        if page or not collected:
+            collected.extend(page)
+            yield header, page
+    metadata_cache.put(
+        "youtube", cache_id, "playlist", {**header, "entries": collected}
+    )
+
+
+async def stream_playlist(
+    url: str,
+    page_size: int = PLAYLIST_PAGE_SIZE,
+    max_entries: int = PLAYLIST_MAX_ENTRIES,
+    use_cache: bool = True,
+) -> AsyncIterator[dict]:
+    """Extrai uma playlist do YouTube página a página, sem baixar.
+
+    Cada item tem o formato de ``extract_playlist_info`` com só as entradas
+    válidas da página, mais ``has_more`` (a página veio cheia: pode haver
+    outra). A primeira página chega sem esperar pelas demais. ``max_entries``
+    (0 = sem limite) interrompe a leitura. ``use_cache=False`` ignora a
+    lista em cache e lê a playlist da fonte (ex.: sincronização).
+
+    Levanta ``ValueError`` (antes da primeira página) se a URL não é aceita,
+    se o yt-dlp não retornou nada ou se nenhuma entrada é válida. Exceções do
+    yt-dlp (ex.: DownloadError) são registradas e propagadas.
+    """
+    _validate_playlist_url(url)
+    url = str(url)
+    logger.info(f"Extraindo informações de playlist: {url}")
+
+    loop = asyncio.get_running_loop()
+    pages = _iter_playlist_pages(url, page_size, use_cache)
+    seen = valid = 0
+    title = None
+    try:
+        while True:
+            try:
+                item = await loop.run_in_executor(None, next, pages, None)
+            except Exception as exc:
+                logger.error(
+                    f"Erro ao extrair playlist '{type(exc).__name__}': {str(exc)[:200]}"
+                )
+                raise
+            if item is None:
+                break
+            header, raw = item
+            if header is None:
+                raise ValueError(
+                    "yt-dlp não retornou informações para a URL fornecida."
+                )
+            title = header.get("title")
+            seen += len(raw)
+            entries = [e for e in map(_playlist_entry, raw) if e is not None]
+            limited = max_entries and valid + len(entries) >= max_entries
+            if limited:
+                entries = entries[: max_entries - valid]
+            valid += len(entries)
+            if entries:
+                payload = _playlist_info_payload(header, url, entries)
+                payload["has_more"] = not limited and len(raw) >= page_size
+                yield payload
+            if limited:
+                logger.warning(
+                    f"Playlist '{title}': leitura interrompida em {max_entries} "
+                    "entradas (PLAYLIST_MAX_ENTRIES)"
+                )
+                break
+    finally:
+        await loop.run_in_executor(None, pages.close)
+
+    if not seen:
+        raise ValueError("URL não parece ser uma playlist ou não retornou entradas.")
+    if not valid:
+        raise ValueError(
+            "Nenhuma entrada com ID válido encontrada na playlist "
+            "(todos os vídeos podem ser privados ou excluídos)."
+        )
+    logger.info(f"Playlist '{title or 'sem título'}': {valid} entradas encontradas.")
+
+
+async def _collect_playlist(url: str) -> dict:
+    """Todas as páginas de ``stream_playlist`` num único payload."""
+    payload = None
+    async for page in stream_playlist(url, max_entries=0):
+        if payload is None:
+            payload = page
+        else:
+            payload["entries"].extend(page["entries"])
+    payload.pop("has_more", None)
+    return payload
+
+
+def _track_watch_url(url_or_id: str) -> str:
+    """URL de watch para um id de vídeo de 11 caracteres; URLs passam direto."""
+    value = str(url_or_id).strip()
+    if _YOUTUBE_ID_RE.match(value):
+        return f"https://www.youtube.com/watch?v={value}"
+    return str(url_or_id)
+
+
+def cached_track_artist(url_or_id: str) -> Optional[str]:
+    """Artista de uma faixa a partir das extrações já no ``metadata_cache``.
+
+    Consulta os modos ``full`` (``fetch_track_artist``) e ``raw`` (download)
+    sem chamar o yt-dlp. Síncrono: rode no executor.
+    """
+    cache_id = _youtube.cache_id(_track_watch_url(url_or_id))
+    for mode in ("full", "raw"):
+        info = metadata_cache.get("youtube", cache_id, mode)
+        artist = extract_artist_from_info(info) if info else None
+        if artist:
+            return artist
+    return None
+
+
+def playlist_entry_artists(url: str) -> Dict[str, str]:
+    """``video_id -> artista`` das entradas flat da playlist em cache.
+
+    Vazio se a playlist não está no cache ou a lista de entradas venceu.
+    Síncrono: rode no executor.
+    """
+    info = metadata_cache.get(
+        "youtube", _playlist_cache_id(url), "playlist", require=("entries",)
+    )
+    artists = {}
+    for entry in (info or {}).get("entries") or ():
+        artist = extract_artist_from_info(entry) if entry else None
+        if artist and entry.get("id"):
+            artists[entry["id"]] = artist
+    return artists
+
+
+def _registration_info(downloader, url: str, external_id: str) -> Dict[str, Any]:
+    """Resultado bruto (``process=False``) usado no registro de um item.
+
+    Só uma extração recém-feita semeia o ``info_cache``: o que vem do
+    ``metadata_cache`` é JSON sanitizado (``sanitize_info``), não um
+    ``ie_result`` fiel para ``process_ie_result``, e os formatos podem ter
+    vencido. Roda no executor.
+    """
+    cached = metadata_cache.get(downloader.source, downloader.cache_id(url), "raw")
+    if cached is not None:
+        return cached
+    info = downloader.get_info(url, process=False)
+    if info:
+        info_cache.put(downloader.source, external_id, info)
+    return info
+
+
 def extract_external_id(url: str) -> tuple:
     """Return ``(source, external_id)`` for ``url``.
 
@@ -192,12 +489,24 @@ class VideoStreamManager:
     async def get_direct_url(self, url: str) -> str:
         """Obtém a URL direta do stream do YouTube"""
         try:
-            ydl_opts = {**self.ydl_opts, **get_yt_dlp_cookies_opts()}
-            with YoutubeDL(ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, lambda: ydl.extract_info(url, download=False)
-                )
-                return info["url"]
+
+            def _extract():
+                with ydl_pool.lease("youtube", "stream", self.ydl_opts) as ydl:
+                    return ydl.extract_info(url, download=False)
+
+            # A URL direta é assinada: ``require`` força nova extração quando
+            # ela vence (METADATA_CACHE_URL_TTL).
+            info = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: metadata_cache.cached(
+                    "youtube",
+                    _youtube.cache_id(url),
+                    "stream",
+                    _extract,
+                    require=("url",),
+                ),
+            )
+            return info["url"]
         except Exception as e:
             logger.error(f"Erro ao obter URL do YouTube: {str(e)}")
             raise HTTPException(
@@ -335,11 +644,14 @@ class AudioDownloadManager:
                     )
                     return existing.id
 
-            # Extrai título sem baixar
+            # Extrai título sem baixar. Uma extração nova (process=False) fica
+            # no info_cache para o download não repetir a extração.
             title = f"Video_{external_id}"
             try:
                 loop = asyncio.get_event_loop()
-                info = await loop.run_in_executor(None, downloader.get_info, url)
+                info = await loop.run_in_executor(
+                    None, _registration_info, downloader, url, external_id
+                )
                 title = info.get("title") or title
             except Exception as extract_error:
                 logger.warning(f"Erro ao extrair informações: {extract_error}")
@@ -381,12 +693,128 @@ class AudioDownloadManager:
             logger.error(f"Erro ao registrar áudio: {e}")
             raise
 
+    async def register_playlist_entries(
+        self,
+        entries: List[dict],
+        folder_id: str,
+        skip_existing: bool = True,
+        first_track: int = 1,
+    ) -> List[Tuple[str, bool]]:
+        """Registra em lote as entradas de uma playlist no álbum ``folder_id``.
+
+        Usa os metadados da extração flat (título, artista) em vez de uma
+        extração por faixa: um ``SELECT ... IN`` para achar o que já existe,
+        um INSERT em lote para as novas linhas e um UPDATE em lote para as
+        existentes, tudo na mesma transação. ``track_number`` é a posição
+        da entrada a partir de ``first_track`` (páginas seguintes da mesma
+        playlist continuam a numeração).
+
+        Retorna ``(audio_id, skipped)`` por entrada, na mesma ordem.
+        """
+        if not entries:
+            return []
+        # As entradas vêm do mesmo extrator de playlist: uma só source
+        source = get_downloader(entries[0]["url"]).source
+
+        results: List[Tuple[str, bool]] = []
+        registered: Dict[str, str] = {}
+        new_audios: List[Audio] = []
+        updates: List[dict] = []
+
+        async with get_db_context() as session:
+            repo = AudioRepository(session)
+            existing = await repo.get_by_external_ids(
+                [entry["id"] for entry in entries], source=source
+            )
+
+            for track_number, entry in enumerate(entries, start=first_track):
+                external_id = entry["id"]
+                if external_id in registered:
+                    # Mesmo vídeo repetido na playlist: uma linha, uma task
+                    results.append((registered[external_id], True))
+                    continue
+
+                changes: Dict[str, Any] = {"track_number": track_number}
+                artist = entry.get("artist")
+                if isinstance(artist, str) and artist:
+                    changes["artist"] = artist[:500]
+
+                audio = existing.get(external_id)
+                if audio is None:
+                    title = entry["title"]
+                    new_audios.append(
+                        Audio(
+                            id=external_id,
+                            title=title,
+                            name=f"{title}.m4a",
+                            source=source,
+                            external_id=external_id,
+                            youtube_id=external_id if source == "youtube" else None,
+                            url=entry["url"],
+                            path="",
+                            directory="",
+                            format="m4a",
+                            filesize=0,
+                            download_status="downloading",
+                            download_progress=0,
+                            download_error="",
+                            transcription_status="none",
+                            transcription_path="",
+                            keywords=json.dumps(self._extract_keywords(title)),
+                            folder_id=folder_id,
+                            **changes,
+                        )
+                    )
+                    registered[external_id] = external_id
+                    results.append((external_id, False))
+                    continue
+
+                usable = audio.download_status not in ("error", "")
+                skipped = usable and skip_existing
+                if skipped:
+                    if audio.folder_id is None:
+                        changes["folder_id"] = folder_id
+                else:
+                    changes["folder_id"] = folder_id
+                    if not usable:
+                        changes.update(
+                            download_status="downloading",
+                            download_progress=0,
+                            download_error="",
+                        )
+                updates.append({"id": audio.id, **changes})
+                registered[external_id] = audio.id
+                results.append((audio.id, skipped))
+
+            await repo.create_many(new_audios)
+            await repo.update_many(updates)
+
+        logger.info(
+            f"Playlist registrada: {len(new_audios)} áudios novos, "
+            f"{len(updates)} existentes atualizados (folder={folder_id})"
+        )
+        return results
+
     async def download_audio_with_status_async(
-        self, audio_id: str, url: str, sse_manager=None
+        self,
+        audio_id: str,
+        url: str,
+        sse_manager=None,
+        on_bytes=None,
+        on_resume=None,
     ) -> str:
-        """Baixa o áudio e atualiza o status."""
+        """Baixa o áudio e atualiza o status.
+
+        ``on_bytes``, se informado, recebe os bytes baixados desde a última
+        chamada; é chamado na thread do yt-dlp (deve ser thread-safe).
+        ``on_resume`` recebe os bytes de partials reaproveitados quando a
+        tentativa continua um download anterior (ver ``download_resume``).
+        """
+        metrics: Optional[DownloadMetrics] = None
         try:
             logger.info(f"Iniciando download real do áudio {audio_id}: {url}")
+            downloader = get_downloader(url)
+            metrics = DownloadMetrics(AUDIO, audio_id, downloader.source)
 
             if sse_manager:
                 await sse_manager.download_started(
@@ -395,39 +823,72 @@ class AudioDownloadManager:
 
             download_dir = self.download_dir / audio_id
             download_dir.mkdir(exist_ok=True)
+            resume = prepare_resume(download_dir)
+            if resume.partial_bytes and on_resume is not None:
+                on_resume(resume.partial_bytes)
 
-            progress_data = {"last_progress": 0}
+            downloaded_by_file: Dict[str, int] = {}
 
             def simple_progress_hook(d):
-                if d["status"] == "downloading":
-                    if d.get("total_bytes"):
-                        progress = int(d["downloaded_bytes"] / d["total_bytes"] * 100)
-                    elif d.get("total_bytes_estimate"):
-                        progress = int(
-                            d["downloaded_bytes"] / d["total_bytes_estimate"] * 100
-                        )
-                    else:
-                        progress = 0
-                    progress_data["current_progress"] = progress
-                    progress_data["status"] = "downloading"
-                elif d["status"] == "finished":
-                    progress_data["current_progress"] = 95
-                    progress_data["status"] = "finished"
-
-            downloader = get_downloader(url)
-            ydl_opts = downloader.build_audio_opts(
-                output_dir=str(download_dir),
-                progress_hook=simple_progress_hook,
+                delta = 0
+                if d.get("downloaded_bytes") is not None:
+                    key = d.get("filename") or ""
+                    downloaded = d["downloaded_bytes"]
+                    delta = downloaded - downloaded_by_file.get(
+                        key, resume.initial_bytes(key)
+                    )
+                    downloaded_by_file[key] = downloaded
+                    if delta > 0 and on_bytes is not None:
+                        on_bytes(delta)
+                metrics.on_progress(d, delta)
+                snapshot = ProgressSnapshot.from_hook(d)
+                if snapshot is None:
+                    return
+                if snapshot.percent > 0:
+                    progress.publish(snapshot.percent)
+                if events is not None:
+                    events.publish(snapshot)
+
+            ydl_opts = metrics.apply(
+                resume.apply(
+                    downloader.build_audio_opts(
+                        output_dir=str(download_dir),
+                        progress_hook=simple_progress_hook,
+                    )
+                )
             )
 
-            try:
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
-                    None,
-                    lambda: self._execute_ydl_download(
-                        url, ydl_opts, progress_data, audio_id, sse_manager
-                    ),
+            # Metadados extraídos no registro: o download só seleciona formatos
+            cached_info = info_cache.get(downloader.source, audio_id)
+
+            # O hook roda na thread do yt-dlp; os canais entregam o progresso
+            # (banco e eventos SSE) no loop
+            loop = asyncio.get_running_loop()
+            progress = ProgressChannel(
+                loop, lambda value: self._update_progress_async(audio_id, value)
+            )
+            events = (
+                ProgressChannel(
+                    loop,
+                    ProgressEventEmitter(sse_manager, audio_id),
+                    min_interval=DOWNLOAD_PROGRESS_EVENT_INTERVAL,
                 )
+                if sse_manager
+                else None
+            )
+            try:
+                try:
+                    result = await loop.run_in_executor(
+                        None,
+                        lambda: self._execute_ydl_download(
+                            url, ydl_opts, cached_info, downloader.source
+                        ),
+                    )
+                    metrics.extraction_finished()
+                finally:
+                    await progress.close()
+                    if events is not None:
+                        await events.close()
 
                 info = result["info"]
                 original_filename = result["filename"]
@@ -435,6 +896,7 @@ class AudioDownloadManager:
                 error_str = str(download_error)
                 logger.error(f"Erro durante download: {error_str}")
 
+                await progress_writer.discard(AUDIO, audio_id)
                 async with get_db_context() as session:
                     repo = AudioRepository(session)
                     await repo.update_download_status(
@@ -444,8 +906,12 @@ class AudioDownloadManager:
                 if sse_manager:
                     await sse_manager.download_error(audio_id, f"Erro: {error_str}")
 
+                # Próxima tentativa extrai de novo (URLs podem ter expirado)
+                info_cache.invalidate(downloader.source, audio_id)
+                await record_download_metrics(metrics, "failed")
                 raise
 
+            finish_resume(download_dir)
             filename = Path(original_filename).with_suffix(".m4a")
 
             if sse_manager:
@@ -456,6 +922,7 @@ class AudioDownloadManager:
             # Atualizar no banco
             actual_title = info.get("title", "").strip()
             artist = extract_artist_from_info(info)
+            await progress_writer.discard(AUDIO, audio_id)
             async with get_db_context() as session:
                 repo = AudioRepository(session)
                 await repo.complete_download(
@@ -478,7 +945,10 @@ class AudioDownloadManager:
             # Storage strategy hook: upload to S3 if STORAGE_BACKEND=s3,
             # then optionally remove the local file. No-op for local backend.
             relative_path = str(filename.relative_to(self.download_dir.parent))
-            await self._upload_to_storage_if_needed(audio_id, filename, relative_path)
+            with metrics.phase("upload"):
+                await self._upload_to_storage_if_needed(
+                    audio_id, filename, relative_path
+                )
 
             # Atualizar mapeamento em memória
             self._add_audio_mappings(filename, info, audio_id)
@@ -488,15 +958,21 @@ class AudioDownloadManager:
                     audio_id, f"Download concluído: {filename.name}"
                 )
 
+            await record_download_metrics(metrics, "completed")
             logger.success(f"Download de áudio concluído: {filename}")
             return str(filename)
 
+        except asyncio.CancelledError:
+            await progress_writer.discard(AUDIO, audio_id)
+            raise
         except Exception as e:
             logger.exception(f"Erro no download de áudio: {str(e)}")
 
+            await record_download_metrics(metrics, "failed")
             if sse_manager:
                 await sse_manager.download_error(audio_id, str(e))
 
+            await progress_writer.discard(AUDIO, audio_id)
             async with get_db_context() as session:
                 repo = AudioRepository(session)
                 await repo.update_download_status(audio_id, "error", error=str(e))
@@ -558,51 +1034,31 @@ class AudioDownloadManager:
             audio_mapping[word] = filename
 
     def _execute_ydl_download(
-        self, url: str, ydl_opts: dict, progress_data: dict, audio_id: str, sse_manager
+        self,
+        url: str,
+        ydl_opts: dict,
+        info: Optional[dict] = None,
+        source: str = "youtube",
     ) -> dict:
-        """Executa o download do yt-dlp em thread separada"""
-        import threading
-        import time
-
-        stop_monitoring = threading.Event()
-
-        def monitor_progress():
-            last_progress = 0
-            while not stop_monitoring.is_set():
-                current_progress = progress_data.get("current_progress", 0)
-                if current_progress != last_progress and current_progress > 0:
-                    # Atualiza no banco de forma síncrona (em thread separada)
-                    import asyncio
-
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            self._update_progress_async(audio_id, current_progress)
-                        )
-                        loop.close()
-                    except Exception as e:
-                        logger.debug(f"Erro ao atualizar progresso: {e}")
-                    last_progress = current_progress
-                time.sleep(1)
-
-        monitor_thread = threading.Thread(target=monitor_progress, daemon=True)
-        monitor_thread.start()
+        """Executa o download do yt-dlp (roda no executor).
 
-        try:
-            with YoutubeDL(ydl_opts) as ydl:
+        Com ``info`` (resultado bruto do registro, ver ``info_cache``) o
+        yt-dlp só seleciona formatos e baixa, sem extrair a página de novo.
+        A instância vem do ``ydl_pool``; destino e hooks são os deste job.
+        O progresso sai pelos hooks via :class:`ProgressChannel`; esta função
+        não cria threads nem event loops.
+        """
+        with ydl_pool.lease(source, "audio", ydl_opts) as ydl:
+            if info is not None:
+                info = ydl.process_ie_result(info, download=True)
+            else:
                 info = ydl.extract_info(url, download=True)
-                original_filename = ydl.prepare_filename(info)
-                return {"info": info, "filename": original_filename}
-        finally:
-            stop_monitoring.set()
-            monitor_thread.join(timeout=1)
+            original_filename = ydl.prepare_filename(info)
+            return {"info": info, "filename": original_filename}
 
     async def _update_progress_async(self, audio_id: str, progress: int):
-        """Atualiza o progresso no banco"""
-        async with get_db_context() as session:
-            repo = AudioRepository(session)
-            await repo.update(audio_id, download_progress=progress)
+        """Entrega o progresso ao writer em lote (gravado em até 250 ms)"""
+        progress_writer.submit(AUDIO, audio_id, progress)
 
     async def _upload_to_storage_if_needed(
         self, audio_id: str, local_filename: Path, relative_path: str
@@ -770,10 +1226,13 @@ class AudioDownloadManager:
         """Migração não necessária com SQLite - mantida para compatibilidade"""
         logger.info("Migração de has_transcription não necessária com SQLite")
 
-    # Design decision: playlist extraction lives on AudioDownloadManager because playlist
-    # metadata feeds the audio download queue. VideoDownloadManager receives an identical
-    # copy (Task 3) since both share the same yt-dlp extraction pattern. Future refactor
-    # could extract a shared _extract_playlist_info() module-level helper.
+    # A extração em si é o helper de módulo stream_playlist(), compartilhado com
+    # VideoDownloadManager; os métodos ficam aqui porque os endpoints e
+    # scripts/reindex_playlist.py chamam a partir do manager.
+    def stream_playlist(self, url: str, use_cache: bool = True) -> AsyncIterator[dict]:
+        """Páginas da playlist conforme são extraídas (ver ``stream_playlist``)."""
+        return stream_playlist(url, use_cache=use_cache)
+
     async def extract_playlist_info(self, url: str) -> dict:
         """Extrai informações de uma playlist do YouTube sem baixar.
 
@@ -784,115 +1243,17 @@ class AudioDownloadManager:
                 "entries": [{"id": str, "title": str, "url": str}, ...]
             }
 
+        Lê todas as páginas de ``stream_playlist`` (sem PLAYLIST_MAX_ENTRIES);
+        os endpoints usam ``stream_playlist`` para não esperar pela lista toda.
+
         Raises ValueError if:
         - URL host is not in the YouTube allowlist
         - yt-dlp returns no information
         - URL yields no entries (e.g. single video URL)
 
-        Runs yt-dlp in executor to avoid blocking the event loop.
-
         Also propagates yt-dlp exceptions (e.g. DownloadError) after logging.
         """
-        # TODO(review): move import urllib.parse to module top-level - code-reviewer, 2026-04-28, Severity: Low
-        import urllib.parse
-
-        # NOTE: Playlist support is YouTube-only for v1. Instagram has no
-        # native playlist concept that maps cleanly to yt-dlp's flat extractor.
-        # Tracked as a non-goal in docs/plans/2026-05-13-instagram-support.md.
-        # TODO(review): move _ALLOWED_HOSTS to module-level constant to avoid per-call allocation - code-reviewer, 2026-04-28, Severity: Low
-        _ALLOWED_HOSTS = {
-            "youtube.com",
-            "www.youtube.com",
-            "youtu.be",
-            "music.youtube.com",
-            "m.youtube.com",
-        }
-
-        parsed = urllib.parse.urlparse(str(url))
-        if parsed.scheme not in ("http", "https"):
-            raise ValueError(f"Esquema de URL não suportado: {parsed.scheme!r}")
-        if parsed.username or parsed.password:
-            raise ValueError("URL com credenciais embutidas não é permitida.")
-        host = parsed.hostname or ""
-        if host not in _ALLOWED_HOSTS:
-            raise ValueError(
-                "Host da URL não está na lista permitida para extração de playlist."
-            )
-
-        ydl_opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "skip_download": True,
-            "extract_flat": True,
-            "js_runtimes": YDL_JS_RUNTIMES,
-            "remote_components": YDL_REMOTE_COMPONENTS,
-            **get_yt_dlp_cookies_opts(),
-        }
-
-        def _extract():
-            with YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(str(url), download=False)
-
-        logger.info(f"Extraindo informações de playlist: {url}")
-
-        try:
-            loop = asyncio.get_running_loop()
-            info = await loop.run_in_executor(None, _extract)
-        except Exception as exc:
-            logger.error(
-                "Erro ao extrair playlist '%s': %s", type(exc).__name__, str(exc)[:200]
-            )
-            raise
-
-        if info is None:
-            raise ValueError("yt-dlp não retornou informações para a URL fornecida.")
-
-        entries_raw = info.get("entries") or []
-        if not entries_raw:
-            raise ValueError(
-                "URL não parece ser uma playlist ou não retornou entradas."
-            )
-
-        entries = []
-        for entry in entries_raw:
-            if entry is None:
-                continue
-            video_id = entry.get("id") or ""
-            if not video_id:
-                logger.warning(
-                    "Entrada de playlist sem ID ignorada: %s",
-                    entry.get("title", "desconhecido"),
-                )
-                continue
-            if not _YOUTUBE_ID_RE.match(video_id):
-                logger.warning(
-                    "Entrada de playlist com ID inválido ignorada: %s",
-                    entry.get("title", "desconhecido"),
-                )
-                continue
-            title = (
-                entry.get("title") or entry.get("webpage_title") or f"Video_{video_id}"
-            )
-            watch_url = f"https://www.youtube.com/watch?v={video_id}"
-            item = {"id": video_id, "title": title, "url": watch_url}
-            entry_artist = extract_artist_from_info(entry)
-            if entry_artist:
-                item["artist"] = entry_artist
-            entries.append(item)
-
-        if not entries:
-            raise ValueError(
-                "Nenhuma entrada com ID válido encontrada na playlist "
-                "(todos os vídeos podem ser privados ou excluídos)."
-            )
-
-        logger.info(
-            "Playlist '%s': %d entradas encontradas.",
-            info.get("title") or "sem título",
-            len(entries),
-        )
-
-        return _playlist_info_payload(info, url, entries)
+        return await _collect_playlist(url)
 
     async def fetch_track_artist(self, url_or_id: str) -> Optional[str]:
         """Fetch track artist via yt-dlp metadata only (no download).
@@ -900,10 +1261,7 @@ class AudioDownloadManager:
         Accepts a full watch URL or an 11-char YouTube video id.
         Uses music fields / title patterns only — never channel/uploader.
         """
-        if _YOUTUBE_ID_RE.match(str(url_or_id).strip()):
-            url = f"https://www.youtube.com/watch?v={str(url_or_id).strip()}"
-        else:
-            url = str(url_or_id)
+        url = _track_watch_url(url_or_id)
 
         ydl_opts = {
             "quiet": True,
@@ -911,16 +1269,20 @@ class AudioDownloadManager:
             "skip_download": True,
             "js_runtimes": YDL_JS_RUNTIMES,
             "remote_components": YDL_REMOTE_COMPONENTS,
-            **get_yt_dlp_cookies_opts(),
         }
 
         def _extract():
-            with YoutubeDL(ydl_opts) as ydl:
+            with ydl_pool.lease("youtube", "metadata", ydl_opts) as ydl:
                 return ydl.extract_info(url, download=False)
 
         try:
             loop = asyncio.get_running_loop()
-            info = await loop.run_in_executor(None, _extract)
+            info = await loop.run_in_executor(
+                None,
+                lambda: metadata_cache.cached(
+                    "youtube", _youtube.cache_id(url), "full", _extract
+                ),
+            )
         except Exception as exc:
             logger.warning(
                 "fetch_track_artist failed for %s: %s",
@@ -1046,7 +1408,9 @@ class VideoDownloadManager:
             duration = None
             try:
                 loop = asyncio.get_event_loop()
-                info = await loop.run_in_executor(None, downloader.get_info, url)
+                info = await loop.run_in_executor(
+                    None, _registration_info, downloader, url, external_id
+                )
                 title = info.get("title") or title
                 duration = info.get("duration")
             except Exception as extract_error:
@@ -1086,12 +1450,112 @@ class VideoDownloadManager:
             logger.error(f"Erro ao registrar vídeo: {e}")
             raise
 
+    async def register_playlist_entries(
+        self,
+        entries: List[dict],
+        folder_id: str,
+        resolution: str = "1080p",
+        skip_existing: bool = True,
+    ) -> List[Tuple[str, bool]]:
+        """Registra em lote as entradas de uma playlist na pasta ``folder_id``.
+
+        Mesmo fluxo de ``AudioDownloadManager.register_playlist_entries``: um
+        ``SELECT ... IN``, um INSERT e um UPDATE em lote, sem extração por
+        vídeo. Retorna ``(video_id, skipped)`` por entrada, na mesma ordem.
+        """
+        if not entries:
+            return []
+        source = get_downloader(entries[0]["url"]).source
+
+        results: List[Tuple[str, bool]] = []
+        registered: Dict[str, str] = {}
+        new_videos: List[Video] = []
+        updates: List[dict] = []
+
+        async with get_db_context() as session:
+            repo = VideoRepository(session)
+            existing = await repo.get_by_external_ids(
+                [entry["id"] for entry in entries], source=source
+            )
+
+            for entry in entries:
+                external_id = entry["id"]
+                if external_id in registered:
+                    results.append((registered[external_id], True))
+                    continue
+
+                video = existing.get(external_id)
+                if video is None:
+                    title = entry["title"]
+                    new_videos.append(
+                        Video(
+                            id=external_id,
+                            title=title,
+                            name=f"{title}.mp4",
+                            source=source,
+                            external_id=external_id,
+                            youtube_id=external_id if source == "youtube" else None,
+                            url=entry["url"],
+                            path="",
+                            directory="",
+                            format="mp4",
+                            filesize=0,
+                            duration=entry.get("duration"),
+                            resolution=resolution,
+                            download_status="downloading",
+                            download_progress=0,
+                            download_error="",
+                            folder_id=folder_id,
+                        )
+                    )
+                    registered[external_id] = external_id
+                    results.append((external_id, False))
+                    continue
+
+                usable = video.download_status not in ("error", "")
+                skipped = usable and skip_existing
+                if not skipped:
+                    changes: Dict[str, Any] = {"folder_id": folder_id}
+                    if not usable:
+                        changes.update(
+                            download_status="downloading",
+                            download_progress=0,
+                            download_error="",
+                        )
+                    updates.append({"id": video.id, **changes})
+                elif video.folder_id is None:
+                    updates.append({"id": video.id, "folder_id": folder_id})
+                registered[external_id] = video.id
+                results.append((video.id, skipped))
+
+            await repo.create_many(new_videos)
+            await repo.update_many(updates)
+
+        logger.info(
+            f"Playlist registrada: {len(new_videos)} vídeos novos, "
+            f"{len(updates)} existentes atualizados (folder={folder_id})"
+        )
+        return results
+
     async def download_video_with_status_async(
-        self, video_id: str, url: str, resolution: str = "1080p", sse_manager=None
+        self,
+        video_id: str,
+        url: str,
+        resolution: str = "1080p",
+        sse_manager=None,
+        on_bytes=None,
+        on_resume=None,
     ) -> str:
-        """Baixa o vídeo e atualiza o status."""
+        """Baixa o vídeo e atualiza o status.
+
+        ``on_bytes`` / ``on_resume``: ver
+        ``AudioDownloadManager.download_audio_with_status_async``.
+        """
+        metrics: Optional[DownloadMetrics] = None
         try:
             logger.info(f"Iniciando download real do vídeo {video_id}: {url}")
+            downloader = get_downloader(url)
+            metrics = DownloadMetrics(VIDEO, video_id, downloader.source)
 
             if sse_manager:
                 await sse_manager.download_started(
@@ -1100,40 +1564,73 @@ class VideoDownloadManager:
 
             download_dir = self.download_dir / video_id
             download_dir.mkdir(exist_ok=True)
+            resume = prepare_resume(download_dir)
+            if resume.partial_bytes and on_resume is not None:
+                on_resume(resume.partial_bytes)
 
-            progress_data = {"last_progress": 0}
+            downloaded_by_file: Dict[str, int] = {}
 
             def simple_progress_hook(d):
-                if d["status"] == "downloading":
-                    if d.get("total_bytes"):
-                        progress = int(d["downloaded_bytes"] / d["total_bytes"] * 100)
-                    elif d.get("total_bytes_estimate"):
-                        progress = int(
-                            d["downloaded_bytes"] / d["total_bytes_estimate"] * 100
-                        )
-                    else:
-                        progress = 0
-                    progress_data["current_progress"] = progress
-                    progress_data["status"] = "downloading"
-                elif d["status"] == "finished":
-                    progress_data["current_progress"] = 95
-                    progress_data["status"] = "finished"
-
-            downloader = get_downloader(url)
-            ydl_opts = downloader.build_video_opts(
-                output_dir=str(download_dir),
-                resolution=resolution,
-                progress_hook=simple_progress_hook,
+                delta = 0
+                if d.get("downloaded_bytes") is not None:
+                    key = d.get("filename") or ""
+                    downloaded = d["downloaded_bytes"]
+                    delta = downloaded - downloaded_by_file.get(
+                        key, resume.initial_bytes(key)
+                    )
+                    downloaded_by_file[key] = downloaded
+                    if delta > 0 and on_bytes is not None:
+                        on_bytes(delta)
+                metrics.on_progress(d, delta)
+                snapshot = ProgressSnapshot.from_hook(d)
+                if snapshot is None:
+                    return
+                if snapshot.percent > 0:
+                    progress.publish(snapshot.percent)
+                if events is not None:
+                    events.publish(snapshot)
+
+            ydl_opts = metrics.apply(
+                resume.apply(
+                    downloader.build_video_opts(
+                        output_dir=str(download_dir),
+                        resolution=resolution,
+                        progress_hook=simple_progress_hook,
+                    )
+                )
             )
 
-            try:
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
-                    None,
-                    lambda: self._execute_ydl_download(
-                        url, ydl_opts, progress_data, video_id, sse_manager
-                    ),
+            # Metadados extraídos no registro: o download só seleciona formatos
+            cached_info = info_cache.get(downloader.source, video_id)
+
+            # O hook roda na thread do yt-dlp; os canais entregam o progresso
+            # (banco e eventos SSE) no loop
+            loop = asyncio.get_running_loop()
+            progress = ProgressChannel(
+                loop, lambda value: self._update_progress_async(video_id, value)
+            )
+            events = (
+                ProgressChannel(
+                    loop,
+                    ProgressEventEmitter(sse_manager, video_id),
+                    min_interval=DOWNLOAD_PROGRESS_EVENT_INTERVAL,
                 )
+                if sse_manager
+                else None
+            )
+            try:
+                try:
+                    result = await loop.run_in_executor(
+                        None,
+                        lambda: self._execute_ydl_download(
+                            url, ydl_opts, cached_info, downloader.source
+                        ),
+                    )
+                    metrics.extraction_finished()
+                finally:
+                    await progress.close()
+                    if events is not None:
+                        await events.close()
 
                 info = result["info"]
                 original_filename = result["filename"]
@@ -1141,6 +1638,7 @@ class VideoDownloadManager:
                 error_str = str(download_error)
                 logger.error(f"Erro durante download: {error_str}")
 
+                await progress_writer.discard(VIDEO, video_id)
                 async with get_db_context() as session:
                     repo = VideoRepository(session)
                     await repo.update_download_status(
@@ -1150,8 +1648,13 @@ class VideoDownloadManager:
                 if sse_manager:
                     await sse_manager.download_error(video_id, f"Erro: {error_str}")
 
+                # Próxima tentativa extrai de novo (URLs podem ter expirado)
+                info_cache.invalidate(downloader.source, video_id)
+                await record_download_metrics(metrics, "failed")
                 raise
 
+            finish_resume(download_dir)
+
             # Procura o arquivo mp4 baixado
             filename = Path(original_filename)
             if not filename.suffix == ".mp4":
@@ -1173,6 +1676,7 @@ class VideoDownloadManager:
             actual_title = info.get("title", "").strip()
 
             # Atualizar no banco
+            await progress_writer.discard(VIDEO, video_id)
             async with get_db_context() as session:
                 repo = VideoRepository(session)
                 await repo.complete_download(
@@ -1194,7 +1698,10 @@ class VideoDownloadManager:
             # Storage strategy hook: upload to S3 if STORAGE_BACKEND=s3,
             # then optionally remove the local file. No-op for local backend.
             relative_path = str(filename.relative_to(self.download_dir.parent))
-            await self._upload_to_storage_if_needed(video_id, filename, relative_path)
+            with metrics.phase("upload"):
+                await self._upload_to_storage_if_needed(
+                    video_id, filename, relative_path
+                )
 
             # Atualizar mapeamento em memória
             self._add_video_mappings(filename, info, video_id)
@@ -1204,15 +1711,21 @@ class VideoDownloadManager:
                     video_id, f"Download concluído: {filename.name}"
                 )
 
+            await record_download_metrics(metrics, "completed")
             logger.success(f"Download de vídeo concluído: {filename}")
             return str(filename)
 
+        except asyncio.CancelledError:
+            await progress_writer.discard(VIDEO, video_id)
+            raise
         except Exception as e:
             logger.exception(f"Erro no download de vídeo: {str(e)}")
 
+            await record_download_metrics(metrics, "failed")
             if sse_manager:
                 await sse_manager.download_error(video_id, str(e))
 
+            await progress_writer.discard(VIDEO, video_id)
             async with get_db_context() as session:
                 repo = VideoRepository(session)
                 await repo.update_download_status(video_id, "error", error=str(e))
@@ -1241,49 +1754,31 @@ class VideoDownloadManager:
             video_mapping[title_id] = filename
 
     def _execute_ydl_download(
-        self, url: str, ydl_opts: dict, progress_data: dict, video_id: str, sse_manager
+        self,
+        url: str,
+        ydl_opts: dict,
+        info: Optional[dict] = None,
+        source: str = "youtube",
     ) -> dict:
-        """Executa o download do yt-dlp em thread separada"""
-        import threading
-        import time
-
-        stop_monitoring = threading.Event()
-
-        def monitor_progress():
-            last_progress = 0
-            while not stop_monitoring.is_set():
-                current_progress = progress_data.get("current_progress", 0)
-                if current_progress != last_progress and current_progress > 0:
-                    # Atualiza no banco de forma síncrona (em thread separada)
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            self._update_progress_async(video_id, current_progress)
-                        )
-                        loop.close()
-                    except Exception as e:
-                        logger.debug(f"Erro ao atualizar progresso: {e}")
-                    last_progress = current_progress
-                time.sleep(1)
+        """Executa o download do yt-dlp (roda no executor).
 
-        monitor_thread = threading.Thread(target=monitor_progress, daemon=True)
-        monitor_thread.start()
-
-        try:
-            with YoutubeDL(ydl_opts) as ydl:
+        Com ``info`` (resultado bruto do registro, ver ``info_cache``) o
+        yt-dlp só seleciona formatos e baixa, sem extrair a página de novo.
+        A instância vem do ``ydl_pool``; destino e hooks são os deste job.
+        O progresso sai pelos hooks via :class:`ProgressChannel`; esta função
+        não cria threads nem event loops.
+        """
+        with ydl_pool.lease(source, "video", ydl_opts) as ydl:
+            if info is not None:
+                info = ydl.process_ie_result(info, download=True)
+            else:
                 info = ydl.extract_info(url, download=True)
-                original_filename = ydl.prepare_filename(info)
-                return {"info": info, "filename": original_filename}
-        finally:
-            stop_monitoring.set()
-            monitor_thread.join(timeout=1)
+            original_filename = ydl.prepare_filename(info)
+            return {"info": info, "filename": original_filename}
 
     async def _update_progress_async(self, video_id: str, progress: int):
-        """Atualiza o progresso no banco"""
-        async with get_db_context() as session:
-            repo = VideoRepository(session)
-            await repo.update(video_id, download_progress=progress)
+        """Entrega o progresso ao writer em lote (gravado em até 250 ms)"""
+        progress_writer.submit(VIDEO, video_id, progress)
 
     async def _upload_to_storage_if_needed(
         self, video_id: str, local_filename: Path, relative_path: str
@@ -1437,10 +1932,11 @@ class VideoDownloadManager:
         logger.warning(f"Vídeo não encontrado: {video_id}")
         return False
 
-    # Design decision: playlist extraction lives on VideoDownloadManager (identical to
-    # AudioDownloadManager.extract_playlist_info) because both managers need to extract
-    # YouTube playlist metadata using the same yt-dlp flat-extract pattern. A shared
-    # module-level helper is a future refactor opportunity (see TODO in AudioDownloadManager).
+    # Mesmo helper de módulo que AudioDownloadManager (stream_playlist()).
+    def stream_playlist(self, url: str, use_cache: bool = True) -> AsyncIterator[dict]:
+        """Páginas da playlist conforme são extraídas (ver ``stream_playlist``)."""
+        return stream_playlist(url, use_cache=use_cache)
+
     async def extract_playlist_info(self, url: str) -> dict:
         """Extrai informações de uma playlist do YouTube sem baixar.
 
@@ -1451,112 +1947,14 @@ class VideoDownloadManager:
                 "entries": [{"id": str, "title": str, "url": str}, ...]
             }
 
+        Lê todas as páginas de ``stream_playlist`` (sem PLAYLIST_MAX_ENTRIES);
+        os endpoints usam ``stream_playlist`` para não esperar pela lista toda.
+
         Raises ValueError if:
         - URL host is not in the YouTube allowlist
         - yt-dlp returns no information
         - URL yields no entries (e.g. single video URL)
 
-        Runs yt-dlp in executor to avoid blocking the event loop.
-
         Also propagates yt-dlp exceptions (e.g. DownloadError) after logging.
         """
-        # TODO(review): move import urllib.parse to module top-level - code-reviewer, 2026-04-28, Severity: Low
-        import urllib.parse
-
-        # NOTE: Playlist support is YouTube-only for v1. Instagram has no
-        # native playlist concept that maps cleanly to yt-dlp's flat extractor.
-        # Tracked as a non-goal in docs/plans/2026-05-13-instagram-support.md.
-        # TODO(review): move _ALLOWED_HOSTS to module-level constant to avoid per-call allocation - code-reviewer, 2026-04-28, Severity: Low
-        _ALLOWED_HOSTS = {
-            "youtube.com",
-            "www.youtube.com",
-            "youtu.be",
-            "music.youtube.com",
-            "m.youtube.com",
-        }
-
-        parsed = urllib.parse.urlparse(str(url))
-        if parsed.scheme not in ("http", "https"):
-            raise ValueError(f"Esquema de URL não suportado: {parsed.scheme!r}")
-        if parsed.username or parsed.password:
-            raise ValueError("URL com credenciais embutidas não é permitida.")
-        host = parsed.hostname or ""
-        if host not in _ALLOWED_HOSTS:
-            raise ValueError(
-                "Host da URL não está na lista permitida para extração de playlist."
-            )
-
-        ydl_opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "skip_download": True,
-            "extract_flat": True,
-            "js_runtimes": YDL_JS_RUNTIMES,
-            "remote_components": YDL_REMOTE_COMPONENTS,
-            **get_yt_dlp_cookies_opts(),
-        }
-
-        def _extract():
-            with YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(str(url), download=False)
-
-        logger.info(f"Extraindo informações de playlist: {url}")
-
-        try:
-            loop = asyncio.get_running_loop()
-            info = await loop.run_in_executor(None, _extract)
-        except Exception as exc:
-            logger.error(
-                "Erro ao extrair playlist '%s': %s", type(exc).__name__, str(exc)[:200]
-            )
-            raise
-
-        if info is None:
-            raise ValueError("yt-dlp não retornou informações para a URL fornecida.")
-
-        entries_raw = info.get("entries") or []
-        if not entries_raw:
-            raise ValueError(
-                "URL não parece ser uma playlist ou não retornou entradas."
-            )
-
-        entries = []
-        for entry in entries_raw:
-            if entry is None:
-                continue
-            video_id = entry.get("id") or ""
-            if not video_id:
-                logger.warning(
-                    "Entrada de playlist sem ID ignorada: %s",
-                    entry.get("title", "desconhecido"),
-                )
-                continue
-            if not _YOUTUBE_ID_RE.match(video_id):
-                logger.warning(
-                    "Entrada de playlist com ID inválido ignorada: %s",
-                    entry.get("title", "desconhecido"),
-                )
-                continue
-            title = (
-                entry.get("title") or entry.get("webpage_title") or f"Video_{video_id}"
-            )
-            watch_url = f"https://www.youtube.com/watch?v={video_id}"
-            item = {"id": video_id, "title": title, "url": watch_url}
-            entry_artist = extract_artist_from_info(entry)
-            if entry_artist:
-                item["artist"] = entry_artist
-            entries.append(item)
-
-        if not entries:
-            raise ValueError(
-                "Nenhuma entrada com ID válido encontrada na playlist "
-                "(todos os vídeos podem ser privados ou excluídos)."
-            )
-
-        logger.info(
-            "Playlist '%s': %d entradas encontradas.",
-            info.get("title") or "sem título",
-            len(entries),
-        )
-
-        return _playlist_info_payload(info, url, entries)
+        return await _collect_playlist(url)
@@ -0,0 +1,291 @@
+"""
+Cache persistente dos info dicts do yt-dlp.
+
+Extrações repetidas do mesmo item (``fetch_track_artist`` em cada
+``refresh-artists``, ``extract_playlist_info``, ``get_info``,
+``get_direct_url``) passam por aqui. Cada entrada é um info dict indexado por
+``(source, external_id, mode)``, onde ``mode`` identifica a variante da
+extração (``full``, ``raw``, ``playlist``, ``stream``...), pois opções
+diferentes produzem dicts diferentes.
+
+TTL por campo, contado desde a extração:
+
+* metadados estáveis (título, artista, duração...): ``METADATA_CACHE_TTL``;
+* URLs assinadas (``url``, ``formats``...): ``METADATA_CACHE_URL_TTL``;
+* ``entries`` de playlists: ``METADATA_CACHE_LIST_TTL``.
+
+Campos vencidos são removidos do dict devolvido; quem depende deles passa
+``require=(...)`` e recebe um miss, o que dispara uma nova extração. O
+arquivo SQLite tem tamanho limitado (``METADATA_CACHE_MAX_MB``) com
+despejo LRU por ``accessed_at``.
+
+O acesso é síncrono e deve rodar fora do event loop: os chamadores já
+extraem dentro de ``run_in_executor``, então a consulta ao cache acontece
+na mesma thread do executor (:meth:`MetadataCache.cached`).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from app.services.configs import (
+    METADATA_CACHE_ENABLED,
+    METADATA_CACHE_LIST_TTL,
+    METADATA_CACHE_MAX_MB,
+    METADATA_CACHE_PATH,
+    METADATA_CACHE_TTL,
+    METADATA_CACHE_URL_TTL,
+)
+
+# Campos com URLs assinadas (expiram em horas) e listas que mudam com frequência
+URL_FIELDS = (
+    "url",
+    "formats",
+    "requested_formats",
+    "requested_downloads",
+    "manifest_url",
+    "fragments",
+    "fragment_base_url",
+)
+LIST_FIELDS = ("entries",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata_cache (
+    source TEXT NOT NULL,
+    external_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    info BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (source, external_id, mode)
+);
+CREATE INDEX IF NOT EXISTS ix_metadata_cache_accessed
+    ON metadata_cache (accessed_at);
+"""
+
+
+def _encode(info: Dict[str, Any]) -> bytes:
+    from yt_dlp import YoutubeDL
+
+    return zlib.compress(
+        json.dumps(YoutubeDL.sanitize_info(dict(info)), default=str).encode("utf-8")
+    )
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class MetadataCache:
+    """Cache SQLite de info dicts com TTL por campo, LRU e contadores."""
+
+    def __init__(
+        self,
+        path: Path = METADATA_CACHE_PATH,
+        max_bytes: int = int(METADATA_CACHE_MAX_MB * 1024 * 1024),
+        ttl: float = METADATA_CACHE_TTL,
+        url_ttl: float = METADATA_CACHE_URL_TTL,
+        list_ttl: float = METADATA_CACHE_LIST_TTL,
+        enabled: bool = METADATA_CACHE_ENABLED,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.field_ttls = {
+            **{field: url_ttl for field in URL_FIELDS},
+            **{field: list_ttl for field in LIST_FIELDS},
+        }
+        self.enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+
+    # -- conexão -----------------------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def reopen(self, path: Path) -> None:
+        """Passa a usar outro arquivo (testes, troca de diretório de dados)."""
+        with self._lock:
+            self._close_locked()
+            self.path = Path(path)
+            self.hits.clear()
+            self.misses.clear()
+            self.evictions = 0
+
+    def _close_locked(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # -- leitura/escrita ---------------------------------------------------------
+
+    def get(
+        self,
+        source: str,
+        external_id: str,
+        mode: str,
+        require: Iterable[str] = (),
+    ) -> Optional[Dict[str, Any]]:
+        """Info em cache sem os campos vencidos, ou ``None`` (miss).
+
+        É miss se a entrada não existe, se os metadados estáveis venceram ou
+        se algum campo de ``require`` venceu ou não existe.
+        """
+        if not self.enabled:
+            return None
+        now = self._clock()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT info, fetched_at FROM metadata_cache "
+                    "WHERE source = ? AND external_id = ? AND mode = ?",
+                    (source, external_id, mode),
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    conn.execute(
+                        "UPDATE metadata_cache SET accessed_at = ? "
+                        "WHERE source = ? AND external_id = ? AND mode = ?",
+                        (now, source, external_id, mode),
+                    )
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache de metadados indisponível: {e}")
+            return None
+
+        info = None
+        if row is not None and now - row[1] < self.ttl:
+            age = now - row[1]
+            info = {
+                key: value
+                for key, value in _decode(row[0]).items()
+                if age < self.field_ttls.get(key, self.ttl)
+            }
+            if any(field not in info for field in require):
+                info = None
+        counters = self.hits if info is not None else self.misses
+        counters[mode] = counters.get(mode, 0) + 1
+        return info
+
+    def put(
+        self, source: str, external_id: str, mode: str, info: Dict[str, Any]
+    ) -> None:
+        """Grava ``info`` e despeja as entradas menos usadas se passar do limite."""
+        if not self.enabled or not info:
+            return
+        try:
+            blob = _encode(info)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Info não serializável para o cache ({source}/{mode}): {e}")
+            return
+        now = self._clock()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata_cache "
+                    "(source, external_id, mode, info, size, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (source, external_id, mode, blob, len(blob), now, now),
+                )
+                self._evict_locked(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao gravar no cache de metadados: {e}")
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM metadata_cache"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT rowid, size FROM metadata_cache ORDER BY accessed_at"
+        ).fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM metadata_cache WHERE rowid = ?", doomed)
+        self.evictions += len(doomed)
+
+    def cached(
+        self,
+        source: str,
+        external_id: str,
+        mode: str,
+        extract: Callable[[], Optional[Dict[str, Any]]],
+        require: Iterable[str] = (),
+    ) -> Optional[Dict[str, Any]]:
+        """Devolve o info em cache ou chama ``extract()`` e grava o resultado.
+
+        Síncrono: chame de dentro do executor, junto com a extração.
+        """
+        info = self.get(source, external_id, mode, require=require)
+        if info is not None:
+            return info
+        info = extract()
+        if info:
+            self.put(source, external_id, mode, info)
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss por modo e ocupação do arquivo."""
+        entries = size = 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries, size = (
+                        self._connection()
+                        .execute(
+                            "SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                            "FROM metadata_cache"
+                        )
+                        .fetchone()
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de metadados indisponível: {e}")
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            "evictions": self.evictions,
+            "by_mode": {
+                mode: {
+                    "hits": self.hits.get(mode, 0),
+                    "misses": self.misses.get(mode, 0),
+                }
+                for mode in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+
+# Instância global
+metadata_cache = MetadataCache()
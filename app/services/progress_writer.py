@@ -0,0 +1,150 @@
+"""
+Writer único para o progresso dos downloads ativos.
+
+Antes, cada atualização de progresso abria uma transação própria com
+``repo.update`` (UPDATE + flush + SELECT para recarregar a linha). Com 20
+downloads simultâneos isso são dezenas de transações por segundo disputando o
+lock de escrita do SQLite.
+
+Aqui os downloads só registram o último valor em memória
+(:meth:`ProgressWriter.submit`); uma task em background grava tudo a cada
+``DOWNLOAD_PROGRESS_FLUSH_INTERVAL`` segundos numa única transação, com um
+UPDATE executemany por tabela e sem recarregar as linhas.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.services.configs import DOWNLOAD_PROGRESS_FLUSH_INTERVAL
+
+AUDIO = "audio"
+VIDEO = "video"
+
+
+class ProgressWriter:
+    """Agrupa o progresso de áudios e vídeos e grava em lote."""
+
+    def __init__(
+        self,
+        flush_interval: float = DOWNLOAD_PROGRESS_FLUSH_INTERVAL,
+        session_factory=None,
+    ):
+        self.flush_interval = flush_interval
+        # None = get_db_context (import tardio, como no flush da fila)
+        self._session_factory = session_factory
+        self._pending: Dict[str, Dict[str, int]] = {AUDIO: {}, VIDEO: {}}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # Métricas expostas para diagnóstico/benchmark
+        self.submitted = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    def submit(self, kind: str, item_id: str, progress: int) -> None:
+        """Registra o progresso atual de um download (chamado no event loop).
+
+        Valores ainda não gravados são substituídos: só o mais recente de
+        cada download chega ao banco.
+        """
+        self._pending[kind][item_id] = progress
+        self.submitted += 1
+        self.start()
+
+    async def discard(self, kind: str, item_id: str) -> None:
+        """Descarta o progresso pendente de um download que terminou.
+
+        Chamar antes de gravar o status final (concluído, erro, cancelado):
+        espera um flush em andamento, para que nenhum progresso atrasado
+        seja gravado depois do status final.
+        """
+        self._pending[kind].pop(item_id, None)
+        if self._flush_lock is not None:
+            async with self._flush_lock:
+                # Um flush que falhou devolve seus valores à fila
+                self._pending[kind].pop(item_id, None)
+
+    def start(self) -> None:
+        """Inicia o writer no loop atual (idempotente)."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is loop
+        ):
+            return
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Para o writer gravando o que ainda estiver pendente."""
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Erro ao gravar progresso no encerramento: {e}")
+
+    async def flush(self) -> int:
+        """Grava numa transação o progresso pendente; retorna linhas afetadas.
+
+        Em caso de erro os valores voltam para a fila, sem sobrescrever um
+        valor mais novo submetido durante a tentativa.
+        """
+        from app.db.repositories import AudioRepository, VideoRepository
+
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            batch = self._pending
+            self._pending = {AUDIO: {}, VIDEO: {}}
+            try:
+                async with self._session() as session:
+                    written = await AudioRepository(session).bulk_update_progress(
+                        batch[AUDIO]
+                    )
+                    written += await VideoRepository(session).bulk_update_progress(
+                        batch[VIDEO]
+                    )
+            except Exception:
+                for kind, items in batch.items():
+                    for item_id, value in items.items():
+                        self._pending[kind].setdefault(item_id, value)
+                raise
+        self.flushes += 1
+        self.rows_written += written
+        return written
+
+    def _session(self):
+        if self._session_factory is not None:
+            return self._session_factory()
+        from app.db.database import get_db_context
+
+        return get_db_context()
+
+    async def _flush_loop(self):
+        """Writer: grava periodicamente o progresso acumulado."""
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro ao gravar progresso dos downloads: {e}")
+
+
+# Instância global
+progress_writer = ProgressWriter()
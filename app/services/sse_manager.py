@@ -22,6 +22,11 @@ class DownloadEvent:
     message: Optional[str] = None
     error: Optional[str] = None
     timestamp: Optional[str] = None
+    # Só em download_progress: bytes baixados, tamanho total, bytes/s e ETA (s)
+    downloaded_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    speed: Optional[int] = None
+    eta: Optional[int] = None
 
     def __post_init__(self):
         if not self.timestamp:
@@ -103,17 +108,36 @@ class SSEManager:
         logger.info(f"Download iniciado: {audio_id}")
 
     async def download_progress(
-        self, audio_id: str, progress: int, message: str = None
+        self,
+        audio_id: str,
+        progress: int,
+        message: str = None,
+        downloaded_bytes: Optional[int] = None,
+        total_bytes: Optional[int] = None,
+        speed: Optional[int] = None,
+        eta: Optional[int] = None,
     ):
         """Notifica progresso do download"""
         if audio_id in self._download_status:
-            self._download_status[audio_id]["progress"] = progress
+            self._download_status[audio_id].update(
+                {
+                    "progress": progress,
+                    "downloaded_bytes": downloaded_bytes,
+                    "total_bytes": total_bytes,
+                    "speed": speed,
+                    "eta": eta,
+                }
+            )
 
         event = DownloadEvent(
             audio_id=audio_id,
             event_type="download_progress",
             progress=progress,
             message=message or f"Progresso: {progress}%",
+            downloaded_bytes=downloaded_bytes,
+            total_bytes=total_bytes,
+            speed=speed,
+            eta=eta,
         )
         await self.broadcast_event(event)
 
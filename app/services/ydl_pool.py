@@ -0,0 +1,217 @@
+"""
+Pool de instâncias ``YoutubeDL`` já inicializadas.
+
+Construir um ``YoutubeDL`` instancia os extractors, valida os runtimes JS
+(``YDL_JS_RUNTIMES``), faz uma cópia do arquivo de cookies e monta o
+cookiejar; em chamadas só de metadados (``extract_id``,
+``fetch_track_artist``, ``get_info``) isso chega a ser boa parte do custo.
+Aqui as instâncias ficam abertas e são reaproveitadas por
+``(source, perfil, opções)``:
+
+* ``lease`` entrega uma instância exclusiva ao job e a devolve ao final;
+* ``outtmpl``, ``progress_hooks`` e ``postprocessor_hooks`` são trocados a
+  cada job (hooks registrados uma vez na criação despacham para os do job);
+* os cookies são do pool: cada instância recebe ``get_yt_dlp_cookies_opts``
+  da sua fonte e fica com a própria cópia, então nunca há dois jobs
+  gravando o mesmo arquivo; o ``cachedir`` do yt-dlp também (``YDL_CACHE_DIR``);
+* instâncias que terminam um job com erro, passam de ``YDL_POOL_MAX_AGE``
+  segundos ou de ``YDL_POOL_MAX_USES`` jobs são fechadas.
+
+Com ``YDL_POOL_ENABLED=false`` cada ``lease`` cria e fecha uma instância,
+como antes.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from yt_dlp import YoutubeDL
+
+from app.services.configs import (
+    YDL_CACHE_DIR,
+    YDL_POOL_ENABLED,
+    YDL_POOL_MAX_AGE,
+    YDL_POOL_MAX_IDLE,
+    YDL_POOL_MAX_USES,
+    get_yt_dlp_cookies_opts,
+)
+
+# Opções trocadas a cada job; não entram na chave do pool
+JOB_KEYS = ("outtmpl", "progress_hooks", "postprocessor_hooks")
+# Definidas pelo pool na criação da instância, a partir da fonte
+COOKIE_KEYS = ("cookiefile", "cookiesfrombrowser")
+
+PoolKey = Tuple[str, str, str]
+
+
+def _fingerprint(opts: Dict[str, Any]) -> str:
+    base = {k: v for k, v in opts.items() if k not in JOB_KEYS + COOKIE_KEYS}
+    return json.dumps(base, sort_keys=True, default=repr)
+
+
+class _PooledYdl:
+    """Uma instância aberta e os hooks do job que a está usando."""
+
+    def __init__(self, key: PoolKey, ydl: YoutubeDL, created: float):
+        self.key = key
+        self.ydl = ydl
+        self.created = created
+        self.uses = 0
+        self.progress_hooks: List[Callable] = []
+        self.postprocessor_hooks: List[Callable] = []
+        self._job_outtmpl = False
+        ydl.add_progress_hook(self._on_progress)
+        ydl.add_postprocessor_hook(self._on_postprocessor)
+
+    def _on_progress(self, d: Dict[str, Any]) -> None:
+        for hook in self.progress_hooks:
+            hook(d)
+
+    def _on_postprocessor(self, d: Dict[str, Any]) -> None:
+        for hook in self.postprocessor_hooks:
+            hook(d)
+
+    def start_job(self, opts: Dict[str, Any]) -> None:
+        self.uses += 1
+        self.progress_hooks = list(opts.get("progress_hooks") or ())
+        self.postprocessor_hooks = list(opts.get("postprocessor_hooks") or ())
+        if opts.get("outtmpl") is not None:
+            self.ydl.params["outtmpl"] = opts["outtmpl"]
+            # Normaliza para o dict {tipo: template} que o yt-dlp espera
+            self.ydl._parse_outtmpl()
+            self._job_outtmpl = True
+
+    def end_job(self) -> None:
+        self.progress_hooks = []
+        self.postprocessor_hooks = []
+        if self._job_outtmpl:
+            self.ydl.params.pop("outtmpl", None)
+            self.ydl._parse_outtmpl()
+            self._job_outtmpl = False
+
+    def close(self) -> None:
+        try:
+            self.ydl.__exit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"Erro ao fechar YoutubeDL do pool: {e}")
+
+
+class YdlPool:
+    """Instâncias ``YoutubeDL`` ociosas por ``(source, perfil, opções)``."""
+
+    def __init__(
+        self,
+        max_idle: int = YDL_POOL_MAX_IDLE,
+        max_age: float = YDL_POOL_MAX_AGE,
+        max_uses: int = YDL_POOL_MAX_USES,
+        enabled: bool = YDL_POOL_ENABLED,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._idle: Dict[PoolKey, List[_PooledYdl]] = {}
+        self.created = 0
+        self.reused = 0
+        self.retired = 0
+
+    @contextmanager
+    def lease(
+        self, source: str, profile: str, opts: Dict[str, Any]
+    ) -> Iterator[YoutubeDL]:
+        """Instância exclusiva para um job, configurada com ``opts``.
+
+        ``profile`` nomeia o uso (``metadata``, ``flat``, ``audio``...) e,
+        junto com as opções que não são de job, define com quem a instância
+        é compartilhada. Não inclua cookies em ``opts``: o pool aplica os da
+        ``source``.
+        """
+        key = (source, profile, _fingerprint(opts))
+        pooled = self._checkout(key) or self._create(key, source, opts)
+        pooled.start_job(opts)
+        healthy = False
+        try:
+            yield pooled.ydl
+            healthy = True
+        finally:
+            pooled.end_job()
+            self._checkin(pooled, healthy)
+
+    def _create(self, key: PoolKey, source: str, opts: Dict[str, Any]) -> _PooledYdl:
+        params = {k: v for k, v in opts.items() if k not in JOB_KEYS + COOKIE_KEYS}
+        params.update(get_yt_dlp_cookies_opts(source))
+        # Cache do yt-dlp (scripts do solver de JS challenges, ver ejs_component)
+        params.setdefault("cachedir", str(YDL_CACHE_DIR))
+        ydl = YoutubeDL(params).__enter__()
+        with self._lock:
+            self.created += 1
+        return _PooledYdl(key, ydl, self._clock())
+
+    def _expired(self, pooled: _PooledYdl, now: float) -> bool:
+        return now - pooled.created >= self.max_age or pooled.uses >= self.max_uses
+
+    def _checkout(self, key: PoolKey) -> Optional[_PooledYdl]:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        stale = []
+        found = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                pooled = idle.pop()
+                if self._expired(pooled, now):
+                    stale.append(pooled)
+                    continue
+                found = pooled
+                self.reused += 1
+                break
+            if not idle:
+                self._idle.pop(key, None)
+            self.retired += len(stale)
+        for pooled in stale:
+            pooled.close()
+        return found
+
+    def _checkin(self, pooled: _PooledYdl, healthy: bool) -> None:
+        keep = self.enabled and healthy and not self._expired(pooled, self._clock())
+        if keep:
+            with self._lock:
+                idle = self._idle.setdefault(pooled.key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(pooled)
+                    return
+                self.retired += 1
+        elif self.enabled:
+            with self._lock:
+                self.retired += 1
+        pooled.close()
+
+    def clear(self) -> None:
+        """Fecha todas as instâncias ociosas (shutdown, testes)."""
+        with self._lock:
+            idle = [p for pooled in self._idle.values() for p in pooled]
+            self._idle.clear()
+            self.retired += len(idle)
+        for pooled in idle:
+            pooled.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "idle": sum(len(pooled) for pooled in self._idle.values()),
+                "created": self.created,
+                "reused": self.reused,
+                "retired": self.retired,
+            }
+
+
+# Instância global
+ydl_pool = YdlPool()
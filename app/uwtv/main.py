@@ -6,7 +6,17 @@ from dataclasses import dataclass
 from datetime import timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    List,
+    Set,
+    Tuple,
+)
 
 from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
@@ -31,6 +41,8 @@ from app.models.audio import (
     PlaylistDownloadRequest,
     PlaylistTaskItem,
     PlaylistDownloadResponse,
+    PlaylistSyncRequest,
+    PlaylistSyncResponse,
 )
 from app.models.folder import (
     FolderCreate,
@@ -49,9 +61,12 @@ from app.services.configs import (
     AUDIO_DIR,
     audio_mapping,
     DOWNLOADS_DIR,
+    DOWNLOAD_METRICS_RETENTION,
     TRANSCRIPTION_CONCURRENCY,
     DEFAULT_TRANSCRIPTION_PROVIDER,
     DEFAULT_TRANSCRIPTION_LANGUAGE,
+    YDL_EJS_PREWARM_TIMEOUT,
+    PLAYLIST_SYNC_INTERVAL,
 )
 from app.services.storage import (
     get_storage,
@@ -77,15 +92,31 @@ from app.services.securities import (
 from app.services.transcription.service import TranscriptionService
 from app.services.downloaders import is_playlist_url
 from app.services.sse_manager import sse_manager
-from app.services.download_queue import download_queue, DownloadTask
+from app.services.artist_refresh import artist_refresh
+from app.services.download_queue import (
+    download_queue,
+    DownloadKind,
+    DownloadStatus,
+    DownloadTask,
+)
+from app.services.progress_writer import progress_writer
+from app.services.download_metrics import summarize
+from app.services.metadata_cache import metadata_cache
+from app.services.ydl_pool import ydl_pool
+from app.services.ejs_component import ejs_component
+from app.services.downloaders.youtube import METADATA_OPTS as YOUTUBE_METADATA_OPTS
 from app.db.database import (
     init_db,
     migrate_json_to_sqlite,
     get_db_context,
-    recompute_album_artists_from_tracks,
 )
 from app.db.models import Folder
-from app.db.repositories import FolderRepository, AudioRepository, VideoRepository
+from app.db.repositories import (
+    AudioRepository,
+    DownloadMetricsRepository,
+    FolderRepository,
+    VideoRepository,
+)
 
 
 @asynccontextmanager
@@ -99,10 +130,6 @@ async def lifespan(app: FastAPI):
     logger.info("Verificando migração de dados JSON -> SQLite...")
     await migrate_json_to_sqlite()
 
-    # Clear playlist-owner names from album.artist; use majority track artists
-    logger.info("Recomputando artist de álbuns a partir das faixas...")
-    await recompute_album_artists_from_tracks()
-
     # Configurar callbacks da fila de downloads
     download_queue.on_download_started = on_download_started_callback
     download_queue.on_download_progress = on_download_progress_callback
@@ -133,8 +160,16 @@ async def lifespan(app: FastAPI):
         logger.error(f"Invalid storage configuration, cannot start: {exc}")
         raise RuntimeError(f"Invalid storage configuration: {exc}") from exc
 
-    # Iniciar processamento da fila
+    # Scripts do solver de JS challenges em cache e runtime JS aquecido, para a
+    # primeira extração depois do deploy não pagar o download nem o spin-up.
+    # Em segundo plano: o startup não espera o download dos scripts.
+    global _ejs_prewarm_task
+    _ejs_prewarm_task = asyncio.create_task(_prewarm_js_solver())
+
+    # Reidratar a fila persistida e iniciar o processamento
+    await recover_pending_downloads()
     download_queue.start_processing()
+    progress_writer.start()
 
     logger.info(
         f"Fila de transcrição: limite de {TRANSCRIPTION_CONCURRENCY} simultâneas"
@@ -145,6 +180,11 @@ async def lifespan(app: FastAPI):
     # foi inicializado/migrado acima — pré-requisitos para a recuperação.
     await recover_pending_transcriptions()
 
+    # Sincronização periódica de álbuns/playlists com a origem (opcional)
+    sync_task = None
+    if PLAYLIST_SYNC_INTERVAL > 0:
+        sync_task = asyncio.create_task(_playlist_sync_loop(PLAYLIST_SYNC_INTERVAL))
+
     logger.info("Aplicação iniciada com sucesso!")
     yield
 
@@ -153,6 +193,23 @@ async def lifespan(app: FastAPI):
     # Encerra o executor de transcrições sem bloquear o shutdown nem vazar
     # threads: cancela tarefas ainda enfileiradas e não aguarda as em execução.
     _transcription_executor.shutdown(wait=False, cancel_futures=True)
+    # Páginas de playlist ainda sendo registradas em segundo plano param aqui;
+    # repetir a requisição (skip_existing) completa a playlist depois.
+    pending = list(_playlist_continuations)
+    if sync_task is not None:
+        pending.append(sync_task)
+    if _ejs_prewarm_task is not None:
+        pending.append(_ejs_prewarm_task)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    await artist_refresh.stop()
+    # Downloads em andamento voltam para "queued" e o estado da fila é gravado,
+    # para serem retomados no próximo startup.
+    await download_queue.stop_processing()
+    # Grava o último progresso pendente dos downloads interrompidos
+    await progress_writer.stop()
+    ydl_pool.clear()
 
 
 app = FastAPI(title="Video Streaming API", lifespan=lifespan)
@@ -180,7 +237,31 @@ _transcription_executor = ThreadPoolExecutor(
     thread_name_prefix="transcribe",
 )
 
-MAX_PLAYLIST_ENTRIES = 200
+# Continuações de playlist em segundo plano (páginas após a primeira). A
+# referência evita que o GC colete a task e permite cancelá-las no shutdown.
+_playlist_continuations: Set[asyncio.Task] = set()
+
+# Warm-up do solver de JS challenges disparado pelo lifespan
+_ejs_prewarm_task: Optional[asyncio.Task] = None
+
+
+async def _prewarm_js_solver() -> None:
+    """``ejs_component.prewarm`` no executor, limitado por YDL_EJS_PREWARM_TIMEOUT."""
+    try:
+        await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(
+                None, ejs_component.prewarm, YOUTUBE_METADATA_OPTS
+            ),
+            timeout=YDL_EJS_PREWARM_TIMEOUT,
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.warning(f"Warm-up do solver de JS challenges falhou: {exc!r}")
+
+
+# Pastas com sincronização em andamento (endpoint e job periódico)
+_syncing_folders: Set[str] = set()
 
 
 # ---------------------------------------------------------------------------
@@ -671,6 +752,70 @@ async def recover_pending_transcriptions() -> int:
     return recovered
 
 
+async def recover_pending_downloads() -> int:
+    """Reidrata a fila de downloads no startup.
+
+    1. Restaura as tasks persistidas em ``download_tasks`` (QUEUED/RETRYING e
+       as DOWNLOADING interrompidas) em ordem de prioridade, sem chamar o
+       yt-dlp — a URL e as opções já estão gravadas.
+    2. Áudios e vídeos presos em ``download_status='downloading'`` sem
+       nenhuma task pendente (ex.: registrados por uma versão sem
+       persistência da fila) ganham uma task nova a partir da ``url`` do
+       próprio registro; sem URL são marcados como erro.
+
+    Erros são tratados por etapa/item e não abortam o startup. Retorna quantas
+    tasks ficaram pendentes na fila.
+    """
+    try:
+        recovered = await download_queue.restore_pending()
+    except Exception as exc:
+        logger.exception(f"Recuperação de downloads: falha ao restaurar a fila: {exc}")
+        recovered = 0
+
+    try:
+        async with get_db_context() as session:
+            stuck = await AudioRepository(session).get_by_status("downloading")
+            stuck_videos = await VideoRepository(session).get_by_status("downloading")
+            stuck_items = [(AudioRepository, a.id, a.url, None) for a in stuck]
+            stuck_items += [
+                (VideoRepository, v.id, v.url, v.resolution or "1080p")
+                for v in stuck_videos
+            ]
+    except Exception as exc:
+        logger.exception(
+            f"Recuperação de downloads: falha ao listar itens pendentes: {exc}"
+        )
+        return recovered
+
+    # Um único passo pela fila em vez de uma consulta (com histórico) por item
+    pending = await download_queue.pending_items()
+    for repo_cls, item_id, url, resolution in stuck_items:
+        kind = DownloadKind.AUDIO if resolution is None else DownloadKind.VIDEO
+        if (kind, item_id) in pending:
+            continue
+        try:
+            if not url:
+                async with get_db_context() as session:
+                    await repo_cls(session).update_download_status(
+                        item_id, "error", error="Download interrompido sem URL"
+                    )
+                continue
+            await download_queue.add_download(
+                audio_id=item_id, url=url, kind=kind, resolution=resolution
+            )
+            recovered += 1
+            logger.info(
+                f"Recuperação de downloads: {kind.value} {item_id} re-enfileirado."
+            )
+        except Exception as exc:
+            logger.exception(
+                f"Recuperação de downloads: falha ao re-enfileirar {item_id}: {exc}"
+            )
+
+    logger.info(f"Recuperação de downloads: {recovered} download(s) pendente(s).")
+    return recovered
+
+
 # Callbacks da fila de downloads
 async def on_download_started_callback(task: DownloadTask):
     await sse_manager.download_started(
@@ -1012,18 +1157,353 @@ async def download_audio(
         )
 
 
+async def _queue_playlist_entries(
+    entries: List[dict],
+    item_type: str,
+    register: Callable[[List[dict], int], Awaitable[List[Tuple[str, bool]]]],
+    repository,
+    download_kwargs: dict,
+    first_track: int = 1,
+) -> Tuple[List[PlaylistTaskItem], int, int, int]:
+    """Registra as entradas de uma playlist em lote e enfileira as novas.
+
+    ``register(entries, first_track)`` faz o registro em lote (uma transação)
+    e devolve ``(item_id, skipped)`` por entrada; os itens não pulados vão
+    para a fila com um único ``add_downloads``. Se o lote falhar, cada entrada
+    é registrada sozinha, para que uma linha problemática não derrube a
+    playlist inteira: só as entradas que falharem de novo contam como falhas.
+    Se o enfileiramento falhar, as linhas registradas ficam em ``error``.
+
+    Retorna ``(tasks, queued, skipped, failed)``.
+    """
+
+    def _item(entry, item_id=None, task_id=None, skipped=False):
+        return PlaylistTaskItem(
+            item_id=item_id,
+            youtube_id=entry["id"],
+            item_type=item_type,
+            task_id=task_id,
+            title=entry["title"],
+            url=entry["url"],
+            skipped=skipped,
+        )
+
+    failed = set()
+    try:
+        registered: List[Optional[Tuple[str, bool]]] = list(
+            await register(entries, first_track)
+        )
+    except Exception as reg_err:
+        logger.exception(
+            f"Registro em lote da playlist falhou ({str(reg_err)[:200]}); "
+            "registrando entrada por entrada"
+        )
+        registered = []
+        for offset, entry in enumerate(entries):
+            try:
+                [result] = await register([entry], first_track + offset)
+            except Exception as entry_err:
+                logger.error(
+                    f"Falha ao registrar {entry['id']}: {str(entry_err)[:200]}"
+                )
+                failed.add(offset)
+                result = None
+            registered.append(result)
+
+    to_queue = [
+        (index, result[0])
+        for index, result in enumerate(registered)
+        if result is not None and not result[1]
+    ]
+    task_ids: Dict[int, str] = {}
+    if to_queue:
+        try:
+            queued = await download_queue.add_downloads(
+                [
+                    {
+                        "audio_id": item_id,
+                        "url": entries[index]["url"],
+                        "priority": 0,
+                        **download_kwargs,
+                    }
+                    for index, item_id in to_queue
+                ]
+            )
+            task_ids = {index: task_id for (index, _), task_id in zip(to_queue, queued)}
+        except Exception as post_err:
+            logger.error(f"Failed to queue playlist entries: {str(post_err)[:200]}")
+            failed.update(index for index, _ in to_queue)
+            try:
+                async with get_db_context() as session:
+                    await repository(session).update_many(
+                        [
+                            {"id": item_id, "download_status": "error"}
+                            for _, item_id in to_queue
+                        ]
+                    )
+            except Exception:
+                logger.exception("Falha ao marcar entradas da playlist como erro")
+
+    tasks: List[PlaylistTaskItem] = []
+    for index, (entry, result) in enumerate(zip(entries, registered)):
+        if index in failed:
+            tasks.append(_item(entry))
+        elif result[1]:
+            tasks.append(_item(entry, item_id=result[0], skipped=True))
+        else:
+            tasks.append(_item(entry, item_id=result[0], task_id=task_ids[index]))
+    skipped_count = sum(1 for result in registered if result and result[1])
+    return tasks, len(task_ids), skipped_count, len(failed)
+
+
+async def _continue_playlist(
+    pages: AsyncIterator[dict],
+    *,
+    folder_id: str,
+    playlist_title: str,
+    item_type: str,
+    register: Callable[[List[dict], int], Awaitable[List[Tuple[str, bool]]]],
+    repository,
+    download_kwargs: dict,
+    seen: Set[str],
+    artists: List[Optional[str]],
+    album_artist: Optional[str],
+) -> None:
+    """Registra e enfileira as páginas restantes de uma playlist.
+
+    Roda como task depois que o endpoint respondeu com a primeira página.
+    ``seen`` e ``artists`` chegam com o que a primeira página já registrou;
+    a numeração de faixas continua de onde ela parou. No fim, se a playlist
+    não traz artista do álbum, o artista majoritário é recalculado com todas
+    as entradas.
+    """
+    queued_total = skipped_total = failed_total = 0
+    try:
+        async for page in pages:
+            entries = []
+            for entry in page["entries"]:
+                if entry["id"] not in seen:
+                    seen.add(entry["id"])
+                    entries.append(entry)
+            if not entries:
+                continue
+            first_track = len(artists) + 1
+            artists.extend(entry.get("artist") for entry in entries)
+            _, queued, skipped, failed = await _queue_playlist_entries(
+                entries,
+                item_type=item_type,
+                register=register,
+                repository=repository,
+                download_kwargs=download_kwargs,
+                first_track=first_track,
+            )
+            queued_total += queued
+            skipped_total += skipped
+            failed_total += failed
+    except asyncio.CancelledError:
+        logger.warning(
+            f"Playlist '{playlist_title}': registro interrompido após "
+            f"{len(artists)} entradas (folder={folder_id})"
+        )
+        raise
+    except Exception as exc:
+        logger.exception(
+            f"Erro ao continuar a playlist '{playlist_title}' "
+            f"(folder={folder_id}): {exc}"
+        )
+    finally:
+        await pages.aclose()
+
+    logger.info(
+        f"Playlist '{playlist_title}': {len(artists)} entradas no total; "
+        f"mais {queued_total} queued, {skipped_total} skipped, "
+        f"{failed_total} failed em segundo plano, folder={folder_id}"
+    )
+    if album_artist:
+        return
+    artist = majority_artist_from_names(artists, total=len(artists))
+    try:
+        async with get_db_context() as session:
+            await FolderRepository(session).update(
+                folder_id, artist=(artist[:500] if artist else None)
+            )
+    except Exception as exc:
+        logger.warning(f"Falha ao atualizar artista do álbum {folder_id}: {exc}")
+
+
+def _spawn_playlist_continuation(**kwargs) -> None:
+    task = asyncio.create_task(_continue_playlist(**kwargs))
+    _playlist_continuations.add(task)
+    task.add_done_callback(_playlist_continuations.discard)
+
+
+async def _sync_playlist_folder(
+    folder_id: str, high_quality: bool = False, resolution: str = "1080p"
+) -> PlaylistSyncResponse:
+    """Sincroniza um álbum/playlist com a playlist de origem.
+
+    Lê a playlist atual, compara com os itens da pasta numa única consulta
+    (``get_folder_index``) e registra/enfileira só as entradas novas. Nos
+    álbuns, ``track_number`` segue a ordem atual da playlist, com um UPDATE
+    em lote só para as faixas que mudaram de posição. Itens que saíram da
+    playlist ficam na pasta (contados em ``missing_items``).
+
+    Levanta HTTPException 404/400/409 (pasta inexistente, sem origem ou já
+    sincronizando).
+    """
+    async with get_db_context() as session:
+        folder = await FolderRepository(session).get_by_id(folder_id)
+    if folder is None or folder.kind not in ("album", "playlist"):
+        raise HTTPException(
+            status_code=404, detail=f"Álbum ou playlist não encontrado: {folder_id}"
+        )
+    source_url = folder.source_url
+    if not source_url and folder.external_playlist_id:
+        source_url = (
+            f"https://www.youtube.com/playlist?list={folder.external_playlist_id}"
+        )
+    if not source_url:
+        raise HTTPException(
+            status_code=400, detail="Pasta não tem playlist de origem para sincronizar."
+        )
+    if folder_id in _syncing_folders:
+        raise HTTPException(
+            status_code=409, detail="Sincronização já em andamento para esta pasta."
+        )
+
+    is_album = folder.kind == "album"
+    item_type = "audio" if is_album else "video"
+    manager = audio_manager if is_album else video_manager
+    repository = AudioRepository if is_album else VideoRepository
+
+    _syncing_folders.add(folder_id)
+    try:
+        entries: List[dict] = []
+        seen: Set[str] = set()
+        try:
+            # Sempre da fonte: a lista em cache esconderia as entradas novas
+            async for page in manager.stream_playlist(source_url, use_cache=False):
+                for entry in page["entries"]:
+                    if entry["id"] not in seen:
+                        seen.add(entry["id"])
+                        entries.append(entry)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+        async with get_db_context() as session:
+            index = await repository(session).get_folder_index(folder_id)
+
+        positions = {entry["id"]: pos for pos, entry in enumerate(entries, start=1)}
+        new_entries = [entry for entry in entries if entry["id"] not in index]
+
+        tasks: List[PlaylistTaskItem] = []
+        queued = skipped = failed = 0
+        if new_entries:
+            if is_album:
+
+                def register(page, first_track):
+                    return audio_manager.register_playlist_entries(
+                        page, folder_id, skip_existing=True, first_track=first_track
+                    )
+
+                download_kwargs = {"high_quality": high_quality}
+            else:
+
+                def register(page, first_track):
+                    return video_manager.register_playlist_entries(
+                        page, folder_id, resolution=resolution, skip_existing=True
+                    )
+
+                download_kwargs = {"kind": DownloadKind.VIDEO, "resolution": resolution}
+            tasks, queued, skipped, failed = await _queue_playlist_entries(
+                new_entries,
+                item_type=item_type,
+                register=register,
+                repository=repository,
+                download_kwargs=download_kwargs,
+            )
+
+        renumber: List[dict] = []
+        if is_album:
+            renumber = [
+                {"id": row_id, "track_number": positions[external_id]}
+                for external_id, (row_id, track) in index.items()
+                if external_id in positions and track != positions[external_id]
+            ]
+            # Entradas novas foram numeradas em sequência; aqui ganham a
+            # posição real na playlist
+            renumber.extend(
+                {"id": task.item_id, "track_number": positions[task.youtube_id]}
+                for task in tasks
+                if task.item_id
+            )
+            if renumber:
+                async with get_db_context() as session:
+                    await AudioRepository(session).update_many(renumber)
+
+        missing = sum(1 for external_id in index if external_id not in positions)
+        logger.info(
+            f"Sync '{folder.name}' ({folder_id}): {len(entries)} entradas, "
+            f"{len(new_entries)} novas, {queued} queued, {len(renumber)} "
+            f"reordenadas, {missing} fora da playlist"
+        )
+        return PlaylistSyncResponse(
+            folder_id=folder_id,
+            playlist_title=folder.name,
+            total_items=len(entries),
+            new_items=len(new_entries),
+            queued_items=queued,
+            skipped_items=skipped,
+            failed_items=failed,
+            renumbered_items=len(renumber),
+            missing_items=missing,
+            tasks=tasks,
+        )
+    finally:
+        _syncing_folders.discard(folder_id)
+
+
+async def _playlist_sync_loop(interval: float) -> None:
+    """Sincroniza a cada ``interval`` segundos as pastas com playlist de origem."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with get_db_context() as session:
+                folders = await FolderRepository(session).get_synced_playlists()
+        except Exception as exc:
+            logger.warning(f"Sync periódico: falha ao listar playlists: {exc}")
+            continue
+        for folder in folders:
+            try:
+                await _sync_playlist_folder(folder.id)
+            except HTTPException as exc:
+                logger.warning(f"Sync periódico de {folder.id}: {exc.detail}")
+            except Exception as exc:
+                logger.exception(f"Sync periódico de {folder.id} falhou: {exc}")
+
+
 @app.post("/audio/playlist", response_model=PlaylistDownloadResponse)
 async def download_audio_playlist(
     request: PlaylistDownloadRequest,
     token_data: dict = Depends(verify_token),
 ):
+    # Enquanto não for entregue à continuação, o gerador de páginas (e o
+    # lease do YoutubeDL no executor) é desta requisição: o finally o fecha
+    pages: Optional[AsyncIterator[dict]] = None
     try:
         logger.info(f"Audio playlist download requested: {request.url}")
 
+        # Só a primeira página é esperada; as demais são registradas em
+        # segundo plano enquanto o yt-dlp continua buscando
+        pages = audio_manager.stream_playlist(str(request.url))
         try:
-            playlist_info = await audio_manager.extract_playlist_info(str(request.url))
+            playlist_info = await anext(pages)
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc))
+        has_more = playlist_info.get("has_more", False)
+        if not has_more:
+            await pages.aclose()
+            pages = None
 
         entries = playlist_info["entries"]
         playlist_title = playlist_info["title"]
@@ -1040,12 +1520,6 @@ async def download_audio_playlist(
             )
         external_playlist_id = playlist_info.get("playlist_id")
 
-        if len(entries) > MAX_PLAYLIST_ENTRIES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A playlist tem {len(entries)} itens; o máximo permitido é {MAX_PLAYLIST_ENTRIES}.",
-            )
-
         logger.info(f"Playlist '{playlist_title}' found with {len(entries)} entries")
 
         async with get_db_context() as session:
@@ -1065,129 +1539,51 @@ async def download_audio_playlist(
 
         logger.info(f"Album folder created: {folder_id} ('{playlist_title}')")
 
-        tasks: List[PlaylistTaskItem] = []
-        queued_count = 0
-        skipped_count = 0
-        failed_count = 0
-
-        for track_number, entry in enumerate(entries, start=1):
-            video_id = entry["id"]
-            title = entry["title"]
-            watch_url = entry["url"]
-            entry_artist = entry.get("artist")
-            if isinstance(entry_artist, str):
-                entry_artist = entry_artist[:500]
-            else:
-                entry_artist = None
-
-            existing = await audio_manager.get_audio_by_youtube_id(video_id)
-            already_exists = existing is not None and existing.get(
-                "download_status", ""
-            ) not in ("error", "")
-
-            if already_exists and request.skip_existing:
-                async with get_db_context() as session:
-                    repo = AudioRepository(session)
-                    update_kwargs = {"track_number": track_number}
-                    if existing.get("folder_id") is None:
-                        update_kwargs["folder_id"] = folder_id
-                    if entry_artist:
-                        update_kwargs["artist"] = entry_artist
-                    await repo.update(existing["id"], **update_kwargs)
-
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=existing["id"],
-                        youtube_id=video_id,
-                        item_type="audio",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=True,
-                    )
-                )
-                skipped_count += 1
-                logger.debug(f"Skipped existing audio: {video_id}")
-                continue
-
-            try:
-                audio_id = await audio_manager.register_audio_for_download(watch_url)
-            except Exception as reg_err:
-                logger.error("Failed to register {}: {}", video_id, str(reg_err)[:200])
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=None,
-                        youtube_id=video_id,
-                        item_type="audio",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                failed_count += 1
-                continue
-
-            try:
-                async with get_db_context() as session:
-                    repo = AudioRepository(session)
-                    update_kwargs = {
-                        "folder_id": folder_id,
-                        "track_number": track_number,
-                    }
-                    if entry_artist:
-                        update_kwargs["artist"] = entry_artist
-                    await repo.update(audio_id, **update_kwargs)
-
-                task_id = await download_queue.add_download(
-                    audio_id=audio_id,
-                    url=watch_url,
-                    high_quality=request.high_quality,
-                    priority=0,
-                )
-
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=audio_id,
-                        youtube_id=video_id,
-                        item_type="audio",
-                        task_id=task_id,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                queued_count += 1
-            except Exception as post_err:
-                logger.error(
-                    "Post-registration failure for {}: {}",
-                    video_id,
-                    str(post_err)[:200],
-                )
-                try:
-                    async with get_db_context() as session:
-                        repo = AudioRepository(session)
-                        await repo.update_download_status(audio_id, "error")
-                except Exception:
-                    pass
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=None,
-                        youtube_id=video_id,
-                        item_type="audio",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                failed_count += 1
+        (
+            tasks,
+            queued_count,
+            skipped_count,
+            failed_count,
+        ) = await _queue_playlist_entries(
+            entries,
+            item_type="audio",
+            register=lambda page, first_track: audio_manager.register_playlist_entries(
+                page,
+                folder_id,
+                skip_existing=request.skip_existing,
+                first_track=first_track,
+            ),
+            repository=AudioRepository,
+            download_kwargs={"high_quality": request.high_quality},
+        )
 
         logger.info(
             f"Playlist '{playlist_title}': {queued_count} queued, "
             f"{skipped_count} skipped, folder={folder_id}"
         )
 
+        if has_more:
+            _spawn_playlist_continuation(
+                pages=pages,
+                folder_id=folder_id,
+                playlist_title=playlist_title,
+                item_type="audio",
+                register=lambda page, first_track: (
+                    audio_manager.register_playlist_entries(
+                        page,
+                        folder_id,
+                        skip_existing=request.skip_existing,
+                        first_track=first_track,
+                    )
+                ),
+                repository=AudioRepository,
+                download_kwargs={"high_quality": request.high_quality},
+                seen={entry["id"] for entry in entries},
+                artists=[entry.get("artist") for entry in entries],
+                album_artist=playlist_info.get("album_artist"),
+            )
+            pages = None
+
         return PlaylistDownloadResponse(
             playlist_title=playlist_title,
             playlist_url=playlist_url,
@@ -1197,6 +1593,7 @@ async def download_audio_playlist(
             skipped_items=skipped_count,
             failed_items=failed_count,
             tasks=tasks,
+            has_more=has_more,
         )
 
     except HTTPException:
@@ -1207,12 +1604,14 @@ async def download_audio_playlist(
             status_code=500,
             detail="Erro interno ao processar a playlist. Verifique os logs do servidor.",
         )
+    finally:
+        if pages is not None:
+            await pages.aclose()
 
 
 @app.post("/video/download")
 async def download_video(
     request: VideoDownloadRequest,
-    background_tasks: BackgroundTasks,
     token_data: dict = Depends(verify_token),
 ):
     """Faz o download de um vídeo do YouTube"""
@@ -1233,19 +1632,20 @@ async def download_video(
                 status_code=500, detail=f"Erro ao registrar vídeo: {str(e)}"
             )
 
-        # Inicia o download em background
-        background_tasks.add_task(
-            video_manager.download_video_with_status_async,
-            video_id,
-            str(request.url),
-            request.resolution,
-            sse_manager,
+        # Adicionar à fila de downloads (lane de vídeo, concorrência limitada)
+        task_id = await download_queue.add_download(
+            audio_id=video_id,
+            url=str(request.url),
+            priority=0,
+            kind=DownloadKind.VIDEO,
+            resolution=request.resolution,
         )
 
         return {
             "status": "processando",
-            "message": "O vídeo foi registrado e o download foi iniciado",
+            "message": "O vídeo foi registrado e adicionado à fila de downloads",
             "video_id": video_id,
+            "task_id": task_id,
             "resolution": request.resolution,
             "url": str(request.url),
         }
@@ -1259,16 +1659,25 @@ async def download_video(
 @app.post("/video/playlist", response_model=PlaylistDownloadResponse)
 async def download_video_playlist(
     request: PlaylistDownloadRequest,
-    background_tasks: BackgroundTasks,
     token_data: dict = Depends(verify_token),
 ):
+    # Enquanto não for entregue à continuação, o gerador de páginas (e o
+    # lease do YoutubeDL no executor) é desta requisição: o finally o fecha
+    pages: Optional[AsyncIterator[dict]] = None
     try:
         logger.info(f"Video playlist download requested: {request.url}")
 
+        # Só a primeira página é esperada; as demais são registradas em
+        # segundo plano enquanto o yt-dlp continua buscando
+        pages = video_manager.stream_playlist(str(request.url))
         try:
-            playlist_info = await video_manager.extract_playlist_info(str(request.url))
+            playlist_info = await anext(pages)
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc))
+        has_more = playlist_info.get("has_more", False)
+        if not has_more:
+            await pages.aclose()
+            pages = None
 
         entries = playlist_info["entries"]
         playlist_title = playlist_info["title"]
@@ -1285,12 +1694,6 @@ async def download_video_playlist(
             )
         external_playlist_id = playlist_info.get("playlist_id")
 
-        if len(entries) > MAX_PLAYLIST_ENTRIES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A playlist tem {len(entries)} itens; o máximo permitido é {MAX_PLAYLIST_ENTRIES}.",
-            )
-
         logger.info(
             f"Video playlist '{playlist_title}' found with {len(entries)} entries"
         )
@@ -1312,139 +1715,57 @@ async def download_video_playlist(
 
         logger.info(f"Video playlist folder created: {folder_id} ('{playlist_title}')")
 
-        tasks: List[PlaylistTaskItem] = []
-        to_download: List[dict] = []
-        skipped_count = 0
-        failed_count = 0
-
-        for entry in entries:
-            video_id = entry["id"]
-            title = entry["title"]
-            watch_url = entry["url"]
-
-            existing = await video_manager.get_video_by_youtube_id(video_id)
-            already_exists = existing is not None and existing.get(
-                "download_status", ""
-            ) not in ("error", "")
-
-            if already_exists and request.skip_existing:
-                if existing.get("folder_id") is None:
-                    async with get_db_context() as session:
-                        repo = VideoRepository(session)
-                        await repo.update_folder(existing["id"], folder_id)
-
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=existing["id"],
-                        youtube_id=video_id,
-                        item_type="video",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=True,
-                    )
-                )
-                skipped_count += 1
-                logger.debug(f"Skipped existing video: {video_id}")
-                continue
-
-            try:
-                registered_id = await video_manager.register_video_for_download(
-                    watch_url, resolution=request.resolution
-                )
-            except Exception as reg_err:
-                logger.error(
-                    "Failed to register video {}: {}", video_id, str(reg_err)[:200]
-                )
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=None,
-                        youtube_id=video_id,
-                        item_type="video",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                failed_count += 1
-                continue
-
-            try:
-                async with get_db_context() as session:
-                    repo = VideoRepository(session)
-                    await repo.update_folder(registered_id, folder_id)
-
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=registered_id,
-                        youtube_id=video_id,
-                        item_type="video",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                to_download.append(
-                    {
-                        "video_id": registered_id,
-                        "url": watch_url,
-                        "resolution": request.resolution,
-                    }
-                )
-            except Exception as post_err:
-                logger.error(
-                    "Post-registration failure for video {}: {}",
-                    video_id,
-                    str(post_err)[:200],
-                )
-                try:
-                    async with get_db_context() as session:
-                        repo = VideoRepository(session)
-                        await repo.update_download_status(registered_id, "error")
-                except Exception:
-                    pass
-                tasks.append(
-                    PlaylistTaskItem(
-                        item_id=None,
-                        youtube_id=video_id,
-                        item_type="video",
-                        task_id=None,
-                        title=title,
-                        url=watch_url,
-                        skipped=False,
-                    )
-                )
-                failed_count += 1
-
-        queued_count = len(to_download)
-
-        async def _download_playlist_serially(items: list):
-            for item in items:
-                try:
-                    await video_manager.download_video_with_status_async(
-                        item["video_id"],
-                        item["url"],
-                        resolution=item["resolution"],
-                        sse_manager=sse_manager,
-                    )
-                    logger.success(f"Playlist video done: {item['video_id']}")
-                except Exception as exc:
-                    logger.error(
-                        "Playlist video failed: {} — {}",
-                        item["video_id"],
-                        str(exc)[:200],
-                    )
-
-        if to_download:
-            background_tasks.add_task(_download_playlist_serially, to_download)
+        (
+            tasks,
+            queued_count,
+            skipped_count,
+            failed_count,
+        ) = await _queue_playlist_entries(
+            entries,
+            item_type="video",
+            register=lambda page, first_track: video_manager.register_playlist_entries(
+                page,
+                folder_id,
+                resolution=request.resolution,
+                skip_existing=request.skip_existing,
+            ),
+            repository=VideoRepository,
+            download_kwargs={
+                "kind": DownloadKind.VIDEO,
+                "resolution": request.resolution,
+            },
+        )
 
         logger.info(
-            f"Video playlist '{playlist_title}': {queued_count} scheduled, "
+            f"Video playlist '{playlist_title}': {queued_count} queued, "
             f"{skipped_count} skipped, folder={folder_id}"
         )
 
+        if has_more:
+            _spawn_playlist_continuation(
+                pages=pages,
+                folder_id=folder_id,
+                playlist_title=playlist_title,
+                item_type="video",
+                register=lambda page, first_track: (
+                    video_manager.register_playlist_entries(
+                        page,
+                        folder_id,
+                        resolution=request.resolution,
+                        skip_existing=request.skip_existing,
+                    )
+                ),
+                repository=VideoRepository,
+                download_kwargs={
+                    "kind": DownloadKind.VIDEO,
+                    "resolution": request.resolution,
+                },
+                seen={entry["id"] for entry in entries},
+                artists=[entry.get("artist") for entry in entries],
+                album_artist=playlist_info.get("album_artist"),
+            )
+            pages = None
+
         return PlaylistDownloadResponse(
             playlist_title=playlist_title,
             playlist_url=playlist_url,
@@ -1454,6 +1775,7 @@ async def download_video_playlist(
             skipped_items=skipped_count,
             failed_items=failed_count,
             tasks=tasks,
+            has_more=has_more,
         )
 
     except HTTPException:
@@ -1464,6 +1786,9 @@ async def download_video_playlist(
             status_code=500,
             detail="Erro interno ao processar a playlist. Verifique os logs do servidor.",
         )
+    finally:
+        if pages is not None:
+            await pages.aclose()
 
 
 @app.get("/video/download-status/{video_id}")
@@ -2225,24 +2550,39 @@ async def get_queue_status(token_data: dict = Depends(verify_token)):
 async def get_queue_tasks(
     status: Optional[str] = None,
     audio_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    archived: bool = False,
     token_data: dict = Depends(verify_token),
 ):
-    """Lista tasks na fila com filtros opcionais"""
-    try:
-        if audio_id:
-            tasks = await download_queue.get_tasks_by_audio_id(audio_id)
-        else:
-            async with download_queue.queue_lock:
-                tasks = list(download_queue.tasks.values())
+    """Lista tasks na fila com filtros opcionais.
 
-        if status:
-            tasks = [task for task in tasks if task.status == status]
+    A filtragem é feita nos índices da fila e a paginação é por cursor:
+    passe o ``next_cursor`` da resposta anterior para obter a próxima página.
+    Com ``archived=true`` a listagem vem do histórico de tasks finalizadas.
+    """
+    try:
+        try:
+            status_filter = DownloadStatus(status) if status else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Status inválido: {status}")
+
+        list_tasks = (
+            download_queue.list_archived_tasks
+            if archived
+            else download_queue.list_tasks
+        )
+        tasks, next_cursor = await list_tasks(
+            status=status_filter, audio_id=audio_id, limit=limit, cursor=cursor
+        )
 
         task_list = []
         for task in tasks:
             task_dict = {
                 "id": task.id,
                 "audio_id": task.audio_id,
+                "kind": task.kind.value,
+                "resolution": task.resolution,
                 "url": task.url,
                 "high_quality": task.high_quality,
                 "status": task.status,
@@ -2262,8 +2602,10 @@ async def get_queue_tasks(
             }
             task_list.append(task_dict)
 
-        return {"tasks": task_list}
+        return {"tasks": task_list, "next_cursor": next_cursor}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Erro ao listar tasks da fila: {str(e)}")
         raise HTTPException(
@@ -2307,16 +2649,11 @@ async def retry_download_task(task_id: str, token_data: dict = Depends(verify_to
                 status_code=404, detail=f"Task {task_id} não encontrada"
             )
 
-        if task.status != "failed":
+        if not await download_queue.retry_download(task_id):
             raise HTTPException(
                 status_code=400, detail=f"Task {task_id} não está em estado de falha"
             )
 
-        async with download_queue.queue_lock:
-            task.status = "queued"
-            task.error_message = None
-            task.next_retry_at = None
-
         return {"success": True, "message": f"Download {task_id} recolocado na fila"}
 
     except HTTPException:
@@ -2328,6 +2665,31 @@ async def retry_download_task(task_id: str, token_data: dict = Depends(verify_to
         )
 
 
+@app.post("/downloads/queue/priority/{task_id}")
+async def set_download_task_priority(
+    task_id: str, priority: int, token_data: dict = Depends(verify_token)
+):
+    """Altera a prioridade de uma task (reordena se ainda estiver na fila)"""
+    try:
+        if not await download_queue.set_priority(task_id, priority):
+            raise HTTPException(
+                status_code=404, detail=f"Task {task_id} não encontrada"
+            )
+
+        return {
+            "success": True,
+            "message": f"Prioridade da task {task_id} alterada para {priority}",
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Erro ao alterar prioridade do download: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao alterar prioridade do download: {str(e)}"
+        )
+
+
 @app.delete("/downloads/queue/cleanup")
 async def cleanup_queue(
     max_age_hours: int = 24, token_data: dict = Depends(verify_token)
@@ -2345,6 +2707,54 @@ async def cleanup_queue(
         raise HTTPException(status_code=500, detail=f"Erro ao limpar fila: {str(e)}")
 
 
+@app.get("/admin/download-metrics")
+async def get_download_metrics(
+    source: Optional[str] = None,
+    kind: Optional[str] = Query(None, pattern="^(audio|video)$"),
+    limit: int = Query(1000, ge=1, le=DOWNLOAD_METRICS_RETENTION),
+    token_data: dict = Depends(verify_token),
+):
+    """Percentis por fonte e por fase dos últimos ``limit`` downloads.
+
+    Fases: ``metadata``, ``transfer``, ``postprocess``, ``upload`` e
+    ``total`` (segundos), além de bytes, throughput médio/pico (bytes/s) e
+    CPU dos post-processors.
+    """
+    try:
+        async with get_db_context() as session:
+            rows = await DownloadMetricsRepository(session).recent(
+                limit=limit, source=source, kind=kind
+            )
+        return summarize(rows)
+    except Exception as e:
+        logger.exception(f"Erro ao obter métricas de download: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao obter métricas de download: {str(e)}"
+        )
+
+
+@app.get("/health")
+async def health():
+    """Saúde do serviço, incluindo o solver de JS challenges do YouTube.
+
+    ``degraded`` quando os scripts EJS faltam no cache local, são de outra
+    versão ou não passam na verificação, ou quando não há runtime JS utilizável.
+    """
+    loop = asyncio.get_running_loop()
+    solver = await loop.run_in_executor(None, ejs_component.status)
+    return {
+        "status": "ok" if solver["ok"] else "degraded",
+        "checks": {"js_challenge_solver": solver},
+    }
+
+
+@app.get("/admin/metadata-cache")
+async def get_metadata_cache_stats(token_data: dict = Depends(verify_token)):
+    """Ocupação e hit/miss (total e por modo) do cache de metadados do yt-dlp."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, metadata_cache.stats)
+
+
 # ============================================================================
 # ENDPOINTS DE PASTAS (FOLDERS)
 # ============================================================================
@@ -2356,6 +2766,8 @@ async def list_albums(token_data: dict = Depends(verify_token)):
     try:
         async with get_db_context() as session:
             folder_repo = FolderRepository(session)
+            # Artista majoritário só dos álbuns cujas faixas mudaram
+            await folder_repo.recompute_album_artists()
             albums = await folder_repo.get_albums()
             result = []
             for album in albums:
@@ -2378,6 +2790,7 @@ async def get_album(folder_id: str, token_data: dict = Depends(verify_token)):
         async with get_db_context() as session:
             folder_repo = FolderRepository(session)
             audio_repo = AudioRepository(session)
+            await folder_repo.recompute_album_artists()
 
             folder = await folder_repo.get_by_id(folder_id)
             if not folder:
@@ -2404,11 +2817,15 @@ async def get_album(folder_id: str, token_data: dict = Depends(verify_token)):
         raise HTTPException(status_code=500, detail=f"Erro ao obter álbum: {str(e)}")
 
 
-@app.post("/albums/{folder_id}/refresh-artists")
+@app.post("/albums/{folder_id}/refresh-artists", status_code=202)
 async def refresh_album_artists(
     folder_id: str, token_data: dict = Depends(verify_token)
 ):
-    """Fill missing track artists via yt-dlp, then recompute folder.artist."""
+    """Inicia o preenchimento dos artistas das faixas em segundo plano.
+
+    Devolve o job na hora; o progresso chega pelos eventos SSE
+    ``artist_refresh_*`` e por ``GET /albums/refresh-artists/{job_id}``.
+    """
     try:
         async with get_db_context() as session:
             folder_repo = FolderRepository(session)
@@ -2427,68 +2844,13 @@ async def refresh_album_artists(
             tracks = await audio_repo.get_by_folder(folder_id)
             track_dicts = [t.to_dict() for t in tracks]
 
-        def _has_artist(t: dict) -> bool:
-            a = t.get("artist")
-            return isinstance(a, str) and bool(a.strip())
-
-        need_fetch = [
-            t
-            for t in track_dicts
-            if t.get("download_status") == "ready" and not _has_artist(t)
-        ]
-        skipped = len(track_dicts) - len(need_fetch)
-        updated = 0
-        failed = 0
-        sem = asyncio.Semaphore(2)
-
-        async def _fetch_and_update(track: dict) -> None:
-            nonlocal updated, failed
-            url_or_id = (
-                track.get("url")
-                or track.get("youtube_id")
-                or track.get("external_id")
-                or track.get("id")
-            )
-            if not url_or_id:
-                failed += 1
-                return
-            async with sem:
-                artist = await audio_manager.fetch_track_artist(str(url_or_id))
-            if not artist:
-                failed += 1
-                return
-            try:
-                async with get_db_context() as session:
-                    repo = AudioRepository(session)
-                    await repo.update(track["id"], artist=artist[:500])
-                track["artist"] = artist[:500]
-                updated += 1
-            except Exception as exc:
-                logger.warning(
-                    "refresh-artists update failed for %s: %s",
-                    track.get("id"),
-                    str(exc)[:200],
-                )
-                failed += 1
-
-        if need_fetch:
-            await asyncio.gather(*[_fetch_and_update(t) for t in need_fetch])
-
-        # Recompute folder artist from majority of track artists
-        all_artists = [t.get("artist") for t in track_dicts]
-        folder_artist = majority_artist_from_names(
-            all_artists, total=len(track_dicts) if track_dicts else 0
+        job = artist_refresh.start(
+            folder_id,
+            track_dicts,
+            fetch=audio_manager.fetch_track_artist,
+            source_url=folder.source_url,
         )
-        async with get_db_context() as session:
-            folder_repo = FolderRepository(session)
-            await folder_repo.update(folder_id, artist=folder_artist)
-
-        return {
-            "updated": updated,
-            "skipped": skipped,
-            "failed": failed,
-            "folder_artist": folder_artist,
-        }
+        return job.to_dict()
     except HTTPException:
         raise
     except Exception as e:
@@ -2498,6 +2860,41 @@ async def refresh_album_artists(
         )
 
 
+@app.get("/albums/refresh-artists/{job_id}")
+async def get_album_artists_refresh(
+    job_id: str, token_data: dict = Depends(verify_token)
+):
+    """Status de um preenchimento de artistas."""
+    job = artist_refresh.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job.to_dict()
+
+
+@app.post("/folders/{folder_id}/sync", response_model=PlaylistSyncResponse)
+async def sync_playlist_folder(
+    folder_id: str,
+    request: Optional[PlaylistSyncRequest] = None,
+    token_data: dict = Depends(verify_token),
+):
+    """Enfileira as entradas novas da playlist de origem de um álbum/playlist."""
+    request = request or PlaylistSyncRequest()
+    try:
+        return await _sync_playlist_folder(
+            folder_id,
+            high_quality=request.high_quality,
+            resolution=request.resolution,
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception(f"Erro ao sincronizar playlist {folder_id}: {exc}")
+        raise HTTPException(
+            status_code=500,
+            detail="Erro interno ao sincronizar a playlist. Verifique os logs do servidor.",
+        )
+
+
 @app.post("/folders", response_model=FolderResponse)
 async def create_folder(
     folder_data: FolderCreate, token_data: dict = Depends(verify_token)
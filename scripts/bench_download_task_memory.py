@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Memory footprint of DownloadQueue tasks at large counts.
+
+Builds ``--count`` finished tasks in a ``TaskStore`` (the structure behind
+``DownloadQueue.tasks``) and reports bytes per task, measured two ways:
+
+  * ``tracemalloc`` — Python allocations attributable to the tasks + indexes;
+  * ``RSS``         — growth of the process resident set (Linux ``/proc``).
+
+For comparison the same data is built with the previous representation: a
+plain ``@dataclass`` (per-instance ``__dict__``) holding ``datetime`` objects,
+stored in a bare ``dict``. ``records`` isolates the slotted records (also in
+a bare ``dict``) from the cost of the store's status/audio indexes.
+
+Usage (from the repo root):
+
+    python scripts/bench_download_task_memory.py
+    python scripts/bench_download_task_memory.py --count 200000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.download_queue import (  # noqa: E402
+    DownloadStatus,
+    DownloadTask,
+    TaskStore,
+)
+
+
+@dataclass
+class LegacyDownloadTask:
+    """Representação anterior da task (dataclass comum + datetimes)."""
+
+    id: str
+    audio_id: str
+    url: str
+    high_quality: bool = True
+    status: DownloadStatus = DownloadStatus.QUEUED
+    priority: int = 0
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    retry_count: int = 0
+    max_retries: int = 3
+    retry_delay: int = 5
+    next_retry_at: Optional[datetime] = None
+    progress: int = 0
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0
+    import resource
+
+    return pages * resource.getpagesize()
+
+
+def _inputs(count: int):
+    # Strings are created up-front so both variants measure only the records.
+    return [
+        (str(uuid.uuid4()), f"{i:011d}", f"https://youtu.be/{i:011d}")
+        for i in range(count)
+    ]
+
+
+def _build_compact(inputs):
+    store = TaskStore()
+    for task_id, audio_id, url in inputs:
+        task = DownloadTask(
+            id=task_id,
+            audio_id=audio_id,
+            url=url,
+            started_ts=time.time(),
+            completed_ts=time.time(),
+            progress=100,
+        )
+        store.add(task)
+        store.set_status(task, DownloadStatus.COMPLETED)
+    return store
+
+
+def _build_records(inputs):
+    tasks = {}
+    for task_id, audio_id, url in inputs:
+        tasks[task_id] = DownloadTask(
+            id=task_id,
+            audio_id=audio_id,
+            url=url,
+            status=DownloadStatus.COMPLETED,
+            started_ts=time.time(),
+            completed_ts=time.time(),
+            progress=100,
+        )
+    return tasks
+
+
+def _build_legacy(inputs):
+    tasks = {}
+    for task_id, audio_id, url in inputs:
+        tasks[task_id] = LegacyDownloadTask(
+            id=task_id,
+            audio_id=audio_id,
+            url=url,
+            status=DownloadStatus.COMPLETED,
+            started_at=datetime.now(),
+            completed_at=datetime.now(),
+            progress=100,
+        )
+    return tasks
+
+
+def _measure(build, inputs):
+    gc.collect()
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    result = build(inputs)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    rss_after = _rss_bytes()
+    return result, traced, rss_after - rss_before
+
+
+def main(count: int):
+    inputs = _inputs(count)
+    print(f"{'variant':>10} | {'tracemalloc B/task':>18} | {'RSS B/task':>10}")
+    print("-" * 46)
+    variants = (
+        ("legacy", _build_legacy),
+        ("records", _build_records),
+        ("store", _build_compact),
+    )
+    for name, build in variants:
+        result, traced, rss = _measure(build, inputs)
+        print(f"{name:>10} | {traced / count:>18.1f} | {rss / count:>10.1f}")
+        del result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.count)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Benchmark database startup (``init_db``) on a large library.
+
+Builds a scratch SQLite file with ``--rows`` audios (plus ``--rows / 10``
+videos and ``--rows / 100`` albums) and measures one startup, as each uvicorn
+worker does it, against an already migrated database:
+
+  * ``ladder``    — the previous startup: ``create_all`` plus every migration
+                    step (``PRAGMA table_info``, ``ALTER``/``CREATE INDEX IF NOT
+                    EXISTS`` and the full-table backfill UPDATEs), every boot;
+  * ``versioned`` — ``_init_schema``: one SELECT on ``schema_version`` when
+                    every migration is already recorded.
+
+Each startup opens a fresh engine (a new worker). Reported: SQL statements and
+the median/max time of ``--repeat`` startups.
+
+Usage (from the repo root):
+
+    python scripts/bench_init_db.py
+    python scripts/bench_init_db.py --rows 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.db.database import _MIGRATIONS, _init_schema  # noqa: E402
+from app.db.models import Audio, Base, Folder, Video  # noqa: E402
+
+BATCH = 10_000
+
+
+async def _populate(path: Path, rows: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await _init_schema(conn)
+        albums = max(1, rows // 100)
+        await conn.execute(
+            Folder.__table__.insert(),
+            [
+                {"id": f"f{i}", "name": f"Album {i}", "kind": "album"}
+                for i in range(albums)
+            ],
+        )
+        for start in range(0, rows, BATCH):
+            await conn.execute(
+                Audio.__table__.insert(),
+                [
+                    {
+                        "id": f"a{i}",
+                        "title": f"Track {i}",
+                        "name": f"track-{i}",
+                        "youtube_id": f"{i:011d}",
+                        "external_id": f"{i:011d}",
+                        "folder_id": f"f{i % albums}",
+                        "track_number": i // albums + 1,
+                        "artist": f"Artist {i % 7}",
+                    }
+                    for i in range(start, min(rows, start + BATCH))
+                ],
+            )
+        await conn.execute(
+            Video.__table__.insert(),
+            [
+                {
+                    "id": f"v{i}",
+                    "title": f"Video {i}",
+                    "name": f"video-{i}",
+                    "youtube_id": f"v{i:010d}",
+                    "external_id": f"v{i:010d}",
+                }
+                for i in range(rows // 10)
+            ],
+        )
+    await engine.dispose()
+
+
+async def _ladder(conn) -> None:
+    await conn.run_sync(Base.metadata.create_all)
+    for migration in _MIGRATIONS:
+        await migration(conn)
+
+
+async def _startup(path: Path, mode: str) -> tuple:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    statements = 0
+
+    def _count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    t0 = time.perf_counter()
+    async with engine.begin() as conn:
+        if mode == "ladder":
+            await _ladder(conn)
+        else:
+            await _init_schema(conn)
+    elapsed = time.perf_counter() - t0
+    await engine.dispose()
+    return statements, elapsed
+
+
+async def main(rows: int, repeat: int) -> None:
+    logger.disable("app")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        t0 = time.perf_counter()
+        await _populate(path, rows)
+        print(
+            f"{rows} audios, {rows // 10} videos, {max(1, rows // 100)} albums "
+            f"(setup {time.perf_counter() - t0:.1f}s)\n"
+        )
+        print(f"{'mode':>10} | {'statements':>10} | {'median ms':>10} | {'max ms':>8}")
+        print("-" * 48)
+        for mode in ("ladder", "versioned"):
+            runs = [await _startup(path, mode) for _ in range(repeat)]
+            times = [elapsed * 1e3 for _, elapsed in runs]
+            print(
+                f"{mode:>10} | {runs[-1][0]:>10} | "
+                f"{statistics.median(times):>10.2f} | {max(times):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
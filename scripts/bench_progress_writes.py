@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Benchmark progress persistence with many concurrent downloads.
+
+Simulates ``--downloads`` downloads that each report ``--updates`` progress
+values, one every ``--tick`` seconds, against a scratch SQLite file, and
+compares:
+
+  * ``before`` — one transaction per update through ``AudioRepository.update``
+                 (UPDATE + flush + SELECT to reload the row), as the download
+                 managers did before the batched writer;
+  * ``after``  — ``ProgressWriter``: updates are coalesced in memory and
+                 flushed every ``--flush-interval`` seconds in one transaction
+                 with a single executemany UPDATE.
+
+Reported per mode: write transactions, SQL statements, rows written, and the
+time spent inside write transactions (``tx ms``/``tx p95``/``tx max``). Every
+transaction holds the SQLite write lock, so concurrent transactions queue on
+it; the transaction latency above the uncontended cost is the lock wait.
+
+Usage (from the repo root):
+
+    python scripts/bench_progress_writes.py
+    python scripts/bench_progress_writes.py --downloads 20 --updates 50 --tick 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db.models import Audio, Base  # noqa: E402
+from app.db.repositories import AudioRepository  # noqa: E402
+from app.services.progress_writer import AUDIO, ProgressWriter  # noqa: E402
+
+
+async def _setup(path: Path, downloads: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        for i in range(downloads):
+            session.add(
+                Audio(id=f"a{i}", title="t", name="n", download_status="downloading")
+            )
+        await session.commit()
+
+    stats = {"statements": 0, "tx": []}
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: stats.__setitem__("statements", stats["statements"] + 1),
+    )
+
+    @asynccontextmanager
+    async def session_factory():
+        t0 = time.perf_counter()
+        async with factory() as session:
+            yield session
+            await session.commit()
+        stats["tx"].append(time.perf_counter() - t0)
+
+    return engine, session_factory, stats
+
+
+async def _run(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory, stats = await _setup(
+            Path(tmp) / "bench.db", args.downloads
+        )
+        writer = ProgressWriter(
+            flush_interval=args.flush_interval, session_factory=session_factory
+        )
+        if mode == "after":
+            writer.start()
+
+        async def download(audio_id: str):
+            for step in range(1, args.updates + 1):
+                progress = step * 100 // args.updates
+                if mode == "before":
+                    async with session_factory() as session:
+                        await AudioRepository(session).update(
+                            audio_id, download_progress=progress
+                        )
+                else:
+                    writer.submit(AUDIO, audio_id, progress)
+                await asyncio.sleep(args.tick)
+
+        stats["statements"] = 0
+        t0 = time.perf_counter()
+        await asyncio.gather(*(download(f"a{i}") for i in range(args.downloads)))
+        await writer.stop()
+        wall = time.perf_counter() - t0
+        await engine.dispose()
+
+    tx = sorted(stats["tx"])
+    return {
+        "mode": mode,
+        "tx": len(tx),
+        "statements": stats["statements"],
+        "rows": writer.rows_written if mode == "after" else len(tx),
+        "tx_total_ms": sum(tx) * 1e3,
+        "tx_p95_ms": (tx[int(len(tx) * 0.95) - 1] if tx else 0) * 1e3,
+        "tx_max_ms": (tx[-1] if tx else 0) * 1e3,
+        "tx_median_ms": (statistics.median(tx) if tx else 0) * 1e3,
+        "wall_s": wall,
+    }
+
+
+async def main(args) -> None:
+    print(
+        f"{args.downloads} downloads x {args.updates} updates, "
+        f"tick {args.tick}s, flush interval {args.flush_interval}s"
+    )
+    print(
+        f"{'mode':>7} {'tx':>6} {'stmts':>7} {'rows':>6} {'tx ms':>9} "
+        f"{'tx p50':>8} {'tx p95':>8} {'tx max':>8} {'wall s':>7}"
+    )
+    for mode in ("before", "after"):
+        r = await _run(mode, args)
+        print(
+            f"{r['mode']:>7} {r['tx']:>6} {r['statements']:>7} {r['rows']:>6} "
+            f"{r['tx_total_ms']:>9.1f} {r['tx_median_ms']:>8.2f} "
+            f"{r['tx_p95_ms']:>8.2f} {r['tx_max_ms']:>8.2f} {r['wall_s']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--downloads", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--tick", type=float, default=0.05)
+    parser.add_argument("--flush-interval", type=float, default=0.25)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Benchmark the per-call YoutubeDL setup cost removed by ``ydl_pool``.
+
+Metadata-only calls (``YouTubeDownloader.extract_id``, ``get_info``,
+``AudioDownloadManager.fetch_track_artist``) used to build a fresh
+``YoutubeDL`` for every call. Before the first request, each new instance:
+
+  * copies the cookies file and loads it into a cookiejar;
+  * builds the request director (HTTP handlers, proxies, TLS context);
+  * instantiates the YouTube extractor.
+
+This script repeats that setup ``--calls`` times for each profile, without
+any network access, and compares:
+
+  * ``fresh``  — ``with YoutubeDL(opts)`` per call, as before;
+  * ``pooled`` — ``ydl_pool.lease(...)``, which builds the instance once and
+                 reuses it.
+
+The extraction itself (network, JS challenges) is unchanged, so the saving
+per call is ``fresh - pooled``. A scratch cookies file with ``--cookies``
+entries stands in for ``YT_COOKIES_FILE``.
+
+Usage (from the repo root):
+
+    python scripts/bench_ydl_pool.py
+    python scripts/bench_ydl_pool.py --calls 200 --cookies 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+
+from app.services.configs import get_yt_dlp_cookies_opts  # noqa: E402
+from app.services.managers import YDL_JS_RUNTIMES, YDL_REMOTE_COMPONENTS  # noqa: E402
+from app.services.ydl_pool import YdlPool  # noqa: E402
+
+# Mesmas opções de extract_id ("flat") e get_info/fetch_track_artist ("metadata")
+PROFILES = {
+    "flat": {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "extract_flat": True,
+        "js_runtimes": YDL_JS_RUNTIMES,
+        "remote_components": YDL_REMOTE_COMPONENTS,
+    },
+    "metadata": {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "js_runtimes": YDL_JS_RUNTIMES,
+        "remote_components": YDL_REMOTE_COMPONENTS,
+    },
+}
+
+
+def _write_cookies(path: Path, count: int) -> None:
+    lines = ["# Netscape HTTP Cookie File"]
+    for i in range(count):
+        lines.append(
+            f".youtube.com\tTRUE\t/\tTRUE\t2147483647\tcookie{i}\tvalue{i:032d}"
+        )
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _warm(ydl) -> None:
+    """O que a primeira extração de uma instância nova monta antes da rede."""
+    ydl.cookiejar
+    ydl._request_director
+    ydl.get_info_extractor("Youtube")
+
+
+def _fresh(opts: dict) -> None:
+    with YoutubeDL({**opts, **get_yt_dlp_cookies_opts("youtube")}) as ydl:
+        _warm(ydl)
+
+
+def _run(fn, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cookies = Path(tmp) / "cookies.txt"
+        _write_cookies(cookies, args.cookies)
+        os.environ["YT_COOKIES_FILE"] = str(cookies)
+        os.environ.pop("YT_COOKIES_FROM_BROWSER", None)
+
+        print(f"{args.calls} calls per profile, {args.cookies} cookies")
+        print(
+            f"{'profile':>9} {'mode':>7} {'mean ms':>9} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'total s':>8}"
+        )
+        for profile, opts in PROFILES.items():
+            pool = YdlPool(max_idle=1, max_age=3600, max_uses=args.calls + 1)
+
+            def pooled():
+                with pool.lease("youtube", profile, opts) as ydl:
+                    _warm(ydl)
+
+            for mode, fn in (("fresh", lambda: _fresh(opts)), ("pooled", pooled)):
+                samples = _run(fn, args.calls)
+                ordered = sorted(samples)
+                print(
+                    f"{profile:>9} {mode:>7} {statistics.mean(samples) * 1e3:>9.2f} "
+                    f"{statistics.median(samples) * 1e3:>8.2f} "
+                    f"{ordered[int(len(ordered) * 0.95) - 1] * 1e3:>8.2f} "
+                    f"{sum(samples):>8.2f}"
+                )
+            pool.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--cookies", type=int, default=200)
+    main(parser.parse_args())
@@ -34,6 +34,18 @@ SAMPLE_PLAYLIST_INFO = {
 }
 
 
+def _stream(*pages, error=None):
+    """``stream_playlist`` falso: entrega ``pages`` (ou levanta ``error``)."""
+
+    async def _pages(url):
+        if error is not None:
+            raise error
+        for page in pages:
+            yield page
+
+    return _pages
+
+
 def _make_db_mock(folder_id="album-folder-1"):
     session_mock = MagicMock()
 
@@ -54,20 +66,16 @@ def test_audio_playlist_creates_folder_as_album(client):
     mock_db, folder_repo, audio_repo = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(return_value=SAMPLE_PLAYLIST_INFO),
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=None),
-        ),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("audio-id-1", False), ("audio-id-2", False)]),
+        ) as register_mock,
         patch(
-            "app.uwtv.main.audio_manager.register_audio_for_download",
-            new=AsyncMock(side_effect=["audio-id-1", "audio-id-2"]),
-        ),
-        patch(
-            "app.uwtv.main.download_queue.add_download",
-            new=AsyncMock(side_effect=["task-id-1", "task-id-2"]),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-id-1", "task-id-2"]),
         ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
@@ -86,18 +94,14 @@ def test_audio_playlist_creates_folder_as_album(client):
     # Uploader is playlist owner — not used as folder artist (mixed track artists)
     assert folder_arg.artist is None
 
-    # track_number 1-based assigned on register path
-    update_calls = audio_repo.update.call_args_list
-    assert any(
-        c.kwargs.get("track_number") == 1 or (len(c.args) > 1 and False)
-        for c in update_calls
+    # Entradas (com artista) vão para o registro em lote do álbum criado;
+    # track_number/artist por faixa: ver test_playlist_registration
+    register_mock.assert_awaited_once_with(
+        SAMPLE_PLAYLIST_INFO["entries"],
+        "album-folder-1",
+        skip_existing=True,
+        first_track=1,
     )
-    track_numbers = [
-        c.kwargs.get("track_number") for c in update_calls if "track_number" in c.kwargs
-    ]
-    assert track_numbers == [1, 2]
-    artists = [c.kwargs.get("artist") for c in update_calls if "artist" in c.kwargs]
-    assert artists == ["Miles Davis", "John Coltrane"]
 
 
 def test_video_playlist_creates_folder_as_playlist_not_album(client):
@@ -106,16 +110,16 @@ def test_video_playlist_creates_folder_as_playlist_not_album(client):
     video_repo.update_folder = AsyncMock()
     with (
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(return_value=SAMPLE_PLAYLIST_INFO),
+            "app.uwtv.main.video_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.video_manager.get_video_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.video_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("vid-1", False), ("vid-2", False)]),
         ),
         patch(
-            "app.uwtv.main.video_manager.register_video_for_download",
-            new=AsyncMock(side_effect=["vid-1", "vid-2"]),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-1", "task-2"]),
         ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
@@ -171,6 +175,7 @@ def _folder_mock(
 def test_list_albums_returns_only_albums_with_counts(client):
     album = _folder_mock()
     folder_repo = MagicMock()
+    folder_repo.recompute_album_artists = AsyncMock(return_value=0)
     folder_repo.get_albums = AsyncMock(return_value=[album])
     folder_repo.count_items = AsyncMock(
         return_value={"audios": 2, "videos": 0, "total": 2}
@@ -221,6 +226,7 @@ def test_get_album_detail_returns_ordered_tracks(client):
     }
 
     folder_repo = MagicMock()
+    folder_repo.recompute_album_artists = AsyncMock(return_value=0)
     folder_repo.get_by_id = AsyncMock(return_value=album)
     folder_repo.count_items = AsyncMock(
         return_value={"audios": 2, "videos": 0, "total": 2}
@@ -256,6 +262,7 @@ def test_get_album_detail_returns_ordered_tracks(client):
 def test_get_album_rejects_non_album_folder(client):
     folder = _folder_mock(kind="folder", name="Normal")
     folder_repo = MagicMock()
+    folder_repo.recompute_album_artists = AsyncMock(return_value=0)
     folder_repo.get_by_id = AsyncMock(return_value=folder)
 
     @asynccontextmanager
@@ -277,6 +284,7 @@ def test_get_album_rejects_non_album_folder(client):
 
 def test_get_album_not_found(client):
     folder_repo = MagicMock()
+    folder_repo.recompute_album_artists = AsyncMock(return_value=0)
     folder_repo.get_by_id = AsyncMock(return_value=None)
 
     @asynccontextmanager
@@ -369,20 +377,16 @@ def test_audio_playlist_sets_majority_artist_when_uploader_missing(client):
     }
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(return_value=playlist),
-        ),
-        patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(playlist),
         ),
         patch(
-            "app.uwtv.main.audio_manager.register_audio_for_download",
-            new=AsyncMock(side_effect=["audio-id-1", "audio-id-2"]),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("audio-id-1", False), ("audio-id-2", False)]),
         ),
         patch(
-            "app.uwtv.main.download_queue.add_download",
-            new=AsyncMock(side_effect=["task-id-1", "task-id-2"]),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-id-1", "task-id-2"]),
         ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
@@ -0,0 +1,20 @@
+"""Tests for the /health endpoint."""
+
+import app.uwtv.main as main
+
+
+def test_health_reports_missing_challenge_solver(client):
+    # O warm-up roda em segundo plano: o startup não espera por ele
+    async def _prewarmed():
+        await main._ejs_prewarm_task
+
+    client.portal.call(_prewarmed)
+    body = client.get("/health").json()
+
+    solver = body["checks"]["js_challenge_solver"]
+    assert body["status"] == "degraded"
+    assert solver["offline"] is True
+    assert solver["scripts"] == {"lib": "missing", "core": "missing"}
+    assert "cache_dir" not in solver
+    # O warm-up do lifespan rodou e registrou o runtime
+    assert solver["runtime"] is not None
@@ -3,6 +3,10 @@
 from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+
+from app.services.download_queue import DownloadKind
+
 
 SAMPLE_PLAYLIST_INFO = {
     "title": "Test Playlist",
@@ -24,6 +28,18 @@ SAMPLE_PLAYLIST_INFO = {
 PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLtest123"
 
 
+def _stream(*pages, error=None):
+    """``stream_playlist`` falso: entrega ``pages`` (ou levanta ``error``)."""
+
+    async def _pages(url):
+        if error is not None:
+            raise error
+        for page in pages:
+            yield page
+
+    return _pages
+
+
 def _make_db_mock(folder_id="folder-uuid-123"):
     """Build async context manager mock for get_db_context."""
     session_mock = MagicMock()
@@ -52,21 +68,17 @@ def test_audio_playlist_happy_path_queues_all_entries(client):
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(return_value=SAMPLE_PLAYLIST_INFO),
-        ),
-        patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.audio_manager.register_audio_for_download",
-            new=AsyncMock(side_effect=["audio-id-1", "audio-id-2"]),
-        ),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("audio-id-1", False), ("audio-id-2", False)]),
+        ) as register_mock,
         patch(
-            "app.uwtv.main.download_queue.add_download",
-            new=AsyncMock(side_effect=["task-id-1", "task-id-2"]),
-        ),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-id-1", "task-id-2"]),
+        ) as add_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
@@ -82,12 +94,26 @@ def test_audio_playlist_happy_path_queues_all_entries(client):
     assert body["tasks"][0]["item_type"] == "audio"
     assert body["tasks"][0]["skipped"] is False
     assert body["tasks"][0]["youtube_id"] == "video1234567"
+    assert [t["task_id"] for t in body["tasks"]] == ["task-id-1", "task-id-2"]
+
+    # Um registro em lote e um único enfileiramento para toda a playlist
+    register_mock.assert_awaited_once_with(
+        SAMPLE_PLAYLIST_INFO["entries"],
+        "folder-uuid-123",
+        skip_existing=True,
+        first_track=1,
+    )
+    add_mock.assert_awaited_once()
+    items = add_mock.call_args.args[0]
+    assert [i["audio_id"] for i in items] == ["audio-id-1", "audio-id-2"]
+    assert items[0]["url"] == "https://www.youtube.com/watch?v=video1234567"
+    assert items[0]["high_quality"] is False
 
 
 def test_audio_playlist_non_playlist_url_raises_400(client):
     with patch(
-        "app.uwtv.main.audio_manager.extract_playlist_info",
-        new=AsyncMock(side_effect=ValueError("URL não parece ser uma playlist")),
+        "app.uwtv.main.audio_manager.stream_playlist",
+        new=_stream(error=ValueError("URL não parece ser uma playlist")),
     ):
         resp = client.post("/audio/playlist", json={"url": PLAYLIST_URL})
 
@@ -106,13 +132,12 @@ def test_audio_playlist_requires_authentication():
 
 
 def test_audio_playlist_skip_existing_true_skips_known_entries(client):
-    existing_audio = {"id": "existing-db-id", "download_status": "completed"}
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(
+                {
                     "title": "Test Playlist",
                     "webpage_url": PLAYLIST_URL,
                     "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
@@ -120,9 +145,12 @@ def test_audio_playlist_skip_existing_true_skips_known_entries(client):
             ),
         ),
         patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=existing_audio),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("existing-db-id", True)]),
         ),
+        patch(
+            "app.uwtv.main.download_queue.add_downloads", new=AsyncMock()
+        ) as add_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
@@ -136,68 +164,60 @@ def test_audio_playlist_skip_existing_true_skips_known_entries(client):
     assert body["skipped_items"] == 1
     assert body["queued_items"] == 0
     assert body["tasks"][0]["skipped"] is True
+    assert body["tasks"][0]["item_id"] == "existing-db-id"
     assert body["tasks"][0]["task_id"] is None
+    add_mock.assert_not_called()
 
 
-def test_audio_playlist_existing_with_error_status_is_not_skipped(client):
-    existing_audio = {"id": "existing-db-id", "download_status": "error"}
+def test_audio_playlist_register_failure_marks_every_entry_failed(client):
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
-                    "title": "Test Playlist",
-                    "webpage_url": PLAYLIST_URL,
-                    "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
-                }
-            ),
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=existing_audio),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(side_effect=Exception("DB error")),
         ),
         patch(
-            "app.uwtv.main.audio_manager.register_audio_for_download",
-            new=AsyncMock(return_value="new-audio-id"),
-        ),
-        patch(
-            "app.uwtv.main.download_queue.add_download",
-            new=AsyncMock(return_value="task-id-1"),
-        ),
+            "app.uwtv.main.download_queue.add_downloads", new=AsyncMock()
+        ) as add_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
     ):
-        resp = client.post(
-            "/audio/playlist", json={"url": PLAYLIST_URL, "skip_existing": True}
-        )
+        resp = client.post("/audio/playlist", json={"url": PLAYLIST_URL})
 
     assert resp.status_code == 200
     body = resp.json()
-    assert body["skipped_items"] == 0
-    assert body["queued_items"] == 1
+    assert body["failed_items"] == 2
+    assert body["queued_items"] == 0
+    assert [t["item_id"] for t in body["tasks"]] == [None, None]
+    add_mock.assert_not_called()
+
 
+def test_audio_playlist_bulk_register_failure_falls_back_per_entry(client):
+    async def register(entries, folder_id, skip_existing=True, first_track=1):
+        if any(e["id"] == "video7654321" for e in entries):
+            raise ValueError("linha ruim")
+        return [(f"audio-{e['id']}", False) for e in entries]
 
-def test_audio_playlist_register_failure_continues_remaining_entries(client):
+    register_mock = AsyncMock(side_effect=register)
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(return_value=SAMPLE_PLAYLIST_INFO),
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=register_mock,
         ),
         patch(
-            "app.uwtv.main.audio_manager.register_audio_for_download",
-            new=AsyncMock(side_effect=[Exception("DB error"), "audio-id-2"]),
-        ),
-        patch(
-            "app.uwtv.main.download_queue.add_download",
-            new=AsyncMock(return_value="task-id-2"),
-        ),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-1"]),
+        ) as add_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
@@ -206,28 +226,32 @@ def test_audio_playlist_register_failure_continues_remaining_entries(client):
 
     assert resp.status_code == 200
     body = resp.json()
-    assert body["failed_items"] == 1
     assert body["queued_items"] == 1
-    assert len(body["tasks"]) == 2
+    assert body["failed_items"] == 1
+    assert [t["item_id"] for t in body["tasks"]] == ["audio-video1234567", None]
+    # Lote inteiro, depois uma entrada por vez mantendo a numeração
+    assert [c.kwargs["first_track"] for c in register_mock.call_args_list] == [1, 1, 2]
+    [items] = add_mock.await_args.args
+    assert [item["audio_id"] for item in items] == ["audio-video1234567"]
 
 
-def test_audio_playlist_playlist_title_truncated_at_255_chars(client):
-    long_title = "A" * 300
+def test_audio_playlist_queue_failure_marks_registered_rows_as_error(client):
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
+    audio_repo.update_many = AsyncMock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
+        ),
+        patch(
+            "app.uwtv.main.audio_manager.register_playlist_entries",
             new=AsyncMock(
-                return_value={
-                    "title": long_title,
-                    "webpage_url": PLAYLIST_URL,
-                    "entries": [],
-                }
+                return_value=[("existing-db-id", True), ("audio-id-2", False)]
             ),
         ),
         patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(side_effect=RuntimeError("queue down")),
         ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
@@ -236,50 +260,41 @@ def test_audio_playlist_playlist_title_truncated_at_255_chars(client):
         resp = client.post("/audio/playlist", json={"url": PLAYLIST_URL})
 
     assert resp.status_code == 200
-    # folder_repo.create was called with a Folder whose name is 255 chars
-    call_args = folder_repo.create.call_args
-    folder_arg = call_args[0][0]
-    assert len(folder_arg.name) == 255
-    assert folder_arg.kind == "album"
+    body = resp.json()
+    assert body["skipped_items"] == 1
+    assert body["failed_items"] == 1
+    assert body["queued_items"] == 0
+    audio_repo.update_many.assert_awaited_once_with(
+        [{"id": "audio-id-2", "download_status": "error"}]
+    )
 
 
-def test_audio_playlist_sets_track_numbers_on_skip_existing(client):
-    existing_audio = {
-        "id": "existing-db-id",
-        "download_status": "ready",
-        "folder_id": None,
-    }
+def test_audio_playlist_playlist_title_truncated_at_255_chars(client):
+    long_title = "A" * 300
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
-    audio_repo.update = AsyncMock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
-                    "title": "Test Playlist",
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(
+                {
+                    "title": long_title,
                     "webpage_url": PLAYLIST_URL,
-                    "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
-                    "playlist_id": "PLtest123",
+                    "entries": [],
                 }
             ),
         ),
-        patch(
-            "app.uwtv.main.audio_manager.get_audio_by_youtube_id",
-            new=AsyncMock(return_value=existing_audio),
-        ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
     ):
-        resp = client.post(
-            "/audio/playlist", json={"url": PLAYLIST_URL, "skip_existing": True}
-        )
+        resp = client.post("/audio/playlist", json={"url": PLAYLIST_URL})
 
     assert resp.status_code == 200
-    audio_repo.update.assert_called()
-    kwargs = audio_repo.update.call_args.kwargs
-    assert kwargs.get("folder_id") == "folder-uuid-123"
-    assert kwargs.get("track_number") == 1
+    # folder_repo.create was called with a Folder whose name is 255 chars
+    call_args = folder_repo.create.call_args
+    folder_arg = call_args[0][0]
+    assert len(folder_arg.name) == 255
+    assert folder_arg.kind == "album"
 
 
 # ---------------------------------------------------------------------------
@@ -334,42 +349,49 @@ def test_audio_download_single_video_with_list_param_is_allowed(client):
 # ---------------------------------------------------------------------------
 
 
-def test_video_playlist_happy_path_schedules_background_task(client):
+def test_video_playlist_happy_path_queues_video_jobs(client):
     mock_db, folder_repo, _, video_repo = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(return_value=SAMPLE_PLAYLIST_INFO),
+            "app.uwtv.main.video_manager.stream_playlist",
+            new=_stream(SAMPLE_PLAYLIST_INFO),
         ),
         patch(
-            "app.uwtv.main.video_manager.get_video_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.video_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("vid-id-1", False), ("vid-id-2", False)]),
         ),
         patch(
-            "app.uwtv.main.video_manager.register_video_for_download",
-            new=AsyncMock(side_effect=["vid-id-1", "vid-id-2"]),
-        ),
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-1", "task-2"]),
+        ) as add_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.VideoRepository", return_value=video_repo),
     ):
-        resp = client.post("/video/playlist", json={"url": PLAYLIST_URL})
+        resp = client.post(
+            "/video/playlist", json={"url": PLAYLIST_URL, "resolution": "720p"}
+        )
 
     assert resp.status_code == 200
     body = resp.json()
     assert body["queued_items"] == 2
     assert body["skipped_items"] == 0
     assert body["failed_items"] == 0
+    assert [t["task_id"] for t in body["tasks"]] == ["task-1", "task-2"]
+    add_mock.assert_awaited_once()
+    items = add_mock.call_args.args[0]
+    assert [i["audio_id"] for i in items] == ["vid-id-1", "vid-id-2"]
+    assert items[0]["kind"] == DownloadKind.VIDEO
+    assert items[0]["resolution"] == "720p"
 
 
 def test_video_playlist_no_background_task_when_all_entries_skipped(client):
-    existing_video = {"id": "existing-vid-db-id", "download_status": "completed"}
     mock_db, folder_repo, _, video_repo = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
+            "app.uwtv.main.video_manager.stream_playlist",
+            new=_stream(
+                {
                     "title": "Test Playlist",
                     "webpage_url": PLAYLIST_URL,
                     "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
@@ -377,9 +399,10 @@ def test_video_playlist_no_background_task_when_all_entries_skipped(client):
             ),
         ),
         patch(
-            "app.uwtv.main.video_manager.get_video_by_youtube_id",
-            new=AsyncMock(return_value=existing_video),
+            "app.uwtv.main.video_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("existing-vid-db-id", True)]),
         ),
+        patch("app.uwtv.main.download_queue.add_downloads", new=AsyncMock()),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.VideoRepository", return_value=video_repo),
@@ -396,12 +419,12 @@ def test_video_playlist_no_background_task_when_all_entries_skipped(client):
 
 def test_video_playlist_propagates_resolution_to_register(client):
     mock_db, folder_repo, _, video_repo = _make_db_mock()
-    register_mock = AsyncMock(return_value="vid-id-1")
+    register_mock = AsyncMock(return_value=[("vid-id-1", False)])
     with (
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
+            "app.uwtv.main.video_manager.stream_playlist",
+            new=_stream(
+                {
                     "title": "Test Playlist",
                     "webpage_url": PLAYLIST_URL,
                     "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
@@ -409,11 +432,11 @@ def test_video_playlist_propagates_resolution_to_register(client):
             ),
         ),
         patch(
-            "app.uwtv.main.video_manager.get_video_by_youtube_id",
-            new=AsyncMock(return_value=None),
+            "app.uwtv.main.video_manager.register_playlist_entries", new=register_mock
         ),
         patch(
-            "app.uwtv.main.video_manager.register_video_for_download", new=register_mock
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-1"]),
         ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
@@ -425,19 +448,20 @@ def test_video_playlist_propagates_resolution_to_register(client):
 
     assert resp.status_code == 200
     register_mock.assert_called_once_with(
-        "https://www.youtube.com/watch?v=video1234567",
+        [SAMPLE_PLAYLIST_INFO["entries"][0]],
+        "folder-uuid-123",
         resolution="720p",
+        skip_existing=True,
     )
 
 
 def test_video_playlist_skip_existing_true_skips_known_videos(client):
-    existing_video = {"id": "existing-vid-db-id", "download_status": "completed"}
     mock_db, folder_repo, _, video_repo = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
+            "app.uwtv.main.video_manager.stream_playlist",
+            new=_stream(
+                {
                     "title": "Test Playlist",
                     "webpage_url": PLAYLIST_URL,
                     "entries": [SAMPLE_PLAYLIST_INFO["entries"][0]],
@@ -445,9 +469,10 @@ def test_video_playlist_skip_existing_true_skips_known_videos(client):
             ),
         ),
         patch(
-            "app.uwtv.main.video_manager.get_video_by_youtube_id",
-            new=AsyncMock(return_value=existing_video),
+            "app.uwtv.main.video_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("existing-vid-db-id", True)]),
         ),
+        patch("app.uwtv.main.download_queue.add_downloads", new=AsyncMock()),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.VideoRepository", return_value=video_repo),
@@ -464,71 +489,166 @@ def test_video_playlist_skip_existing_true_skips_known_videos(client):
 
 def test_video_playlist_non_playlist_url_raises_400(client):
     with patch(
-        "app.uwtv.main.video_manager.extract_playlist_info",
-        new=AsyncMock(side_effect=ValueError("URL não parece ser uma playlist")),
+        "app.uwtv.main.video_manager.stream_playlist",
+        new=_stream(error=ValueError("URL não parece ser uma playlist")),
     ):
         resp = client.post("/video/playlist", json={"url": PLAYLIST_URL})
 
     assert resp.status_code == 400
 
 
-def test_audio_playlist_max_entries_limit_returns_400(client):
-    many_entries = [
+# ---------------------------------------------------------------------------
+# Playlists em páginas (sem limite fixo de entradas)
+# ---------------------------------------------------------------------------
+
+
+def _entries(start, stop, artist=None):
+    return [
         {
-            "id": f"vid{i:011d}",
+            "id": f"vid{i:08d}",
             "title": f"Video {i}",
-            "url": f"https://www.youtube.com/watch?v=vid{i:011d}",
+            "url": f"https://www.youtube.com/watch?v=vid{i:08d}",
+            **({"artist": artist} if artist else {}),
         }
-        for i in range(201)
+        for i in range(start, stop)
     ]
+
+
+def test_audio_playlist_larger_than_old_cap_is_accepted(client):
+    entries = _entries(0, 201)
     mock_db, folder_repo, audio_repo, _ = _make_db_mock()
     with (
         patch(
-            "app.uwtv.main.audio_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
-                    "title": "Huge Playlist",
-                    "webpage_url": PLAYLIST_URL,
-                    "entries": many_entries,
-                }
+            "app.uwtv.main.audio_manager.stream_playlist",
+            new=_stream(
+                {"title": "Huge", "webpage_url": PLAYLIST_URL, "entries": entries}
             ),
         ),
+        patch(
+            "app.uwtv.main.audio_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[(e["id"], True) for e in entries]),
+        ),
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
     ):
         resp = client.post("/audio/playlist", json={"url": PLAYLIST_URL})
 
-    assert resp.status_code == 400
-    assert "máximo" in resp.json()["detail"]
+    assert resp.status_code == 200
+    assert resp.json()["total_items"] == 201
+    assert resp.json()["has_more"] is False
 
 
-def test_video_playlist_max_entries_limit_returns_400(client):
-    many_entries = [
-        {
-            "id": f"vid{i:011d}",
-            "title": f"Video {i}",
-            "url": f"https://www.youtube.com/watch?v=vid{i:011d}",
-        }
-        for i in range(201)
-    ]
+def test_video_playlist_first_page_answers_and_rest_continues(client):
+    page = {
+        "title": "Paged",
+        "webpage_url": PLAYLIST_URL,
+        "entries": _entries(0, 2),
+        "has_more": True,
+    }
     mock_db, folder_repo, _, video_repo = _make_db_mock()
     with (
+        patch("app.uwtv.main.video_manager.stream_playlist", new=_stream(page)),
         patch(
-            "app.uwtv.main.video_manager.extract_playlist_info",
-            new=AsyncMock(
-                return_value={
-                    "title": "Huge Playlist",
-                    "webpage_url": PLAYLIST_URL,
-                    "entries": many_entries,
-                }
-            ),
+            "app.uwtv.main.video_manager.register_playlist_entries",
+            new=AsyncMock(return_value=[("v-0", False), ("v-1", False)]),
+        ),
+        patch(
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(return_value=["task-0", "task-1"]),
         ),
+        patch("app.uwtv.main._spawn_playlist_continuation") as spawn_mock,
         patch("app.uwtv.main.get_db_context", mock_db),
         patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
         patch("app.uwtv.main.VideoRepository", return_value=video_repo),
     ):
         resp = client.post("/video/playlist", json={"url": PLAYLIST_URL})
 
-    assert resp.status_code == 400
-    assert "máximo" in resp.json()["detail"]
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["total_items"], body["queued_items"], body["has_more"]) == (
+        2,
+        2,
+        True,
+    )
+    spawn_mock.assert_called_once()
+    kwargs = spawn_mock.call_args.kwargs
+    assert kwargs["folder_id"] == "folder-uuid-123"
+    assert kwargs["item_type"] == "video"
+    assert kwargs["seen"] == {"vid00000000", "vid00000001"}
+    assert len(kwargs["artists"]) == 2
+
+
+@pytest.mark.parametrize("kind", ["audio", "video"])
+def test_playlist_failure_before_continuation_closes_the_pages(client, kind):
+    closed = []
+
+    async def _pages(url):
+        try:
+            yield {
+                "title": "Paged",
+                "webpage_url": PLAYLIST_URL,
+                "entries": _entries(0, 2),
+                "has_more": True,
+            }
+            yield {"entries": _entries(2, 4)}
+        finally:
+            closed.append(url)
+
+    mock_db, folder_repo, _, _ = _make_db_mock()
+    folder_repo.create = AsyncMock(side_effect=RuntimeError("db down"))
+    with (
+        patch(f"app.uwtv.main.{kind}_manager.stream_playlist", new=_pages),
+        patch("app.uwtv.main._spawn_playlist_continuation") as spawn_mock,
+        patch("app.uwtv.main.get_db_context", mock_db),
+        patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
+    ):
+        resp = client.post(f"/{kind}/playlist", json={"url": PLAYLIST_URL})
+
+    assert resp.status_code == 500
+    spawn_mock.assert_not_called()
+    assert closed == [PLAYLIST_URL]
+
+
+@pytest.mark.anyio
+async def test_continue_playlist_registers_remaining_pages():
+    from app.uwtv.main import _continue_playlist
+
+    pages = _stream(
+        {"entries": _entries(1, 3, artist="A")},  # vid00000001 já veio antes
+        {"entries": _entries(3, 4, artist="A")},
+    )(PLAYLIST_URL)
+    register = AsyncMock(
+        side_effect=lambda page, first_track: [(e["id"], False) for e in page]
+    )
+    mock_db, folder_repo, audio_repo, _ = _make_db_mock()
+    folder_repo.update = AsyncMock()
+    with (
+        patch(
+            "app.uwtv.main.download_queue.add_downloads",
+            new=AsyncMock(side_effect=lambda items: [f"t-{i}" for i in items]),
+        ) as add_mock,
+        patch("app.uwtv.main.get_db_context", mock_db),
+        patch("app.uwtv.main.FolderRepository", return_value=folder_repo),
+    ):
+        await _continue_playlist(
+            pages,
+            folder_id="album-1",
+            playlist_title="Paged",
+            item_type="audio",
+            register=register,
+            repository=MagicMock(return_value=audio_repo),
+            download_kwargs={"high_quality": False},
+            seen={"vid00000000", "vid00000001"},
+            artists=["A", None],
+            album_artist=None,
+        )
+
+    # Numeração continua depois da primeira página; repetidos não voltam
+    assert [c.args for c in register.call_args_list] == [
+        (_entries(2, 3, artist="A"), 3),
+        (_entries(3, 4, artist="A"), 4),
+    ]
+    assert add_mock.await_count == 2
+    # Artista majoritário recalculado com a playlist inteira
+    folder_repo.update.assert_awaited_once_with("album-1", artist="A")
@@ -0,0 +1,190 @@
+"""Tests for album/playlist sync against the source playlist (POST /folders/{id}/sync)."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Audio, Base, Folder
+from app.services import managers
+from app.uwtv import main
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLsync"
+
+
+def _entry(video_id):
+    return {
+        "id": video_id,
+        "title": f"Title {video_id}",
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+
+def _stream(*ids):
+    async def _pages(url, use_cache=True):
+        yield {"entries": [_entry(i) for i in ids]}
+
+    return _pages
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sync.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as session:
+        session.add_all(
+            [
+                Folder(
+                    id="album-1", name="Album", kind="album", source_url=PLAYLIST_URL
+                ),
+                Folder(id="plain", name="Plain"),
+            ]
+        )
+        for track, video_id in enumerate(["trackaaaaaa", "trackbbbbbb"], start=1):
+            session.add(
+                Audio(
+                    id=video_id,
+                    title=video_id,
+                    name=video_id,
+                    source="youtube",
+                    external_id=video_id,
+                    youtube_id=video_id,
+                    folder_id="album-1",
+                    track_number=track,
+                    download_status="ready",
+                )
+            )
+
+    monkeypatch.setattr(main, "get_db_context", session_factory)
+    monkeypatch.setattr(managers, "get_db_context", session_factory)
+    yield session_factory
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_sync_queues_only_new_entries_and_renumbers(db):
+    add_mock = AsyncMock(
+        side_effect=lambda items: [f"task-{i['audio_id']}" for i in items]
+    )
+    with (
+        patch.object(
+            main.audio_manager,
+            "stream_playlist",
+            _stream("tracknew001", "trackbbbbbb", "trackaaaaaa", "tracknew002"),
+        ),
+        patch("app.uwtv.main.download_queue.add_downloads", new=add_mock),
+    ):
+        result = await main._sync_playlist_folder("album-1")
+
+    assert (result.total_items, result.new_items, result.queued_items) == (4, 2, 2)
+    assert result.missing_items == 0
+    add_mock.assert_awaited_once()
+    assert [i["audio_id"] for i in add_mock.call_args.args[0]] == [
+        "tracknew001",
+        "tracknew002",
+    ]
+
+    async with db() as session:
+        rows = (await session.execute(select(Audio))).scalars().all()
+    tracks = {row.id: (row.track_number, row.folder_id) for row in rows}
+    assert tracks == {
+        "tracknew001": (1, "album-1"),
+        "trackbbbbbb": (2, "album-1"),
+        "trackaaaaaa": (3, "album-1"),
+        "tracknew002": (4, "album-1"),
+    }
+
+
+@pytest.mark.anyio
+@patch("app.services.ydl_pool.YoutubeDL")
+async def test_sync_reads_the_source_not_the_cached_playlist(
+    mock_ydl_cls, db, isolated_metadata_cache
+):
+    ydl = MagicMock()
+    mock_ydl_cls.return_value.__enter__.return_value = ydl
+    ids = ["trackaaaaaa", "trackbbbbbb"]
+    ydl.extract_info.side_effect = lambda *a, **kw: {
+        "title": "Album",
+        "entries": [{"id": i, "title": i} for i in ids],
+    }
+    add_mock = AsyncMock(
+        side_effect=lambda items: [f"task-{i['audio_id']}" for i in items]
+    )
+    with patch("app.uwtv.main.download_queue.add_downloads", new=add_mock):
+        first = await main._sync_playlist_folder("album-1")
+        # Entrada nova na fonte dentro do TTL da lista em cache
+        ids.append("tracknew003")
+        second = await main._sync_playlist_folder("album-1")
+
+    assert first.new_items == 0
+    assert (second.total_items, second.new_items) == (3, 1)
+    assert ydl.extract_info.call_count == 2
+    # A leitura nova atualiza o cache usado pelos imports
+    cached = isolated_metadata_cache.get(
+        "youtube", managers._playlist_cache_id(PLAYLIST_URL), "playlist"
+    )
+    assert [e["id"] for e in cached["entries"]] == ids
+
+
+@pytest.mark.anyio
+async def test_sync_without_changes_does_no_work(db):
+    add_mock = AsyncMock()
+    with (
+        patch.object(
+            main.audio_manager, "stream_playlist", _stream("trackaaaaaa", "trackbbbbbb")
+        ),
+        patch("app.uwtv.main.download_queue.add_downloads", new=add_mock),
+        patch.object(main.AudioRepository, "update_many") as update_mock,
+    ):
+        result = await main._sync_playlist_folder("album-1")
+
+    assert (result.new_items, result.renumbered_items) == (0, 0)
+    add_mock.assert_not_called()
+    update_mock.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_sync_counts_tracks_removed_from_source(db):
+    with patch.object(main.audio_manager, "stream_playlist", _stream("trackbbbbbb")):
+        result = await main._sync_playlist_folder("album-1")
+
+    assert (result.missing_items, result.renumbered_items) == (1, 1)
+
+
+@pytest.mark.anyio
+async def test_sync_rejects_folder_without_source(db):
+    with pytest.raises(HTTPException) as exc_info:
+        await main._sync_playlist_folder("plain")
+
+    assert exc_info.value.status_code == 404
+
+
+def test_sync_endpoint_passes_download_options(client):
+    sync_mock = AsyncMock(
+        return_value=main.PlaylistSyncResponse(
+            folder_id="album-1",
+            playlist_title="Album",
+            total_items=0,
+            new_items=0,
+            queued_items=0,
+            skipped_items=0,
+            tasks=[],
+        )
+    )
+    with patch("app.uwtv.main._sync_playlist_folder", new=sync_mock):
+        resp = client.post("/folders/album-1/sync", json={"high_quality": True})
+
+    assert resp.status_code == 200
+    sync_mock.assert_awaited_once_with("album-1", high_quality=True, resolution="1080p")
@@ -0,0 +1,287 @@
+"""Tests for the download queue endpoints, archival and restart recovery."""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import app.uwtv.main as main
+from app.db.database import get_db_context
+from app.db.repositories import DownloadTaskStateRepository
+from app.services.download_queue import DownloadKind, DownloadQueue, DownloadStatus
+
+
+@pytest.fixture
+def queue():
+    """Fresh, non-processing queue swapped in for the global one."""
+    q = DownloadQueue(max_concurrent_downloads=1, archive_after_seconds=None)
+    with patch("app.uwtv.main.download_queue", q):
+        yield q
+
+
+def _add(client, queue, n):
+    return [
+        client.portal.call(queue.add_download, f"a{i}", f"https://youtu.be/a{i}")
+        for i in range(n)
+    ]
+
+
+def test_tasks_endpoint_paginates_with_cursor(client, queue):
+    ids = _add(client, queue, 5)
+
+    first = client.get("/downloads/queue/tasks", params={"limit": 2}).json()
+    assert [t["id"] for t in first["tasks"]] == ids[:2]
+    assert first["next_cursor"] is not None
+
+    second = client.get(
+        "/downloads/queue/tasks", params={"limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    assert [t["id"] for t in second["tasks"]] == ids[2:4]
+
+    last = client.get(
+        "/downloads/queue/tasks", params={"limit": 2, "cursor": second["next_cursor"]}
+    ).json()
+    assert [t["id"] for t in last["tasks"]] == ids[4:]
+    assert last["next_cursor"] is None
+
+
+def test_tasks_endpoint_filters_by_status(client, queue):
+    ids = _add(client, queue, 3)
+    client.portal.call(queue.cancel_download, ids[1])
+
+    body = client.get("/downloads/queue/tasks", params={"status": "cancelled"}).json()
+    assert [t["id"] for t in body["tasks"]] == [ids[1]]
+
+    status = client.get("/downloads/queue/status").json()
+    assert status["queued"] == 2
+    assert status["cancelled"] == 1
+
+
+def test_tasks_endpoint_rejects_unknown_status(client, queue):
+    response = client.get("/downloads/queue/tasks", params={"status": "bogus"})
+    assert response.status_code == 400
+
+
+def test_archived_tasks_remain_queryable(client, queue):
+    audio_id = f"archive-{uuid.uuid4()}"
+    task_id = client.portal.call(queue.add_download, audio_id, "https://youtu.be/x")
+    client.portal.call(queue.cancel_download, task_id)
+
+    archived = client.portal.call(queue.archive_finished_tasks, 0)
+    assert archived == 1
+    assert task_id not in queue.tasks
+
+    task = client.portal.call(queue.get_task_status, task_id)
+    assert task.status == DownloadStatus.CANCELLED
+    assert [
+        t.id for t in client.portal.call(queue.get_tasks_by_audio_id, audio_id)
+    ] == [task_id]
+
+    body = client.get(
+        "/downloads/queue/tasks", params={"archived": True, "audio_id": audio_id}
+    ).json()
+    assert [t["id"] for t in body["tasks"]] == [task_id]
+    assert body["tasks"][0]["status"] == "cancelled"
+
+
+def test_retry_restores_archived_failed_task(client, queue):
+    audio_id = f"archive-{uuid.uuid4()}"
+    task_id = client.portal.call(queue.add_download, audio_id, "https://youtu.be/x")
+    task = queue.tasks[task_id]
+    queue.tasks.set_status(task, DownloadStatus.FAILED)
+    task.completed_ts = 0
+    client.portal.call(queue.archive_finished_tasks, 60)
+    assert task_id not in queue.tasks
+
+    response = client.post(f"/downloads/queue/retry/{task_id}")
+    assert response.status_code == 200
+    assert queue.tasks[task_id].status == DownloadStatus.QUEUED
+
+
+def _delete_state(client, task_ids):
+    async def _delete():
+        async with get_db_context() as session:
+            await DownloadTaskStateRepository(session).delete_many(task_ids)
+
+    client.portal.call(_delete)
+
+
+def test_persisted_queue_is_restored_in_priority_order(client):
+    first = DownloadQueue(persist=True, archive_after_seconds=None)
+    ids = []
+    try:
+        low = client.portal.call(first.add_download, "persist-low", "u-low", True, 0)
+        high = client.portal.call(
+            first.add_download, "persist-high", "u-high", False, 5
+        )
+        running = client.portal.call(
+            first.add_download, "persist-run", "u-run", True, 1
+        )
+        ids = [low, high, running]
+        first.tasks.set_status(first.tasks[running], DownloadStatus.DOWNLOADING)
+        assert client.portal.call(first.flush_state) == 3
+        assert client.portal.call(first.flush_state) == 0  # nada sujo
+
+        second = DownloadQueue(archive_after_seconds=None)
+        assert client.portal.call(second.restore_pending) == 3
+        assert second.tasks[running].status == DownloadStatus.QUEUED
+        assert second.tasks[high].high_quality is False
+        assert second.tasks[high].url == "u-high"
+        [lane] = [lane for lane in second._lanes.values() if lane.queued]
+        order = []
+        while (task_id := lane.pop()) is not None:
+            order.append(task_id)
+        assert order == [high, running, low]
+    finally:
+        _delete_state(client, ids)
+
+
+def test_recover_pending_downloads_requeues_stuck_audio(client, queue):
+    stuck = MagicMock(id="stuck-audio", url="https://youtu.be/stuck")
+    repo = MagicMock()
+    repo.get_by_status = AsyncMock(return_value=[stuck])
+    video_repo = MagicMock()
+    video_repo.get_by_status = AsyncMock(return_value=[])
+    with (
+        patch.object(queue, "restore_pending", AsyncMock(return_value=0)),
+        patch("app.uwtv.main.AudioRepository", return_value=repo),
+        patch("app.uwtv.main.VideoRepository", return_value=video_repo),
+    ):
+        recovered = client.portal.call(main.recover_pending_downloads)
+
+    assert recovered == 1
+    [task] = queue.tasks.by_audio_id("stuck-audio")
+    assert task.url == "https://youtu.be/stuck"
+    assert task.status == DownloadStatus.QUEUED
+
+
+def test_recover_pending_downloads_requeues_stuck_video(client, queue):
+    stuck = MagicMock(id="stuck-video", url="https://youtu.be/stuckv", resolution="")
+    audio_repo = MagicMock()
+    audio_repo.get_by_status = AsyncMock(return_value=[])
+    video_repo = MagicMock()
+    video_repo.get_by_status = AsyncMock(return_value=[stuck])
+    with (
+        patch.object(queue, "restore_pending", AsyncMock(return_value=0)),
+        patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
+        patch("app.uwtv.main.VideoRepository", return_value=video_repo),
+    ):
+        assert client.portal.call(main.recover_pending_downloads) == 1
+
+    [task] = queue.tasks.by_audio_id("stuck-video")
+    assert task.kind == DownloadKind.VIDEO
+    assert task.resolution == "1080p"
+
+
+def test_recover_pending_downloads_matches_pending_tasks_by_kind(client, queue):
+    # Uma task de áudio pendente não cobre o vídeo preso com o mesmo id
+    client.portal.call(queue.add_download, "same-id", "https://youtu.be/same-id")
+    stuck_audio = MagicMock(id="same-id", url="https://youtu.be/same-id")
+    stuck_video = MagicMock(id="same-id", url="https://youtu.be/same-id", resolution="")
+    audio_repo = MagicMock()
+    audio_repo.get_by_status = AsyncMock(return_value=[stuck_audio])
+    video_repo = MagicMock()
+    video_repo.get_by_status = AsyncMock(return_value=[stuck_video])
+    with (
+        patch.object(queue, "restore_pending", AsyncMock(return_value=0)),
+        patch.object(queue, "get_tasks_by_audio_id") as per_item,
+        patch("app.uwtv.main.AudioRepository", return_value=audio_repo),
+        patch("app.uwtv.main.VideoRepository", return_value=video_repo),
+    ):
+        assert client.portal.call(main.recover_pending_downloads) == 1
+
+    per_item.assert_not_called()
+    kinds = sorted(t.kind.value for t in queue.tasks.by_audio_id("same-id"))
+    assert kinds == ["audio", "video"]
+
+
+def test_video_download_is_queued_as_video_job(client, queue):
+    with patch(
+        "app.uwtv.main.video_manager.register_video_for_download",
+        new=AsyncMock(return_value="vid-queued"),
+    ):
+        resp = client.post(
+            "/video/download",
+            json={
+                "url": "https://www.youtube.com/watch?v=abcdefghijk",
+                "resolution": "720p",
+            },
+        )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    task = queue.tasks[body["task_id"]]
+    assert task.audio_id == "vid-queued"
+    assert task.kind == DownloadKind.VIDEO
+    assert task.resolution == "720p"
+
+    listed = client.get("/downloads/queue/tasks").json()["tasks"]
+    assert listed[0]["kind"] == "video"
+    assert listed[0]["resolution"] == "720p"
+
+
+def test_video_task_kind_survives_persistence(client):
+    first = DownloadQueue(persist=True, archive_after_seconds=None)
+    ids = []
+    try:
+        video = client.portal.call(
+            lambda: first.add_download(
+                "persist-video", "u-video", kind=DownloadKind.VIDEO, resolution="480p"
+            )
+        )
+        ids = [video]
+        assert client.portal.call(first.flush_state) == 1
+
+        second = DownloadQueue(archive_after_seconds=None)
+        assert client.portal.call(second.restore_pending) == 1
+        assert second.tasks[video].kind == DownloadKind.VIDEO
+        assert second.tasks[video].resolution == "480p"
+        assert second._lanes["video:unknown"].queued == 1
+    finally:
+        _delete_state(client, ids)
+
+
+def test_download_metrics_endpoint_reports_percentiles(client):
+    from sqlalchemy import delete
+
+    from app.db.models import DownloadMetric
+    from app.services.download_metrics import DownloadMetrics, record_download_metrics
+
+    source = f"test-{uuid.uuid4().hex[:8]}"
+    for _ in range(3):
+        metrics = DownloadMetrics("audio", "abc", source)
+        metrics.on_progress({"status": "downloading", "speed": 4096}, delta=1024)
+        client.portal.call(record_download_metrics, metrics, "completed")
+
+    try:
+        body = client.get("/admin/download-metrics", params={"source": source}).json()
+        stats = body["sources"][source]
+        assert body["samples"] == 3
+        assert stats["downloads"] == 3
+        assert stats["phases"]["total"]["count"] == 3
+        assert stats["peak_bps"]["max"] == 4096
+        assert stats["bytes"]["p50"] == 1024
+    finally:
+
+        async def _cleanup():
+            async with get_db_context() as session:
+                await session.execute(
+                    delete(DownloadMetric).where(DownloadMetric.source == source)
+                )
+
+        client.portal.call(_cleanup)
+
+
+def test_metadata_cache_endpoint_reports_counters(client, isolated_metadata_cache):
+    isolated_metadata_cache.put("youtube", "abc", "full", {"title": "Song"})
+    isolated_metadata_cache.get("youtube", "abc", "full")
+    isolated_metadata_cache.get("youtube", "xyz", "stream")
+
+    body = client.get("/admin/metadata-cache").json()
+
+    assert body["entries"] == 1
+    assert body["by_mode"] == {
+        "full": {"hits": 1, "misses": 0},
+        "stream": {"hits": 0, "misses": 1},
+    }
+    assert body["hit_ratio"] == 0.5
@@ -11,3 +11,35 @@ def client():
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_metadata_cache(tmp_path):
+    """Cada teste usa um cache de metadados vazio (extrações são mockadas)."""
+    from app.services.metadata_cache import metadata_cache
+
+    original = metadata_cache.path
+    metadata_cache.reopen(tmp_path / "metadata_cache.db")
+    yield metadata_cache
+    metadata_cache.reopen(original)
+
+
+@pytest.fixture(autouse=True)
+def isolated_ydl_pool():
+    """Nenhuma instância (mockada) do YoutubeDL passa de um teste para outro."""
+    from app.services.ydl_pool import ydl_pool
+
+    ydl_pool.clear()
+    yield ydl_pool
+    ydl_pool.clear()
+
+
+@pytest.fixture(autouse=True)
+def offline_ejs_component(tmp_path, monkeypatch):
+    """O warm-up do lifespan não baixa os scripts do solver nos testes."""
+    from app.services.ejs_component import ejs_component
+
+    monkeypatch.setattr(ejs_component, "cache_dir", tmp_path / "yt-dlp-cache")
+    monkeypatch.setattr(ejs_component, "offline", True)
+    monkeypatch.setattr(ejs_component, "runtime", None)
+    yield ejs_component
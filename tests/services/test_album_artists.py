@@ -0,0 +1,165 @@
+"""Tests for the dirty-album artist recompute (FolderRepository.recompute_album_artists)."""
+
+import pytest
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import _init_schema
+from app.db.models import Audio, Folder
+from app.db.repositories import FolderRepository
+
+
+def _audio(audio_id, folder_id, artist):
+    return Audio(
+        id=audio_id,
+        title=audio_id,
+        name=audio_id,
+        youtube_id=audio_id,
+        folder_id=folder_id,
+        artist=artist,
+    )
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'albums.db'}")
+    async with engine.begin() as conn:
+        # Schema completo, com os triggers de artist_dirty
+        await _init_schema(conn)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with factory() as session:
+        session.add_all(
+            [
+                Folder(id="majority", name="Majority", kind="album"),
+                Folder(id="tie", name="Tie", kind="album"),
+                Folder(id="plain", name="Plain"),
+            ]
+        )
+        await session.flush()
+        session.add_all(
+            [
+                _audio("m1", "majority", "Miles Davis"),
+                _audio("m2", "majority", " Miles Davis "),
+                _audio("m3", "majority", None),
+                _audio("t1", "tie", "A"),
+                _audio("t2", "tie", "B"),
+                _audio("p1", "plain", "A"),
+            ]
+        )
+        await session.commit()
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(
+            sql.split()[0]
+        ),
+    )
+    yield factory, statements
+    await engine.dispose()
+
+
+async def _albums(factory):
+    async with factory() as session:
+        result = await session.execute(
+            select(Folder.id, Folder.artist, Folder.artist_dirty).where(
+                Folder.kind == "album"
+            )
+        )
+        return {row[0]: (row[1], row[2]) for row in result}
+
+
+@pytest.mark.anyio
+async def test_triggers_mark_only_albums_whose_tracks_changed(db):
+    factory, _ = db
+    assert await _albums(factory) == {
+        "majority": (None, True),
+        "tie": (None, True),
+    }
+    async with factory() as session:
+        await session.execute(update(Folder).values(artist_dirty=False))
+        # track_number não afeta o artista
+        await session.execute(update(Audio).values(track_number=1))
+        await session.execute(update(Audio).where(Audio.id == "t1").values(artist="B"))
+        await session.commit()
+
+    assert await _albums(factory) == {
+        "majority": (None, False),
+        "tie": (None, True),
+    }
+
+
+@pytest.mark.anyio
+async def test_recompute_uses_one_group_by_and_skips_clean_albums(db):
+    factory, statements = db
+    statements.clear()
+    async with factory() as session:
+        changed = await FolderRepository(session).recompute_album_artists()
+        await session.commit()
+
+    assert changed == 1
+    # Álbuns sujos + GROUP BY + UPDATE do artista + limpeza do flag
+    assert statements.count("SELECT") == 2
+    assert statements.count("UPDATE") == 2
+    assert await _albums(factory) == {
+        "majority": ("Miles Davis", False),
+        "tie": (None, False),
+    }
+
+    statements.clear()
+    async with factory() as session:
+        assert await FolderRepository(session).recompute_album_artists() == 0
+    assert statements == ["SELECT"]
+
+
+@pytest.mark.anyio
+async def test_moving_a_track_out_marks_both_albums(db):
+    factory, _ = db
+    async with factory() as session:
+        await FolderRepository(session).recompute_album_artists()
+        await session.execute(
+            update(Audio).where(Audio.id == "t2").values(folder_id="majority")
+        )
+        await session.commit()
+        assert await FolderRepository(session).recompute_album_artists() == 1
+        await session.commit()
+
+    assert await _albums(factory) == {
+        "majority": ("Miles Davis", False),
+        "tie": ("A", False),
+    }
+
+
+@pytest.mark.anyio
+async def test_album_marked_dirty_during_recompute_stays_dirty(db):
+    factory, _ = db
+    async with factory() as session:
+        await session.execute(
+            update(Folder).where(Folder.id == "tie").values(artist_dirty=False)
+        )
+        await session.commit()
+
+    async with factory() as session:
+        execute = session.execute
+        calls = []
+
+        async def _execute(statement, *args, **kwargs):
+            calls.append(statement)
+            if len(calls) == 2:
+                # Outra sessão altera uma faixa logo depois do SELECT dos sujos
+                async with factory() as other:
+                    await other.execute(
+                        update(Audio).where(Audio.id == "t1").values(artist="B")
+                    )
+                    await other.commit()
+            return await execute(statement, *args, **kwargs)
+
+        session.execute = _execute
+        await FolderRepository(session).recompute_album_artists()
+        await session.commit()
+
+    albums = await _albums(factory)
+    assert albums["majority"] == ("Miles Davis", False)
+    assert albums["tie"] == (None, True)
@@ -0,0 +1,146 @@
+"""Tests for the background album artist refresh job."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Audio, Base, Folder
+from app.services.artist_refresh import ArtistRefreshService
+from app.services.managers import _playlist_cache_id
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLartists"
+IDS = ["trackaaaaaa", "trackbbbbbb", "trackccccc1", "trackccccc2", "trackddddd1"]
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'artists.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as session:
+        session.add(Folder(id="album-1", name="Album", kind="album"))
+        for track, video_id in enumerate(IDS, start=1):
+            session.add(
+                Audio(
+                    id=video_id,
+                    title=video_id,
+                    name=video_id,
+                    source="youtube",
+                    external_id=video_id,
+                    youtube_id=video_id,
+                    folder_id="album-1",
+                    track_number=track,
+                    download_status="ready",
+                    artist="Known" if video_id == "trackddddd1" else None,
+                )
+            )
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(
+            sql.split()[0]
+        ),
+    )
+    yield session_factory, statements
+    await engine.dispose()
+
+
+async def _tracks(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(Audio).order_by(Audio.track_number))
+        return [row.to_dict() for row in result.scalars().all()]
+
+
+@pytest.mark.anyio
+async def test_refresh_uses_cache_limits_concurrency_and_writes_once(
+    db, isolated_metadata_cache
+):
+    session_factory, statements = db
+    tracks = await _tracks(session_factory)
+    statements.clear()
+    # Um artista na playlist em cache, outro numa extração completa em cache
+    isolated_metadata_cache.put(
+        "youtube",
+        _playlist_cache_id(PLAYLIST_URL),
+        "playlist",
+        {"entries": [{"id": "trackaaaaaa", "artist": "From Playlist"}]},
+    )
+    isolated_metadata_cache.put(
+        "youtube", "trackbbbbbb", "full", {"id": "trackbbbbbb", "artist": "Cached"}
+    )
+
+    active = peak = 0
+    fetched = []
+
+    async def _fetch(ref):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        fetched.append(ref)
+        return None if ref.endswith("c2") else "Fetched"
+
+    service = ArtistRefreshService(concurrency=1, session_factory=session_factory)
+    with patch("app.services.artist_refresh.sse_manager.broadcast_event") as sse:
+        job = service.start("album-1", tracks, _fetch, source_url=PLAYLIST_URL)
+        await service._tasks[job.job_id]
+
+    assert job.status == "completed"
+    assert (job.updated, job.from_cache, job.failed, job.skipped) == (3, 2, 1, 1)
+    assert job.processed == job.total == 5
+    assert sorted(r.rsplit("=", 1)[-1] for r in fetched) == [
+        "trackccccc1",
+        "trackccccc2",
+    ]
+    assert peak == 1
+    # Um UPDATE em lote das faixas e um da pasta
+    assert statements.count("UPDATE") == 2
+
+    artists = {t["id"]: t["artist"] for t in await _tracks(session_factory)}
+    assert artists == {
+        "trackaaaaaa": "From Playlist",
+        "trackbbbbbb": "Cached",
+        "trackccccc1": "Fetched",
+        "trackccccc2": None,
+        "trackddddd1": "Known",
+    }
+    events = [call.args[0].event_type for call in sse.await_args_list]
+    assert events[-1] == "artist_refresh_completed"
+    assert events.count("artist_refresh_progress") == 3
+
+
+@pytest.mark.anyio
+async def test_second_start_returns_running_job(db):
+    session_factory, _ = db
+    tracks = await _tracks(session_factory)
+    release = asyncio.Event()
+
+    async def _fetch(ref):
+        await release.wait()
+        return "A"
+
+    service = ArtistRefreshService(session_factory=session_factory)
+    with patch("app.services.artist_refresh.sse_manager.broadcast_event"):
+        first = service.start("album-1", tracks, _fetch)
+        second = service.start("album-1", tracks, _fetch)
+        assert second is first
+        release.set()
+        await service._tasks[first.job_id]
+
+    assert service.get(first.job_id).status == "completed"
+    assert first.folder_artist == "A"
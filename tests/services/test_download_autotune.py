@@ -0,0 +1,217 @@
+"""Tests for the adaptive (AIMD) concurrency tuner of the download queue."""
+
+import asyncio
+
+import pytest
+
+from app.services.download_autotune import ConcurrencyAutoTuner, is_throttle_error
+from app.services.download_lanes import LaneConfig
+from app.services.download_queue import DownloadQueue
+
+
+def _tuner(limit=2, **kwargs):
+    kwargs.setdefault("floor", 1)
+    kwargs.setdefault("ceiling", 4)
+    tuner = ConcurrencyAutoTuner(limit=limit, **kwargs)
+    tuner._window_started = 0.0
+    return tuner
+
+
+def test_is_throttle_error():
+    assert is_throttle_error("HTTP Error 429: Too Many Requests")
+    assert is_throttle_error("rate-limit reached for this account")
+    assert not is_throttle_error("Video unavailable")
+
+
+def test_additive_increase_while_throughput_improves():
+    tuner = _tuner(limit=2)
+    tuner.record_bytes("youtube", 1000)
+    assert tuner.adjust(backlog=5, now=1.0) == 3
+    tuner.record_bytes("youtube", 2000)
+    assert tuner.adjust(backlog=5, now=2.0) == 4
+    assert "throughput" in tuner.reason
+    # teto
+    tuner.record_bytes("youtube", 4000)
+    assert tuner.adjust(backlog=5, now=3.0) == 4
+
+
+def test_holds_without_backlog_or_gain():
+    tuner = _tuner(limit=2)
+    tuner.record_bytes("youtube", 1000)
+    assert tuner.adjust(backlog=0, now=1.0) == 2
+    tuner.record_bytes("youtube", 1000)
+    assert tuner.adjust(backlog=3, now=2.0) == 2
+    assert "mantido" in tuner.reason
+
+
+def test_multiplicative_decrease_on_429_cuts_only_that_source():
+    tuner = _tuner(limit=4)
+    tuner.record_bytes("youtube", 1000)
+    tuner.record_result("instagram", "HTTP Error 429: Too Many Requests")
+    assert tuner.adjust(backlog=10, now=1.0, active={"instagram": 4}) == 4
+    assert "instagram" in tuner.reason
+    assert tuner.source_limit("instagram") == 2
+    assert tuner.source_limit("youtube") is None
+    for now in (2.0, 3.0):
+        tuner.record_bytes("youtube", 1000)
+        tuner.record_result("instagram", "429")
+        assert tuner.adjust(backlog=10, now=now) == 4
+    assert tuner.source_limit("instagram") == 1  # piso
+    snapshot = tuner.snapshot()["sources"]["instagram"]
+    assert snapshot["throttled"] == 3
+    assert snapshot["limit"] == 1
+
+
+def test_source_limit_recovers_after_clean_windows():
+    tuner = _tuner(limit=3)
+    tuner.record_bytes("youtube", 1000)
+    tuner.record_result("instagram", "429")
+    assert tuner.adjust(backlog=0, now=1.0, active={"instagram": 2}) == 3
+    assert tuner.source_limit("instagram") == 1
+    tuner.record_bytes("youtube", 1000)
+    tuner.record_result("instagram")
+    tuner.adjust(backlog=0, now=2.0)
+    assert tuner.source_limit("instagram") == 2
+    tuner.record_result("instagram")
+    tuner.adjust(backlog=0, now=3.0)
+    assert tuner.source_limit("instagram") is None  # alcançou o global
+
+
+def test_decrease_on_error_rate_needs_min_samples():
+    tuner = _tuner(limit=4, min_samples=3)
+    tuner.record_result("youtube", "boom")
+    tuner.record_result("youtube", "boom")
+    tuner.adjust(backlog=0, now=1.0)
+    assert tuner.source_limit("youtube") is None
+    for error in ("boom", "boom", None):
+        tuner.record_result("youtube", error)
+    tuner.record_bytes("instagram", 1000)
+    assert tuner.adjust(backlog=0, now=2.0) == 4
+    assert tuner.source_limit("youtube") == 2
+    assert "taxa de erro" in tuner.reason
+
+
+def test_global_limit_is_cut_when_every_active_source_fails():
+    tuner = _tuner(limit=4, floor=2)
+    tuner.record_result("instagram", "429")
+    assert tuner.adjust(backlog=5, now=1.0, active={"instagram": 2}) == 2
+    assert "todas as fontes" in tuner.reason
+    assert tuner.source_limit("instagram") is None  # teto >= global
+    tuner.record_result("instagram", "429")
+    assert tuner.adjust(backlog=5, now=2.0) == 2  # piso
+    assert tuner.source_limit("instagram") is None
+
+
+def test_source_cap_never_goes_below_floor():
+    tuner = _tuner(limit=4, floor=2)
+    tuner.record_bytes("youtube", 1000)
+    tuner.record_result("instagram", "429")
+    tuner.adjust(backlog=5, now=1.0, active={"instagram": 1})
+    assert tuner.source_limit("instagram") == 2
+
+
+def test_global_limit_comes_back_down_when_throughput_drops():
+    tuner = _tuner(limit=2)
+    for now, nbytes in ((1.0, 1000), (2.0, 2000), (3.0, 4000)):
+        tuner.record_bytes("youtube", nbytes)
+        tuner.adjust(backlog=5, now=now)
+    assert tuner.limit == 4  # teto
+    tuner.record_bytes("youtube", 1000)
+    assert tuner.adjust(backlog=5, now=4.0) == 2
+    assert "caiu" in tuner.reason
+    # A queda proporcional ao corte não provoca outro corte
+    tuner.record_bytes("youtube", 600)
+    assert tuner.adjust(backlog=5, now=5.0) == 2
+
+
+def test_empty_window_is_not_adjusted():
+    tuner = _tuner(limit=2)
+    assert tuner.adjust(backlog=5, now=1.0) == 2
+    assert tuner.adjust(backlog=5, now=2.0) == 2
+    assert tuner.reason == "limite inicial"
+    # Só erros sem bytes: não conta como throughput para subir
+    tuner.record_result("youtube", "boom")
+    assert tuner.adjust(backlog=5, now=3.0) == 2
+
+
+@pytest.mark.anyio
+async def test_queue_caps_throttled_source_without_slowing_others():
+    tuner = ConcurrencyAutoTuner(limit=4, floor=1, ceiling=4)
+    tuner._stats("instagram").limit = 1
+    queue = DownloadQueue(
+        max_concurrent_downloads=4,
+        lanes={
+            "youtube": LaneConfig(concurrency=2),
+            "instagram": LaneConfig(concurrency=2),
+        },
+        archive_after_seconds=None,
+        autotuner=tuner,
+    )
+    release = asyncio.Event()
+    started = []
+
+    async def fake_perform(task):
+        started.append(task.source)
+        await release.wait()
+
+    queue._perform_download = fake_perform
+    for i in range(3):
+        await queue.add_download(f"ig{i}", f"https://www.instagram.com/p/{i}/")
+        await queue.add_download(f"yt{i}", f"https://youtu.be/{i}")
+
+    queue.start_processing()
+    try:
+        for _ in range(100):
+            if len(started) >= 4:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        # Instagram fica no teto de 1; o YouTube usa os slots que sobram
+        assert sorted(started) == ["instagram", "youtube", "youtube", "youtube"]
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_queue_applies_limit_and_exposes_it():
+    tuner = ConcurrencyAutoTuner(limit=1, floor=1, ceiling=3, interval=0.01)
+    queue = DownloadQueue(
+        max_concurrent_downloads=1,
+        lanes={"youtube": LaneConfig(concurrency=3)},
+        archive_after_seconds=None,
+        autotuner=tuner,
+    )
+    release = asyncio.Event()
+    started = []
+
+    async def fake_perform(task):
+        started.append(task.audio_id)
+        reporter = queue._bytes_reporter(task)
+        reporter(1024 * (len(started) ** 2))
+        await release.wait()
+
+    queue._perform_download = fake_perform
+    for i in range(4):
+        await queue.add_download(audio_id=f"yt{i}", url=f"https://youtu.be/{i}")
+
+    queue.start_processing()
+    try:
+        for _ in range(100):
+            if len(started) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(started) >= 2
+        status = await queue.get_queue_status()
+        assert status["max_concurrent"] >= 2
+        assert status["adaptive"]["limit"] == status["max_concurrent"]
+        assert status["adaptive"]["reason"]
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_status_without_autotuner():
+    queue = DownloadQueue(max_concurrent_downloads=1, archive_after_seconds=None)
+    assert (await queue.get_queue_status())["adaptive"] is None
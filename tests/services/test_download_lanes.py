@@ -0,0 +1,200 @@
+"""Tests for per-source lanes and token buckets in the download queue."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.download_lanes import LaneConfig, TokenBucket, source_for_url
+from app.services.download_queue import DownloadKind, DownloadQueue
+
+YT = "https://youtu.be/{}"
+IG = "https://www.instagram.com/reel/{}/"
+
+
+def _lane_queue(max_concurrent: int, lanes: dict):
+    queue = DownloadQueue(
+        max_concurrent_downloads=max_concurrent,
+        lanes=lanes,
+        archive_after_seconds=None,
+    )
+    release = asyncio.Event()
+    started: list = []
+
+    async def fake_perform(task):
+        started.append((task.source, task.audio_id, time.monotonic()))
+        await release.wait()
+
+    queue._perform_download = fake_perform
+    return queue, release, started
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_source_for_url_uses_downloader_source():
+    assert source_for_url(YT.format("abc")) == "youtube"
+    assert source_for_url(IG.format("abc")) == "instagram"
+    assert source_for_url("https://example.com/x") == "unknown"
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    now = time.monotonic()
+    assert bucket.available(now)
+    bucket.consume(now)
+    bucket.consume(now)
+    assert not bucket.available(now)
+    assert bucket.seconds_until_available(now) == pytest.approx(0.5)
+    assert bucket.available(now + 0.5)
+
+
+@pytest.mark.anyio
+async def test_each_lane_gets_its_reserved_slots():
+    queue, release, started = _lane_queue(
+        3,
+        {"youtube": LaneConfig(concurrency=2), "instagram": LaneConfig(concurrency=1)},
+    )
+    for i in range(3):
+        await queue.add_download(audio_id=f"yt{i}", url=YT.format(i), priority=5)
+    await queue.add_download(audio_id="ig0", url=IG.format(0))
+
+    queue.start_processing()
+    try:
+        await _settle()
+        sources = sorted(source for source, _, _ in started)
+        assert sources == ["instagram", "youtube", "youtube"]
+        lanes = (await queue.get_queue_status())["lanes"]
+        assert lanes["youtube"]["queued"] == 1
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_lane_borrows_idle_capacity():
+    queue, release, started = _lane_queue(
+        3,
+        {"youtube": LaneConfig(concurrency=1), "instagram": LaneConfig(concurrency=2)},
+    )
+    for i in range(4):
+        await queue.add_download(audio_id=f"yt{i}", url=YT.format(i))
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert len(started) == 3
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_rate_limited_lane_keeps_its_reservation():
+    queue, release, started = _lane_queue(
+        3,
+        {
+            "youtube": LaneConfig(concurrency=1),
+            "instagram": LaneConfig(concurrency=2, rate=0.001, burst=1),
+        },
+    )
+    for i in range(2):
+        await queue.add_download(audio_id=f"ig{i}", url=IG.format(i))
+    for i in range(3):
+        await queue.add_download(audio_id=f"yt{i}", url=YT.format(i))
+
+    queue.start_processing()
+    try:
+        await _settle()
+        # ig1 waits for a token; youtube may not take the slot it reserves
+        assert sorted(audio_id for _, audio_id, _ in started) == ["ig0", "yt0"]
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_token_bucket_spaces_out_starts():
+    queue, release, started = _lane_queue(
+        2, {"youtube": LaneConfig(concurrency=2, rate=20.0, burst=1)}
+    )
+    release.set()
+    for i in range(3):
+        await queue.add_download(audio_id=f"yt{i}", url=YT.format(i))
+
+    queue.start_processing()
+    try:
+        for _ in range(100):
+            if len(started) == 3:
+                break
+            await asyncio.sleep(0.01)
+        times = [t for _, _, t in started]
+        assert len(times) == 3
+        assert times[1] - times[0] >= 0.04
+        assert times[2] - times[1] >= 0.04
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_video_jobs_use_weighted_lane():
+    queue, release, started = _lane_queue(
+        3,
+        {
+            "youtube": LaneConfig(concurrency=2),
+            "video:youtube": LaneConfig(concurrency=2, weight=2),
+        },
+    )
+    for i in range(2):
+        await queue.add_download(
+            audio_id=f"v{i}",
+            url=YT.format(i),
+            kind=DownloadKind.VIDEO,
+            resolution="720p",
+        )
+    await queue.add_download(audio_id="a0", url=YT.format("a"))
+
+    queue.start_processing()
+    try:
+        await _settle()
+        # v0 ocupa 2 slots, a0 o terceiro; v1 não cabe
+        assert sorted(audio_id for _, audio_id, _ in started) == ["a0", "v0"]
+        status = await queue.get_queue_status()
+        assert status["slots_in_use"] == 3
+        assert status["lanes"]["video:youtube"]["queued"] == 1
+        assert status["lanes"]["video:youtube"]["weight"] == 2
+        task = queue.tasks.by_audio_id("v1")[0]
+        assert task.kind == DownloadKind.VIDEO and task.resolution == "720p"
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_video_weight_is_capped_by_global_limit():
+    queue, release, started = _lane_queue(
+        1, {"video:youtube": LaneConfig(concurrency=1, weight=4)}
+    )
+    await queue.add_download(audio_id="v0", url=YT.format(0), kind="video")
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert [audio_id for _, audio_id, _ in started] == ["v0"]
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+def test_video_lane_shares_source_bucket():
+    queue = DownloadQueue(
+        max_concurrent_downloads=3,
+        lanes={
+            "youtube": LaneConfig(concurrency=1, rate=1.0, burst=2),
+            "video:youtube": LaneConfig(concurrency=1, weight=2),
+        },
+        archive_after_seconds=None,
+    )
+    assert queue._lanes["video:youtube"].bucket is queue._lanes["youtube"].bucket
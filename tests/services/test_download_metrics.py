@@ -0,0 +1,109 @@
+"""Tests for per-phase download telemetry."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import download_metrics
+from app.services.download_metrics import DownloadMetrics, percentiles, summarize
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(
+        download_metrics,
+        "time",
+        SimpleNamespace(monotonic=clock, thread_time=time.thread_time),
+    )
+    return clock
+
+
+def test_phases_are_split_by_hook_events(clock):
+    metrics = DownloadMetrics("audio", "abc", "youtube")
+
+    clock.now = 102.0  # metadados extraídos, primeiro byte
+    metrics.on_progress({"status": "downloading", "speed": 1000}, delta=500)
+    clock.now = 106.0
+    metrics.on_progress({"status": "downloading", "speed": 3000}, delta=7500)
+    metrics.on_progress({"status": "finished"})
+    clock.now = 106.5
+    metrics.on_postprocessor({"status": "started", "postprocessor": "ExtractAudio"})
+    clock.now = 109.5
+    metrics.on_postprocessor({"status": "finished", "postprocessor": "ExtractAudio"})
+    metrics.extraction_finished()
+    with metrics.phase("upload"):
+        clock.now = 111.0
+
+    record = metrics.finish("completed")
+
+    assert record["metadata_s"] == 2.0
+    assert record["transfer_s"] == 4.0
+    assert record["postprocess_s"] == 3.0
+    assert record["upload_s"] == 1.5
+    assert record["total_s"] == 11.0
+    assert record["bytes"] == 8000
+    assert record["avg_bps"] == 2000
+    assert record["peak_bps"] == 3000
+    assert record["postprocess_cpu_s"] >= 0
+
+
+def test_download_without_transfer_has_no_throughput(clock):
+    metrics = DownloadMetrics("video", "abc", "youtube")
+    clock.now = 103.0
+    metrics.extraction_finished()
+    record = metrics.finish("failed")
+    assert record["metadata_s"] == 3.0
+    assert record["transfer_s"] is None
+    assert record["avg_bps"] is None
+    assert record["postprocess_cpu_s"] is None
+
+
+def test_apply_appends_postprocessor_hook():
+    metrics = DownloadMetrics("audio", "abc", "youtube")
+    opts = metrics.apply({"postprocessor_hooks": ["other"]})
+    assert opts["postprocessor_hooks"] == ["other", metrics.on_postprocessor]
+
+
+def test_percentiles_use_nearest_rank():
+    result = percentiles(range(1, 101))
+    assert result == {"count": 100, "p50": 50, "p90": 90, "p99": 99, "max": 100}
+    assert percentiles([None, None]) is None
+
+
+def test_summarize_groups_by_source_and_phase():
+    def row(source, total, status="completed"):
+        return {
+            "source": source,
+            "status": status,
+            "metadata_s": 1.0,
+            "transfer_s": total - 1.0,
+            "postprocess_s": None,
+            "upload_s": None,
+            "total_s": total,
+            "bytes": 100,
+            "avg_bps": 50,
+            "peak_bps": 80,
+            "postprocess_cpu_s": None,
+        }
+
+    summary = summarize(
+        [row("youtube", 3.0), row("youtube", 5.0, "failed"), row("instagram", 2.0)]
+    )
+
+    assert summary["samples"] == 3
+    youtube = summary["sources"]["youtube"]
+    assert youtube["downloads"] == 2
+    assert youtube["failed"] == 1
+    assert youtube["phases"]["total"]["max"] == 5.0
+    assert youtube["phases"]["upload"] is None
+    assert summary["sources"]["instagram"]["phases"]["transfer"]["p50"] == 1.0
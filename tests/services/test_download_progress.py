@@ -0,0 +1,146 @@
+"""Tests for the loop-side download progress channel and SSE progress events."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.services.download_progress import (
+    ProgressChannel,
+    ProgressEventEmitter,
+    ProgressSnapshot,
+)
+from app.services.sse_manager import SSEManager
+
+
+class _Recorder:
+    def __init__(self):
+        self.values = []
+        self.threads = set()
+
+    async def __call__(self, value):
+        self.values.append(value)
+        self.threads.add(threading.get_ident())
+
+
+@pytest.mark.anyio
+async def test_publishes_are_coalesced_to_latest_value():
+    sink = _Recorder()
+    channel = ProgressChannel(asyncio.get_running_loop(), sink, min_interval=60)
+    for value in range(1, 51):
+        channel.publish(value)
+    await channel.close()
+    assert sink.values == [50]
+
+
+@pytest.mark.anyio
+async def test_publish_from_worker_thread_is_delivered_on_loop():
+    sink = _Recorder()
+    loop = asyncio.get_running_loop()
+    channel = ProgressChannel(loop, sink, min_interval=0)
+
+    def hook():
+        for value in (10, 20, 30):
+            channel.publish(value)
+
+    threads_before = threading.active_count()
+    await loop.run_in_executor(None, hook)
+    await channel.close()
+
+    assert sink.values[-1] == 30
+    assert sink.threads == {threading.get_ident()}
+    assert threading.active_count() <= threads_before + 1
+
+
+@pytest.mark.anyio
+async def test_repeated_value_is_written_once():
+    sink = _Recorder()
+    channel = ProgressChannel(asyncio.get_running_loop(), sink, min_interval=0)
+    channel.publish(95)
+    await asyncio.sleep(0.01)
+    channel.publish(95)
+    await channel.close()
+    assert sink.values == [95]
+
+
+@pytest.mark.anyio
+async def test_sink_errors_do_not_stop_the_channel():
+    calls = []
+
+    async def flaky(value):
+        calls.append(value)
+        if value == 1:
+            raise RuntimeError("db locked")
+
+    channel = ProgressChannel(asyncio.get_running_loop(), flaky, min_interval=0)
+    channel.publish(1)
+    await asyncio.sleep(0.01)
+    channel.publish(2)
+    await channel.close()
+    assert calls == [1, 2]
+
+
+def test_snapshot_from_hook_reads_bytes_speed_and_eta():
+    snapshot = ProgressSnapshot.from_hook(
+        {
+            "status": "downloading",
+            "downloaded_bytes": 2500,
+            "total_bytes_estimate": 10000.0,
+            "speed": 1234.7,
+            "eta": 6,
+        }
+    )
+    assert snapshot == ProgressSnapshot(25, 2500, 10000, 1234, 6)
+    assert ProgressSnapshot.from_hook({"status": "finished"}).percent == 95
+    assert ProgressSnapshot.from_hook({"status": "error"}) is None
+
+
+class _FakeSSE:
+    def __init__(self):
+        self.events = []
+
+    async def download_progress(self, item_id, progress, message=None, **fields):
+        self.events.append((item_id, progress, fields))
+
+
+@pytest.mark.anyio
+async def test_emitter_sends_events_only_on_percentage_deltas():
+    sse = _FakeSSE()
+    emitter = ProgressEventEmitter(sse, "abc", min_delta=5)
+    for percent in (1, 3, 6, 8, 12):
+        await emitter(ProgressSnapshot(percent, percent * 100, 10000, 500, 9))
+    await emitter(ProgressSnapshot(95, 10000, 10000, finished=True))
+
+    assert [p for _, p, _ in sse.events] == [1, 6, 12, 95]
+    assert sse.events[0][2] == {
+        "downloaded_bytes": 100,
+        "total_bytes": 10000,
+        "speed": 500,
+        "eta": 9,
+    }
+
+
+@pytest.mark.anyio
+async def test_emitter_without_total_follows_downloaded_bytes():
+    sse = _FakeSSE()
+    emitter = ProgressEventEmitter(sse, "abc", min_delta=5)
+    for downloaded in (100, 100, 300):
+        await emitter(ProgressSnapshot(0, downloaded))
+    assert [f["downloaded_bytes"] for _, _, f in sse.events] == [100, 300]
+
+
+@pytest.mark.anyio
+async def test_download_progress_event_carries_transfer_fields():
+    manager = SSEManager()
+    queue = await manager.connect("client")
+    await queue.get()  # evento "connected"
+
+    await manager.download_progress(
+        "abc", 40, downloaded_bytes=4000, total_bytes=10000, speed=2000, eta=3
+    )
+
+    payload = json.loads((await queue.get()).split("data: ", 1)[1])
+    assert payload["event_type"] == "download_progress"
+    assert payload["progress"] == 40
+    assert (payload["speed"], payload["eta"]) == (2000, 3)
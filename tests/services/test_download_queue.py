@@ -0,0 +1,393 @@
+"""Tests for the event-driven scheduler in app/services/download_queue.py."""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.services.download_queue import (
+    DownloadQueue,
+    DownloadStatus,
+    DownloadTask,
+    TaskStore,
+)
+
+
+def _blocking_queue(max_concurrent: int):
+    """Queue whose downloads block until ``release`` is set; records start order."""
+    queue = DownloadQueue(max_concurrent_downloads=max_concurrent)
+    release = asyncio.Event()
+    started: list = []
+
+    async def fake_perform(task):
+        started.append(task.audio_id)
+        await release.wait()
+
+    queue._perform_download = fake_perform
+    return queue, release, started
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.anyio
+async def test_fills_every_free_slot_in_one_pass():
+    queue, release, started = _blocking_queue(max_concurrent=3)
+    for i in range(5):
+        await queue.add_download(audio_id=f"a{i}", url=f"https://youtu.be/a{i}")
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert len(queue.active_downloads) == 3
+        status = await queue.get_queue_status()
+        assert status["downloading"] == 3
+        assert status["queued"] == 2
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_dispatches_by_priority_then_fifo():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    await queue.add_download(audio_id="low-1", url="u", priority=0)
+    await queue.add_download(audio_id="high", url="u", priority=5)
+    await queue.add_download(audio_id="low-2", url="u", priority=0)
+
+    release.set()
+    queue.start_processing()
+    try:
+        for _ in range(50):
+            if len(started) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert started == ["high", "low-1", "low-2"]
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_set_priority_reorders_queued_task():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    await queue.add_download(audio_id="first", url="u")
+    second = await queue.add_download(audio_id="second", url="u")
+
+    assert await queue.set_priority(second, 10) is True
+    assert await queue.set_priority("missing", 10) is False
+
+    release.set()
+    queue.start_processing()
+    try:
+        for _ in range(50):
+            if len(started) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert started == ["second", "first"]
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_freed_slot_is_refilled_without_polling_delay():
+    queue = DownloadQueue(max_concurrent_downloads=1)
+    started_at: dict = {}
+
+    async def fake_perform(task):
+        started_at[task.audio_id] = time.monotonic()
+
+    queue._perform_download = fake_perform
+    await queue.add_download(audio_id="a", url="u")
+    await queue.add_download(audio_id="b", url="u")
+
+    queue.start_processing()
+    try:
+        for _ in range(50):
+            if len(started_at) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert started_at["b"] - started_at["a"] < 0.5
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_cancel_queued_task_never_starts():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    await queue.add_download(audio_id="running", url="u")
+    queued = await queue.add_download(audio_id="cancelled", url="u")
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert await queue.cancel_download(queued) is True
+        release.set()
+        await asyncio.sleep(0.05)
+        assert started == ["running"]
+        task = await queue.get_task_status(queued)
+        assert task.status == DownloadStatus.CANCELLED
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_failed_download_is_retried_after_backoff():
+    queue = DownloadQueue(max_concurrent_downloads=1)
+    attempts: list = []
+
+    async def flaky_perform(task):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+
+    queue._perform_download = flaky_perform
+    task_id = await queue.add_download(audio_id="a", url="u")
+    queue.tasks[task_id].retry_delay = 0.05
+    queue.tasks[task_id].retry_jitter = 0
+
+    queue.start_processing()
+    try:
+        for _ in range(100):
+            if len(attempts) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(attempts) == 2
+        assert attempts[1] - attempts[0] >= 0.05
+        await asyncio.sleep(0.01)
+        task = await queue.get_task_status(task_id)
+        assert task.status == DownloadStatus.COMPLETED
+        assert task.retry_count == 1
+        assert queue._retry_heap == []
+    finally:
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_cancelled_retry_is_not_requeued():
+    queue = DownloadQueue(max_concurrent_downloads=1)
+    attempts: list = []
+
+    async def failing_perform(task):
+        attempts.append(task.id)
+        raise RuntimeError("boom")
+
+    queue._perform_download = failing_perform
+    task_id = await queue.add_download(audio_id="a", url="u")
+    queue.tasks[task_id].retry_delay = 0.05
+
+    queue.start_processing()
+    try:
+        for _ in range(50):
+            if queue.tasks[task_id].status == DownloadStatus.RETRYING:
+                break
+            await asyncio.sleep(0.01)
+        assert await queue.cancel_download(task_id) is True
+        await asyncio.sleep(0.15)
+        assert attempts == [task_id]
+        assert queue.tasks[task_id].status == DownloadStatus.CANCELLED
+    finally:
+        await queue.stop_processing()
+
+
+def test_schedule_retry_applies_jitter_within_bounds():
+    random.seed(1234)
+    delays = set()
+    for _ in range(20):
+        task = DownloadTask(id="t", audio_id="a", url="u", retry_delay=10)
+        before = datetime.now()
+        task.schedule_retry()
+        delay = (task.next_retry_at - before).total_seconds()
+        assert 7.5 - 0.1 <= delay <= 12.5 + 0.1
+        delays.add(round(delay, 2))
+    assert len(delays) > 1
+
+
+@pytest.mark.anyio
+async def test_status_counters_follow_transitions():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    ids = [await queue.add_download(audio_id=f"a{i}", url="u") for i in range(3)]
+    await queue.cancel_download(ids[2])
+
+    queue.start_processing()
+    try:
+        await _settle()
+        status = await queue.get_queue_status()
+        assert status["total"] == 3
+        assert status["downloading"] == 1
+        assert status["queued"] == 1
+        assert status["cancelled"] == 1
+        release.set()
+        for _ in range(50):
+            if (await queue.get_queue_status())["completed"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        status = await queue.get_queue_status()
+        assert status["completed"] == 2
+        assert status["queued"] == status["downloading"] == 0
+    finally:
+        await queue.stop_processing()
+
+
+def test_task_store_indexes_and_paginates():
+    store = TaskStore()
+    tasks = [
+        DownloadTask(id=f"t{i}", audio_id="odd" if i % 2 else "even", url="u")
+        for i in range(7)
+    ]
+    for task in tasks:
+        store.add(task)
+    store.set_status(tasks[1], DownloadStatus.FAILED)
+    store.set_status(tasks[4], DownloadStatus.FAILED)
+
+    assert store.count(DownloadStatus.QUEUED) == 5
+    assert store.count(DownloadStatus.FAILED) == 2
+    assert [t.id for t in store.by_audio_id("odd")] == ["t1", "t3", "t5"]
+
+    page, cursor = store.page(limit=3)
+    assert [t.id for t in page] == ["t0", "t1", "t2"]
+    page, cursor = store.page(limit=3, cursor=cursor)
+    assert [t.id for t in page] == ["t3", "t4", "t5"]
+    page, cursor = store.page(limit=3, cursor=cursor)
+    assert [t.id for t in page] == ["t6"]
+    assert cursor is None
+
+    page, cursor = store.page(status=DownloadStatus.FAILED, limit=10)
+    assert [t.id for t in page] == ["t1", "t4"]
+    assert cursor is None
+    page, _ = store.page(status=DownloadStatus.QUEUED, audio_id="odd", limit=10)
+    assert [t.id for t in page] == ["t3", "t5"]
+
+    store.remove("t3")
+    assert "t3" not in store
+    assert [t.id for t in store.by_audio_id("odd")] == ["t1", "t5"]
+    assert store.count(DownloadStatus.QUEUED) == 4
+
+
+@pytest.mark.anyio
+async def test_stop_processing_requeues_interrupted_downloads():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    task_id = await queue.add_download(audio_id="a", url="u")
+
+    queue.start_processing()
+    await _settle()
+    assert started == ["a"]
+    await queue.stop_processing()
+
+    task = await queue.get_task_status(task_id)
+    assert task.status == DownloadStatus.QUEUED
+    assert task.started_at is None
+
+
+@pytest.mark.anyio
+async def test_duplicate_submission_attaches_to_inflight_task():
+    queue, release, started = _blocking_queue(max_concurrent=3)
+    first = await queue.add_download(
+        audio_id="dQw4w9WgXcQ", url="https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    )
+    # outra forma da mesma URL, com prioridade maior
+    second = await queue.add_download(
+        audio_id="dQw4w9WgXcQ", url="https://youtu.be/dQw4w9WgXcQ", priority=5
+    )
+    video = await queue.add_download(
+        audio_id="dQw4w9WgXcQ", url="https://youtu.be/dQw4w9WgXcQ", kind="video"
+    )
+
+    assert second == first
+    assert video != first
+    assert queue.tasks[first].priority == 5
+    status = await queue.get_queue_status()
+    assert status["total"] == 2
+    assert status["coalesced"] == 1
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert sorted(started) == ["dQw4w9WgXcQ", "dQw4w9WgXcQ"]
+        # ainda baixando: continua coalescendo
+        again = await queue.add_download(
+            audio_id="dQw4w9WgXcQ", url="https://youtu.be/dQw4w9WgXcQ"
+        )
+        assert again == first
+        release.set()
+        await _settle()
+        assert queue.tasks[first].status == DownloadStatus.COMPLETED
+        # terminou: uma nova submissão cria outra task
+        fresh = await queue.add_download(
+            audio_id="dQw4w9WgXcQ", url="https://youtu.be/dQw4w9WgXcQ"
+        )
+        assert fresh != first
+    finally:
+        release.set()
+        await queue.stop_processing()
+
+
+@pytest.mark.anyio
+async def test_flight_key_never_extracts_over_the_network():
+    queue = DownloadQueue(max_concurrent_downloads=1)
+    with patch(
+        "app.services.downloaders.youtube.YouTubeDownloader.extract_id",
+        side_effect=AssertionError("extract_id sob queue_lock"),
+    ):
+        # URL sem ID reconhecível offline: a chave cai no ID do item
+        first = await queue.add_download(
+            audio_id="item-1", url="https://www.youtube.com/@handle/live"
+        )
+        second = await queue.add_download(
+            audio_id="item-1", url="https://www.youtube.com/@handle/live"
+        )
+        other = await queue.add_download(
+            audio_id="item-2", url="https://www.youtube.com/@handle/live"
+        )
+
+    assert second == first
+    assert other != first
+
+
+@pytest.mark.anyio
+async def test_cancel_releases_inflight_key():
+    queue = DownloadQueue(max_concurrent_downloads=1)
+    url = "https://youtu.be/abcdefghijk"
+    first = await queue.add_download(audio_id="abcdefghijk", url=url)
+    assert await queue.cancel_download(first)
+    second = await queue.add_download(audio_id="abcdefghijk", url=url)
+    assert second != first
+    assert (await queue.get_queue_status())["in_flight"] == 1
+
+
+@pytest.mark.anyio
+async def test_add_downloads_enqueues_batch_in_order_and_coalesces():
+    queue, release, started = _blocking_queue(max_concurrent=1)
+    existing = await queue.add_download(
+        audio_id="abcdefghijk", url="https://youtu.be/abcdefghijk"
+    )
+
+    task_ids = await queue.add_downloads(
+        [
+            {"audio_id": "video000001", "url": "https://youtu.be/video000001"},
+            {"audio_id": "abcdefghijk", "url": "https://youtu.be/abcdefghijk"},
+            {
+                "audio_id": "video000002",
+                "url": "https://youtu.be/video000002",
+                "priority": 3,
+            },
+        ]
+    )
+
+    assert task_ids[1] == existing
+    assert len(set(task_ids)) == 3
+    assert queue.tasks[task_ids[2]].priority == 3
+    assert (await queue.get_queue_status())["coalesced"] == 1
+    assert await queue.add_downloads([]) == []
+
+    queue.start_processing()
+    try:
+        await _settle()
+        assert started == ["video000002"]
+    finally:
+        release.set()
+        await queue.stop_processing()
@@ -0,0 +1,130 @@
+"""Tests for resuming partial downloads between attempts."""
+
+import json
+
+import pytest
+
+from app.services.download_queue import DownloadQueue
+from app.services.download_resume import (
+    RESUME_SIDECAR,
+    ResumeFormatChanged,
+    finish_resume,
+    prepare_resume,
+)
+
+
+def _sidecar(tmp_path, fmt, sizes):
+    (tmp_path / RESUME_SIDECAR).write_text(json.dumps({"format": fmt, "sizes": sizes}))
+
+
+def test_fresh_directory_has_nothing_to_resume(tmp_path):
+    _sidecar(tmp_path, "251", {})
+    state = prepare_resume(tmp_path)
+    assert state.pinned_format is None
+    assert state.partial_bytes == 0
+    assert not (tmp_path / RESUME_SIDECAR).exists()
+
+
+def test_partials_without_sidecar_are_discarded(tmp_path):
+    part = tmp_path / "Song.webm.part"
+    part.write_bytes(b"x" * 100)
+    state = prepare_resume(tmp_path)
+    assert state.partial_bytes == 0
+    assert not part.exists()
+
+
+def test_valid_partials_are_kept_and_format_pinned(tmp_path):
+    (tmp_path / "Song.webm.part").write_bytes(b"x" * 300)
+    (tmp_path / "Clip.f137.mp4.part-Frag3").write_bytes(b"y" * 50)
+    (tmp_path / "Clip.f137.mp4.ytdl").write_text("{}")
+    oversized = tmp_path / "Other.m4a.part"
+    oversized.write_bytes(b"z" * 20)
+    _sidecar(tmp_path, "251", {"Song.webm": 1000, "Other.m4a": 10})
+
+    state = prepare_resume(tmp_path)
+
+    assert state.partial_bytes == 350
+    assert state.initial_bytes(str(tmp_path / "Song.webm")) == 300
+    assert not oversized.exists()
+    assert (tmp_path / "Clip.f137.mp4.ytdl").exists()
+    opts = state.apply({"format": "bestaudio/best", "progress_hooks": []})
+    assert opts["format"] == "251/bestaudio/best"
+    assert opts["continuedl"] is True
+    assert state.progress_hook in opts["progress_hooks"]
+
+
+def test_progress_hook_records_merged_format_and_sizes(tmp_path):
+    state = prepare_resume(tmp_path)
+    info = {
+        "format_id": "137",
+        "requested_formats": [{"format_id": "137"}, {"format_id": "140"}],
+    }
+    state.progress_hook(
+        {
+            "status": "downloading",
+            "filename": str(tmp_path / "Clip.f137.mp4"),
+            "total_bytes": 5000,
+            "info_dict": info,
+        }
+    )
+    data = json.loads((tmp_path / RESUME_SIDECAR).read_text())
+    assert data == {"format": "137+140", "sizes": {"Clip.f137.mp4": 5000}}
+
+    # Próxima tentativa fixa o mesmo formato mesclado
+    (tmp_path / "Clip.f137.mp4.part").write_bytes(b"x" * 10)
+    assert prepare_resume(tmp_path).pinned_format == "137+140"
+
+
+def test_fallback_to_another_format_discards_partials(tmp_path):
+    part = tmp_path / "Song.webm.part"
+    part.write_bytes(b"x" * 300)
+    _sidecar(tmp_path, "251", {"Song.webm": 1000})
+    state = prepare_resume(tmp_path)
+    assert state.pinned_format == "251"
+
+    # 251 sumiu e o fallback ``bestaudio`` caiu no 250, também .webm
+    with pytest.raises(ResumeFormatChanged):
+        state.progress_hook(
+            {
+                "status": "downloading",
+                "filename": str(tmp_path / "Song.webm"),
+                "total_bytes": 800,
+                "info_dict": {"format_id": "250"},
+            }
+        )
+
+    assert not part.exists()
+    assert not (tmp_path / RESUME_SIDECAR).exists()
+    assert prepare_resume(tmp_path).pinned_format is None
+
+
+def test_progress_hook_accepts_the_pinned_format(tmp_path):
+    (tmp_path / "Song.webm.part").write_bytes(b"x" * 300)
+    _sidecar(tmp_path, "251", {"Song.webm": 1000})
+    state = prepare_resume(tmp_path)
+    state.progress_hook(
+        {
+            "status": "downloading",
+            "filename": str(tmp_path / "Song.webm"),
+            "total_bytes": 1000,
+            "info_dict": {"format_id": "251"},
+        }
+    )
+    assert (tmp_path / "Song.webm.part").exists()
+
+
+def test_finish_resume_removes_leftovers(tmp_path):
+    (tmp_path / "Song.m4a").write_bytes(b"done")
+    (tmp_path / "Song.f250.webm.part").write_bytes(b"stale")
+    _sidecar(tmp_path, "251", {})
+    finish_resume(tmp_path)
+    assert [p.name for p in tmp_path.iterdir()] == ["Song.m4a"]
+
+
+@pytest.mark.anyio
+async def test_queue_reports_bytes_saved():
+    queue = DownloadQueue(max_concurrent_downloads=1, archive_after_seconds=None)
+    queue._record_resume(1024)
+    queue._record_resume(512)
+    status = await queue.get_queue_status()
+    assert status["resume"] == {"resumed_attempts": 2, "bytes_saved": 1536}
@@ -0,0 +1,134 @@
+"""Tests for the local EJS challenge-solver cache and runtime warm-up."""
+
+import hashlib
+import json
+import shutil
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from yt_dlp import YoutubeDL
+
+from app.services import ejs_component as ejs_module
+from app.services.ejs_component import SECTION, EjsComponent
+
+LIB = "var lib = {answer: 42};"
+CORE = "var jsc = function (input) { return answer; };"
+
+
+def _sha(code):
+    return hashlib.sha3_512(code.encode()).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def vendor(monkeypatch):
+    fake = SimpleNamespace(
+        VERSION="0.8.0",
+        HASHES={"yt.solver.lib.min.js": _sha(LIB), "yt.solver.core.min.js": _sha(CORE)},
+    )
+    monkeypatch.setattr(ejs_module, "_vendor", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def component(tmp_path, monkeypatch):
+    component = EjsComponent(cache_dir=tmp_path / "cache", offline=False)
+    downloads = []
+
+    def download(filename):
+        downloads.append(filename)
+        return LIB if "lib" in filename else CORE
+
+    monkeypatch.setattr(component, "_download", download)
+    component.downloads = downloads
+    return component
+
+
+def test_ensure_downloads_verifies_and_stores_in_yt_dlp_cache_format(component):
+    assert component.ensure() == {"lib": "ok", "core": "ok"}
+    assert component.downloads == ["yt.solver.lib.min.js", "yt.solver.core.min.js"]
+
+    # O próprio yt-dlp lê o arquivo gravado
+    ydl = YoutubeDL({"cachedir": str(component.cache_dir), "quiet": True})
+    cached = ydl.cache.load(SECTION, "core")
+    assert cached == {"version": "0.8.0", "variant": "minified", "code": CORE}
+
+    # Segunda chamada não baixa de novo
+    component.ensure()
+    assert len(component.downloads) == 2
+
+
+def test_stale_and_tampered_scripts_are_replaced(component, vendor):
+    component.ensure()
+    vendor.VERSION = "0.9.1"
+    assert component.script_status("lib") == "stale"
+
+    vendor.VERSION = "0.8.0"
+    path = component.cache_dir / SECTION / "core.json"
+    payload = json.loads(path.read_text())
+    payload["data"]["code"] += "\n// alterado"
+    path.write_text(json.dumps(payload))
+    assert component.script_status("core") == "invalid"
+
+    assert component.ensure()["core"] == "ok"
+    assert component.downloads[-1] == "yt.solver.core.min.js"
+
+
+def test_download_with_wrong_hash_is_rejected(component, monkeypatch):
+    monkeypatch.setattr(component, "_download", lambda filename: "evil();")
+
+    assert component.ensure() == {"lib": "invalid", "core": "invalid"}
+    assert not (component.cache_dir / SECTION / "lib.json").exists()
+
+
+def test_offline_mode_never_downloads(component):
+    component.offline = True
+
+    assert component.ensure() == {"lib": "missing", "core": "missing"}
+    assert component.downloads == []
+    assert component.status()["ok"] is False
+
+
+def _fake_pool(monkeypatch, runtimes):
+    @contextmanager
+    def lease(source, profile, opts):
+        yield SimpleNamespace(_js_runtimes=runtimes)
+
+    from app.services import ydl_pool as pool_module
+
+    monkeypatch.setattr(pool_module.ydl_pool, "lease", lease)
+
+
+def test_warm_without_supported_runtime_is_reported(component, monkeypatch):
+    _fake_pool(monkeypatch, {"node": None})
+
+    assert component.warm({})["ok"] is False
+    assert component.status()["ok"] is False
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node não instalado")
+def test_warm_runs_cached_scripts_in_runtime(component, monkeypatch):
+    info = SimpleNamespace(
+        name="node", path=shutil.which("node"), version="22.0.0", supported=True
+    )
+    _fake_pool(monkeypatch, {"node": SimpleNamespace(info=info)})
+    component.ensure()
+
+    runtime = component.warm({})
+
+    assert runtime["ok"] is True, runtime
+    assert runtime["warmup_ms"] >= 0
+    assert component.status()["ok"] is True
+
+
+def test_missing_yt_dlp_internals_report_unsupported(component, monkeypatch):
+    monkeypatch.setattr(ejs_module, "_vendor", lambda: None)
+    _fake_pool(monkeypatch, None)
+
+    assert component.ensure() == {"lib": "unsupported", "core": "unsupported"}
+    assert component.downloads == []
+    assert component.warm({}) == {"ok": False, "error": "unsupported"}
+    status = component.status()
+    assert status["ok"] is False
+    assert status["supported"] is False
+    assert status["version"] is None
@@ -0,0 +1,117 @@
+"""Tests for reusing registration metadata in the download step."""
+
+from unittest.mock import MagicMock, patch
+
+from app.services.downloaders.youtube import YouTubeDownloader
+from app.services.info_cache import InfoCache
+from app.services.managers import AudioDownloadManager, _registration_info
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = InfoCache(ttl=60, max_entries=10, clock=clock)
+    cache.put("youtube", "abc", {"id": "abc", "title": "Song"})
+
+    clock.now = 59
+    assert cache.get("youtube", "abc")["title"] == "Song"
+    clock.now = 60
+    assert cache.get("youtube", "abc") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 0
+
+
+def test_key_includes_source_and_lru_evicts_oldest():
+    cache = InfoCache(ttl=60, max_entries=2)
+    cache.put("youtube", "a", {"id": "a"})
+    cache.put("instagram", "a", {"id": "ig"})
+    cache.get("youtube", "a")  # "youtube/a" passa a ser o mais recente
+    cache.put("youtube", "b", {"id": "b"})
+
+    assert cache.get("instagram", "a") is None
+    assert cache.get("youtube", "a") == {"id": "a"}
+    assert cache.get("youtube", "b") == {"id": "b"}
+
+
+def test_get_returns_independent_copies():
+    cache = InfoCache(ttl=60, max_entries=10)
+    cache.put("youtube", "abc", {"formats": [{"format_id": "251"}]})
+
+    first = cache.get("youtube", "abc")
+    first["formats"].append({"format_id": "140"})
+    first["requested_formats"] = []
+
+    assert cache.get("youtube", "abc") == {"formats": [{"format_id": "251"}]}
+
+
+def test_invalidate_and_disabled_cache():
+    cache = InfoCache(ttl=60, max_entries=10)
+    cache.put("youtube", "abc", {"id": "abc"})
+    cache.invalidate("youtube", "abc")
+    assert cache.get("youtube", "abc") is None
+
+    disabled = InfoCache(ttl=0, max_entries=10)
+    disabled.put("youtube", "abc", {"id": "abc"})
+    assert len(disabled) == 0
+
+
+def _fake_ydl():
+    ydl = MagicMock()
+    ydl.__enter__.return_value = ydl
+    ydl.process_ie_result.return_value = {"id": "abc", "title": "Song"}
+    ydl.extract_info.return_value = {"id": "abc", "title": "Song"}
+    ydl.prepare_filename.return_value = "/tmp/abc/Song.webm"
+    return ydl
+
+
+def test_download_with_cached_info_skips_extraction():
+    ydl = _fake_ydl()
+    raw = {"id": "abc", "title": "Song", "formats": []}
+    with patch("app.services.ydl_pool.YoutubeDL", return_value=ydl):
+        result = AudioDownloadManager()._execute_ydl_download(
+            "https://youtu.be/abc", {}, raw
+        )
+
+    ydl.process_ie_result.assert_called_once_with(raw, download=True)
+    ydl.extract_info.assert_not_called()
+    assert result["filename"] == "/tmp/abc/Song.webm"
+
+
+def test_download_without_cached_info_extracts():
+    ydl = _fake_ydl()
+    with patch("app.services.ydl_pool.YoutubeDL", return_value=ydl):
+        AudioDownloadManager()._execute_ydl_download("https://youtu.be/abc", {})
+
+    ydl.extract_info.assert_called_once_with("https://youtu.be/abc", download=True)
+    ydl.process_ie_result.assert_not_called()
+
+
+def test_registration_seeds_info_cache_only_from_fresh_extraction(
+    isolated_metadata_cache, monkeypatch
+):
+    cache = InfoCache(ttl=60, max_entries=10)
+    monkeypatch.setattr("app.services.managers.info_cache", cache)
+    downloader = YouTubeDownloader()
+    url = "https://www.youtube.com/watch?v=abcdefghijk"
+    fresh = {"id": "abcdefghijk", "title": "Song", "formats": [{"format_id": "251"}]}
+
+    with patch.object(downloader, "get_info", return_value=fresh) as get_info:
+        assert _registration_info(downloader, url, "abcdefghijk") is fresh
+    get_info.assert_called_once_with(url, process=False)
+    assert cache.get("youtube", "abcdefghijk") == fresh
+
+    # Resultado sanitizado vindo do metadata_cache: só serve para o título
+    cache.clear()
+    isolated_metadata_cache.put("youtube", "abcdefghijk", "raw", fresh)
+    with patch.object(downloader, "get_info") as get_info:
+        info = _registration_info(downloader, url, "abcdefghijk")
+    get_info.assert_not_called()
+    assert info["title"] == "Song"
+    assert cache.get("youtube", "abcdefghijk") is None
@@ -0,0 +1,133 @@
+"""Tests for the persistent yt-dlp metadata cache."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.managers import AudioDownloadManager
+from app.services.metadata_cache import MetadataCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _public(info):
+    """Sem os campos que ``YoutubeDL.sanitize_info`` acrescenta (``_version``...)."""
+    if info is None:
+        return None
+    return {k: v for k, v in info.items() if not k.startswith("_") and k != "epoch"}
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return MetadataCache(
+        path=tmp_path / "cache.db",
+        max_bytes=1024 * 1024,
+        ttl=3600,
+        url_ttl=60,
+        list_ttl=300,
+        enabled=True,
+        clock=clock,
+    )
+
+
+def test_expired_fields_are_stripped_per_field(cache, clock):
+    cache.put("youtube", "abc", "full", {"title": "Song", "url": "https://signed"})
+
+    clock.now += 59
+    assert cache.get("youtube", "abc", "full")["url"] == "https://signed"
+
+    clock.now += 1
+    assert _public(cache.get("youtube", "abc", "full")) == {"title": "Song"}
+    assert cache.get("youtube", "abc", "full", require=("url",)) is None
+
+    clock.now += 3600
+    assert cache.get("youtube", "abc", "full") is None
+    assert cache.stats()["by_mode"]["full"] == {"hits": 2, "misses": 2}
+
+
+def test_key_includes_source_and_mode(cache):
+    cache.put("youtube", "abc", "raw", {"title": "Raw"})
+
+    assert cache.get("youtube", "abc", "full") is None
+    assert cache.get("instagram", "abc", "raw") is None
+    assert _public(cache.get("youtube", "abc", "raw")) == {"title": "Raw"}
+
+
+def test_lru_eviction_keeps_file_under_limit(cache, clock):
+    cache.put("youtube", "a", "full", {"title": "a"})
+    single = cache.stats()["bytes"]
+    cache.max_bytes = single * 2 + single // 2  # cabem duas entradas
+
+    clock.now += 1
+    cache.put("youtube", "b", "full", {"title": "b"})
+    clock.now += 1
+    cache.get("youtube", "a", "full")  # "a" passa a ser o mais recente
+    clock.now += 1
+    cache.put("youtube", "c", "full", {"title": "c"})
+
+    assert cache.get("youtube", "b", "full") is None
+    assert _public(cache.get("youtube", "a", "full")) == {"title": "a"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_survive_reopen(cache, tmp_path, clock):
+    cache.put("youtube", "abc", "full", {"title": "Song", "duration": 215})
+
+    other = MetadataCache(path=tmp_path / "cache.db", enabled=True, clock=clock)
+    assert _public(other.get("youtube", "abc", "full")) == {
+        "title": "Song",
+        "duration": 215,
+    }
+
+
+def test_cached_only_extracts_on_miss(cache):
+    extract = MagicMock(return_value={"title": "Song", "entries": [{"id": "x"}]})
+
+    first = cache.cached("youtube", "PL1", "playlist", extract, require=("entries",))
+    second = cache.cached("youtube", "PL1", "playlist", extract, require=("entries",))
+
+    assert _public(first) == _public(second)
+    extract.assert_called_once()
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_disabled_cache_always_extracts(tmp_path):
+    cache = MetadataCache(path=tmp_path / "cache.db", enabled=False)
+    extract = MagicMock(return_value={"title": "Song"})
+
+    cache.cached("youtube", "abc", "full", extract)
+    cache.cached("youtube", "abc", "full", extract)
+
+    assert extract.call_count == 2
+    assert not (tmp_path / "cache.db").exists()
+
+
+@pytest.mark.anyio
+async def test_fetch_track_artist_reuses_cached_metadata():
+    ydl = MagicMock()
+    ydl.__enter__.return_value = ydl
+    ydl.extract_info.return_value = {"id": "dQw4w9WgXcQ", "artist": "Rick Astley"}
+
+    manager = AudioDownloadManager()
+    with patch("app.services.ydl_pool.YoutubeDL", return_value=ydl):
+        assert await manager.fetch_track_artist("dQw4w9WgXcQ") == "Rick Astley"
+        assert (
+            await manager.fetch_track_artist(
+                "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+            )
+            == "Rick Astley"
+        )
+
+    ydl.extract_info.assert_called_once()
@@ -8,6 +8,7 @@ from app.services.managers import (
     AudioDownloadManager,
     VideoDownloadManager,
     extract_artist_from_info,
+    stream_playlist,
 )
 
 
@@ -17,7 +18,7 @@ def manager(request):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_happy_path_returns_entries(mock_ydl_cls, manager):
     """extract_playlist_info returns entries list on valid playlist."""
     mock_ydl = MagicMock()
@@ -48,7 +49,7 @@ async def test_happy_path_returns_entries(mock_ydl_cls, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_raises_value_error_on_empty_entries(mock_ydl_cls, manager):
     """extract_playlist_info raises ValueError when entries is empty list."""
     mock_ydl = MagicMock()
@@ -60,7 +61,7 @@ async def test_raises_value_error_on_empty_entries(mock_ydl_cls, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_raises_value_error_on_no_entries_key(mock_ydl_cls, manager):
     """extract_playlist_info raises ValueError when entries key is absent."""
     mock_ydl = MagicMock()
@@ -72,7 +73,7 @@ async def test_raises_value_error_on_no_entries_key(mock_ydl_cls, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_raises_value_error_when_info_is_none(mock_ydl_cls, manager):
     """extract_playlist_info raises ValueError when yt-dlp returns None."""
     mock_ydl = MagicMock()
@@ -84,7 +85,7 @@ async def test_raises_value_error_when_info_is_none(mock_ydl_cls, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_skips_entries_with_none_id(mock_ydl_cls, manager):
     """extract_playlist_info skips entries where id is None (deleted/private videos)."""
     mock_ydl = MagicMock()
@@ -131,7 +132,7 @@ async def test_raises_value_error_for_userinfo_url(manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_title_fallback_uses_video_id(mock_ydl_cls, manager):
     """extract_playlist_info falls back to Video_{id} when title fields absent."""
     mock_ydl = MagicMock()
@@ -159,7 +160,7 @@ async def test_title_fallback_uses_video_id(mock_ydl_cls, manager):
         "https://m.youtube.com/playlist?list=PL1",
     ],
 )
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_all_allowed_hosts_are_accepted(mock_ydl_cls, url, manager):
     """All allowed YouTube hosts accept without raising."""
     mock_ydl = MagicMock()
@@ -174,7 +175,7 @@ async def test_all_allowed_hosts_are_accepted(mock_ydl_cls, url, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_raises_value_error_when_all_entries_filtered(mock_ydl_cls, manager):
     """extract_playlist_info raises ValueError when all entries lack valid IDs."""
     mock_ydl = MagicMock()
@@ -193,7 +194,7 @@ async def test_raises_value_error_when_all_entries_filtered(mock_ydl_cls, manage
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_playlist_title_falls_back_to_playlist_string(mock_ydl_cls, manager):
     """extract_playlist_info falls back to 'Playlist' when title fields absent."""
     mock_ydl = MagicMock()
@@ -208,7 +209,7 @@ async def test_playlist_title_falls_back_to_playlist_string(mock_ydl_cls, manage
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_webpage_url_falls_back_to_input_url(mock_ydl_cls, manager):
     """extract_playlist_info falls back to input URL when webpage_url absent."""
     mock_ydl = MagicMock()
@@ -224,7 +225,7 @@ async def test_webpage_url_falls_back_to_input_url(mock_ydl_cls, manager):
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_skips_entries_with_invalid_id_format(mock_ydl_cls, manager):
     """extract_playlist_info skips entries with IDs that fail the YouTube regex."""
     mock_ydl = MagicMock()
@@ -306,7 +307,7 @@ def test_extract_artist_title_pattern_requires_both_sides():
 
 
 @pytest.mark.anyio
-@patch("app.services.managers.YoutubeDL")
+@patch("app.services.ydl_pool.YoutubeDL")
 async def test_entry_includes_artist_when_present(mock_ydl_cls, manager):
     """Flat playlist entries include artist from music fields only."""
     mock_ydl = MagicMock()
@@ -327,3 +328,61 @@ async def test_entry_includes_artist_when_present(mock_ydl_cls, manager):
 
     assert result["entries"][0]["artist"] == "Singer One"
     assert "artist" not in result["entries"][1]
+
+
+def _paged_playlist(mock_ydl_cls, count):
+    mock_ydl = MagicMock()
+    mock_ydl_cls.return_value.__enter__.return_value = mock_ydl
+
+    def _entries():
+        for i in range(count):
+            yield {"id": f"track{i:06d}", "title": f"Track {i}"}
+
+    # Sem process, o yt-dlp devolve as entradas como gerador
+    mock_ydl.extract_info.side_effect = lambda *a, **k: {
+        "title": "Long Playlist",
+        "id": "PL1",
+        "entries": _entries(),
+    }
+    return mock_ydl
+
+
+async def _pages(**kwargs):
+    return [
+        page
+        async for page in stream_playlist(
+            "https://www.youtube.com/playlist?list=PL1", **kwargs
+        )
+    ]
+
+
+@pytest.mark.anyio
+@patch("app.services.ydl_pool.YoutubeDL")
+async def test_stream_playlist_yields_pages_and_caches_full_list(mock_ydl_cls):
+    mock_ydl = _paged_playlist(mock_ydl_cls, 5)
+
+    pages = await _pages(page_size=2, max_entries=0)
+
+    assert [len(p["entries"]) for p in pages] == [2, 2, 1]
+    assert [p["has_more"] for p in pages] == [True, True, False]
+    assert pages[2]["entries"][0]["id"] == "track000004"
+    assert mock_ydl.extract_info.call_args.kwargs["process"] is False
+
+    # Lida até o fim: a segunda leitura vem do cache de metadados
+    again = await _pages(page_size=3, max_entries=0)
+    assert [len(p["entries"]) for p in again] == [3, 2]
+    assert mock_ydl.extract_info.call_count == 1
+
+
+@pytest.mark.anyio
+@patch("app.services.ydl_pool.YoutubeDL")
+async def test_stream_playlist_stops_at_max_entries(mock_ydl_cls):
+    mock_ydl = _paged_playlist(mock_ydl_cls, 10)
+
+    pages = await _pages(page_size=2, max_entries=3)
+
+    assert [len(p["entries"]) for p in pages] == [2, 1]
+    assert pages[-1]["has_more"] is False
+    # Leitura interrompida: a lista parcial não vai para o cache
+    await _pages(page_size=2, max_entries=3)
+    assert mock_ydl.extract_info.call_count == 2
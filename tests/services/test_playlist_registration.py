@@ -0,0 +1,200 @@
+"""Tests for bulk playlist registration (one lookup, one insert, one update)."""
+
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Audio, Base, Folder, Video
+from app.services import managers
+from app.services.downloaders.youtube import YouTubeDownloader
+from app.services.managers import AudioDownloadManager, VideoDownloadManager
+
+
+def _entry(video_id, title, artist=None):
+    entry = {
+        "id": video_id,
+        "title": title,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+    if artist:
+        entry["artist"] = artist
+    return entry
+
+
+ENTRIES = [
+    _entry("newvideo001", "New Track", "Miles Davis"),
+    _entry("readyvid001", "Ready Track", "John Coltrane"),
+    _entry("errorvid001", "Broken Track"),
+]
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'playlist.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as session:
+        session.add_all(
+            [
+                Folder(id="album-1", name="Album", kind="album"),
+                Folder(id="other", name="Other"),
+            ]
+        )
+        for model in (Audio, Video):
+            session.add_all(
+                [
+                    model(
+                        id="readyvid001",
+                        title="Ready",
+                        name="n",
+                        source="youtube",
+                        external_id="readyvid001",
+                        download_status="ready",
+                    ),
+                    model(
+                        id="errorvid001",
+                        title="Broken",
+                        name="n",
+                        source="youtube",
+                        external_id="errorvid001",
+                        download_status="error",
+                        download_error="boom",
+                        folder_id="other",
+                    ),
+                ]
+            )
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(
+            sql.split()[0]
+        ),
+    )
+    monkeypatch.setattr(managers, "get_db_context", session_factory)
+    yield session_factory, statements
+    await engine.dispose()
+
+
+async def _rows(session_factory, model):
+    async with session_factory() as session:
+        result = await session.execute(select(model))
+        return {row.id: row for row in result.scalars().all()}
+
+
+@pytest.mark.anyio
+async def test_audio_playlist_registers_in_one_transaction_without_extraction(
+    db, monkeypatch
+):
+    session_factory, statements = db
+
+    def _no_extraction(*args, **kwargs):
+        raise AssertionError("a entrada flat já traz os metadados")
+
+    monkeypatch.setattr(YouTubeDownloader, "get_info", _no_extraction)
+
+    results = await AudioDownloadManager().register_playlist_entries(
+        ENTRIES, "album-1", skip_existing=True
+    )
+
+    assert results == [
+        ("newvideo001", False),
+        ("readyvid001", True),
+        ("errorvid001", False),
+    ]
+    # Um SELECT ... IN, um INSERT e um UPDATE (executemany por formato)
+    assert statements.count("SELECT") == 1
+    assert statements.count("INSERT") == 1
+
+    rows = await _rows(session_factory, Audio)
+    new = rows["newvideo001"]
+    assert (new.title, new.folder_id, new.track_number, new.artist) == (
+        "New Track",
+        "album-1",
+        1,
+        "Miles Davis",
+    )
+    assert new.download_status == "downloading"
+    assert new.youtube_id == "newvideo001"
+
+    ready = rows["readyvid001"]
+    assert (ready.download_status, ready.folder_id, ready.track_number) == (
+        "ready",
+        "album-1",
+        2,
+    )
+    assert ready.artist == "John Coltrane"
+
+    retried = rows["errorvid001"]
+    assert (retried.download_status, retried.download_error) == ("downloading", "")
+    assert (retried.folder_id, retried.track_number) == ("album-1", 3)
+
+
+@pytest.mark.anyio
+async def test_audio_playlist_without_skip_requeues_existing_rows(db):
+    session_factory, _ = db
+
+    results = await AudioDownloadManager().register_playlist_entries(
+        ENTRIES[1:2], "album-1", skip_existing=False
+    )
+
+    assert results == [("readyvid001", False)]
+    ready = (await _rows(session_factory, Audio))["readyvid001"]
+    assert (ready.download_status, ready.folder_id) == ("ready", "album-1")
+
+
+@pytest.mark.anyio
+async def test_duplicate_entries_register_a_single_row(db):
+    session_factory, _ = db
+    entries = [ENTRIES[0], _entry("other000001", "Other"), ENTRIES[0]]
+
+    results = await AudioDownloadManager().register_playlist_entries(entries, "album-1")
+
+    assert results == [
+        ("newvideo001", False),
+        ("other000001", False),
+        ("newvideo001", True),
+    ]
+    assert (await _rows(session_factory, Audio))["newvideo001"].track_number == 1
+
+
+@pytest.mark.anyio
+async def test_video_playlist_registers_in_bulk_and_keeps_existing_folder(db):
+    session_factory, statements = db
+    async with session_factory() as session:
+        video = await session.get(Video, "readyvid001")
+        video.folder_id = "other"
+    statements.clear()
+
+    results = await VideoDownloadManager().register_playlist_entries(
+        ENTRIES, "album-1", resolution="720p", skip_existing=True
+    )
+
+    assert results == [
+        ("newvideo001", False),
+        ("readyvid001", True),
+        ("errorvid001", False),
+    ]
+    assert statements.count("SELECT") == 1
+    assert statements.count("INSERT") == 1
+
+    rows = await _rows(session_factory, Video)
+    assert (rows["newvideo001"].resolution, rows["newvideo001"].folder_id) == (
+        "720p",
+        "album-1",
+    )
+    # Já baixado e já numa pasta: não é movido
+    assert rows["readyvid001"].folder_id == "other"
+    assert rows["errorvid001"].download_status == "downloading"
+    assert rows["errorvid001"].folder_id == "album-1"
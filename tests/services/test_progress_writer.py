@@ -0,0 +1,139 @@
+"""Tests for the batched download progress writer."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Audio, Base, Video
+from app.services.progress_writer import AUDIO, VIDEO, ProgressWriter
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as session:
+        for i in range(3):
+            session.add(
+                Audio(id=f"a{i}", title="t", name="n", download_status="downloading")
+            )
+        session.add(Audio(id="done", title="t", name="n", download_status="ready"))
+        session.add(Video(id="v0", title="t", name="n", download_status="downloading"))
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(
+            (sql.split()[0], many)
+        ),
+    )
+    yield session_factory, statements
+    await engine.dispose()
+
+
+async def _progress(session_factory, model):
+    async with session_factory() as session:
+        rows = await session.execute(select(model.id, model.download_progress))
+        return dict(rows.all())
+
+
+@pytest.mark.anyio
+async def test_flush_coalesces_and_writes_with_one_executemany_per_table(db):
+    session_factory, statements = db
+    writer = ProgressWriter(flush_interval=60, session_factory=session_factory)
+    for value in range(1, 41):
+        writer._pending[AUDIO]["a0"] = value
+    writer._pending[AUDIO]["a1"] = 10
+    writer._pending[VIDEO]["v0"] = 55
+
+    assert await writer.flush() == 3
+
+    # Um UPDATE por tabela (executemany com 2 linhas para audios), sem SELECT
+    assert statements == [("UPDATE", True), ("UPDATE", False)]
+    assert (await _progress(session_factory, Audio))["a0"] == 40
+    assert (await _progress(session_factory, Video))["v0"] == 55
+    assert writer.pending == 0
+
+
+@pytest.mark.anyio
+async def test_late_progress_does_not_overwrite_finished_download(db):
+    session_factory, _ = db
+    writer = ProgressWriter(flush_interval=60, session_factory=session_factory)
+    writer._pending[AUDIO]["done"] = 95
+
+    assert await writer.flush() == 0
+    assert (await _progress(session_factory, Audio))["done"] == 0
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_newer_values():
+    @asynccontextmanager
+    async def broken():
+        writer.submit(AUDIO, "a0", 80)  # chega durante a tentativa
+        raise RuntimeError("database is locked")
+        yield
+
+    writer = ProgressWriter(flush_interval=60, session_factory=broken)
+    writer.submit(AUDIO, "a0", 50)
+    writer.submit(AUDIO, "a1", 20)
+
+    with pytest.raises(RuntimeError):
+        await writer.flush()
+
+    assert writer._pending[AUDIO] == {"a0": 80, "a1": 20}
+    await writer.stop()
+
+
+@pytest.mark.anyio
+async def test_stop_flushes_pending_values(db):
+    session_factory, _ = db
+    writer = ProgressWriter(flush_interval=60, session_factory=session_factory)
+    writer.submit(AUDIO, "a2", 33)
+    await writer.stop()
+    assert (await _progress(session_factory, Audio))["a2"] == 33
+    assert writer.flushes == 1
+
+
+@pytest.mark.anyio
+async def test_discard_drops_value_returned_by_a_failed_flush():
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    @asynccontextmanager
+    async def slow_broken():
+        entered.set()
+        await release.wait()
+        raise RuntimeError("database is locked")
+        yield
+
+    writer = ProgressWriter(flush_interval=60, session_factory=slow_broken)
+    writer.submit(AUDIO, "a0", 50)
+    writer.submit(AUDIO, "a1", 20)
+    flush = asyncio.create_task(writer.flush())
+    await entered.wait()
+
+    # O download termina durante o flush: o valor não pode voltar à fila
+    discard = asyncio.create_task(writer.discard(AUDIO, "a0"))
+    await asyncio.sleep(0)
+    assert not discard.done()
+    release.set()
+    with pytest.raises(RuntimeError):
+        await flush
+    await discard
+
+    assert writer._pending[AUDIO] == {"a1": 20}
+    writer._pending[AUDIO].clear()
+    await writer.stop()
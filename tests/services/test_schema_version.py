@@ -0,0 +1,88 @@
+"""Tests for the versioned schema migrations run by init_db."""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import database
+from app.db.database import SCHEMA_VERSION, _init_schema
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(sql),
+    )
+    yield engine, statements
+    await engine.dispose()
+
+
+async def _versions(engine):
+    async with engine.begin() as conn:
+        result = await conn.exec_driver_sql(
+            "SELECT version FROM schema_version ORDER BY version"
+        )
+        return [row[0] for row in result]
+
+
+@pytest.mark.anyio
+async def test_fresh_database_records_every_step_and_warm_start_is_one_select(
+    engine,
+):
+    engine, statements = engine
+    async with engine.begin() as conn:
+        applied = await _init_schema(conn)
+    assert applied == list(range(1, SCHEMA_VERSION + 1))
+    assert await _versions(engine) == applied
+
+    statements.clear()
+    async with engine.begin() as conn:
+        assert await _init_schema(conn) == []
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+
+
+@pytest.mark.anyio
+async def test_only_pending_steps_run(engine, monkeypatch):
+    engine, _ = engine
+    async with engine.begin() as conn:
+        await _init_schema(conn)
+
+    ran = []
+
+    async def _migrate_new_step(conn):
+        ran.append(conn)
+        await conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_bench ON audios(name)"
+        )
+
+    monkeypatch.setattr(
+        database, "_MIGRATIONS", [*database._MIGRATIONS, _migrate_new_step]
+    )
+    monkeypatch.setattr(database, "SCHEMA_VERSION", SCHEMA_VERSION + 1)
+    async with engine.begin() as conn:
+        assert await _init_schema(conn) == [SCHEMA_VERSION + 1]
+    assert len(ran) == 1
+    assert await _versions(engine) == list(range(1, SCHEMA_VERSION + 2))
+
+
+@pytest.mark.anyio
+async def test_legacy_database_without_schema_version_is_migrated(engine):
+    engine, _ = engine
+    # Banco de uma versão antiga: tabela sem as colunas novas, sem schema_version
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "CREATE TABLE folders (id VARCHAR(100) PRIMARY KEY, name VARCHAR(255) "
+            "NOT NULL, parent_id VARCHAR(100), description TEXT, color VARCHAR(20), "
+            "icon VARCHAR(50), created_date DATETIME NOT NULL, "
+            "modified_date DATETIME NOT NULL)"
+        )
+
+    async with engine.begin() as conn:
+        assert await _init_schema(conn) == list(range(1, SCHEMA_VERSION + 1))
+        result = await conn.exec_driver_sql("PRAGMA table_info(folders)")
+        columns = {row[1] for row in result}
+    assert {"kind", "artist", "artist_dirty"} <= columns
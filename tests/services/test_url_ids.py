@@ -0,0 +1,146 @@
+"""Tests for offline external-id parsing of YouTube and Instagram URLs."""
+
+import pytest
+
+from app.services.downloaders import url_ids
+from app.services.downloaders.instagram import InstagramDownloader
+from app.services.downloaders.url_ids import (
+    instagram_shortcode,
+    youtube_playlist_id,
+    youtube_video_id,
+)
+from app.services.downloaders.youtube import YouTubeDownloader
+
+VID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        (f"https://www.youtube.com/watch?v={VID}", VID),
+        (f"https://youtube.com/watch?v={VID}", VID),
+        (f"http://m.youtube.com/watch?v={VID}", VID),
+        (f"https://music.youtube.com/watch?v={VID}&si=abc", VID),
+        (f"https://www.youtube.com/watch?feature=share&v={VID}", VID),
+        (f"https://www.youtube.com/watch?v={VID}&list=PL123&index=2", VID),
+        (f"https://www.youtube.com/watch?v={VID}&t=42s", VID),
+        (f"https://www.youtube.com/watch?v={VID}#t=1m2s", VID),
+        (f"https://WWW.YouTube.com/watch?v={VID}", VID),
+        (f"www.youtube.com/watch?v={VID}", VID),
+        (f"  https://www.youtube.com/watch?v={VID}  ", VID),
+        (f"https://youtu.be/{VID}", VID),
+        (f"https://youtu.be/{VID}?t=10", VID),
+        (f"https://youtu.be/{VID}?si=xyz&list=PL123", VID),
+        (f"https://www.youtube.com/embed/{VID}", VID),
+        (f"https://www.youtube.com/embed/{VID}?start=30", VID),
+        (f"https://www.youtube-nocookie.com/embed/{VID}", VID),
+        (f"https://www.youtube.com/v/{VID}?version=3", VID),
+        (f"https://www.youtube.com/e/{VID}", VID),
+        (f"https://www.youtube.com/shorts/{VID}", VID),
+        (f"https://youtube.com/shorts/{VID}?feature=share", VID),
+        (f"https://www.youtube.com/live/{VID}", VID),
+        (f"https://www.youtube.com/watch/{VID}", VID),
+        (
+            "https://www.youtube.com/attribution_link?a=x&u=%2Fwatch%3Fv%3D"
+            f"{VID}%26feature%3Dshare",
+            VID,
+        ),
+        (f"https://www.youtube.com/user/someone#!v={VID}", VID),
+        # Sem vídeo: playlists, canais, handles, busca, ids inválidos
+        ("https://www.youtube.com/playlist?list=PL123", None),
+        ("https://www.youtube.com/@handle", None),
+        ("https://www.youtube.com/channel/UCabcdefghijklmnopqrstuv", None),
+        ("https://www.youtube.com/results?search_query=abc", None),
+        ("https://www.youtube.com/watch?v=short", None),
+        ("https://youtu.be/", None),
+        (f"https://example.com/watch?v={VID}", None),
+        (f"https://www.instagram.com/p/{VID}/", None),
+    ],
+)
+def test_youtube_video_id(url, expected):
+    assert youtube_video_id(url) == expected
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("https://www.youtube.com/playlist?list=PLabc_123-x", "PLabc_123-x"),
+        ("https://music.youtube.com/playlist?list=OLAK5uy_abc", "OLAK5uy_abc"),
+        (f"https://www.youtube.com/watch?v={VID}&list=PL123", "PL123"),
+        (f"https://www.youtube.com/watch?v={VID}", None),
+        ("https://www.youtube.com/playlist?list=", None),
+        ("https://example.com/playlist?list=PL123", None),
+    ],
+)
+def test_youtube_playlist_id(url, expected):
+    assert youtube_playlist_id(url) == expected
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("https://www.instagram.com/p/C1a2B3c4D5e/", "C1a2B3c4D5e"),
+        ("https://instagram.com/reel/C1a2B3c4D5e?igsh=abc", "C1a2B3c4D5e"),
+        ("https://www.instagram.com/reels/C1a2B3c4D5e/", "C1a2B3c4D5e"),
+        ("https://m.instagram.com/tv/C1a2B3c4D5e", "C1a2B3c4D5e"),
+        ("https://www.instagram.com/someone/reel/C1a2B3c4D5e/", "C1a2B3c4D5e"),
+        ("instagram.com/p/C1a2B3c4D5e", "C1a2B3c4D5e"),
+        ("https://www.instagram.com/someone/", None),
+        ("https://www.instagram.com/stories/someone/123456/", None),
+        ("https://www.instagram.com/p/", None),
+        ("https://example.com/p/C1a2B3c4D5e", None),
+    ],
+)
+def test_instagram_shortcode(url, expected):
+    assert instagram_shortcode(url) == expected
+
+
+def test_results_are_memoised():
+    url_ids.youtube_video_id.cache_clear()
+    url = f"https://youtu.be/{VID}"
+
+    youtube_video_id(url)
+    youtube_video_id(url)
+
+    assert url_ids.youtube_video_id.cache_info().hits == 1
+
+
+def test_known_shapes_never_reach_yt_dlp(monkeypatch):
+    def _boom(*args, **kwargs):
+        raise AssertionError("yt-dlp não deveria ser chamado")
+
+    monkeypatch.setattr("app.services.downloaders.youtube.ydl_pool.lease", _boom)
+    downloader = YouTubeDownloader()
+
+    assert downloader.extract_id(f"https://www.youtube.com/embed/{VID}") == VID
+    assert downloader.extract_id("https://www.youtube.com/playlist?list=PL1") == "PL1"
+    assert downloader.cache_id(f"https://m.youtube.com/watch?v={VID}") == VID
+    assert (
+        InstagramDownloader().extract_id("https://www.instagram.com/reel/C1a2B3c4D5e/")
+        == "C1a2B3c4D5e"
+    )
+
+
+def test_unknown_youtube_url_falls_back_to_yt_dlp(monkeypatch):
+    calls = []
+
+    class _Ydl:
+        def extract_info(self, url, download=False):
+            calls.append(url)
+            return {"id": "UCchannel"}
+
+    class _Lease:
+        def __enter__(self):
+            return _Ydl()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(
+        "app.services.downloaders.youtube.ydl_pool.lease", lambda *a, **k: _Lease()
+    )
+
+    assert YouTubeDownloader().extract_id("https://www.youtube.com/@handle") == (
+        "UCchannel"
+    )
+    assert calls == ["https://www.youtube.com/@handle"]
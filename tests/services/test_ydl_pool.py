@@ -0,0 +1,126 @@
+"""Tests for the pooled YoutubeDL instances."""
+
+import pytest
+
+from app.services import ydl_pool as ydl_pool_module
+from app.services.ydl_pool import YdlPool
+
+OPTS = {"quiet": True, "no_warnings": True, "skip_download": True}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def no_cookies(monkeypatch):
+    monkeypatch.setattr(ydl_pool_module, "get_yt_dlp_cookies_opts", lambda source: {})
+
+
+def test_same_profile_reuses_instance_and_job_keys_do_not_split_it():
+    pool = YdlPool(max_idle=2, max_age=60, max_uses=10, enabled=True)
+
+    with pool.lease("youtube", "metadata", OPTS) as first:
+        pass
+    job = {**OPTS, "outtmpl": "/tmp/x/%(title)s.%(ext)s", "progress_hooks": [print]}
+    with pool.lease("youtube", "metadata", job) as second:
+        pass
+    with pool.lease("instagram", "metadata", OPTS) as other_source:
+        pass
+    with pool.lease("youtube", "metadata", {**OPTS, "format": "best"}) as other_opts:
+        pass
+
+    assert second is first
+    assert other_source is not first and other_opts is not first
+    assert pool.stats() == {
+        "enabled": True,
+        "idle": 3,
+        "created": 3,
+        "reused": 1,
+        "retired": 0,
+    }
+    pool.clear()
+
+
+def test_outtmpl_and_hooks_are_swapped_per_job():
+    pool = YdlPool(max_idle=2, max_age=60, max_uses=10, enabled=True)
+    seen = []
+    job = {
+        **OPTS,
+        "outtmpl": "/tmp/job/%(title)s.%(ext)s",
+        "progress_hooks": [lambda d: seen.append(("progress", d["status"]))],
+        "postprocessor_hooks": [lambda d: seen.append(("pp", d["status"]))],
+    }
+
+    with pool.lease("youtube", "audio", job) as ydl:
+        assert ydl.params["outtmpl"]["default"] == "/tmp/job/%(title)s.%(ext)s"
+        for hook in ydl._progress_hooks:
+            hook({"status": "downloading"})
+        for hook in ydl._postprocessor_hooks:
+            hook({"status": "finished"})
+
+    assert ydl.params["outtmpl"]["default"] != "/tmp/job/%(title)s.%(ext)s"
+    for hook in ydl._progress_hooks:
+        hook({"status": "late"})
+    assert seen == [("progress", "downloading"), ("pp", "finished")]
+    pool.clear()
+
+
+def test_failed_jobs_and_old_instances_are_retired():
+    clock = _Clock()
+    pool = YdlPool(max_idle=2, max_age=60, max_uses=2, enabled=True, clock=clock)
+
+    with pytest.raises(RuntimeError):
+        with pool.lease("youtube", "metadata", OPTS) as broken:
+            raise RuntimeError("boom")
+    with pool.lease("youtube", "metadata", OPTS) as fresh:
+        pass
+    assert fresh is not broken
+
+    with pool.lease("youtube", "metadata", OPTS) as again:
+        pass
+    assert again is fresh
+    # segundo uso atingiu max_uses: a instância foi fechada na devolução
+    with pool.lease("youtube", "metadata", OPTS) as third:
+        pass
+    assert third is not fresh
+
+    clock.now = 61
+    with pool.lease("youtube", "metadata", OPTS) as fourth:
+        pass
+    assert fourth is not third
+    assert pool.stats()["retired"] == 3
+    pool.clear()
+
+
+def test_pool_applies_source_cookies(monkeypatch):
+    monkeypatch.setattr(
+        ydl_pool_module,
+        "get_yt_dlp_cookies_opts",
+        lambda source: {"cookiefile": f"/tmp/{source}-cookies.txt"},
+    )
+    pool = YdlPool(max_idle=2, max_age=60, max_uses=10, enabled=True)
+
+    with pool.lease("instagram", "metadata", OPTS) as ydl:
+        assert ydl.params["cookiefile"] == "/tmp/instagram-cookies.txt"
+    with pool.lease("instagram", "metadata", {**OPTS, "cookiefile": "/x"}) as same:
+        pass
+
+    assert same is ydl
+    pool.clear()
+
+
+def test_disabled_pool_builds_one_instance_per_lease():
+    pool = YdlPool(enabled=False)
+
+    with pool.lease("youtube", "metadata", OPTS) as first:
+        pass
+    with pool.lease("youtube", "metadata", OPTS) as second:
+        pass
+
+    assert first is not second
+    assert pool.stats()["idle"] == 0
@@ -20,6 +20,7 @@ $(document).ready(function() {
     let currentAudioId = null;
     let currentVideoId = null;
     let activeDownloads = new Map();
+    let downloadEvents = null;  // EventSource de /audio/download-events
     let currentTranscription = null;
     let currentTranscriptionId = null;
     let currentTranscriptionMedia = [];
@@ -257,6 +258,13 @@ $(document).ready(function() {
             updateAuthStatus(true);
             console.log('Authentication successful');
 
+            // O stream SSE autentica pela query string: reabre com o token novo
+            if (downloadEvents) {
+                downloadEvents.close();
+                downloadEvents = null;
+                if (activeDownloads.size > 0) connectDownloadEvents();
+            }
+
             // Refresh token before expiration
             setTimeout(authenticate, 25 * 60 * 1000);
 
@@ -697,8 +705,8 @@ $(document).ready(function() {
                 // Add to active downloads
                 addActiveDownload(response.audio_id, 'audio', response.title || 'Áudio');
 
-                // Start polling for status
-                pollDownloadStatus(response.audio_id, 'audio');
+                // Acompanhar progresso pelo stream SSE
+                trackDownload(response.audio_id, 'audio');
             } else {
                 showToast('Falha ao iniciar download', 'error');
             }
@@ -739,7 +747,7 @@ $(document).ready(function() {
                     return;
                 }
                 addActiveDownload(task.item_id, 'audio', task.title || 'Áudio');
-                pollDownloadStatus(task.item_id, 'audio');
+                trackDownload(task.item_id, 'audio');
             });
 
             const folderId = response.folder_id;
@@ -794,8 +802,8 @@ $(document).ready(function() {
                 // Add to active downloads
                 addActiveDownload(response.video_id, 'video', 'Vídeo');
 
-                // Start polling for status
-                pollDownloadStatus(response.video_id, 'video');
+                // Acompanhar progresso pelo stream SSE
+                trackDownload(response.video_id, 'video');
             } else {
                 showToast('Falha ao iniciar download', 'error');
             }
@@ -886,6 +894,7 @@ $(document).ready(function() {
                         <div class="yd-progress-bar__fill ${fillClass}"
                              style="width: ${download.progress}%"></div>
                     </div>
+                    ${buildTransferDetails(download)}
                 </div>
             `);
 
@@ -901,7 +910,92 @@ $(document).ready(function() {
         });
     }
 
-    async function pollDownloadStatus(id, type) {
+    function buildTransferDetails(download) {
+        if (download.status === 'error' || download.progress >= 95) return '';
+        const parts = [];
+        if (download.downloadedBytes) {
+            parts.push(download.totalBytes ?
+                `${formatFileSize(download.downloadedBytes)} / ${formatFileSize(download.totalBytes)}` :
+                formatFileSize(download.downloadedBytes));
+        }
+        if (download.speed) parts.push(`${formatFileSize(download.speed)}/s`);
+        if (download.eta !== null && download.eta !== undefined) {
+            parts.push(`restam ${download.eta > 0 ? formatDuration(download.eta) : '0:00'}`);
+        }
+        if (parts.length === 0) return '';
+        return `<small class="text-muted d-block mt-1">${parts.join(' · ')}</small>`;
+    }
+
+    /**
+     * Acompanha um download pelo stream SSE (sem polling). Uma consulta única
+     * ao status cobre downloads que terminaram antes do stream conectar.
+     */
+    function trackDownload(id, type) {
+        connectDownloadEvents();
+        fetchDownloadStatus(id, type);
+    }
+
+    function connectDownloadEvents() {
+        if (!authToken || downloadEvents) return;
+
+        downloadEvents = new EventSource(
+            `${API_BASE_URL}/audio/download-events?token=${encodeURIComponent(authToken)}`
+        );
+
+        downloadEvents.addEventListener('download_progress', (e) => {
+            const event = JSON.parse(e.data);
+            const download = activeDownloads.get(event.audio_id);
+            if (!download) return;
+            download.progress = event.progress || 0;
+            download.downloadedBytes = event.downloaded_bytes;
+            download.totalBytes = event.total_bytes;
+            download.speed = event.speed;
+            download.eta = event.eta;
+            updateProgressUI();
+        });
+
+        downloadEvents.addEventListener('download_completed', (e) => {
+            finishDownload(JSON.parse(e.data).audio_id, 'ready');
+        });
+
+        downloadEvents.addEventListener('download_error', (e) => {
+            finishDownload(JSON.parse(e.data).audio_id, 'error');
+        });
+
+        // Reconexão automática do EventSource: ressincroniza o que pode ter
+        // sido perdido enquanto o stream estava fora
+        downloadEvents.addEventListener('open', () => {
+            activeDownloads.forEach((download, id) => fetchDownloadStatus(id, download.type));
+        });
+    }
+
+    function disconnectDownloadEventsIfIdle() {
+        if (activeDownloads.size === 0 && downloadEvents) {
+            downloadEvents.close();
+            downloadEvents = null;
+        }
+    }
+
+    function finishDownload(id, status) {
+        const download = activeDownloads.get(id);
+        if (!download) return;
+
+        if (status === 'ready') {
+            showToast(`Download concluído: ${download.title}`, 'success');
+            // Reload appropriate list
+            if (download.type === 'video') loadVideoList();
+            else loadAudioList();
+        } else {
+            showToast(`Erro no download: ${download.title}`, 'error');
+        }
+
+        // Remover imediatamente
+        activeDownloads.delete(id);
+        updateProgressUI();
+        disconnectDownloadEventsIfIdle();
+    }
+
+    async function fetchDownloadStatus(id, type) {
         if (!authToken) return;
 
         const endpoint = type === 'video' ?
@@ -917,34 +1011,17 @@ $(document).ready(function() {
 
             const download = activeDownloads.get(id);
             if (download) {
-                download.progress = response.download_progress || 0;
+                if (response.download_status === 'ready' || response.download_status === 'error') {
+                    finishDownload(id, response.download_status);
+                    return;
+                }
+                download.progress = Math.max(download.progress, response.download_progress || 0);
                 download.status = response.download_status;
                 updateProgressUI();
-
-                if (response.download_status === 'ready') {
-                    showToast(`Download concluído: ${download.title}`, 'success');
-                    // Remover imediatamente
-                    activeDownloads.delete(id);
-                    updateProgressUI();
-
-                    // Reload appropriate list
-                    if (type === 'video') loadVideoList();
-                    else loadAudioList();
-
-                } else if (response.download_status === 'error') {
-                    showToast(`Erro no download: ${download.title}`, 'error');
-                    // Remover imediatamente
-                    activeDownloads.delete(id);
-                    updateProgressUI();
-
-                } else {
-                    // Continue polling
-                    setTimeout(() => pollDownloadStatus(id, type), 2000);
-                }
             }
 
         } catch (error) {
-            console.error('Error polling status:', error);
+            console.error('Error fetching download status:', error);
         }
     }
 
@@ -1911,11 +1988,23 @@ $(document).ready(function() {
             showToast('Atualizando artistas…', 'info');
         }
         try {
-            const result = await $.ajax({
+            // O servidor devolve um job; aguarda o fim consultando o status
+            let result = await $.ajax({
                 url: `${API_BASE_URL}/albums/${folderId}/refresh-artists`,
                 method: 'POST',
                 headers: getAuthHeaders()
             });
+            while (result && result.status === 'running') {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                result = await $.ajax({
+                    url: `${API_BASE_URL}/albums/refresh-artists/${result.job_id}`,
+                    method: 'GET',
+                    headers: getAuthHeaders()
+                });
+            }
+            if (result && result.status === 'failed') {
+                throw new Error(result.error || 'refresh-artists failed');
+            }
             refreshedArtistsFor.add(folderId);
             if (!silent) {
                 const n = (result && result.updated) || 0;